@@ -14,7 +14,9 @@ import sys
 import json
 import logging
 import argparse
-import concurrent.futures
+import queue
+import threading
+import time
 from typing import List, Dict, Any, Set
 from pathlib import Path
 from datetime import datetime
@@ -25,6 +27,11 @@ except ImportError:
     print("❌ Error: supabase-py not installed. Run: pip install supabase")
     exit(1)
 
+# url_dedup lives at the repository root; keep `cd AI_SCRAPER_RAW_TEXTS && python batch_upload.py` working
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from url_dedup import UrlDeduplicator, UrlHashSet
+
 def setup_logging():
     """Configure advanced logging for batch operations"""
     log_dir = Path('data/logs')
@@ -43,27 +50,46 @@ def setup_logging():
     )
     return logging.getLogger(__name__)
 
-def get_existing_urls(supabase: Client) -> Set[str]:
-    """Fetch all existing source URLs from database"""
+def get_existing_urls(supabase: Client) -> UrlHashSet:
+    """Fetch all existing source URLs from database
+    
+    Keys are paged with keyset pagination (so the PostgREST row limit cannot
+    truncate the result) and kept as 64-bit hashes to bound memory.
+    """
     logger = logging.getLogger(__name__)
     try:
-        response = supabase.table('raw_scraped_pages').select('source_url').execute()
-        urls = {row['source_url'] for row in response.data}
-        logger.info(f"📊 Found {len(urls)} existing URLs in database")
-        return urls
+        deduplicator = UrlDeduplicator(supabase, 'raw_scraped_pages', 'source_url', logger=logger)
+        deduplicator.load()
+        logger.info(f"📊 Found {len(deduplicator.seen)} existing URLs in database")
+        return deduplicator.seen
     except Exception as e:
         logger.error(f"❌ Error fetching existing URLs: {e}")
-        return set()
+        return UrlHashSet()
 
-def upload_single_file(args_tuple) -> Dict[str, Any]:
-    """Upload a single JSON file (for parallel processing)"""
-    json_file, supabase_config, existing_urls = args_tuple
-    
+# Bulk upserts are bounded by serialized payload size and row count
+DEFAULT_BATCH_BYTES = 2 * 1024 * 1024
+DEFAULT_BATCH_ROWS = 500
+
+# Transient upsert failures are retried with exponential backoff
+MAX_RETRIES = 3
+RETRY_DELAY = 1.0
+
+# SQLSTATE classes and HTTP-stack exception names that describe the server's
+# state rather than the rows (mirrors legacy/scraper/supabase_uploader.py)
+TRANSIENT_SQLSTATE_CLASSES = ('08', '40', '53', '57')
+TRANSIENT_EXCEPTION_NAMES = ('ConnectionError', 'TimeoutError', 'TransportError', 'NetworkError')
+
+_END_OF_FILES = object()
+
+def prepare_single_file(json_file: Path, existing_urls) -> Dict[str, Any]:
+    """Parse a single JSON file into a row for upsert (runs in worker threads)"""
     result = {
         'file': str(json_file),
-        'status': 'success',
+        'status': 'ready',
         'error': None,
-        'skipped': False
+        'skipped': False,
+        'row': None,
+        'bytes': 0
     }
     
     try:
@@ -86,7 +112,7 @@ def upload_single_file(args_tuple) -> Dict[str, Any]:
         
         # Prepare data
         attachment_paths = raw_data.get('attachment_paths', [])
-        prepared_data = {
+        result['row'] = {
             'source_url': source_url,
             'source_site': raw_data.get('source_site'),
             'scrape_date': raw_data.get('scrape_date'),
@@ -96,60 +122,155 @@ def upload_single_file(args_tuple) -> Dict[str, Any]:
             'attachment_count': len(attachment_paths) if attachment_paths else 0,
             'status': 'raw'
         }
+        result['bytes'] = len(json.dumps(result['row'], ensure_ascii=False, default=str).encode('utf-8'))
         
-        # Upload to Supabase
-        supabase = create_client(supabase_config['url'], supabase_config['key'])
-        response = supabase.table('raw_scraped_pages').upsert(
-            prepared_data,
-            on_conflict='source_url'
-        ).execute()
-        
-        if response.data:
-            result['status'] = 'success'
-        else:
-            result['status'] = 'error'
-            result['error'] = 'No data returned from upsert'
-            
     except Exception as e:
         result['status'] = 'error'
         result['error'] = str(e)
     
     return result
 
-def parallel_upload(supabase: Client, json_files: List[Path], max_workers: int = 4, check_existing: bool = True) -> Dict[str, int]:
-    """Upload files in parallel for faster processing"""
+def is_transient_error(error: Exception) -> bool:
+    """Whether an upsert error is worth retrying unchanged
+    
+    Throttling, timeouts, 5xx responses and dropped connections are
+    transient; 4xx responses and constraint violations are about the data.
+    """
+    if any(cls.__name__ in TRANSIENT_EXCEPTION_NAMES or 'Timeout' in cls.__name__
+           for cls in type(error).__mro__):
+        return True
+    code = str(getattr(error, 'code', '') or '')
+    if code.isdigit() and len(code) == 3:
+        return code == '429' or code.startswith('5')
+    if len(code) == 5:
+        return code[:2] in TRANSIENT_SQLSTATE_CLASSES
+    message = str(error).lower()
+    return any(marker in message for marker in (
+        'too many requests', 'rate limit', 'bad gateway', 'service unavailable',
+        'connection reset', 'connection refused', 'server disconnected', 'temporarily unavailable'
+    ))
+
+def upsert_rows(supabase: Client, rows: List[Dict[str, Any]], attempt: int = 0) -> List[tuple]:
+    """Upsert rows in one request, retrying transient errors and bisecting on data errors
+    
+    Returns ``(source_url, error)`` pairs for rows that could not be written,
+    so one bad row does not fail the rest of its batch.
+    """
+    try:
+        supabase.table('raw_scraped_pages').upsert(rows, on_conflict='source_url').execute()
+        return []
+    except Exception as e:
+        if is_transient_error(e):
+            if attempt < MAX_RETRIES:
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+                return upsert_rows(supabase, rows, attempt + 1)
+            # Splitting would not help; the whole batch failed for the same reason
+            return [(row['source_url'], str(e)) for row in rows]
+        if len(rows) == 1:
+            return [(rows[0]['source_url'], str(e))]
+        middle = len(rows) // 2
+        return upsert_rows(supabase, rows[:middle]) + upsert_rows(supabase, rows[middle:])
+
+def parallel_upload(supabase: Client, json_files: List[Path], max_workers: int = 4,
+                    check_existing: bool = True, batch_bytes: int = DEFAULT_BATCH_BYTES,
+                    batch_rows: int = DEFAULT_BATCH_ROWS) -> Dict[str, Any]:
+    """Upload files with parallel parsing and bulk upserts
+    
+    Worker threads parse JSON files and hand rows to the calling thread
+    through a bounded queue. The calling thread upserts them with the single
+    shared ``supabase`` client in batches bounded by ``batch_bytes`` and
+    ``batch_rows``.
+    """
     logger = logging.getLogger(__name__)
     
-    # Get existing URLs if requested
-    existing_urls = get_existing_urls(supabase) if check_existing else set()
+    # Get existing URLs if requested; otherwise upsert on_conflict handles duplicates
+    existing_urls = get_existing_urls(supabase) if check_existing else UrlHashSet()
     
-    # Prepare arguments for parallel processing
-    supabase_config = {
-        'url': os.environ["SUPABASE_URL"],
-        'key': os.environ["SUPABASE_SERVICE_ROLE_KEY"]
-    }
+    stats = {'uploaded': 0, 'errors': 0, 'skipped': 0, 'batches': 0, 'bytes': 0}
+    
+    files_queue: queue.Queue = queue.Queue()
+    for json_file in json_files:
+        files_queue.put(json_file)
+    for _ in range(max_workers):
+        files_queue.put(_END_OF_FILES)
+    
+    # Bounded so parsing cannot run arbitrarily far ahead of uploading
+    results_queue: queue.Queue = queue.Queue(maxsize=max(batch_rows, max_workers * 4))
+    
+    def producer():
+        while True:
+            json_file = files_queue.get()
+            if json_file is _END_OF_FILES:
+                results_queue.put(_END_OF_FILES)
+                return
+            results_queue.put(prepare_single_file(json_file, existing_urls))
     
-    args_list = [(f, supabase_config, existing_urls) for f in json_files]
+    batch: List[Dict[str, Any]] = []
+    batch_size_bytes = 0
+    seen_in_run = UrlHashSet()
     
-    stats = {'uploaded': 0, 'errors': 0, 'skipped': 0}
+    def flush():
+        nonlocal batch, batch_size_bytes
+        failures = upsert_rows(supabase, batch)
+        stats['batches'] += 1
+        stats['uploaded'] += len(batch) - len(failures)
+        stats['errors'] += len(failures)
+        stats['bytes'] += batch_size_bytes
+        logger.info(f"✅ Batch {stats['batches']}: {len(batch) - len(failures)}/{len(batch)} rows "
+                    f"({batch_size_bytes / 1024:.0f} KB)")
+        for source_url, error in failures:
+            logger.error(f"❌ {source_url}: {error}")
+        batch, batch_size_bytes = [], 0
     
-    logger.info(f"🚀 Starting parallel upload with {max_workers} workers")
+    logger.info(f"🚀 Starting parallel upload with {max_workers} parser threads")
+    start_time = time.time()
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_file = {executor.submit(upload_single_file, args): args[0] for args in args_list}
+    workers = [threading.Thread(target=producer, daemon=True) for _ in range(max_workers)]
+    for worker in workers:
+        worker.start()
+    
+    finished = 0
+    while finished < max_workers:
+        result = results_queue.get()
+        if result is _END_OF_FILES:
+            finished += 1
+            continue
+        
+        name = Path(result['file']).name
+        if result['skipped']:
+            stats['skipped'] += 1
+            logger.debug(f"⏭️ {name}: {result['error']}")
+            continue
+        if result['status'] == 'error':
+            stats['errors'] += 1
+            logger.error(f"❌ {name}: {result['error']}")
+            continue
+        
+        row = result['row']
+        # A URL may appear only once per upsert statement
+        if row['source_url'] in seen_in_run:
+            stats['skipped'] += 1
+            logger.debug(f"⏭️ {name}: Duplicate source_url in this run")
+            continue
+        seen_in_run.add(row['source_url'])
         
-        for future in concurrent.futures.as_completed(future_to_file):
-            result = future.result()
-            
-            if result['status'] == 'success':
-                stats['uploaded'] += 1
-                logger.info(f"✅ {Path(result['file']).name}")
-            elif result['skipped']:
-                stats['skipped'] += 1
-                logger.debug(f"⏭️ {Path(result['file']).name}: {result['error']}")
-            else:
-                stats['errors'] += 1
-                logger.error(f"❌ {Path(result['file']).name}: {result['error']}")
+        if batch and (batch_size_bytes + result['bytes'] > batch_bytes or len(batch) >= batch_rows):
+            flush()
+        batch.append(row)
+        batch_size_bytes += result['bytes']
+    
+    if batch:
+        flush()
+    
+    for worker in workers:
+        worker.join()
+    
+    elapsed = max(time.time() - start_time, 1e-9)
+    stats['seconds'] = round(elapsed, 2)
+    stats['rows_per_sec'] = round(stats['uploaded'] / elapsed, 1)
+    stats['mb_per_sec'] = round(stats['bytes'] / (1024 * 1024) / elapsed, 2)
+    logger.info(f"📈 {stats['rows_per_sec']} rows/s, {stats['mb_per_sec']} MB/s "
+                f"in {stats['batches']} batches")
     
     return stats
 
@@ -176,6 +297,10 @@ def main():
     parser.add_argument('--max-workers', type=int, default=4, help='Maximum number of worker threads')
     parser.add_argument('--check-existing', action='store_true', help='Skip files that already exist in database')
     parser.add_argument('--data-dir', default='data/raw_pages', help='Directory containing JSON files')
+    parser.add_argument('--batch-mb', type=float, default=DEFAULT_BATCH_BYTES / (1024 * 1024),
+                        help='Maximum payload per bulk upsert in MB (parallel mode)')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS,
+                        help='Maximum rows per bulk upsert (parallel mode)')
     
     args = parser.parse_args()
     
@@ -205,7 +330,9 @@ def main():
         
         # Choose upload method
         if args.parallel:
-            stats = parallel_upload(supabase, json_files, args.max_workers, args.check_existing)
+            stats = parallel_upload(supabase, json_files, args.max_workers, args.check_existing,
+                                    batch_bytes=int(args.batch_mb * 1024 * 1024),
+                                    batch_rows=args.batch_rows)
         else:
             # Use the original upload method from upload_raw_to_supabase.py
             from upload_raw_to_supabase import upload_json_files
@@ -220,6 +347,8 @@ def main():
    📊 Total files: {len(json_files)}
    🔧 Method: {'Parallel' if args.parallel else 'Sequential'}
         """)
+        if 'rows_per_sec' in stats:
+            logger.info(f"⚡ Throughput: {stats['rows_per_sec']} rows/s, {stats['mb_per_sec']} MB/s")
         
         return 0 if stats['errors'] == 0 else 1
         
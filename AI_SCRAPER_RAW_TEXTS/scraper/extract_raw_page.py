@@ -16,7 +16,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-from document_processing import PythonDocumentExtractor
+from document_processing import DEFAULT_EXTRACTION_WORKERS, PythonDocumentExtractor
 
 logger = logging.getLogger(__name__)
 
@@ -24,12 +24,15 @@ logger = logging.getLogger(__name__)
 class RawPageExtractor:
     """Extracts raw content and attachments from detail pages."""
 
-    def __init__(self, driver: webdriver.Chrome, output_dir: str = "data"):
+    def __init__(self, driver: webdriver.Chrome, output_dir: str = "data", crawl_index=None,
+                 extraction_workers: int = DEFAULT_EXTRACTION_WORKERS):
         self.driver = driver
         self.output_dir = output_dir
+        self.crawl_index = crawl_index
         self.raw_pages_dir = os.path.join(output_dir, "raw_pages")
         self.attachments_dir = os.path.join(output_dir, "attachments")
         self.doc_extractor = PythonDocumentExtractor()
+        self.extraction_workers = extraction_workers
         self._ensure_directories()
 
     def _ensure_directories(self):
@@ -61,14 +64,16 @@ class RawPageExtractor:
 
             # Download attachments
             attachment_paths = self._download_attachments(url, cleaned_html)
-            attachment_texts = []
-            for path in attachment_paths:
-                try:
-                    result = self.doc_extractor.extract_document(path)
-                    attachment_texts.append(result.text_content)
-                except Exception as e:
-                    logger.warning(f"Failed to extract {path}: {e}")
-                    attachment_texts.append("")
+            extracted_texts = {}
+            try:
+                # Attachments extract in parallel; results arrive as each one finishes
+                for result in self.doc_extractor.extract_many(attachment_paths, workers=self.extraction_workers):
+                    if not result.success:
+                        logger.warning(f"Failed to extract {result.file_path}: {result.error}")
+                    extracted_texts[result.file_path] = result.text_content
+            except Exception as e:
+                logger.warning(f"Attachment extraction failed for {url}: {e}")
+            attachment_texts = [extracted_texts.get(path, "") for path in attachment_paths]
 
             # Create unique identifier for this page
             page_id = self._generate_page_id(url)
@@ -90,6 +95,11 @@ class RawPageExtractor:
             output_file = self._save_raw_data(page_id, result)
             logger.info(f"Saved page data to: {output_file}")
 
+            if self.crawl_index is not None:
+                changed = self.crawl_index.record(url, content=visible_text, output_path=output_file)
+                if not changed:
+                    logger.info(f"Content unchanged since last crawl: {url}")
+
             return result
 
         except Exception as e:
@@ -1,15 +1,22 @@
 """Utility functions for the scraper system."""
 
 import os
+import sys
 import logging
 import json
 from datetime import datetime
-from typing import Dict, Any, List
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
+# crawl_index lives at the repository root, two levels above this package
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from crawl_index import CrawlIndex
+
 
 def setup_logging(log_dir: str = "data/logs", log_level: str = "INFO") -> None:
     """Setup logging configuration."""
@@ -103,36 +110,73 @@ def save_summary_log(results: Dict[str, Any], output_dir: str = "data") -> str:
     return summary_file
 
 
-def load_existing_pages(output_dir: str = "data") -> Dict[str, Dict[str, Any]]:
-    """Load existing scraped pages to avoid re-scraping."""
-    raw_pages_dir = os.path.join(output_dir, "raw_pages")
-    existing_pages = {}
+def open_crawl_index(output_dir: str = "data", max_age_hours: Optional[float] = None) -> CrawlIndex:
+    """Open the persistent crawl index stored alongside the scraped output."""
+    return CrawlIndex(os.path.join(output_dir, "crawl_index.sqlite"), max_age_hours=max_age_hours)
+
+
+def load_existing_pages(output_dir: str = "data", index: Optional[CrawlIndex] = None) -> Dict[str, Dict[str, Any]]:
+    """Load the crawl index entries of already scraped pages to avoid re-scraping.
+    
+    Entries come from the SQLite crawl index rather than the raw page files.
+    On the first run against an existing ``raw_pages/`` directory the index is
+    seeded once from those files.
+    """
+    index = index or open_crawl_index(output_dir)
     
+    if len(index) == 0:
+        _seed_crawl_index(index, os.path.join(output_dir, "raw_pages"))
+    
+    return {url: entry.to_dict() for url, entry in index.entries().items()}
+
+
+def _seed_crawl_index(index: CrawlIndex, raw_pages_dir: str) -> None:
+    """Populate an empty crawl index from previously saved raw page files."""
     if not os.path.exists(raw_pages_dir):
-        return existing_pages
+        return
     
+    seeded = 0
     for filename in os.listdir(raw_pages_dir):
         if filename.endswith('.json'):
             file_path = os.path.join(raw_pages_dir, filename)
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    if 'source_url' in data:
-                        existing_pages[data['source_url']] = data
+                if 'source_url' in data and 'error' not in data:
+                    index.record(
+                        data['source_url'],
+                        content=data.get('raw_text', ''),
+                        output_path=file_path,
+                        fetched_at=os.path.getmtime(file_path)
+                    )
+                    seeded += 1
             except Exception as e:
                 logging.warning(f"Could not load existing page {filename}: {e}")
     
-    return existing_pages
+    if seeded:
+        logging.info(f"Seeded crawl index with {seeded} existing pages from {raw_pages_dir}")
 
 
-def filter_new_urls(urls: List[str], existing_pages: Dict[str, Dict[str, Any]]) -> List[str]:
-    """Filter out URLs that have already been scraped."""
+def filter_new_urls(urls: List[str], existing_pages: Dict[str, Dict[str, Any]],
+                    max_age_hours: Optional[float] = None) -> List[str]:
+    """Filter out URLs that have already been scraped.
+    
+    With ``max_age_hours`` set, pages fetched longer ago than that are kept
+    so that stale pages are re-crawled.
+    """
+    now = datetime.now().timestamp()
     new_urls = []
+    stale = 0
     for url in urls:
-        if url not in existing_pages:
+        page = existing_pages.get(url)
+        if page is None:
             new_urls.append(url)
+        elif max_age_hours is not None and page.get('fetched_at') is not None:
+            if (now - page['fetched_at']) / 3600 >= max_age_hours:
+                new_urls.append(url)
+                stale += 1
     
-    logging.info(f"Filtered {len(urls)} URLs -> {len(new_urls)} new URLs to scrape")
+    logging.info(f"Filtered {len(urls)} URLs -> {len(new_urls)} URLs to scrape ({stale} stale)")
     return new_urls
 
 
@@ -20,12 +20,14 @@ from scraper.extract_raw_page import RawPageExtractor, extract_single_page
 from scraper.utils import (
     setup_logging, create_driver, save_summary_log, 
     load_existing_pages, filter_new_urls, create_job_stats, 
-    update_job_stats, finalize_job_stats, ensure_output_structure
+    update_job_stats, finalize_job_stats, ensure_output_structure,
+    open_crawl_index
 )
 
 
 def scrape_site_batch(site_name: str, start_page: int, end_page: int, output_dir: str = "data", 
-                     max_pages: int = None, max_urls: int = None) -> None:
+                     max_pages: int = None, max_urls: int = None,
+                     recrawl_after_hours: float = None) -> None:
     """Scrape all pages from a site using pagination."""
     logger = logging.getLogger(__name__)
     
@@ -51,6 +53,7 @@ def scrape_site_batch(site_name: str, start_page: int, end_page: int, output_dir
     })
     
     driver = None
+    crawl_index = open_crawl_index(output_dir, recrawl_after_hours)
     try:
         # Create driver
         driver = create_driver()
@@ -68,16 +71,16 @@ def scrape_site_batch(site_name: str, start_page: int, end_page: int, output_dir
             logger.warning("No URLs collected! Check site configuration and selectors.")
             return
         
-        # Load existing pages to avoid re-scraping
-        existing_pages = load_existing_pages(output_dir)
-        new_urls = filter_new_urls(all_urls, existing_pages)
+        # Consult the crawl index to skip fresh pages and re-crawl stale ones
+        existing_pages = load_existing_pages(output_dir, crawl_index)
+        new_urls = filter_new_urls(all_urls, existing_pages, recrawl_after_hours)
         
         if not new_urls:
             logger.info("All URLs have already been scraped.")
             return
         
         # Create extractor
-        extractor = RawPageExtractor(driver, output_dir)
+        extractor = RawPageExtractor(driver, output_dir, crawl_index=crawl_index)
         
         # Process each URL
         logger.info(f"Starting extraction of {len(new_urls)} new pages...")
@@ -103,6 +106,7 @@ def scrape_site_batch(site_name: str, start_page: int, end_page: int, output_dir
     finally:
         if driver:
             driver.quit()
+        crawl_index.close()
         
         # Save summary
         final_stats = finalize_job_stats(stats)
@@ -185,6 +189,8 @@ Examples:
                        help='Scrape all pages until no more results (equivalent to --end-page -1)')
     parser.add_argument('--output-dir', default='data',
                        help='Output directory for scraped data (default: data)')
+    parser.add_argument('--recrawl-after-hours', type=float, default=None,
+                       help='Re-crawl already scraped pages older than this many hours (default: never)')
     parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
                        default='INFO', help='Logging level (default: INFO)')
     parser.add_argument('--headless', action='store_true', default=True,
@@ -227,7 +233,7 @@ Examples:
             
             # Batch scraping with pagination
             scrape_site_batch(args.site, args.start_page, end_page, args.output_dir, 
-                            args.max_pages, args.max_urls)
+                            args.max_pages, args.max_urls, args.recrawl_after_hours)
         elif args.url:
             # Single URL scraping
             scrape_single_url(args.url, "manual", args.output_dir)
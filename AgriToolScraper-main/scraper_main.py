@@ -20,6 +20,7 @@ import json
 import time
 import argparse
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Optional
 from urllib.parse import urljoin, urlparse
 
@@ -39,6 +40,11 @@ from config_manager import SecureConfigManager
 from scraper.discovery import extract_subsidy_details
 from scraper.runner import ScrapingRunner
 from supabase_client import SupabaseUploader
+
+# crawl_index lives at the repository root; keep `cd AgriToolScraper-main && python scraper_main.py` working
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from crawl_index import CrawlIndex, DEFAULT_INDEX_PATH
 from debug_diagnostics import get_ruthless_debugger, ruthless_trap, log_step, log_error, log_warning
 
 
@@ -76,7 +82,9 @@ class AgriToolScraper:
     """Main scraper class with STRICT DOMAIN ISOLATION, Supabase integration and ruthless debugging."""
     
     @ruthless_trap
-    def __init__(self, target_url: str, dry_run: bool = False):
+    def __init__(self, target_url: str, dry_run: bool = False,
+                 crawl_index_path: Optional[str] = None,
+                 recrawl_after_hours: Optional[float] = None):
         self.target_url = target_url
         self.dry_run = dry_run
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -108,6 +116,12 @@ class AgriToolScraper:
                 log_error(f"Failed to initialize Supabase client: {e}")
                 raise
         
+        # Incremental crawling: skip pages already uploaded and still fresh
+        self.crawl_index = None
+        if crawl_index_path:
+            self.crawl_index = CrawlIndex(crawl_index_path, max_age_hours=recrawl_after_hours)
+            log_step("Crawl index enabled", path=crawl_index_path, recrawl_after_hours=recrawl_after_hours)
+        
         # Initialize results tracking with isolation info
         self.results = {
             'session_id': self.session_id,
@@ -118,6 +132,7 @@ class AgriToolScraper:
             'config_validated': False,
             'urls_collected': 0,
             'urls_filtered': 0,
+            'urls_skipped_unchanged': 0,
             'pages_processed': 0,
             'subsidies_extracted': 0,
             'subsidies_uploaded': 0,
@@ -426,16 +441,17 @@ class AgriToolScraper:
             return {'inserted': 0, 'errors': ['No data to upload']}
         
         print(f"[INFO] Uploading {len(subsidies)} subsidies to Supabase...")
+        indexed_subsidies = [s for s in subsidies if s.get('source_url')]
         
         try:
-            # Check for existing subsidies to avoid duplicates
-            codes = [s.get('code', '') for s in subsidies if s.get('code')]
-            existing_codes = self.supabase.check_existing_subsidies(codes)
+            # Check for existing subsidies (by source URL) to avoid duplicates
+            source_urls = [s['source_url'] for s in subsidies if s.get('source_url')]
+            existing_urls = set(self.supabase.check_existing_subsidies(source_urls))
             
-            if existing_codes:
-                print(f"[INFO] Found {len(existing_codes)} existing subsidies, will skip duplicates")
-                subsidies = [s for s in subsidies if s.get('code', '') not in existing_codes]
-                self.results['warnings'].append(f"Skipped {len(existing_codes)} duplicate subsidies")
+            if existing_urls:
+                print(f"[INFO] Found {len(existing_urls)} existing subsidies, will skip duplicates")
+                subsidies = [s for s in subsidies if s.get('source_url') not in existing_urls]
+                self.results['warnings'].append(f"Skipped {len(existing_urls)} duplicate subsidies")
             
             # Upload remaining subsidies
             upload_results = self.supabase.insert_subsidies(subsidies)
@@ -443,6 +459,10 @@ class AgriToolScraper:
             self.results['subsidies_uploaded'] = upload_results['inserted']
             if upload_results['errors']:
                 self.results['errors'].extend(upload_results['errors'])
+            elif self.crawl_index is not None:
+                # Only index pages once they are safely stored
+                for subsidy in indexed_subsidies:
+                    self.crawl_index.record(subsidy['source_url'], content=subsidy)
             
             print(f"[INFO] Upload complete. Inserted: {upload_results['inserted']}")
             return upload_results
@@ -497,18 +517,28 @@ class AgriToolScraper:
                     raise RuntimeError("URL domain isolation validation failed")
                 self.results['isolation_verified'] = True
                 log_step(f"✅ Step 1 complete: {len(urls)} domain-isolated URLs collected")
-            
-                # Step 2: Extract content with domain validation
-                log_step("🔍 PIPELINE STEP 2: Extracting domain-isolated subsidy content")
-                subsidies = self.extract_subsidy_content(urls)
-                if not subsidies:
-                    raise RuntimeError("No subsidies extracted - pipeline cannot continue")
-                log_step(f"✅ Step 2 complete: {len(subsidies)} subsidies extracted")
-            
-                # Step 3: Upload to Supabase
-                log_step("☁️ PIPELINE STEP 3: Uploading to Supabase")
-                upload_results = self.upload_to_supabase(subsidies)
-                log_step(f"✅ Step 3 complete: {upload_results.get('inserted', 0)} subsidies uploaded")
+                
+                if self.crawl_index is not None:
+                    collected = len(urls)
+                    urls = self.crawl_index.filter_urls(urls, revalidate=True)
+                    self.results['urls_skipped_unchanged'] = collected - len(urls)
+                    log_step(f"♻️ Crawl index: {self.results['urls_skipped_unchanged']} fresh or unchanged URLs skipped")
+                
+                if urls:
+                    # Step 2: Extract content with domain validation
+                    log_step("🔍 PIPELINE STEP 2: Extracting domain-isolated subsidy content")
+                    subsidies = self.extract_subsidy_content(urls)
+                    if not subsidies:
+                        raise RuntimeError("No subsidies extracted - pipeline cannot continue")
+                    log_step(f"✅ Step 2 complete: {len(subsidies)} subsidies extracted")
+                
+                    # Step 3: Upload to Supabase
+                    log_step("☁️ PIPELINE STEP 3: Uploading to Supabase")
+                    upload_results = self.upload_to_supabase(subsidies)
+                    log_step(f"✅ Step 3 complete: {upload_results.get('inserted', 0)} subsidies uploaded")
+                else:
+                    log_step("⏭️ Steps 2-3 skipped: all collected URLs are fresh in the crawl index")
+                    upload_results = {'inserted': 0, 'errors': []}
                 
                 # Step 4: Validate output purity
                 log_step("🔍 PIPELINE STEP 4: Validating output purity")
@@ -579,6 +609,7 @@ class AgriToolScraper:
         print()
         print("STATISTICS:")
         print(f"  URLs collected: {self.results['urls_collected']}")
+        print(f"  URLs skipped (unchanged): {self.results['urls_skipped_unchanged']}")
         print(f"  Pages processed: {self.results['pages_processed']}")
         print(f"  Subsidies extracted: {self.results['subsidies_extracted']}")
         print(f"  Subsidies uploaded: {self.results['subsidies_uploaded']}")
@@ -630,6 +661,12 @@ def main():
                        help='Run scraper but do not upload to Supabase')
     parser.add_argument('--retry-failed', action='store_true',
                        help='Retry previously failed URLs')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Skip pages already uploaded according to the local crawl index')
+    parser.add_argument('--crawl-index', default=DEFAULT_INDEX_PATH,
+                       help='Crawl index database path (used with --incremental)')
+    parser.add_argument('--recrawl-after-hours', type=float, default=None,
+                       help='Re-crawl indexed pages older than this many hours')
     
     args = parser.parse_args()
     
@@ -640,7 +677,12 @@ def main():
     
     # Initialize and run scraper
     try:
-        scraper = AgriToolScraper(target_url, dry_run)
+        scraper = AgriToolScraper(
+            target_url,
+            dry_run,
+            crawl_index_path=args.crawl_index if args.incremental else None,
+            recrawl_after_hours=args.recrawl_after_hours
+        )
         results = scraper.run_full_pipeline(max_pages)
         
         # Exit with appropriate code
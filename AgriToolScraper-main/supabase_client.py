@@ -9,12 +9,22 @@ import os
 import json
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 from supabase import create_client, Client
 from supabase.lib.client_options import ClientOptions
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import requests
 
+# Keeps in.(...) filters well under URL length limits
+SOURCE_URL_LOOKUP_CHUNK = 50
+SCAN_PAGE_SIZE = 1000
+
+
+def _is_missing_column_error(error: Exception) -> bool:
+    """PostgREST schema errors (PGRST*) or an undefined column (42703)."""
+    code = str(getattr(error, 'code', '') or '')
+    return code == '42703' or code.startswith('PGRST')
+
 
 def get_supabase_client():
     """Legacy helper function for backward compatibility."""
@@ -41,6 +51,10 @@ class SupabaseUploader:
         self.client: Client = create_client(self.url, self.key, options=options)
         self.session_id = str(uuid.uuid4())
         self.run_start = datetime.utcnow().isoformat()
+        # source_url -> exists in raw_logs, for this run
+        self._source_url_cache: Dict[str, bool] = {}
+        # Payload source URLs from the fallback scan, taken at most once per run
+        self._scanned_source_urls: Optional[Set[str]] = None
         
     def test_connection(self) -> bool:
         """Test the Supabase connection and permissions."""
@@ -320,6 +334,11 @@ class SupabaseUploader:
         # Insert into raw_logs instead of subsidies
         results = self.insert_raw_logs(raw_log_entries)
         
+        if not results['errors']:
+            for subsidy in subsidies:
+                if subsidy.get('source_url'):
+                    self._source_url_cache[subsidy['source_url']] = True
+        
         # Update messaging for clarity
         if results['inserted'] > 0:
             print(f"[INFO] Successfully inserted {results['inserted']} raw log entries.")
@@ -327,45 +346,113 @@ class SupabaseUploader:
         
         return results
     
+    def check_existing_source_urls(self, source_urls: List[str]) -> Set[str]:
+        """
+        Return the subset of source_urls already present in raw_logs.
+        Uses the indexed raw_logs.source_url column with chunked in_() filters
+        and caches answers for the rest of the run. Only a missing column
+        falls back to scanning payloads; other errors propagate.
+        """
+        urls = [u for u in dict.fromkeys(source_urls) if u]
+        unknown = [u for u in urls if u not in self._source_url_cache]
+        
+        if unknown and self._scanned_source_urls is None:
+            try:
+                for start in range(0, len(unknown), SOURCE_URL_LOOKUP_CHUNK):
+                    chunk = unknown[start:start + SOURCE_URL_LOOKUP_CHUNK]
+                    result = self.client.table('raw_logs').select('source_url').in_('source_url', chunk).execute()
+                    found = {row['source_url'] for row in result.data or []}
+                    for url in chunk:
+                        self._source_url_cache[url] = url in found
+            except Exception as e:
+                if not _is_missing_column_error(e):
+                    raise
+                # Column missing (migration not applied): index the table once instead
+                print(f"[WARN] raw_logs.source_url is unavailable ({e}); scanning raw_logs payloads once")
+                self._scanned_source_urls = self._scan_raw_log_source_urls()
+        
+        if self._scanned_source_urls is not None:
+            for url in unknown:
+                if url not in self._source_url_cache:
+                    self._source_url_cache[url] = url in self._scanned_source_urls
+        
+        return {u for u in urls if self._source_url_cache.get(u)}
+    
+    def _scan_raw_log_source_urls(self) -> Set[str]:
+        """Fallback: page through raw_logs once and collect payload source URLs."""
+        known: Set[str] = set()
+        last_id = None
+        while True:
+            query = self.client.table('raw_logs').select('id,payload').order('id').limit(SCAN_PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            rows = query.execute().data or []
+            if not rows:
+                break
+            for row in rows:
+                try:
+                    source_url = json.loads(row['payload']).get('scraping_metadata', {}).get('source_url')
+                except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                    continue
+                if source_url:
+                    known.add(source_url)
+            last_id = rows[-1]['id']
+        return known
+    
     def check_existing_subsidies(self, codes: List[str]) -> List[str]:
         """
         UPDATED: Check raw_logs for existing data instead of subsidies table.
-        This prevents duplicate processing of the same source URLs.
+        Identifiers are matched exactly against the indexed source_url column,
+        so callers should pass source URLs.
         """
         try:
-            existing_urls = []
-            
-            # Check for existing source URLs in raw_logs
-            for code in codes:
-                # Search payloads for source_url matches
-                result = self.client.table('raw_logs').select('id,payload').execute()
-                for row in result.data:
-                    try:
-                        payload_data = json.loads(row['payload'])
-                        source_url = payload_data.get('scraping_metadata', {}).get('source_url', '')
-                        if code in source_url:  # Simple URL-based deduplication
-                            existing_urls.append(code)
-                            break
-                    except (json.JSONDecodeError, KeyError):
-                        continue
-            
-            return existing_urls
+            existing = self.check_existing_source_urls(codes)
+            return [code for code in codes if code in existing]
         except Exception as e:
             print(f"[WARN] Could not check existing raw logs: {e}")
             return []
     
+    def _count_rows(self, table: str, processed: Optional[bool] = None) -> int:
+        """Count rows with a HEAD request; the server returns only Content-Range."""
+        query = self.client.table(table).select('id', count='exact', head=True)
+        if processed is not None:
+            query = query.eq('processed', processed)
+        return query.execute().count or 0
+
+    def _scan_counts(self, table: str, columns: str = 'id') -> Dict[str, int]:
+        """Fallback: page through a table by id, counting rows and processed flags."""
+        counts = {'total': 0, 'processed': 0}
+        last_id = None
+        while True:
+            query = self.client.table(table).select(columns).order('id').limit(SCAN_PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            rows = query.execute().data or []
+            if not rows:
+                return counts
+            counts['total'] += len(rows)
+            counts['processed'] += sum(1 for r in rows if r.get('processed', False))
+            last_id = rows[-1]['id']
+
     def get_scraper_stats(self, days: int = 30) -> Dict:
         """Get scraper statistics for the last N days."""
         try:
-            # Query scraper_logs and raw_logs for statistics
-            logs_result = self.client.table('scraper_logs').select('*').execute()
-            raw_logs_result = self.client.table('raw_logs').select('id,processed,created_at').execute()
+            try:
+                total_sessions = self._count_rows('scraper_logs')
+                total_raw_logs = self._count_rows('raw_logs')
+                processed_logs = self._count_rows('raw_logs', processed=True)
+            except Exception:
+                # Counting not available (e.g. proxy strips Content-Range): stream ids instead
+                total_sessions = self._scan_counts('scraper_logs')['total']
+                raw_counts = self._scan_counts('raw_logs', 'id,processed')
+                total_raw_logs = raw_counts['total']
+                processed_logs = raw_counts['processed']
             
             stats = {
-                'total_sessions': len(logs_result.data),
-                'total_raw_logs': len(raw_logs_result.data),
-                'processed_logs': len([r for r in raw_logs_result.data if r.get('processed', False)]),
-                'pending_logs': len([r for r in raw_logs_result.data if not r.get('processed', False)])
+                'total_sessions': total_sessions,
+                'total_raw_logs': total_raw_logs,
+                'processed_logs': processed_logs,
+                'pending_logs': total_raw_logs - processed_logs
             }
             
             return stats
@@ -0,0 +1,152 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import supabase_client
+from supabase_client import SupabaseUploader
+
+
+class FakeAPIError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.row_limit = None
+        self.head = False
+
+    def select(self, columns, count=None, head=False):
+        if count and self.db.no_count:
+            raise Exception("count not supported")
+        self.head = head
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, n):
+        self.row_limit = n
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def in_(self, column, values):
+        if self.db.missing_column:
+            raise FakeAPIError("42703", "column raw_logs.source_url does not exist")
+        if self.db.lookup_error:
+            raise self.db.lookup_error
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def execute(self):
+        self.db.requests.append(self.table)
+        rows = sorted(self.db.rows, key=lambda row: row["id"])
+        rows = [row for row in rows if all(f(row) for f in self.filters)]
+        if self.head:
+            return type("Response", (), {"data": [], "count": len(rows)})()
+        if self.row_limit:
+            rows = rows[:self.row_limit]
+        return type("Response", (), {"data": rows, "count": None})()
+
+
+class FakeClient:
+    def __init__(self, urls, missing_column=False, no_count=False, lookup_error=None):
+        self.missing_column = missing_column
+        self.lookup_error = lookup_error
+        self.no_count = no_count
+        self.requests = []
+        self.rows = [
+            {
+                "id": f"{i:04d}",
+                "source_url": url,
+                "payload": json.dumps({"scraping_metadata": {"source_url": url}}),
+                "processed": i % 3 == 0,
+            }
+            for i, url in enumerate(urls)
+        ]
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def make_uploader(monkeypatch, client):
+    monkeypatch.setenv("NEXT_PUBLIC_SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "a.b.c")
+    monkeypatch.setattr(supabase_client, "create_client", lambda *args, **kwargs: client)
+    return SupabaseUploader()
+
+
+def test_existing_urls_use_chunked_indexed_lookup(monkeypatch):
+    stored = [f"https://example.fr/aide/{i}" for i in range(0, 120, 2)]
+    client = FakeClient(stored)
+    uploader = make_uploader(monkeypatch, client)
+
+    candidates = [f"https://example.fr/aide/{i}" for i in range(120)]
+    existing = uploader.check_existing_subsidies(candidates)
+
+    assert existing == stored
+    # 120 URLs in chunks of 50 -> three indexed queries
+    assert len(client.requests) == 3
+
+    # Answers are cached for the rest of the run
+    assert uploader.check_existing_subsidies(candidates[:10]) == stored[:5]
+    assert len(client.requests) == 3
+
+
+def test_falls_back_to_single_scan_without_column(monkeypatch):
+    client = FakeClient(["https://example.fr/a", "https://example.fr/b"], missing_column=True)
+    uploader = make_uploader(monkeypatch, client)
+
+    existing = uploader.check_existing_subsidies(["https://example.fr/b", "https://example.fr/c"])
+
+    assert existing == ["https://example.fr/b"]
+    scan_requests = len(client.requests)
+
+    # The scanned set is reused for the rest of the run
+    assert uploader.check_existing_subsidies(["https://example.fr/a", "https://example.fr/d"]) == ["https://example.fr/a"]
+    assert len(client.requests) == scan_requests
+
+
+def test_transient_lookup_errors_do_not_scan(monkeypatch):
+    client = FakeClient(["https://example.fr/a"], lookup_error=FakeAPIError("57014", "statement timeout"))
+    uploader = make_uploader(monkeypatch, client)
+
+    assert uploader.check_existing_subsidies(["https://example.fr/a"]) == []
+    assert client.requests == []
+
+    # Nothing was cached, so the next call tries the indexed lookup again
+    client.lookup_error = None
+    assert uploader.check_existing_subsidies(["https://example.fr/a"]) == ["https://example.fr/a"]
+    assert len(client.requests) == 1
+
+
+def test_scraper_stats_use_head_counts(monkeypatch):
+    client = FakeClient([f"https://example.fr/{i}" for i in range(10)])
+    uploader = make_uploader(monkeypatch, client)
+
+    stats = uploader.get_scraper_stats()
+
+    assert stats == {"total_sessions": 10, "total_raw_logs": 10, "processed_logs": 4, "pending_logs": 6}
+    assert len(client.requests) == 3
+
+
+def test_scraper_stats_fall_back_to_paged_scan(monkeypatch):
+    client = FakeClient([f"https://example.fr/{i}" for i in range(10)], no_count=True)
+    uploader = make_uploader(monkeypatch, client)
+
+    stats = uploader.get_scraper_stats()
+
+    assert stats == {"total_sessions": 10, "total_raw_logs": 10, "processed_logs": 4, "pending_logs": 6}
@@ -2,23 +2,39 @@
 
 The pipeline reads a batch file containing subsidy records, loads a
 language specific prompt template and sends each entry to the OpenAI API
-to obtain structured information. Responses are merged back into the
-original records and optionally written to an output file.
+to obtain structured information. Entries are enriched concurrently and
+each result is appended to a JSONL journal as soon as it completes, so an
+interrupted run resumes by skipping entries that already have output.
+Responses are merged back into the original records and optionally
+written to an output file.
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
-import openai
+
+from llm_cache import get_response_cache
+from openai_rate_limiter import Priority, chat_completion
 
 PROMPT_DIR = Path(__file__).parent / "ai" / "prompts"
 
+# Parallel OpenAI calls; the shared rate limiter still caps RPM/TPM
+DEFAULT_CONCURRENCY = 4
+
+# Values counted as blank when computing field failure rates
+BLANK_VALUES = (None, "", "N/A", "TBD", "Unknown")
+
+# Bump when a prompt template changes meaning so cached responses are not reused
+PROMPT_VERSION = "1"
+
 # Map language code to prompt file name
 PROMPT_FILES: Dict[str, str] = {
     "fr": "fr_en_funding.txt",
@@ -36,52 +52,134 @@ def load_prompt(language: str) -> str:
     return (PROMPT_DIR / file_name).read_text(encoding="utf-8")
 
 
-def compute_qa_metrics(results: List[Dict[str, str]]) -> Dict[str, object]:
-    """Compute simple QA statistics from extraction results.
+class QAAccumulator:
+    """Incrementally maintained form of :func:`compute_qa_metrics`.
 
-    The function inspects the ``structured_output`` field of each entry and
-    calculates metrics such as missing outputs and field-level blank values.
-    The metrics are lightweight and intended mainly for regression testing and
-    developer insight rather than exhaustive auditing.
+    Entries are folded in one at a time as they complete, so metrics for a
+    long or resumed run are available without re-reading every result.
     """
 
-    total = len(results)
-    missing_output = 0
-    field_counts: Dict[str, int] = {}
-    field_blanks: Dict[str, int] = {}
-    lengths: List[int] = []
+    def __init__(self) -> None:
+        self.total = 0
+        self.missing_output = 0
+        self.field_counts: Dict[str, int] = {}
+        self.field_blanks: Dict[str, int] = {}
+        self.length_sum = 0
+        self.length_count = 0
 
-    for entry in results:
+    def add(self, entry: Dict[str, str]) -> None:
+        """Fold one extraction result into the running totals."""
+
+        self.total += 1
         output = entry.get("structured_output")
         if not output:
-            missing_output += 1
-            continue
+            self.missing_output += 1
+            return
 
-        lengths.append(len(output))
+        self.length_sum += len(output)
+        self.length_count += 1
         try:
             data = json.loads(output)
         except json.JSONDecodeError:
             # If the model returned non-JSON text we can't do field analysis
-            continue
+            return
+        if not isinstance(data, dict):
+            return
 
         for field, value in data.items():
-            field_counts[field] = field_counts.get(field, 0) + 1
-            if value in (None, "", "N/A", "TBD", "Unknown"):
-                field_blanks[field] = field_blanks.get(field, 0) + 1
+            self.field_counts[field] = self.field_counts.get(field, 0) + 1
+            if value in BLANK_VALUES:
+                self.field_blanks[field] = self.field_blanks.get(field, 0) + 1
 
-    avg_length = sum(lengths) / len(lengths) if lengths else 0
-    field_failure_rate = {
-        field: field_blanks.get(field, 0) / count
-        for field, count in field_counts.items()
-    }
+    def metrics(self) -> Dict[str, object]:
+        """Return the metrics for all entries added so far."""
 
-    return {
-        "total_records": total,
-        "missing_structured_output": missing_output,
-        "missing_rate": missing_output / total if total else 0,
-        "avg_response_length": avg_length,
-        "field_failure_rate": field_failure_rate,
-    }
+        return {
+            "total_records": self.total,
+            "missing_structured_output": self.missing_output,
+            "missing_rate": self.missing_output / self.total if self.total else 0,
+            "avg_response_length": self.length_sum / self.length_count if self.length_count else 0,
+            "field_failure_rate": {
+                field: self.field_blanks.get(field, 0) / count
+                for field, count in self.field_counts.items()
+            },
+        }
+
+
+def compute_qa_metrics(results: List[Dict[str, str]]) -> Dict[str, object]:
+    """Compute simple QA statistics from extraction results.
+
+    The function inspects the ``structured_output`` field of each entry and
+    calculates metrics such as missing outputs and field-level blank values.
+    The metrics are lightweight and intended mainly for regression testing and
+    developer insight rather than exhaustive auditing.
+    """
+
+    accumulator = QAAccumulator()
+    for entry in results:
+        accumulator.add(entry)
+    return accumulator.metrics()
+
+
+def cache_run_stats(before: Dict[str, object], after: Dict[str, object]) -> Dict[str, object]:
+    """Response cache hits and misses between two :meth:`ResponseCache.stats` snapshots."""
+
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    lookups = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": hits / lookups if lookups else 0.0}
+
+
+def entry_key(entry: Dict[str, str]) -> str:
+    """Stable identity of a batch entry, ignoring any enrichment output."""
+
+    source = {k: v for k, v in entry.items() if k != "structured_output"}
+    encoded = json.dumps(source, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def load_journal(journal_path: str) -> Dict[str, Dict[str, str]]:
+    """Return enriched entries from a JSONL journal keyed by :func:`entry_key`.
+
+    Later lines win, and a line truncated by a crash is ignored. Lines are
+    read as bytes because a crash can cut a multi-byte character in half.
+    """
+
+    done: Dict[str, Dict[str, str]] = {}
+    if not os.path.exists(journal_path):
+        return done
+    with open(journal_path, "rb") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:  # JSONDecodeError or UnicodeDecodeError
+                continue
+            if isinstance(record, dict):
+                done[entry_key(record)] = record
+    return done
+
+
+def _enrich_entry(
+    entry: Dict[str, str], prompt: str, model: str, api_key: str, template_version: str
+) -> Dict[str, str]:
+    """Fill ``structured_output`` for one entry; failures leave it ``None``."""
+
+    try:
+        response = chat_completion(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+            priority=Priority.BATCH,
+            api_key=api_key,
+            template_version=template_version,
+        )
+        content = response["choices"][0]["message"]["content"].strip()
+        entry["structured_output"] = content
+        print(f"[AI] Extracted data for: {entry.get('title', '')[:50]}...")
+    except Exception as exc:  # pragma: no cover - best effort
+        print(f"[AI] Error processing {entry.get('title', '')}: {exc}")
+        entry["structured_output"] = None
+    return entry
 
 
 def run_ai_pipeline(
@@ -91,6 +189,9 @@ def run_ai_pipeline(
     dry_run: bool = False,
     output_path: str = "output/ai_processed.json",
     qa_report: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    resume: bool = True,
+    journal_path: Optional[str] = None,
 ) -> List[Dict[str, str]]:
     """Process a batch of subsidies with the OpenAI API.
 
@@ -99,7 +200,7 @@ def run_ai_pipeline(
     batch_path:
         Path to JSON file containing a list of subsidy entries.
     model:
-        Model identifier to use for the ChatCompletion call.
+        Model identifier to use for the chat completion calls.
     language:
         Language code used to select the prompt template.
     dry_run:
@@ -109,37 +210,75 @@ def run_ai_pipeline(
     qa_report:
         When ``True`` a ``qa_report.json`` file with basic quality metrics is
         generated alongside the AI output.
+    concurrency:
+        Number of entries enriched in parallel.
+    resume:
+        When ``True`` entries already enriched in the journal are reused
+        instead of being sent to the API again.
+    journal_path:
+        JSONL file receiving each enriched entry as it completes. Defaults to
+        ``output_path`` with a ``.jsonl`` suffix.
     """
 
     load_dotenv()
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY not set")
-    openai.api_key = api_key
 
     prompt_template = load_prompt(language)
+    template_version = f"{PROMPT_FILES[language.lower()]}:{PROMPT_VERSION}"
+    cache = get_response_cache()
+    cache_before = cache.stats() if cache is not None else None
 
     with open(batch_path, "r", encoding="utf-8") as fh:
         batch: List[Dict[str, str]] = json.load(fh)
 
-    results: List[Dict[str, str]] = []
-    for entry in batch:
-        prompt = prompt_template.format(**entry)
-        try:
-            response = openai.ChatCompletion.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2,
-            )
-            content = response["choices"][0]["message"]["content"].strip()
-            entry["structured_output"] = content
-            print(f"[AI] Extracted data for: {entry.get('title', '')[:50]}...")
-        except Exception as exc:  # pragma: no cover - best effort
-            print(f"[AI] Error processing {entry.get('title', '')}: {exc}")
-            entry["structured_output"] = None
-        results.append(entry)
+    journal = journal_path or str(Path(output_path).with_suffix(".jsonl"))
+    done = load_journal(journal) if resume and not dry_run else {}
+
+    results: List[Optional[Dict[str, str]]] = [None] * len(batch)
+    qa = QAAccumulator()
+    pending = []
+    for index, entry in enumerate(batch):
+        previous = done.get(entry_key(entry))
+        if previous is not None and previous.get("structured_output"):
+            results[index] = previous
+            qa.add(previous)
+        else:
+            pending.append((index, entry, prompt_template.format(**entry)))
+    if len(pending) < len(batch):
+        print(f"[AI] Resuming: {len(batch) - len(pending)} entries already enriched in {journal}")
 
     output_dir = Path(output_path).parent
+    journal_fh = None
+    if not dry_run and pending:
+        os.makedirs(Path(journal).parent, exist_ok=True)
+        if os.path.exists(journal) and os.path.getsize(journal):
+            # Terminate a line left half-written by an interrupted run; the
+            # check is done on bytes since the tail may be a partial character
+            with open(journal, "rb+") as fh:
+                fh.seek(-1, os.SEEK_END)
+                if fh.read(1) != b"\n":
+                    fh.write(b"\n")
+        journal_fh = open(journal, "a", encoding="utf-8")
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = {
+                pool.submit(_enrich_entry, entry, prompt, model, api_key, template_version): index
+                for index, entry, prompt in pending
+            }
+            # Only this thread writes the journal, one flushed line per entry
+            for future in as_completed(futures):
+                entry = future.result()
+                results[futures[future]] = entry
+                qa.add(entry)
+                if journal_fh is not None:
+                    journal_fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    journal_fh.flush()
+    finally:
+        if journal_fh is not None:
+            journal_fh.close()
+
     if not dry_run:
         os.makedirs(output_dir, exist_ok=True)
         with open(output_path, "w", encoding="utf-8") as fh:
@@ -149,7 +288,9 @@ def run_ai_pipeline(
         print("[AI] Dry-run mode active. No file written.")
 
     if qa_report:
-        report = compute_qa_metrics(results)
+        report = qa.metrics()
+        if cache is not None:
+            report["llm_cache"] = cache_run_stats(cache_before, cache.stats())
         os.makedirs(output_dir, exist_ok=True)
         report_path = output_dir / "qa_report.json"
         with open(report_path, "w", encoding="utf-8") as fh:
@@ -173,6 +314,13 @@ if __name__ == "__main__":  # pragma: no cover
         action="store_true",
         help="Generate qa_report.json with quality metrics",
     )
+    parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Parallel OpenAI requests"
+    )
+    parser.add_argument(
+        "--no-resume", action="store_true", help="Re-enrich entries already in the journal"
+    )
+    parser.add_argument("--journal-path", help="JSONL journal (defaults to output path with .jsonl)")
     args = parser.parse_args()
 
     run_ai_pipeline(
@@ -182,4 +330,7 @@ if __name__ == "__main__":  # pragma: no cover
         dry_run=args.dry_run,
         output_path=args.output_path,
         qa_report=args.qa_report,
+        concurrency=args.concurrency,
+        resume=not args.no_resume,
+        journal_path=args.journal_path,
     )
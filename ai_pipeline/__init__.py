@@ -1,7 +1,7 @@
 # Unified AI extraction pipeline utilities
 """Unified AI extraction pipeline utilities."""
 
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from ai_extractor import run_ai_pipeline, compute_qa_metrics
 
@@ -21,7 +21,10 @@ class AIExtractor:
         pass
 
     def process_raw_logs(
-        self, batch_size: int = 10, max_records: Optional[int] = None
+        self,
+        batch_size: int = 10,
+        max_records: Optional[int] = None,
+        record_ids: Optional[List[Any]] = None,
     ) -> Dict[str, int]:
         """Process raw log entries through the AI pipeline.
 
@@ -31,6 +34,10 @@ class AIExtractor:
             Number of records to process in a single batch.
         max_records:
             Optional upper bound on records to process.
+        record_ids:
+            Optional ids of the records to process, e.g. the rows a
+            pipeline run just uploaded.  ``None`` processes any
+            unprocessed records.
 
         Returns
         -------
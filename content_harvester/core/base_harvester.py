@@ -12,10 +12,13 @@ import asyncio
 import logging
 import time
 import uuid
+from collections import defaultdict
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass, field
 from datetime import datetime
+from urllib.parse import urlparse
 
 from .content_processor import ContentProcessor
 from .format_preserver import FormatPreserver
@@ -90,6 +93,8 @@ class HarvestResult:
     
     # Processing metadata
     processing_time: float = 0.0
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+    bytes_processed: Dict[str, int] = field(default_factory=dict)
     error_message: Optional[str] = None
     retry_count: int = 0
 
@@ -114,13 +119,13 @@ class UniversalHarvester:
         self.session_id = str(uuid.uuid4())
         
         # Initialize core components
-        self.content_processor = ContentProcessor(self.config)
+        self.performance_monitor = PerformanceMonitor()
+        self.content_processor = ContentProcessor(self.config, performance_monitor=self.performance_monitor)
         self.format_preserver = FormatPreserver(self.config)
         self.metadata_extractor = MetadataExtractor(self.config)
         self.validation_engine = ValidationEngine(self.config)
         self.url_discoverer = URLDiscoverer(self.config)
         self.language_detector = LanguageDetector()
-        self.performance_monitor = PerformanceMonitor()
         
         # Setup logging
         self.logger = logging.getLogger(__name__)
@@ -214,58 +219,73 @@ class UniversalHarvester:
                 # Step 1: Discover URLs if this is a sitemap or RSS source
                 urls_to_process = [source.url]
                 if source.source_type in ["sitemap", "rss"]:
-                    discovered_urls = await self.url_discoverer.discover_urls(
-                        source.url, source.source_type, source.filters
-                    )
+                    with self._time_stage(result, "discovery"):
+                        discovered_urls = await self.url_discoverer.discover_urls(
+                            source.url, source.source_type, source.filters
+                        )
                     urls_to_process.extend(discovered_urls)
                     self.logger.info(f"📋 Discovered {len(discovered_urls)} additional URLs")
                 
-                # Step 2: Process main content
-                content_data = await self.content_processor.process_content(
-                    source.url, source.custom_config
-                )
+                # Step 2: Process main content (fetch and parse are timed by the processor)
+                page_timings = {}
+                try:
+                    content_data = await self.content_processor.process_content(
+                        source.url, source.custom_config, timings=page_timings
+                    )
+                finally:
+                    for stage, elapsed in page_timings.items():
+                        self._record_stage(result, stage, elapsed)
+                page_bytes = (content_data.get('response_metadata') or {}).get('content_length', 0)
+                self._record_bytes(result, "page", page_bytes)
                 
                 # Step 3: Preserve formatting and structure
-                preserved_content = await self.format_preserver.preserve_format(
-                    content_data
-                )
+                with self._time_stage(result, "preserve_format"):
+                    preserved_content = await self.format_preserver.preserve_format(
+                        content_data
+                    )
                 
                 # Step 4: Extract comprehensive metadata
-                metadata = await self.metadata_extractor.extract_metadata(
-                    source.url, content_data
-                )
+                with self._time_stage(result, "metadata"):
+                    metadata = await self.metadata_extractor.extract_metadata(
+                        source.url, content_data
+                    )
                 
                 # Step 5: Detect and process language
                 if self.config.language_detection:
-                    language_info = self.language_detector.detect_language(
-                        content_data.get('text_content', '')
-                    )
+                    with self._time_stage(result, "language"):
+                        language_info = self.language_detector.detect_language(
+                            content_data.get('text_content', '')
+                        )
                     metadata['language'] = language_info
                 
                 # Step 6: Discover and process related documents
                 documents = []
                 if self.config.extract_documents:
-                    document_urls = self.content_processor.find_document_links(
-                        content_data
-                    )
-                    for doc_url in document_urls:
-                        doc_result = await self.content_processor.process_document(
-                            doc_url
+                    with self._time_stage(result, "documents"):
+                        document_urls = self.content_processor.find_document_links(
+                            content_data
                         )
-                        if doc_result:
-                            documents.append(doc_result)
+                        for doc_url in document_urls:
+                            doc_result = await self.content_processor.process_document(
+                                doc_url
+                            )
+                            if doc_result:
+                                documents.append(doc_result)
+                    self._record_bytes(result, "documents", sum(doc.get('file_size', 0) for doc in documents))
                 
                 # Step 7: Build relationship mapping
-                relationships = await self._build_relationships(
-                    source.url, content_data, documents
-                )
+                with self._time_stage(result, "relationships"):
+                    relationships = await self._build_relationships(
+                        source.url, content_data, documents
+                    )
                 
                 # Step 8: Validate content quality
                 quality_metrics = {}
                 if self.config.validate_content:
-                    quality_metrics = await self.validation_engine.validate_content(
-                        preserved_content, documents, metadata
-                    )
+                    with self._time_stage(result, "validation"):
+                        quality_metrics = await self.validation_engine.validate_content(
+                            preserved_content, documents, metadata
+                        )
                 
                 # Step 9: Compile final result
                 result.content = preserved_content
@@ -277,6 +297,7 @@ class UniversalHarvester:
                 result.format_preservation = quality_metrics.get('format_score', 0.0)
                 result.processing_time = time.time() - start_time
                 result.success = True
+                self.performance_monitor.record_success("harvest")
                 
                 self.logger.info(
                     f"✅ Harvested {source.url} - "
@@ -287,6 +308,7 @@ class UniversalHarvester:
             except Exception as e:
                 result.error_message = str(e)
                 result.processing_time = time.time() - start_time
+                self.performance_monitor.record_failure("harvest", type(e).__name__)
                 self.logger.error(f"❌ Failed to harvest {source.url}: {e}")
             
             # Add small delay to be respectful
@@ -294,6 +316,23 @@ class UniversalHarvester:
             
             return result
     
+    @contextmanager
+    def _time_stage(self, result: HarvestResult, stage: str):
+        """Time a pipeline stage into the result and the performance monitor."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record_stage(result, stage, time.perf_counter() - started)
+    
+    def _record_stage(self, result: HarvestResult, stage: str, elapsed: float):
+        result.stage_timings[stage] = result.stage_timings.get(stage, 0.0) + elapsed
+        self.performance_monitor.record_duration(f"harvest_{stage}", elapsed)
+    
+    def _record_bytes(self, result: HarvestResult, kind: str, count: int):
+        result.bytes_processed[kind] = result.bytes_processed.get(kind, 0) + count
+        self.performance_monitor.increment(f"harvest_{kind}_bytes", count)
+    
     async def _build_relationships(
         self, 
         source_url: str, 
@@ -375,7 +414,53 @@ class UniversalHarvester:
             "average_completeness": sum(r.completeness_score for r in successful_results) / max(len(successful_results), 1),
             "average_format_preservation": sum(r.format_preservation for r in successful_results) / max(len(successful_results), 1),
             "errors": [r.error_message for r in results if r.error_message],
+            "stage_timings": self._summarize_stage_timings(results),
+            "domains": self._summarize_domains(results),
             "performance_metrics": self.performance_monitor.get_summary()
         }
         
-        return summary
\ No newline at end of file
+        return summary
+    
+    @staticmethod
+    def _summarize_stage_timings(results: List[HarvestResult]) -> Dict[str, Dict[str, float]]:
+        """Total, average, max and share of time per pipeline stage."""
+        per_stage: Dict[str, List[float]] = defaultdict(list)
+        for result in results:
+            for stage, elapsed in result.stage_timings.items():
+                per_stage[stage].append(elapsed)
+        
+        grand_total = sum(sum(values) for values in per_stage.values())
+        return {
+            stage: {
+                "count": len(values),
+                "total": sum(values),
+                "average": sum(values) / len(values),
+                "max": max(values),
+                "share": sum(values) / grand_total if grand_total else 0.0
+            }
+            for stage, values in sorted(per_stage.items(), key=lambda item: -sum(item[1]))
+        }
+    
+    def _summarize_domains(self, results: List[HarvestResult]) -> Dict[str, Dict[str, Any]]:
+        """Where time and bytes go per domain, slowest domain first."""
+        by_domain: Dict[str, List[HarvestResult]] = defaultdict(list)
+        for result in results:
+            by_domain[urlparse(result.source_url).netloc or "unknown"].append(result)
+        
+        domains = {}
+        for domain, domain_results in by_domain.items():
+            stage_timings = self._summarize_stage_timings(domain_results)
+            bytes_processed: Dict[str, int] = defaultdict(int)
+            for result in domain_results:
+                for kind, count in result.bytes_processed.items():
+                    bytes_processed[kind] += count
+            domains[domain] = {
+                "sources": len(domain_results),
+                "successful_harvests": sum(1 for r in domain_results if r.success),
+                "total_processing_time": sum(r.processing_time for r in domain_results),
+                "bytes_processed": dict(bytes_processed),
+                "stage_timings": stage_timings,
+                "slowest_stage": next(iter(stage_timings), None)
+            }
+        
+        return dict(sorted(domains.items(), key=lambda item: -item[1]["total_processing_time"]))
\ No newline at end of file
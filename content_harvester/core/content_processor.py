@@ -12,6 +12,7 @@ import asyncio
 import aiohttp
 import logging
 import re
+import time
 from typing import Dict, List, Optional, Any
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup, Comment
@@ -29,11 +30,11 @@ class ContentProcessor:
     classification with robust error handling and quality preservation.
     """
     
-    def __init__(self, config):
+    def __init__(self, config, performance_monitor=None):
         """Initialize the content processor with configuration."""
         self.config = config
         self.logger = logging.getLogger(__name__)
-        self.encoding_handler = EncodingHandler()
+        self.encoding_handler = EncodingHandler(performance_monitor=performance_monitor)
         self.error_recovery = ErrorRecovery()
         
         # Content extraction patterns
@@ -51,7 +52,8 @@ class ContentProcessor:
     async def process_content(
         self, 
         url: str, 
-        custom_config: Optional[Dict[str, Any]] = None
+        custom_config: Optional[Dict[str, Any]] = None,
+        timings: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
         """
         Process content from a web page with comprehensive extraction.
@@ -59,20 +61,28 @@ class ContentProcessor:
         Args:
             url: URL of the page to process
             custom_config: Optional custom configuration for this specific URL
+            timings: Optional dict that receives the "fetch" and "parse" durations in seconds
             
         Returns:
             Dictionary containing extracted content and metadata
         """
+        if timings is None:
+            timings = {}
         try:
             self.logger.info(f"🔄 Processing content: {url}")
             
             # Fetch the page content
-            html_content, response_metadata = await self._fetch_page_content(url)
+            started = time.perf_counter()
+            try:
+                html_content, response_metadata = await self._fetch_page_content(url)
+            finally:
+                timings['fetch'] = time.perf_counter() - started
             
             if not html_content:
                 raise ValueError(f"Failed to fetch content from {url}")
             
             # Parse the HTML
+            started = time.perf_counter()
             soup = BeautifulSoup(html_content, 'html.parser')
             
             # Extract core content components
@@ -98,6 +108,7 @@ class ContentProcessor:
                 content_data = await self._apply_custom_processing(
                     content_data, custom_config
                 )
+            timings['parse'] = time.perf_counter() - started
             
             self.logger.info(f"✅ Content processed: {len(content_data['text_content'])} chars")
             return content_data
@@ -219,7 +230,7 @@ class ContentProcessor:
                 # Get content with proper encoding
                 content_bytes = await response.read()
                 content_str = self.encoding_handler.decode_content(
-                    content_bytes, response.headers.get('content-type', '')
+                    content_bytes, response.headers.get('content-type', ''), url=str(response.url)
                 )
                 
                 metadata = {
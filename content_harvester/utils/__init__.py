@@ -3,11 +3,12 @@
 from .language_detector import LanguageDetector
 from .encoding_handler import EncodingHandler
 from .error_recovery import ErrorRecovery
-from .performance_monitor import PerformanceMonitor
+from .performance_monitor import LogHistogram, PerformanceMonitor
 
 __all__ = [
     "LanguageDetector",
     "EncodingHandler", 
     "ErrorRecovery",
-    "PerformanceMonitor"
+    "PerformanceMonitor",
+    "LogHistogram"
 ]
\ No newline at end of file
@@ -8,9 +8,48 @@ content with special focus on European languages and agricultural
 documentation formats.
 """
 
-import chardet
+import codecs
 import logging
-from typing import Union, Optional
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Union, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    from charset_normalizer import from_bytes as _normalizer_from_bytes
+except ImportError:  # pragma: no cover - optional dependency
+    _normalizer_from_bytes = None
+
+try:
+    import chardet
+except ImportError:  # pragma: no cover - optional dependency
+    chardet = None
+
+
+# Byte order marks, longest first so UTF-32 LE is not mistaken for UTF-16 LE
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# The HTML prescan only looks at the first 1024 bytes for a charset declaration
+SNIFF_BYTES = 1024
+DETECTION_SAMPLE_BYTES = 10000
+HOST_CACHE_SIZE = 512
+# Detector candidates this close to the best "chaos" score count as a tie
+TIE_CHAOS = 0.01
+
+_META_CHARSET = re.compile(
+    rb'<meta[^>]+?charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE
+)
+_XML_ENCODING = re.compile(
+    rb'^<\?xml[^>]+encoding\s*=\s*["\']([A-Za-z0-9_.:-]+)', re.IGNORECASE
+)
 
 
 class EncodingHandler:
@@ -19,11 +58,24 @@ class EncodingHandler:
     
     Handles character encoding detection and conversion with fallbacks
     for European languages commonly found in agricultural documentation.
+    Cheap signals are tried first (BOM, declared charset, in-document
+    declaration, plain UTF-8); statistical detection only runs when they
+    all fail, and its answer is remembered per host.
     """
     
-    def __init__(self):
-        """Initialize encoding handler with European encoding preferences."""
+    def __init__(self, performance_monitor=None, cache_size: int = HOST_CACHE_SIZE):
+        """
+        Initialize encoding handler with European encoding preferences.
+        
+        Args:
+            performance_monitor: Optional PerformanceMonitor receiving decode timings
+            cache_size: Number of hosts whose detected encoding is remembered
+        """
         self.logger = logging.getLogger(__name__)
+        self.performance_monitor = performance_monitor
+        self.cache_size = cache_size
+        self._host_encodings: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
         
         # Preferred encodings for European content (in order of preference)
         self.encoding_preferences = [
@@ -39,7 +91,8 @@ class EncodingHandler:
     def decode_content(
         self, 
         content: Union[bytes, str], 
-        content_type: Optional[str] = None
+        content_type: Optional[str] = None,
+        url: Optional[str] = None
     ) -> str:
         """
         Decode content with robust encoding detection.
@@ -47,6 +100,7 @@ class EncodingHandler:
         Args:
             content: Raw content bytes or string
             content_type: HTTP content-type header for encoding hints
+            url: Source URL; its host keys the detected-encoding cache
             
         Returns:
             Decoded string content
@@ -57,45 +111,109 @@ class EncodingHandler:
         if not isinstance(content, bytes):
             return str(content)
         
-        # Try to extract encoding from content-type header
-        declared_encoding = self._extract_encoding_from_content_type(content_type)
+        started = time.perf_counter()
+        host = urlparse(url).hostname if url else None
+        decoded, encoding, method = self._decode(content, content_type, host)
         
-        # Try declared encoding first
-        if declared_encoding:
-            try:
-                decoded = content.decode(declared_encoding)
-                self.logger.debug(f"✅ Decoded using declared encoding: {declared_encoding}")
-                return decoded
-            except (UnicodeDecodeError, LookupError) as e:
-                self.logger.warning(f"⚠️ Declared encoding {declared_encoding} failed: {e}")
-        
-        # Try to detect encoding using chardet
-        detected_encoding = self._detect_encoding(content)
-        if detected_encoding:
-            try:
-                decoded = content.decode(detected_encoding)
-                self.logger.debug(f"✅ Decoded using detected encoding: {detected_encoding}")
-                return decoded
-            except (UnicodeDecodeError, LookupError) as e:
-                self.logger.warning(f"⚠️ Detected encoding {detected_encoding} failed: {e}")
+        if self.performance_monitor is not None:
+            # Labelled by strategy and encoding only: hosts are unbounded
+            labels = {"method": method, "encoding": encoding}
+            self.performance_monitor.record_custom_metric(
+                "encoding_decode_duration",
+                time.perf_counter() - started,
+                unit="seconds",
+                category="encoding",
+                metadata=labels
+            )
+            self.performance_monitor.record_custom_metric(
+                "encoding_decode_bytes", len(content), unit="bytes", category="encoding", metadata=labels
+            )
+        return decoded
+    
+    def _decode(
+        self,
+        content: bytes,
+        content_type: Optional[str],
+        host: Optional[str]
+    ) -> Tuple[str, str, str]:
+        """Return ``(text, encoding, method)`` for the first strategy that decodes cleanly."""
+        for bom, encoding in BOMS:
+            if content.startswith(bom):
+                return content.decode(encoding), encoding, "bom"
         
-        # Try preferred encodings in order
-        for encoding in self.encoding_preferences:
-            try:
-                decoded = content.decode(encoding)
+        candidates = (
+            (self._extract_encoding_from_content_type(content_type), "declared"),
+            (self._sniff_document_encoding(content), "meta"),
+            ('utf-8', "utf-8"),
+        )
+        for encoding, method in candidates:
+            decoded = self._try_decode(content, encoding)
+            if decoded is not None:
+                self.logger.debug(f"✅ Decoded using {method} encoding: {encoding}")
+                return decoded, encoding, method
+            if encoding and method != "utf-8":
+                self.logger.warning(f"⚠️ {method.capitalize()} encoding {encoding} failed")
+        
+        cached = self._cached_encoding(host)
+        if cached:
+            decoded = self._try_decode(content, cached)
+            if decoded is not None:
+                return decoded, cached, "host_cache"
+        
+        detected = self._detect_encoding(content)
+        decoded = self._try_decode(content, detected)
+        if decoded is not None:
+            self._remember_encoding(host, detected)
+            self.logger.debug(f"✅ Decoded using detected encoding: {detected}")
+            return decoded, detected, "detected"
+        
+        # windows-1252 leaves five bytes undefined; latin-1 decodes anything
+        for encoding in ('windows-1252', 'latin-1'):
+            decoded = self._try_decode(content, encoding)
+            if decoded is not None:
+                self._remember_encoding(host, encoding)
                 self.logger.info(f"✅ Decoded using fallback encoding: {encoding}")
-                return decoded
-            except (UnicodeDecodeError, LookupError):
-                continue
+                return decoded, encoding, "fallback"
         
-        # Last resort: decode with errors='replace'
+        # Unreachable in practice, kept as a guard
+        return content.decode('utf-8', errors='replace'), 'utf-8', "replace"
+    
+    @staticmethod
+    def _try_decode(content: bytes, encoding: Optional[str]) -> Optional[str]:
+        if not encoding:
+            return None
         try:
-            decoded = content.decode('utf-8', errors='replace')
-            self.logger.warning("⚠️ Used UTF-8 with error replacement")
-            return decoded
-        except Exception as e:
-            self.logger.error(f"❌ All encoding attempts failed: {e}")
-            return str(content, errors='replace')
+            return content.decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            return None
+    
+    def _preference_rank(self, encoding: str) -> int:
+        try:
+            name = codecs.lookup(encoding).name
+        except LookupError:
+            return len(self.encoding_preferences)
+        for rank, preferred in enumerate(self.encoding_preferences):
+            if codecs.lookup(preferred).name == name:
+                return rank
+        return len(self.encoding_preferences)
+    
+    def _cached_encoding(self, host: Optional[str]) -> Optional[str]:
+        if not host:
+            return None
+        with self._cache_lock:
+            encoding = self._host_encodings.get(host)
+            if encoding:
+                self._host_encodings.move_to_end(host)
+            return encoding
+    
+    def _remember_encoding(self, host: Optional[str], encoding: str):
+        if not host or self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._host_encodings[host] = encoding
+            self._host_encodings.move_to_end(host)
+            while len(self._host_encodings) > self.cache_size:
+                self._host_encodings.popitem(last=False)
     
     def _extract_encoding_from_content_type(self, content_type: Optional[str]) -> Optional[str]:
         """Extract encoding from HTTP content-type header."""
@@ -108,40 +226,57 @@ class EncodingHandler:
         if 'charset=' in content_type:
             try:
                 charset_part = content_type.split('charset=')[1]
-                encoding = charset_part.split(';')[0].strip()
-                return encoding
+                encoding = charset_part.split(';')[0].strip().strip('"\'')
+                return encoding or None
             except (IndexError, AttributeError):
                 pass
         
         return None
     
+    def _sniff_document_encoding(self, content: bytes) -> Optional[str]:
+        """Find an XML declaration or ``<meta charset>`` in the first kilobyte."""
+        head = content[:SNIFF_BYTES]
+        match = _XML_ENCODING.match(head) or _META_CHARSET.search(head)
+        if not match:
+            return None
+        encoding = match.group(1).decode('ascii').lower()
+        # A UTF-16 declaration in an ASCII-compatible byte stream is wrong by definition
+        if encoding.startswith('utf-16'):
+            return 'utf-8'
+        return encoding
+    
     def _detect_encoding(self, content: bytes) -> Optional[str]:
-        """Detect encoding using chardet with European language bias."""
+        """Detect encoding on a sample, preferring charset-normalizer over chardet."""
+        encoding, confidence = self._detect_with_confidence(content[:DETECTION_SAMPLE_BYTES])
+        if encoding and confidence > 0.7:
+            # Map some common aliases to standard names
+            encoding_map = {
+                'ascii': 'utf-8',
+                'ISO-8859-1': 'iso-8859-1',
+                'ISO-8859-2': 'iso-8859-2',
+                'windows-1252': 'cp1252',
+                'windows-1250': 'cp1250'
+            }
+            return encoding_map.get(encoding, encoding)
+        return None
+    
+    def _detect_with_confidence(self, sample: bytes) -> Tuple[Optional[str], float]:
         try:
-            # Use a sample of content for faster detection
-            sample_size = min(10000, len(content))
-            sample = content[:sample_size]
-            
-            detection = chardet.detect(sample)
-            
-            if detection and detection.get('confidence', 0) > 0.7:
-                encoding = detection['encoding']
-                
-                # Map some common aliases to standard names
-                encoding_map = {
-                    'ascii': 'utf-8',
-                    'ISO-8859-1': 'iso-8859-1',
-                    'ISO-8859-2': 'iso-8859-2',
-                    'windows-1252': 'cp1252',
-                    'windows-1250': 'cp1250'
-                }
-                
-                return encoding_map.get(encoding, encoding)
-        
+            if _normalizer_from_bytes is not None:
+                matches = list(_normalizer_from_bytes(sample))
+                if not matches:
+                    return None, 0.0
+                # Single-byte code pages often tie; break ties towards the European preferences
+                best_chaos = min(match.chaos for match in matches)
+                tied = [match for match in matches if match.chaos - best_chaos <= TIE_CHAOS]
+                match = min(tied, key=lambda m: self._preference_rank(m.encoding))
+                return match.encoding, 1.0 - match.chaos
+            if chardet is not None:
+                detection = chardet.detect(sample)
+                return detection.get('encoding'), detection.get('confidence') or 0.0
         except Exception as e:
             self.logger.warning(f"⚠️ Encoding detection failed: {e}")
-        
-        return None
+        return None, 0.0
     
     def normalize_text(self, text: str) -> str:
         """
@@ -219,10 +354,9 @@ class EncodingHandler:
         
         # Detect encoding
         if not info['detected_encoding']:
-            detection = chardet.detect(content[:10000])
-            if detection:
-                info['detected_encoding'] = detection.get('encoding')
-                info['confidence'] = detection.get('confidence', 0.0)
+            encoding, confidence = self._detect_with_confidence(content[:DETECTION_SAMPLE_BYTES])
+            info['detected_encoding'] = encoding
+            info['confidence'] = confidence
         
         # Test all preferred encodings
         for encoding in self.encoding_preferences:
@@ -5,52 +5,225 @@ Performance Monitor
 
 Comprehensive performance monitoring and optimization for content
 harvesting operations with detailed metrics and profiling.
+
+Every metric series is a preallocated log-bucket histogram (HDR style:
+each power of two is split into linear sub-buckets, so any recorded value
+is known to within ~3%). Recording a value is a bucket increment under the
+series' own lock; nothing is allocated per observation, and percentiles
+are read straight from the buckets. Series can be exported as Prometheus
+text or as JSON lines.
+
+Metadata passed to the recording methods is not thrown away: text values
+(method, encoding, domain, ...) become labels that split a metric into one
+series per combination, and numeric values are recorded as their own
+``<name>_<key>`` series. Each metric keeps at most ``MAX_LABEL_SETS``
+label combinations; further ones share an ``overflow="true"`` series so a
+high-cardinality value cannot grow memory without bound.
 """
 
+import functools
+import inspect
+import itertools
+import json
+import math
+import re
 import time
 import psutil
 import logging
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, field
-from collections import defaultdict, deque
+from typing import Dict, List, Any, Optional, Tuple, Union, IO
+from collections import defaultdict
 import threading
 
 
-@dataclass
-class PerformanceMetric:
-    """Individual performance metric measurement."""
-    name: str
-    value: float
-    unit: str
-    timestamp: float
-    category: str = "general"
-    metadata: Dict[str, Any] = field(default_factory=dict)
+# Sub-buckets per power of two; relative bucket width is 1 / SUB_BUCKETS
+SUB_BUCKETS = 32
+# Binary exponents covered by the histograms: ~1e-9 .. ~1e12
+MIN_EXPONENT = -30
+MAX_EXPONENT = 40
+QUANTILES = (0.5, 0.95, 0.99)
+# Successes are counted per second over this window for "recent throughput"
+RECENT_WINDOW_SECONDS = 300
+# Distinct label combinations kept per metric name before folding into OVERFLOW_LABELS
+MAX_LABEL_SETS = 100
+
+Labels = Tuple[Tuple[str, str], ...]
+NO_LABELS: Labels = ()
+OVERFLOW_LABELS: Labels = (("overflow", "true"),)
+
+
+class LogHistogram:
+    """
+    Fixed-size logarithmic histogram.
+
+    Values above zero land in one of ``SUB_BUCKETS`` linear sub-buckets of
+    their power of two; zero and negative values are counted separately.
+    Count, sum, min and max are tracked exactly.
+    """
+
+    __slots__ = ("counts", "zero_count", "count", "total", "min", "max", "last_value", "last_timestamp", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * ((MAX_EXPONENT - MIN_EXPONENT) * SUB_BUCKETS)
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.last_value = 0.0
+        self.last_timestamp = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _index(value: float) -> int:
+        mantissa, exponent = math.frexp(value)  # value = mantissa * 2**exponent, 0.5 <= mantissa < 1
+        if exponent <= MIN_EXPONENT:
+            return 0
+        if exponent > MAX_EXPONENT:
+            return (MAX_EXPONENT - MIN_EXPONENT) * SUB_BUCKETS - 1
+        return (exponent - MIN_EXPONENT - 1) * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+    @staticmethod
+    def _bucket_bounds(index: int) -> Tuple[float, float]:
+        exponent, sub = divmod(index, SUB_BUCKETS)
+        exponent += MIN_EXPONENT + 1
+        low = math.ldexp(0.5 + sub / (2 * SUB_BUCKETS), exponent)
+        high = math.ldexp(0.5 + (sub + 1) / (2 * SUB_BUCKETS), exponent)
+        return low, high
+
+    def record(self, value: float):
+        """Add one observation."""
+        with self._lock:
+            if value > 0:
+                self.counts[self._index(value)] += 1
+            else:
+                self.zero_count += 1
+            self.count += 1
+            self.total += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+            self.last_value = value
+            self.last_timestamp = time.time()
+
+    def percentile(self, quantile: float) -> float:
+        """Approximate value below which ``quantile`` of the observations fall."""
+        with self._lock:
+            return self._percentile(quantile)
+
+    def _percentile(self, quantile: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(quantile * self.count))
+        seen = self.zero_count
+        if seen >= rank:
+            return min(0.0, self.max)
+        for index, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            seen += bucket_count
+            if seen >= rank:
+                if index == len(self.counts) - 1:
+                    # The top bucket also holds everything above the range
+                    return self.max
+                low, high = self._bucket_bounds(index)
+                return min(max((low + high) / 2, self.min), self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary statistics of everything recorded so far."""
+        with self._lock:
+            if not self.count:
+                return {"count": 0}
+            result = {
+                "count": self.count,
+                "total": self.total,
+                "min": self.min,
+                "max": self.max,
+                "average": self.total / self.count,
+                "last_value": self.last_value,
+                "last_timestamp": self.last_timestamp
+            }
+            for quantile in QUANTILES:
+                result[f"p{int(quantile * 100)}"] = self._percentile(quantile)
+            return result
+
+
+class _Timer:
+    """Times a block (``with``) or every call of a function (decorator)."""
+
+    __slots__ = ("_monitor", "_operation", "_labels", "_started", "elapsed")
+
+    def __init__(self, monitor: "PerformanceMonitor", operation: str, labels: Labels = NO_LABELS):
+        self._monitor = monitor
+        self._operation = operation
+        self._labels = labels
+        self._started = 0.0
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._started
+        self._monitor._record_duration(self._operation, self.elapsed, self._labels)
+        return False
+
+    def __call__(self, func):
+        monitor, operation, labels = self._monitor, self._operation, self._labels
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    monitor._record_duration(operation, time.perf_counter() - started, labels)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                monitor._record_duration(operation, time.perf_counter() - started, labels)
+        return wrapper
 
 
 class PerformanceMonitor:
     """
     Comprehensive performance monitoring system.
-    
+
     Tracks timing, memory usage, throughput, and other performance
     metrics for content harvesting operations.
     """
-    
-    def __init__(self, history_size: int = 1000):
+
+    def __init__(self, history_size: int = 1000, system_monitoring_interval: Optional[float] = None):
         """
         Initialize performance monitor.
-        
+
         Args:
-            history_size: Maximum number of metrics to keep in history
+            history_size: Accepted for backwards compatibility; histograms have a fixed size
+            system_monitoring_interval: Sample memory usage every this many seconds
+                in a background thread (stopped by ``close()``); off by default,
+                ``get_summary()`` samples it on demand
         """
         self.logger = logging.getLogger(__name__)
         self.history_size = history_size
-        
-        # Metric storage
-        self.metrics_history: deque = deque(maxlen=history_size)
-        self.active_timers: Dict[str, float] = {}
+
+        # Metric storage: one histogram per (name, unit, category, labels) series
+        self._series: Dict[Tuple[str, str, str, Labels], LogHistogram] = {}
+        self._label_sets: Dict[str, int] = defaultdict(int)
+        self._timer_ids = itertools.count()
+        self.active_timers: Dict[str, Tuple[str, float]] = {}
+        # Per-event totals, plus the labelled part of each total
         self.counters: Dict[str, int] = defaultdict(int)
+        self.labelled_counters: Dict[Tuple[str, Labels], int] = defaultdict(int)
         self.gauges: Dict[str, float] = {}
-        
+
         # Performance statistics
         self.stats = {
             'total_operations': 0,
@@ -62,99 +235,152 @@ class PerformanceMonitor:
             'peak_memory_usage': 0.0,
             'current_memory_usage': 0.0
         }
-        
-        # Thread safety
+        self._recent_successes = [0] * RECENT_WINDOW_SECONDS
+        self._recent_seconds = [0] * RECENT_WINDOW_SECONDS
+
+        # Thread safety: _lock guards counters and stats, each histogram has its own
         self._lock = threading.Lock()
-        
-        # Start system monitoring
-        self._start_system_monitoring()
-    
+        self._stop_event = threading.Event()
+        self._monitor_thread: Optional[threading.Thread] = None
+
+        if system_monitoring_interval:
+            self.start_system_monitoring(system_monitoring_interval)
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def histogram(self, name: str, unit: str = "count", category: str = "custom",
+                  labels: Optional[Dict[str, Any]] = None) -> LogHistogram:
+        """Return the histogram of a series, creating it on first use."""
+        return self._histogram(name, unit, category, _labels(labels))
+
+    def _histogram(self, name: str, unit: str, category: str, labels: Labels) -> LogHistogram:
+        key = (name, unit, category, labels)
+        histogram = self._series.get(key)
+        if histogram is not None:
+            return histogram
+        with self._lock:
+            histogram = self._series.get(key)
+            if histogram is None:
+                if labels and self._label_sets[name] >= MAX_LABEL_SETS:
+                    key = (name, unit, category, OVERFLOW_LABELS)
+                    histogram = self._series.get(key)
+                elif labels:
+                    self._label_sets[name] += 1
+            if histogram is None:
+                histogram = self._series[key] = LogHistogram()
+        return histogram
+
+    def timer(self, operation_name: str, labels: Optional[Dict[str, Any]] = None) -> _Timer:
+        """
+        Time an operation as a context manager or decorator.
+
+        Example::
+
+            with monitor.timer("fetch", labels={"domain": "example.org"}):
+                ...
+
+            @monitor.timer("parse")
+            def parse(html): ...
+        """
+        return _Timer(self, operation_name, _labels(labels))
+
+    def record_duration(self, operation_name: str, elapsed: float, labels: Optional[Dict[str, Any]] = None):
+        """Record an already measured duration in seconds."""
+        self._record_duration(operation_name, elapsed, _labels(labels))
+
+    def _record_duration(self, operation_name: str, elapsed: float, labels: Labels):
+        key = (operation_name, "seconds", "timing", labels)
+        histogram = self._series.get(key) or self._histogram(*key)
+        histogram.record(elapsed)
+
+    def increment(self, name: str, amount: int = 1, labels: Optional[Dict[str, Any]] = None):
+        """Add ``amount`` to a counter (bytes fetched, documents found, ...)."""
+        self._increment(name, amount, _labels(labels))
+
+    def _increment(self, name: str, amount: int, labels: Labels):
+        with self._lock:
+            self.counters[name] += amount
+            if labels:
+                self.labelled_counters[(name, labels)] += amount
+
+    def _record_metadata(self, name: str, category: str, metadata: Optional[Dict[str, Any]]) -> Labels:
+        """
+        Split ``metadata`` into labels and measurements.
+
+        Numeric values are recorded as ``<name>_<key>`` series in
+        ``category``; the remaining values are returned as labels.
+        """
+        if not metadata:
+            return NO_LABELS
+        labels, measurements = _split_metadata(metadata)
+        for key, value in measurements:
+            self._histogram(f"{name}_{key}", "count", category, labels).record(value)
+        return labels
+
     def start_timer(self, operation_name: str) -> str:
         """
         Start timing an operation.
-        
+
         Args:
             operation_name: Name of the operation to time
-            
+
         Returns:
             Timer ID for stopping the timer
         """
-        timer_id = f"{operation_name}_{int(time.time() * 1000000)}"
-        
-        with self._lock:
-            self.active_timers[timer_id] = time.time()
-        
+        timer_id = f"{operation_name}#{next(self._timer_ids)}"
+        self.active_timers[timer_id] = (operation_name, time.perf_counter())
         return timer_id
-    
+
     def stop_timer(self, timer_id: str, metadata: Optional[Dict[str, Any]] = None) -> float:
         """
         Stop timing an operation and record the metric.
-        
+
         Args:
             timer_id: Timer ID returned by start_timer
-            metadata: Additional metadata for the metric
-            
+            metadata: Labels and measurements for the timing (see module docstring)
+
         Returns:
             Elapsed time in seconds
         """
-        end_time = time.time()
-        
-        with self._lock:
-            start_time = self.active_timers.pop(timer_id, end_time)
-            elapsed_time = end_time - start_time
-            
-            # Record timing metric
-            operation_name = timer_id.split('_')[0]
-            self._record_metric(
-                name=f"{operation_name}_duration",
-                value=elapsed_time,
-                unit="seconds",
-                category="timing",
-                metadata=metadata or {}
-            )
-            
-            # Update statistics
-            self.stats['total_operations'] += 1
-            self.stats['total_processing_time'] += elapsed_time
-            self.stats['average_processing_time'] = (
-                self.stats['total_processing_time'] / self.stats['total_operations']
-            )
-        
-        return elapsed_time
-    
+        timer = self.active_timers.pop(timer_id, None)
+        if timer is None:
+            return 0.0
+        operation_name, started = timer
+        elapsed = time.perf_counter() - started
+        labels = self._record_metadata(operation_name, "timing", metadata)
+        self._record_duration(operation_name, elapsed, labels)
+        return elapsed
+
     def record_success(self, operation_name: str, metadata: Optional[Dict[str, Any]] = None):
-        """Record a successful operation."""
+        """Record a successful operation; ``metadata`` labels the success counter."""
+        labels = self._record_metadata(f"{operation_name}_success", "operations", metadata)
+        second = int(time.time())
+        slot = second % RECENT_WINDOW_SECONDS
         with self._lock:
             self.stats['successful_operations'] += 1
             self.counters[f"{operation_name}_success"] += 1
-            
-            self._record_metric(
-                name=f"{operation_name}_success",
-                value=1,
-                unit="count",
-                category="success",
-                metadata=metadata or {}
-            )
-    
+            if labels:
+                self.labelled_counters[(f"{operation_name}_success", labels)] += 1
+            if self._recent_seconds[slot] != second:
+                self._recent_seconds[slot] = second
+                self._recent_successes[slot] = 0
+            self._recent_successes[slot] += 1
+
     def record_failure(self, operation_name: str, error_type: str = "unknown", metadata: Optional[Dict[str, Any]] = None):
-        """Record a failed operation."""
+        """Record a failed operation; ``metadata`` labels the failure counters."""
+        labels = self._record_metadata(f"{operation_name}_failure", "operations", metadata)
         with self._lock:
             self.stats['failed_operations'] += 1
-            self.counters[f"{operation_name}_failure"] += 1
-            self.counters[f"error_{error_type}"] += 1
-            
-            self._record_metric(
-                name=f"{operation_name}_failure",
-                value=1,
-                unit="count",
-                category="failure",
-                metadata={**(metadata or {}), "error_type": error_type}
-            )
-    
+            for name in (f"{operation_name}_failure", f"error_{error_type}"):
+                self.counters[name] += 1
+                if labels:
+                    self.labelled_counters[(name, labels)] += 1
+
     def record_throughput(self, operation_name: str, count: int, duration: float):
         """
         Record throughput metrics.
-        
+
         Args:
             operation_name: Name of the operation
             count: Number of items processed
@@ -162,145 +388,116 @@ class PerformanceMonitor:
         """
         if duration > 0:
             throughput = count / duration
-            
+            self._histogram(f"{operation_name}_throughput", "items/second", "throughput", NO_LABELS).record(throughput)
             with self._lock:
-                self._record_metric(
-                    name=f"{operation_name}_throughput",
-                    value=throughput,
-                    unit="items/second",
-                    category="throughput",
-                    metadata={"count": count, "duration": duration}
-                )
-                
-                # Update operations per second
                 self.stats['operations_per_second'] = throughput
-    
+
     def record_memory_usage(self, operation_name: str = "system"):
         """Record current memory usage."""
         try:
-            process = psutil.Process()
-            memory_info = process.memory_info()
-            memory_mb = memory_info.rss / 1024 / 1024  # Convert to MB
-            
+            memory_mb = psutil.Process().memory_info().rss / 1024 / 1024  # Convert to MB
+            self._histogram(f"{operation_name}_memory_usage", "MB", "memory", NO_LABELS).record(memory_mb)
             with self._lock:
                 self.stats['current_memory_usage'] = memory_mb
                 if memory_mb > self.stats['peak_memory_usage']:
                     self.stats['peak_memory_usage'] = memory_mb
-                
-                self._record_metric(
-                    name=f"{operation_name}_memory_usage",
-                    value=memory_mb,
-                    unit="MB",
-                    category="memory",
-                    metadata={
-                        "rss": memory_info.rss,
-                        "vms": memory_info.vms,
-                        "percent": process.memory_percent()
-                    }
-                )
-        
+                self.gauges[f"{operation_name}_memory_usage_mb"] = memory_mb
+
         except Exception as e:
             self.logger.warning(f"⚠️ Failed to record memory usage: {e}")
-    
+
     def record_custom_metric(
-        self, 
-        name: str, 
-        value: float, 
+        self,
+        name: str,
+        value: float,
         unit: str = "count",
         category: str = "custom",
         metadata: Optional[Dict[str, Any]] = None
     ):
-        """Record a custom performance metric."""
-        with self._lock:
-            self._record_metric(name, value, unit, category, metadata or {})
-    
+        """Record a custom performance metric, split by the labels in ``metadata``."""
+        labels = self._record_metadata(name, category, metadata)
+        self._histogram(name, unit, category, labels).record(value)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
     def get_summary(self) -> Dict[str, Any]:
         """Get comprehensive performance summary."""
+        self.record_memory_usage("system")
+        timing = self._get_timing_summary()
+        now = int(time.time())
+
         with self._lock:
+            self._update_timing_stats(timing)
             # Calculate success rate
             total_ops = self.stats['successful_operations'] + self.stats['failed_operations']
             success_rate = (
-                self.stats['successful_operations'] / total_ops 
+                self.stats['successful_operations'] / total_ops
                 if total_ops > 0 else 0.0
             )
-            
-            # Get recent metrics (last 5 minutes)
-            recent_threshold = time.time() - 300
-            recent_metrics = [
-                metric for metric in self.metrics_history
-                if metric.timestamp > recent_threshold
-            ]
-            
-            # Calculate recent throughput
-            recent_successes = len([
-                m for m in recent_metrics 
-                if m.category == "success"
-            ])
-            recent_throughput = recent_successes / 300 if recent_successes > 0 else 0.0
-            
-            return {
-                'summary': {
-                    'total_operations': self.stats['total_operations'],
-                    'successful_operations': self.stats['successful_operations'],
-                    'failed_operations': self.stats['failed_operations'],
-                    'success_rate': success_rate,
-                    'average_processing_time': self.stats['average_processing_time'],
-                    'operations_per_second': self.stats['operations_per_second'],
-                    'recent_throughput': recent_throughput
-                },
-                'memory': {
-                    'current_usage_mb': self.stats['current_memory_usage'],
-                    'peak_usage_mb': self.stats['peak_memory_usage'],
-                    'system_total_mb': self._get_system_memory_total()
-                },
-                'timing': self._get_timing_summary(),
-                'errors': self._get_error_summary(),
-                'recent_metrics_count': len(recent_metrics),
-                'total_metrics_recorded': len(self.metrics_history)
-            }
-    
+
+            # Successes over the last 5 minutes
+            recent_successes = sum(
+                count for second, count in zip(self._recent_seconds, self._recent_successes)
+                if now - second < RECENT_WINDOW_SECONDS
+            )
+            recent_throughput = recent_successes / RECENT_WINDOW_SECONDS
+            stats = dict(self.stats)
+            series = list(self._series.items())
+
+        return {
+            'summary': {
+                'total_operations': stats['total_operations'],
+                'successful_operations': stats['successful_operations'],
+                'failed_operations': stats['failed_operations'],
+                'success_rate': success_rate,
+                'average_processing_time': stats['average_processing_time'],
+                'operations_per_second': stats['operations_per_second'],
+                'recent_throughput': recent_throughput
+            },
+            'memory': {
+                'current_usage_mb': stats['current_memory_usage'],
+                'peak_usage_mb': stats['peak_memory_usage'],
+                'system_total_mb': self._get_system_memory_total()
+            },
+            'timing': timing,
+            'operations': {
+                _series_id(name, labels): histogram.snapshot()
+                for (name, _, category, labels), histogram in series
+                if category == "timing"
+            },
+            'counters': dict(self.counters),
+            'errors': self._get_error_summary(),
+            'total_metrics_recorded': sum(histogram.count for _, histogram in series)
+        }
+
     def get_detailed_metrics(self, category: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
         """
-        Get detailed metrics with optional filtering.
-        
+        Get per-series metric statistics with optional filtering.
+
         Args:
             category: Filter by metric category
-            limit: Maximum number of metrics to return
-            
+            limit: Maximum number of series to return
+
         Returns:
-            List of detailed metric data
+            List of series statistics, most recently updated first
         """
-        with self._lock:
-            metrics = list(self.metrics_history)
-            
-            # Filter by category if specified
-            if category:
-                metrics = [m for m in metrics if m.category == category]
-            
-            # Sort by timestamp (most recent first)
-            metrics.sort(key=lambda m: m.timestamp, reverse=True)
-            
-            # Limit results
-            metrics = metrics[:limit]
-            
-            # Convert to dictionaries
-            return [
-                {
-                    'name': m.name,
-                    'value': m.value,
-                    'unit': m.unit,
-                    'timestamp': m.timestamp,
-                    'category': m.category,
-                    'metadata': m.metadata
-                }
-                for m in metrics
-            ]
-    
+        metrics = [
+            {'name': name, 'unit': unit, 'category': series_category, 'labels': dict(labels), **histogram.snapshot()}
+            for (name, unit, series_category, labels), histogram in list(self._series.items())
+            if category is None or series_category == category
+        ]
+        metrics = [metric for metric in metrics if metric['count']]
+        metrics.sort(key=lambda m: m['last_timestamp'], reverse=True)
+        return metrics[:limit]
+
     def get_performance_recommendations(self) -> List[str]:
         """Get performance optimization recommendations."""
         recommendations = []
-        
+        timing = self._get_timing_summary()
+
         with self._lock:
+            self._update_timing_stats(timing)
             # Check success rate
             total_ops = self.stats['successful_operations'] + self.stats['failed_operations']
             if total_ops > 0:
@@ -309,107 +506,236 @@ class PerformanceMonitor:
                     recommendations.append(
                         f"Success rate is {success_rate:.1%}. Consider investigating failed operations."
                     )
-            
+
             # Check average processing time
             if self.stats['average_processing_time'] > 30:
                 recommendations.append(
                     f"Average processing time is {self.stats['average_processing_time']:.1f}s. "
                     "Consider optimizing slow operations."
                 )
-            
+
             # Check memory usage
             if self.stats['current_memory_usage'] > 1000:  # 1GB
                 recommendations.append(
                     f"Memory usage is {self.stats['current_memory_usage']:.1f}MB. "
                     "Consider optimizing memory-intensive operations."
                 )
-            
+
             # Check throughput
             if self.stats['operations_per_second'] < 1 and self.stats['total_operations'] > 10:
                 recommendations.append(
                     "Low throughput detected. Consider increasing concurrency or optimizing processing."
                 )
-            
+
             if not recommendations:
                 recommendations.append("Performance looks good! No immediate optimizations needed.")
-        
+
         return recommendations
-    
-    def _record_metric(
-        self, 
-        name: str, 
-        value: float, 
-        unit: str, 
-        category: str, 
-        metadata: Dict[str, Any]
-    ):
-        """Record a metric (internal method, assumes lock is held)."""
-        metric = PerformanceMetric(
-            name=name,
-            value=value,
-            unit=unit,
-            timestamp=time.time(),
-            category=category,
-            metadata=metadata
-        )
-        
-        self.metrics_history.append(metric)
-    
-    def _start_system_monitoring(self):
-        """Start background system monitoring."""
+
+    # ------------------------------------------------------------------
+    # Exporters
+    # ------------------------------------------------------------------
+    def export_prometheus(self, prefix: str = "content_harvester") -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Timings become one ``<prefix>_operation_duration_seconds`` summary
+        labelled by operation, other series one summary each, counters a
+        ``<prefix>_events_total`` counter labelled by event and gauges
+        ``<prefix>_<name>`` gauges. Series and counter labels are added to
+        the sample labels; the unlabelled part of a counter keeps only the
+        event label, so the samples of an event add up to its total.
+        """
+        lines: List[str] = []
+        families: Dict[str, List[Tuple[str, Dict[str, Any]]]] = defaultdict(list)
+        for (name, unit, category, labels), histogram in list(self._series.items()):
+            snapshot = histogram.snapshot()
+            if not snapshot["count"]:
+                continue
+            if category == "timing":
+                families[f"{prefix}_operation_duration_seconds"].append(
+                    (_render_labels((("operation", name),) + labels), snapshot)
+                )
+            else:
+                families[f"{prefix}_{_metric_name(name)}"].append((_render_labels(labels), snapshot))
+
+        for family, samples in sorted(families.items()):
+            lines.append(f"# TYPE {family} summary")
+            for labels, snapshot in samples:
+                for quantile in QUANTILES:
+                    quantile_labels = ",".join(filter(None, (labels, f'quantile="{quantile}"')))
+                    lines.append(f"{family}{{{quantile_labels}}} {snapshot[f'p{int(quantile * 100)}']!r}")
+                suffix = f"{{{labels}}}" if labels else ""
+                lines.append(f"{family}_sum{suffix} {snapshot['total']!r}")
+                lines.append(f"{family}_count{suffix} {snapshot['count']}")
+
+        with self._lock:
+            counters = sorted(self.counters.items())
+            labelled_counters = sorted(self.labelled_counters.items())
+            gauges = sorted(self.gauges.items())
+        if counters:
+            lines.append(f"# TYPE {prefix}_events_total counter")
+            unlabelled = dict(counters)
+            for (name, labels), value in labelled_counters:
+                unlabelled[name] -= value
+                lines.append(f"{prefix}_events_total{{{_render_labels((('event', name),) + labels)}}} {value}")
+            for name, value in counters:
+                if unlabelled[name] or value == 0:
+                    lines.append(f'{prefix}_events_total{{event="{_escape_label(name)}"}} {unlabelled[name]}')
+        for name, value in gauges:
+            family = f"{prefix}_{_metric_name(name)}"
+            lines.append(f"# TYPE {family} gauge")
+            lines.append(f"{family} {value!r}")
+        return "\n".join(lines) + "\n"
+
+    def export_jsonl(self, destination: Union[str, IO[str]]) -> int:
+        """
+        Append one JSON line per metric series and counter to ``destination``.
+
+        Args:
+            destination: File path (appended to) or an open text stream
+
+        Returns:
+            Number of lines written
+        """
+        timestamp = time.time()
+        records = [
+            {"timestamp": timestamp, "type": "histogram", **metric}
+            for metric in self.get_detailed_metrics(limit=len(self._series))
+        ]
+        with self._lock:
+            records.extend(
+                {"timestamp": timestamp, "type": "counter", "name": name, "value": value}
+                for name, value in sorted(self.counters.items())
+            )
+            records.extend(
+                {"timestamp": timestamp, "type": "counter", "name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.labelled_counters.items())
+            )
+            records.extend(
+                {"timestamp": timestamp, "type": "gauge", "name": name, "value": value}
+                for name, value in sorted(self.gauges.items())
+            )
+
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        if isinstance(destination, str):
+            with open(destination, "a", encoding="utf-8") as f:
+                f.write(lines)
+        else:
+            destination.write(lines)
+        return len(records)
+
+    # ------------------------------------------------------------------
+    # System monitoring
+    # ------------------------------------------------------------------
+    def start_system_monitoring(self, interval: float = 60):
+        """Sample memory usage every ``interval`` seconds until ``close()``."""
+        if self._monitor_thread and self._monitor_thread.is_alive():
+            return
+        self._stop_event.clear()
+
         def monitor_system():
-            while True:
+            while not self._stop_event.wait(interval):
                 try:
                     self.record_memory_usage("system")
-                    time.sleep(60)  # Monitor every minute
                 except Exception as e:
                     self.logger.warning(f"⚠️ System monitoring error: {e}")
-                    time.sleep(60)
-        
-        monitor_thread = threading.Thread(target=monitor_system, daemon=True)
-        monitor_thread.start()
-    
+
+        self._monitor_thread = threading.Thread(target=monitor_system, daemon=True, name="performance-monitor")
+        self._monitor_thread.start()
+
+    def close(self):
+        """Stop background system monitoring, if it is running."""
+        self._stop_event.set()
+        if self._monitor_thread:
+            self._monitor_thread.join(timeout=5)
+            self._monitor_thread = None
+
     def _get_system_memory_total(self) -> float:
         """Get total system memory in MB."""
         try:
             return psutil.virtual_memory().total / 1024 / 1024
-        except:
+        except Exception:
             return 0.0
-    
+
     def _get_timing_summary(self) -> Dict[str, Any]:
-        """Get timing metrics summary."""
-        timing_metrics = [
-            m for m in self.metrics_history 
-            if m.category == "timing"
+        """Get timing metrics summary across all operations."""
+        snapshots = [
+            histogram.snapshot()
+            for (_, _, category, _), histogram in list(self._series.items())
+            if category == "timing"
         ]
-        
-        if not timing_metrics:
+        snapshots = [snapshot for snapshot in snapshots if snapshot["count"]]
+
+        if not snapshots:
             return {"count": 0}
-        
-        values = [m.value for m in timing_metrics]
-        
+
+        count = sum(s["count"] for s in snapshots)
+        total = sum(s["total"] for s in snapshots)
         return {
-            "count": len(timing_metrics),
-            "min": min(values),
-            "max": max(values),
-            "average": sum(values) / len(values),
-            "total": sum(values)
+            "count": count,
+            "min": min(s["min"] for s in snapshots),
+            "max": max(s["max"] for s in snapshots),
+            "average": total / count,
+            "total": total
         }
-    
+
+    def _update_timing_stats(self, timing: Dict[str, Any]):
+        """Refresh the timing totals in ``stats`` (assumes lock is held)."""
+        self.stats['total_operations'] = timing["count"]
+        self.stats['total_processing_time'] = timing.get("total", 0.0)
+        self.stats['average_processing_time'] = timing.get("average", 0.0)
+
     def _get_error_summary(self) -> Dict[str, Any]:
         """Get error metrics summary."""
-        error_metrics = [
-            m for m in self.metrics_history 
-            if m.category == "failure"
-        ]
-        
-        error_types = defaultdict(int)
-        for metric in error_metrics:
-            error_type = metric.metadata.get("error_type", "unknown")
-            error_types[error_type] += 1
-        
+        with self._lock:
+            error_types = {
+                name[len("error_"):]: count
+                for name, count in self.counters.items()
+                if name.startswith("error_")
+            }
+
         return {
-            "total_errors": len(error_metrics),
-            "error_types": dict(error_types),
+            "total_errors": sum(error_types.values()),
+            "error_types": error_types,
             "most_common_error": max(error_types.items(), key=lambda x: x[1], default=("none", 0))[0]
-        }
\ No newline at end of file
+        }
+
+
+_INVALID_METRIC_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _metric_name(name: str) -> str:
+    return _INVALID_METRIC_CHARS.sub("_", name)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _render_labels(labels: Labels) -> str:
+    return ",".join(f'{_metric_name(key)}="{_escape_label(value)}"' for key, value in labels)
+
+
+def _series_id(name: str, labels: Labels) -> str:
+    return f"{name}{{{_render_labels(labels)}}}" if labels else name
+
+
+def _labels(mapping: Optional[Dict[str, Any]]) -> Labels:
+    if not mapping:
+        return NO_LABELS
+    return tuple(sorted((str(key), str(value)) for key, value in mapping.items() if value is not None))
+
+
+def _split_metadata(metadata: Dict[str, Any]) -> Tuple[Labels, List[Tuple[str, float]]]:
+    """Numeric metadata values are measurements, everything else is a label."""
+    labels = []
+    measurements = []
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            measurements.append((str(key), value))
+        else:
+            labels.append((str(key), str(value)))
+    return tuple(sorted(labels)), measurements
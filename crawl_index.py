@@ -0,0 +1,305 @@
+"""Persistent local crawl index for incremental scraping.
+
+The index is a small SQLite database keyed by URL. For every fetched page it
+remembers when it was fetched, the HTTP validators (``ETag`` and
+``Last-Modified``) the server returned, a hash of the extracted content and
+where the raw output was written. Scrapers consult it before crawling so that
+pages fetched recently are skipped and stale pages can be revalidated with a
+cheap conditional request instead of a full browser render.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = os.path.join("data", "crawl_index.sqlite")
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_index (
+    url TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    output_path TEXT
+)
+"""
+
+
+def content_hash(content: Any) -> str:
+    """Return a stable SHA-256 hex digest for page content."""
+
+    if isinstance(content, bytes):
+        data = content
+    elif isinstance(content, str):
+        data = content.encode("utf-8")
+    else:
+        data = json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+@dataclass
+class CrawlEntry:
+    """A single URL recorded in the crawl index."""
+
+    url: str
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    output_path: Optional[str] = None
+
+    def age_hours(self, now: Optional[float] = None) -> float:
+        """Hours elapsed since the page was last fetched."""
+        return ((now or time.time()) - self.fetched_at) / 3600
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dictionary."""
+        data = asdict(self)
+        data["source_url"] = self.url
+        return data
+
+
+class CrawlIndex:
+    """SQLite-backed record of crawled URLs.
+
+    Parameters
+    ----------
+    db_path:
+        Location of the SQLite database. Parent directories are created.
+    max_age_hours:
+        Age policy for :meth:`filter_urls`. Pages fetched longer ago than this
+        are considered stale and re-crawled. ``None`` keeps indexed pages
+        forever.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH,
+                 max_age_hours: Optional[float] = None) -> None:
+        self.db_path = db_path
+        self.max_age_hours = max_age_hours
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Scrapers record pages from worker threads; serialise access
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+        # Validators seen while revalidating pages that still need a
+        # re-crawl; they are only stored once record() confirms the fetch
+        self._pending_validators: Dict[str, Dict[str, Optional[str]]] = {}
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "CrawlIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM crawl_index").fetchone()[0]
+
+    def get(self, url: str) -> Optional[CrawlEntry]:
+        """Return the entry for ``url`` or ``None`` if it was never crawled."""
+        return self.lookup([url]).get(url)
+
+    def lookup(self, urls: Iterable[str]) -> Dict[str, CrawlEntry]:
+        """Return entries for all indexed URLs among ``urls``."""
+
+        urls = list(dict.fromkeys(urls))
+        entries: Dict[str, CrawlEntry] = {}
+        with self._lock:
+            for start in range(0, len(urls), _LOOKUP_CHUNK):
+                chunk = urls[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT url, fetched_at, etag, last_modified, content_hash, output_path "
+                    f"FROM crawl_index WHERE url IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for row in rows:
+                    entries[row[0]] = CrawlEntry(*row)
+        return entries
+
+    def entries(self) -> Dict[str, CrawlEntry]:
+        """Return every indexed entry keyed by URL."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, fetched_at, etag, last_modified, content_hash, output_path "
+                "FROM crawl_index"
+            ).fetchall()
+        return {row[0]: CrawlEntry(*row) for row in rows}
+
+    def record(self, url: str, content: Any = None, output_path: Optional[str] = None,
+               etag: Optional[str] = None, last_modified: Optional[str] = None,
+               fetched_at: Optional[float] = None,
+               digest: Optional[str] = None) -> bool:
+        """Record a fetch of ``url``.
+
+        Returns ``True`` when the content differs from the previous fetch (or
+        the URL is new) and ``False`` when the content hash is unchanged.
+        Validators that are not supplied fall back to the ones seen when the
+        page was last revalidated, then to their previously stored value.
+        """
+
+        digest = digest or (content_hash(content) if content is not None else None)
+        fetched_at = fetched_at or time.time()
+
+        with self._lock:
+            pending = self._pending_validators.pop(url, {})
+            etag = etag or pending.get("etag")
+            last_modified = last_modified or pending.get("last_modified")
+            previous = self._conn.execute(
+                "SELECT content_hash FROM crawl_index WHERE url = ?", (url,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT INTO crawl_index (url, fetched_at, etag, last_modified, content_hash, output_path)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    fetched_at = excluded.fetched_at,
+                    etag = COALESCE(excluded.etag, crawl_index.etag),
+                    last_modified = COALESCE(excluded.last_modified, crawl_index.last_modified),
+                    content_hash = COALESCE(excluded.content_hash, crawl_index.content_hash),
+                    output_path = COALESCE(excluded.output_path, crawl_index.output_path)
+                """,
+                (url, fetched_at, etag, last_modified, digest, output_path),
+            )
+            self._conn.commit()
+
+        return previous is None or digest is None or previous[0] != digest
+
+    def touch(self, url: str, fetched_at: Optional[float] = None) -> None:
+        """Mark ``url`` as freshly verified without changing its content."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE crawl_index SET fetched_at = ? WHERE url = ?",
+                (fetched_at or time.time(), url),
+            )
+            self._conn.commit()
+
+    def is_stale(self, entry: CrawlEntry, max_age_hours: Optional[float] = None,
+                 now: Optional[float] = None) -> bool:
+        """Whether ``entry`` is older than the age policy."""
+        max_age = self.max_age_hours if max_age_hours is None else max_age_hours
+        if max_age is None:
+            return False
+        return entry.age_hours(now) >= max_age
+
+    def conditional_headers(self, entry: CrawlEntry) -> Dict[str, str]:
+        """HTTP headers for revalidating ``entry`` with a conditional request."""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def revalidate(self, entry: CrawlEntry, session: Any = None,
+                   timeout: float = 10) -> Tuple[bool, Dict[str, Optional[str]]]:
+        """Check with the server whether a stale page is unchanged.
+
+        Sends a conditional ``HEAD`` request using the stored validators and
+        returns ``(unchanged, validators)``. A ``304 Not Modified`` (or
+        identical validators on a ``200``) refreshes the entry and reports it
+        unchanged. Any other outcome means the caller should re-crawl the
+        page; validators newly seen on a ``200`` are returned, not stored, so
+        a failed re-crawl cannot leave the entry claiming a version it never
+        fetched. Pass them to :meth:`record` once the fetch succeeds.
+        """
+
+        try:
+            if session is None:
+                import requests
+
+                session = requests
+            response = session.head(
+                entry.url,
+                headers=self.conditional_headers(entry),
+                timeout=timeout,
+                allow_redirects=True,
+            )
+        except Exception as e:
+            logger.debug(f"Revalidation failed for {entry.url}: {e}")
+            return False, {}
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        if response.status_code == 304:
+            self.touch(entry.url)
+            return True, {}
+
+        if response.status_code == 200:
+            if (etag and etag == entry.etag) or (
+                not etag and last_modified and last_modified == entry.last_modified
+            ):
+                self.touch(entry.url)
+                return True, {}
+            if etag or last_modified:
+                return False, {"etag": etag, "last_modified": last_modified}
+        return False, {}
+
+    def filter_urls(self, urls: Iterable[str], max_age_hours: Optional[float] = None,
+                    revalidate: bool = False, session: Any = None) -> List[str]:
+        """Return the URLs that need crawling, preserving input order.
+
+        New URLs are always returned. Indexed URLs are returned only when they
+        are stale under the age policy and, if ``revalidate`` is set and the
+        entry has HTTP validators, the server does not confirm they are
+        unchanged. New validators the server sent for those URLs are kept in
+        memory and stored by :meth:`record` when the re-crawl succeeds.
+        """
+
+        urls = list(urls)
+        known = self.lookup(urls)
+        now = time.time()
+        to_crawl = []
+        for url in dict.fromkeys(urls):
+            entry = known.get(url)
+            if entry is None:
+                to_crawl.append(url)
+                continue
+            if not self.is_stale(entry, max_age_hours, now):
+                continue
+            if revalidate and (entry.etag or entry.last_modified):
+                unchanged, validators = self.revalidate(entry, session)
+                with self._lock:
+                    if validators:
+                        self._pending_validators[url] = validators
+                    else:
+                        self._pending_validators.pop(url, None)
+                if unchanged:
+                    continue
+            to_crawl.append(url)
+
+        logger.info(
+            f"Crawl index: {len(urls)} URLs -> {len(to_crawl)} to crawl "
+            f"({len(known)} indexed)"
+        )
+        return to_crawl
+
+
+__all__ = ["CrawlIndex", "CrawlEntry", "content_hash", "DEFAULT_INDEX_PATH"]
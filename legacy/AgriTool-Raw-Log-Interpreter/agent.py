@@ -14,7 +14,12 @@ import json
 import logging
 import traceback
 import argparse
-from typing import List, Dict, Any, Optional, Tuple
+import socket
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Set, Tuple
 from enhanced_agent import RawLogInterpreterAgent as _EnhancedRawLogInterpreterAgent
 from datetime import datetime, date
 from decimal import Decimal
@@ -58,8 +63,8 @@ except ImportError:
 
 # Third-party imports
 try:
-    from supabase import create_client, Client
-    from openai import OpenAI
+    from supabase import create_client, acreate_client, Client
+    from openai import OpenAI, AsyncOpenAI
     import requests
     import sys
     import os
@@ -74,6 +79,18 @@ except ImportError as e:
     print("Install with: pip install -r requirements.txt")
     sys.exit(1)
 
+# Shared OpenAI rate limiter from the repository root; standalone images run unthrottled
+try:
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+    from openai_rate_limiter import Priority, estimate_tokens, get_rate_limiter, retry_after_seconds
+    from llm_cache import cache_key, get_response_cache
+except ImportError:
+    get_rate_limiter = None
+    get_response_cache = None
+
+from content_reducer import ContentReducer, merge_extractions
+from write_buffer import StructuredWriteBuffer
+
 # Configuration
 CANONICAL_FIELDS = [
     "url", "title", "description", "eligibility", "documents", "deadline",
@@ -113,6 +130,12 @@ class Config:
         self.BATCH_SIZE = int(os.getenv("BATCH_SIZE", "50"))  # Increased default for better throughput
         self.MAX_CONCURRENT_EXTRACTIONS = int(os.getenv("MAX_CONCURRENT_EXTRACTIONS", "5"))  # New: Concurrency control
         self.POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "300"))
+        # Work queue leases: claimed logs return to the pool if not renewed in time
+        self.CLAIM_LEASE_SECONDS = int(os.getenv("CLAIM_LEASE_SECONDS", "900"))
+        # Failed logs keep their lease until it expires; after this many claims they are no longer handed out
+        self.MAX_CLAIM_ATTEMPTS = int(os.getenv("MAX_CLAIM_ATTEMPTS", "5"))
+        self.HEARTBEAT_INTERVAL = int(os.getenv("HEARTBEAT_INTERVAL", str(max(1, self.CLAIM_LEASE_SECONDS // 3))))
+        self.WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
         self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
         self.SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
         self.SLACK_ALERT_THRESHOLD = float(os.getenv("SLACK_ALERT_THRESHOLD", "0.25"))
@@ -120,6 +143,32 @@ class Config:
         # OpenAI Configuration
         self.OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self.ASSISTANT_ID = os.getenv("ASSISTANT_ID", "SCRAPER_RAW_LOGS_INTERPRETER")
+        self.OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # e.g. a local stub server for load tests
+        
+        # Native async path: AsyncOpenAI + async Supabase writes instead of one thread per log
+        self.USE_ASYNC_CLIENTS = os.getenv("USE_ASYNC_CLIENTS", "true").lower() in ("1", "true", "yes")
+        self.ASSISTANT_POLL_INITIAL = float(os.getenv("ASSISTANT_POLL_INITIAL", "0.5"))
+        self.ASSISTANT_POLL_MAX = float(os.getenv("ASSISTANT_POLL_MAX", "8"))
+        self.ASSISTANT_RUN_TIMEOUT = float(os.getenv("ASSISTANT_RUN_TIMEOUT", "600"))
+        
+        # Offline backfills through the OpenAI Batch API (--batch-api)
+        self.BATCH_API_POLL_INTERVAL = float(os.getenv("BATCH_API_POLL_INTERVAL", "60"))
+        self.BATCH_JOB_DIR = os.getenv("BATCH_JOB_DIR", "batch_jobs")
+        self.BATCH_CLAIM_LEASE_SECONDS = int(os.getenv("BATCH_CLAIM_LEASE_SECONDS", str(25 * 3600)))
+        
+        # Reuse extractions for unchanged logs from the shared LLM response cache
+        self.LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        
+        # Prompt compaction: dedupe/filter/rank the input, then map-reduce over at most MAX_PROMPT_CHUNKS
+        self.PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "12000"))
+        self.MAX_PROMPT_CHUNKS = int(os.getenv("MAX_PROMPT_CHUNKS", "4"))
+        
+        # Write-behind: claimed logs are saved and marked processed in bulk every N results (0 writes per log)
+        self.WRITE_BUFFER_SIZE = int(os.getenv("WRITE_BUFFER_SIZE", "25"))
+        
+        # Attachment extraction: documents up to this size are parsed in memory, results cached per agent
+        self.IN_MEMORY_EXTRACTION_MAX_BYTES = int(float(os.getenv("IN_MEMORY_EXTRACTION_MAX_MB", "5")) * 1024 * 1024)
+        self.DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "256"))
     
     def _get_required_env(self, key: str) -> str:
         """Get required environment variable or exit with error"""
@@ -138,10 +187,20 @@ class Config:
         if args.max_concurrent:
             self.MAX_CONCURRENT_EXTRACTIONS = args.max_concurrent
             print(f"⚡ Max concurrent extractions: {self.MAX_CONCURRENT_EXTRACTIONS}")
+        if getattr(args, "sync_clients", False):
+            self.USE_ASYNC_CLIENTS = False
+            print("🧵 Using synchronous clients in worker threads")
 
 class LogInterpreterAgent:
     """Main agent class for processing raw logs"""
     
+    rate_limiter = None
+    response_cache = None
+    content_reducer = None
+    write_buffer = None
+    _document_extractor = None
+    _http_session = None
+    
     def __init__(self, config: Config):
         self.config = config
         # Ensure log files exist for artifact uploads
@@ -150,12 +209,35 @@ class LogInterpreterAgent:
         self.supabase = self._init_supabase()
         self.openai_client = self._init_openai()
         
-        # Initialize concurrency control for async processing
+        # Initialize concurrency control for async processing (recreated per batch event loop)
         self.semaphore = asyncio.Semaphore(self.config.MAX_CONCURRENT_EXTRACTIONS)
         
+        # Async clients are bound to the running event loop, so they live for one batch
+        self.async_openai_client = None
+        self.async_supabase = None
+        
         # Timing and performance tracking
         self.processing_start_time = None
         
+        # Logs claimed through claim_raw_logs and not yet finished by this worker
+        self.claims_supported = True
+        self._claimed_ids: Set[str] = set()
+        self._claims_lock = threading.Lock()
+        
+        # Process-wide OpenAI request/token budget shared with the other AI helpers
+        self.rate_limiter = get_rate_limiter() if get_rate_limiter else None
+        if get_response_cache and self.config.LLM_CACHE_ENABLED:
+            self.response_cache = get_response_cache()
+        self.content_reducer = ContentReducer(token_budget=self.config.PROMPT_TOKEN_BUDGET,
+                                              max_chunks=self.config.MAX_PROMPT_CHUNKS)
+        if self.config.WRITE_BUFFER_SIZE > 0:
+            self.write_buffer = StructuredWriteBuffer(self, max_rows=self.config.WRITE_BUFFER_SIZE)
+        self._failed_writes: Set[str] = set()
+        
+        # Extracted attachment sections keyed by (file ref, sha256 of content), least recently used first
+        self._document_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._document_cache_lock = threading.Lock()
+        
     def _setup_logging(self) -> logging.Logger:
         """Setup logging configuration"""
         logging.basicConfig(
@@ -183,7 +265,7 @@ class LogInterpreterAgent:
     def _init_openai(self) -> OpenAI:
         """Initialize OpenAI client"""
         try:
-            client = OpenAI(api_key=self.config.OPENAI_API_KEY)
+            client = OpenAI(api_key=self.config.OPENAI_API_KEY, base_url=self.config.OPENAI_BASE_URL)
             # Test connection
             client.models.list()
             self.logger.info("OpenAI connection established")
@@ -193,7 +275,32 @@ class LogInterpreterAgent:
             sys.exit(1)
     
     def fetch_unprocessed_logs(self) -> List[Dict[str, Any]]:
-        """Fetch batch of unprocessed logs from Supabase"""
+        """Claim a batch of unprocessed logs for this worker
+        
+        claim_raw_logs hands out disjoint batches under a lease, so replicas never
+        fetch the same rows. Databases without the RPC fall back to a plain select
+        plus per-log advisory locks.
+        """
+        if self.claims_supported:
+            try:
+                response = self.supabase.rpc('claim_raw_logs', {
+                    'p_worker': self.config.WORKER_ID,
+                    'p_limit': self.config.BATCH_SIZE,
+                    'p_lease_seconds': self.config.CLAIM_LEASE_SECONDS,
+                    'p_max_attempts': self.config.MAX_CLAIM_ATTEMPTS
+                }).execute()
+                logs = response.data or []
+                with self._claims_lock:
+                    self._claimed_ids.update(log['id'] for log in logs)
+                self.logger.info(f"Claimed {len(logs)} unprocessed logs as {self.config.WORKER_ID}")
+                return logs
+            except Exception as e:
+                if getattr(e, 'code', None) not in ('PGRST202', '42883'):
+                    self.logger.error(f"Failed to claim unprocessed logs: {e}")
+                    return []
+                self.logger.warning("claim_raw_logs not available, falling back to per-log locks")
+                self.claims_supported = False
+        
         try:
             response = self.supabase.table('raw_logs').select('*').eq('processed', False).limit(self.config.BATCH_SIZE).execute()
             logs = response.data
@@ -212,6 +319,51 @@ class LogInterpreterAgent:
             self.logger.warning(f"Failed to acquire lock for {log_id}: {e}")
             return False
     
+    def renew_claims(self, log_ids: List[str]) -> Set[str]:
+        """Extend the lease on claimed logs, returning the ids this worker still holds"""
+        try:
+            response = self.supabase.rpc('extend_raw_log_claims', {
+                'p_worker': self.config.WORKER_ID,
+                'p_ids': log_ids,
+                'p_lease_seconds': self.config.CLAIM_LEASE_SECONDS
+            }).execute()
+            return {str(log_id) for log_id in (response.data or [])}
+        except Exception as e:
+            # Keep working; the lease is still valid until it expires
+            self.logger.warning(f"Failed to renew claims for {len(log_ids)} logs: {e}")
+            return set(log_ids)
+    
+    def release_claims(self, log_ids: List[str], worker_id: Optional[str] = None) -> int:
+        """Return unfinished claimed logs to the queue
+        
+        ``worker_id`` defaults to this agent's WORKER_ID; pass the original
+        claimer when releasing logs claimed by another process (resumed batches).
+        """
+        try:
+            response = self.supabase.rpc('release_raw_log_claims', {
+                'p_worker': worker_id or self.config.WORKER_ID,
+                'p_ids': log_ids
+            }).execute()
+            return response.data or 0
+        except Exception as e:
+            self.logger.warning(f"Failed to release claims for {len(log_ids)} logs: {e}")
+            return 0
+    
+    async def _heartbeat_claims(self):
+        """Renew leases on in-flight claims until cancelled"""
+        while True:
+            await asyncio.sleep(self.config.HEARTBEAT_INTERVAL)
+            with self._claims_lock:
+                log_ids = list(self._claimed_ids)
+            if not log_ids:
+                continue
+            held = await asyncio.to_thread(self.renew_claims, log_ids)
+            lost = set(log_ids) - held
+            if lost:
+                self.logger.warning(f"Lost claim on {len(lost)} logs (lease expired or reclaimed)")
+                with self._claims_lock:
+                    self._claimed_ids.difference_update(lost)
+    
     def release_lock(self, log_id: str) -> bool:
         """Release processing lock for a log entry"""
         try:
@@ -221,98 +373,60 @@ class LogInterpreterAgent:
             self.logger.warning(f"Failed to release lock for {log_id}: {e}")
             return False
     
+    def _get_document_extractor(self) -> PythonDocumentExtractor:
+        """Document extractor shared by every log this agent processes"""
+        if self._document_extractor is None:
+            self._document_extractor = PythonDocumentExtractor(
+                enable_ocr=True,
+                ocr_language='eng+fra+ron',  # Multi-language OCR support
+                max_file_size_mb=10.0
+            )
+        return self._document_extractor
+    
+    def _get_http_session(self):
+        """Pooled HTTP session for attachment downloads (keep-alive across logs)"""
+        if self._http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(10, self.config.MAX_CONCURRENT_EXTRACTIONS))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._http_session = session
+        return self._http_session
+    
+    def _download_file_ref(self, file_ref: str) -> bytes:
+        """Download file from a URL or Supabase storage"""
+        if file_ref.startswith('http'):
+            response = self._get_http_session().get(file_ref, timeout=30)
+            return response.content
+        # Assume it's a Supabase storage path
+        return self.supabase.storage.from_('attachments').download(file_ref)
+    
     def extract_file_content(self, file_refs: List[str]) -> str:
-        """Extract text content from attached files using Python document extraction"""
-        content = ""
+        """Extract text content from attached files using Python document extraction
         
-        # Initialize Python document extractor
-        extractor = PythonDocumentExtractor(
-            enable_ocr=True,
-            ocr_language='eng+fra+ron',  # Multi-language OCR support
-            max_file_size_mb=10.0
-        )
+        Extracted sections are cached by file ref and content hash, so an
+        attachment shared by many logs is parsed (and OCR'd) once per agent.
+        """
+        content = ""
         
         for file_ref in file_refs:
             try:
-                # Download file from Supabase storage or URL
-                if file_ref.startswith('http'):
-                    response = requests.get(file_ref, timeout=30)
-                    file_content = response.content
+                file_content = self._download_file_ref(file_ref)
+                cache_key = (file_ref, hashlib.sha256(file_content).hexdigest())
+                with self._document_cache_lock:
+                    section = self._document_cache.get(cache_key)
+                    if section is not None:
+                        self._document_cache.move_to_end(cache_key)
+                if section is None:
+                    section, cacheable = self._extract_file_section(file_ref, file_content)
+                    if cacheable and self.config.DOCUMENT_CACHE_SIZE > 0:
+                        with self._document_cache_lock:
+                            self._document_cache[cache_key] = section
+                            while len(self._document_cache) > self.config.DOCUMENT_CACHE_SIZE:
+                                self._document_cache.popitem(last=False)
                 else:
-                    # Assume it's a Supabase storage path
-                    response = self.supabase.storage.from_('attachments').download(file_ref)
-                    file_content = response
-                
-                # Extract text based on file type
-                # Use Python document extractor for all document types
-                temp_file_path = None
-                try:
-                    # Determine file extension and handle supported document types
-                    if file_ref.lower().endswith(('.pdf', '.docx', '.doc', '.xlsx', '.xls', '.odt')):
-                        file_ext = os.path.splitext(file_ref)[1].lower()
-                        
-                        # Save to temp file for document extraction
-                        import tempfile
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
-                            temp_file.write(file_content)
-                            temp_file_path = temp_file.name
-                        
-                        self.logger.info(f"📄 Attempting Python document extraction for: {file_ref}")
-                        
-                        # Extract using Python document extractor
-                        extraction_result = extractor.extract_document_text(temp_file_path)
-                        
-                        if extraction_result['success'] and extraction_result.get('text_content'):
-                            content += f"\n\n--- Content from {file_ref} ---\n"
-                            content += extraction_result['text_content']
-                            
-                            # Add extraction metadata
-                            metadata = extraction_result.get('metadata', {})
-                            if metadata:
-                                content += f"\n--- Extracted using: {metadata.get('method', 'unknown')}"
-                                if metadata.get('page_count'):
-                                    content += f", {metadata['page_count']} pages"
-                                if metadata.get('ocr_applied'):
-                                    content += f", OCR applied"
-                                content += " ---"
-                            
-                            self.logger.info(f"✅ Python document extraction successful for: {file_ref}")
-                        else:
-                            error_msg = extraction_result.get('error', 'Unknown extraction error')
-                            self.logger.warning(f"❌ Document extraction failed for {file_ref}: {error_msg}")
-                            content += f"\n\n--- Failed to extract content from {file_ref}: {error_msg} ---\n"
-                            
-                    elif file_ref.lower().endswith(('.png', '.jpg', '.jpeg', '.tiff')):
-                        # OCR for images
-                        try:
-                            image = Image.open(io.BytesIO(file_content))
-                            ocr_text = pytesseract.image_to_string(image)
-                            if ocr_text.strip():
-                                content += f"\n\n--- OCR Content from {file_ref} ---\n"
-                                content += ocr_text
-                                self.logger.info(f"✅ OCR extraction successful for: {file_ref}")
-                            else:
-                                self.logger.warning(f"⚠️ OCR returned no text for: {file_ref}")
-                        except Exception as ocr_error:
-                            self.logger.error(f"❌ OCR failed for {file_ref}: {ocr_error}")
-                            content += f"\n\n--- OCR failed for {file_ref}: {str(ocr_error)} ---\n"
-                    
-                    elif file_ref.lower().endswith(('.txt', '.text')):
-                        content += f"\n\n--- Content from {file_ref} ---\n"
-                        content += file_content.decode('utf-8', errors='ignore')
-                        
-                except Exception as extraction_error:
-                    self.logger.error(f"❌ File extraction failed for {file_ref}: {extraction_error}")
-                    content += f"\n\n--- Failed to extract content from {file_ref}: {str(extraction_error)} ---\n"
-                
-                finally:
-                    # Always cleanup temp files
-                    if temp_file_path and os.path.exists(temp_file_path):
-                        try:
-                            os.unlink(temp_file_path)
-                            self.logger.debug(f"🗑️ Cleaned up temp file: {temp_file_path}")
-                        except Exception as cleanup_error:
-                            self.logger.warning(f"⚠️ Failed to cleanup temp file {temp_file_path}: {cleanup_error}")
+                    self.logger.debug(f"♻️ Reusing extracted content for: {file_ref}")
+                content += section
             
             except Exception as e:
                 self.logger.error(f"Error processing file {file_ref}: {e}")
@@ -320,8 +434,85 @@ class LogInterpreterAgent:
         
         return content
     
-    def call_openai_assistant(self, payload: str, file_content: str) -> Dict[str, Any]:
-        """Call OpenAI Assistant to extract canonical fields"""
+    def _extract_file_section(self, file_ref: str, file_content: bytes) -> Tuple[str, bool]:
+        """Return the prompt section for one downloaded file and whether it may be cached"""
+        lowered = file_ref.lower()
+        temp_file_path = None
+        try:
+            # Use Python document extractor for all document types
+            if lowered.endswith(('.pdf', '.docx', '.doc', '.xlsx', '.xls', '.odt')):
+                file_ext = os.path.splitext(file_ref)[1].lower()
+                extractor = self._get_document_extractor()
+                self.logger.info(f"📄 Attempting Python document extraction for: {file_ref}")
+                
+                if len(file_content) <= self.config.IN_MEMORY_EXTRACTION_MAX_BYTES:
+                    result = extractor.extract_document_bytes(file_content, f"attachment{file_ext}")
+                else:
+                    # Large files go through a temp file; the path is known before writing so it is always removed
+                    fd, temp_file_path = tempfile.mkstemp(suffix=file_ext)
+                    with os.fdopen(fd, 'wb') as temp_file:
+                        temp_file.write(file_content)
+                    result = extractor.extract_document(temp_file_path)
+                
+                if result.success and result.text_content:
+                    section = f"\n\n--- Content from {file_ref} ---\n" + result.text_content
+                    
+                    # Add extraction metadata
+                    metadata = result.metadata or {}
+                    method = metadata.get('method') or result.extraction_method
+                    if method:
+                        section += f"\n--- Extracted using: {method}"
+                        if metadata.get('page_count'):
+                            section += f", {metadata['page_count']} pages"
+                        if metadata.get('sheets'):
+                            section += f", {len(metadata['sheets'])} sheets"
+                        if metadata.get('truncated'):
+                            section += ", truncated"
+                        if metadata.get('ocr_applied'):
+                            section += f", OCR applied"
+                        section += " ---"
+                    
+                    self.logger.info(f"✅ Python document extraction successful for: {file_ref}")
+                    return section, True
+                
+                error_msg = result.error or 'Unknown extraction error'
+                self.logger.warning(f"❌ Document extraction failed for {file_ref}: {error_msg}")
+                return f"\n\n--- Failed to extract content from {file_ref}: {error_msg} ---\n", False
+            
+            if lowered.endswith(('.png', '.jpg', '.jpeg', '.tiff')):
+                # OCR for images
+                try:
+                    image = Image.open(io.BytesIO(file_content))
+                    ocr_text = pytesseract.image_to_string(image)
+                except Exception as ocr_error:
+                    self.logger.error(f"❌ OCR failed for {file_ref}: {ocr_error}")
+                    return f"\n\n--- OCR failed for {file_ref}: {str(ocr_error)} ---\n", False
+                if ocr_text.strip():
+                    self.logger.info(f"✅ OCR extraction successful for: {file_ref}")
+                    return f"\n\n--- OCR Content from {file_ref} ---\n" + ocr_text, True
+                self.logger.warning(f"⚠️ OCR returned no text for: {file_ref}")
+                return "", True
+            
+            if lowered.endswith(('.txt', '.text')):
+                return f"\n\n--- Content from {file_ref} ---\n" + file_content.decode('utf-8', errors='ignore'), True
+            
+            return "", True
+        
+        except Exception as extraction_error:
+            self.logger.error(f"❌ File extraction failed for {file_ref}: {extraction_error}")
+            return f"\n\n--- Failed to extract content from {file_ref}: {str(extraction_error)} ---\n", False
+        
+        finally:
+            # Always cleanup temp files
+            if temp_file_path and os.path.exists(temp_file_path):
+                try:
+                    os.unlink(temp_file_path)
+                    self.logger.debug(f"🗑️ Cleaned up temp file: {temp_file_path}")
+                except Exception as cleanup_error:
+                    self.logger.warning(f"⚠️ Failed to cleanup temp file {temp_file_path}: {cleanup_error}")
+    
+    def build_extraction_prompt(self, payload: str, file_content: str) -> Tuple[str, str]:
+        """Return the (system prompt, user content) pair for field extraction"""
         system_prompt = """You are the SCRAPER_RAW_LOGS_INTERPRETER assistant. 
         Extract canonical subsidy fields from the provided text content with ABSOLUTE PRECISION.
         
@@ -367,11 +558,117 @@ class LogInterpreterAgent:
         Ensure all fields are present in your response."""
         
         full_content = f"Raw Log Payload:\n{payload}\n\nAttached File Content:\n{file_content}"
+        return system_prompt, full_content
+    
+    def parse_extraction_response(self, result_text: str) -> Dict[str, Any]:
+        """Parse the model's JSON answer, unwrapping markdown code fences if needed"""
+        try:
+            return json.loads(result_text)
+        except json.JSONDecodeError:
+            # Try to extract JSON from response if wrapped in markdown
+            import re
+            json_match = re.search(r'```json\s*(\{.*?\})\s*```', result_text, re.DOTALL)
+            if json_match:
+                return json.loads(json_match.group(1))
+            raise ValueError("Could not parse JSON from OpenAI response")
+    
+    def _use_assistants_api(self, client) -> bool:
+        return self.config.ASSISTANT_ID.startswith("asst_") and hasattr(client, "beta")
+    
+    def _openai_reservation(self, system_prompt: str, content: str, max_tokens: int = 4000) -> int:
+        """Tokens to reserve from the rate limiter for one extraction"""
+        if self.rate_limiter is None:
+            return 0
+        messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": content}]
+        return estimate_tokens(messages, self.config.OPENAI_MODEL) + max_tokens
+    
+    def _openai_acquire(self, tokens: int = 0):
+        """Wait for rate limiter capacity; extraction traffic yields to interactive callers"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(tokens, Priority.BATCH)
+    
+    async def _openai_acquire_async(self, tokens: int = 0):
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(tokens, Priority.BATCH)
+    
+    def _openai_settle(self, reserved: int, result: Any = None, error: Optional[Exception] = None):
+        """Reconcile a reservation with reported usage and back off everyone on 429"""
+        if self.rate_limiter is None:
+            return
+        used = getattr(getattr(result, "usage", None), "total_tokens", None)
+        if not isinstance(used, int):
+            used = 0 if error is not None else reserved
+        self.rate_limiter.reconcile(reserved, used)
+        if getattr(error, "status_code", None) == 429:
+            headers = getattr(getattr(error, "response", None), "headers", None)
+            self.rate_limiter.pause(retry_after_seconds(headers) or 1.0)
+    
+    def _extraction_cache_key(self, system_prompt: str, content: str) -> Optional[str]:
+        """Cache key for one extraction; the Assistant ID stands in for the model on that path"""
+        if self.response_cache is None:
+            return None
+        model = self.config.ASSISTANT_ID if self._use_assistants_api(self.openai_client) else self.config.OPENAI_MODEL
+        messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": content}]
+        return cache_key(model, messages, 0.1, "raw-log-extraction", max_tokens=4000)
+    
+    def _cached_extraction(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        cached = self.response_cache.get(key)
+        return cached.get("content") if cached else None
+    
+    def _store_extraction(self, key: Optional[str], result_text: str):
+        if key is not None:
+            self.response_cache.set(key, {"content": result_text}, template_version="raw-log-extraction")
+    
+    def prepare_extraction_chunks(self, payload: str, file_content: str,
+                                  max_chunks: Optional[int] = None) -> Tuple[List[Tuple[str, str]], Optional[Dict[str, Any]]]:
+        """Reduce the extraction input to (payload, file_content) chunks plus token statistics"""
+        if self.content_reducer is None:
+            return [(payload, file_content)], None
+        reducer = self.content_reducer
+        if max_chunks is not None:
+            reducer = ContentReducer(token_budget=reducer.token_budget, max_chunks=max_chunks)
+        reduced = reducer.reduce(payload, file_content)
+        stats = reduced["stats"]
+        if stats["tokens_after"] < stats["tokens_before"]:
+            self.logger.info(f"✂️ Prompt reduced from {stats['tokens_before']} to {stats['tokens_after']} tokens "
+                             f"in {stats['chunks']} chunk(s)")
+        return reduced["chunks"], stats
+    
+    def _merge_chunk_extractions(self, results: List[Dict[str, Any]], stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Reduce step: one extraction per chunk merged into a single record"""
+        extracted = results[0] if len(results) == 1 else merge_extractions(results)
+        if stats is not None:
+            extracted['_content_reduction'] = stats
+        return extracted
+    
+    def call_openai_assistant(self, payload: str, file_content: str) -> Dict[str, Any]:
+        """Call OpenAI Assistant to extract canonical fields
+        
+        The input is compacted by the content reducer first; when it still
+        spans several chunks each chunk is extracted and the results merged.
+        """
+        chunks, stats = self.prepare_extraction_chunks(payload, file_content)
+        results = [self._extract_chunk(chunk_payload, chunk_file) for chunk_payload, chunk_file in chunks]
+        return self._merge_chunk_extractions(results, stats)
+    
+    def _extract_chunk(self, payload: str, file_content: str) -> Dict[str, Any]:
+        """Extract canonical fields from one prompt chunk"""
+        system_prompt, full_content = self.build_extraction_prompt(payload, file_content)
+        extraction_key = self._extraction_cache_key(system_prompt, full_content)
+        cached = self._cached_extraction(extraction_key)
+        if cached is not None:
+            return self.parse_extraction_response(cached)
+        reserved = self._openai_reservation(system_prompt, full_content)
+        settled = False
         
         try:
-            if self.config.ASSISTANT_ID.startswith("asst_") and hasattr(self.openai_client, "beta"):
+            if self._use_assistants_api(self.openai_client):
                 # Use OpenAI Assistants API when an Assistant ID is provided
+                self._openai_acquire()
                 thread = self.openai_client.beta.threads.create(messages=[{"role": "user", "content": full_content}])
+                self._openai_acquire(reserved)
                 run = self.openai_client.beta.threads.runs.create(
                     thread_id=thread.id,
                     assistant_id=self.config.ASSISTANT_ID,
@@ -381,15 +678,20 @@ class LogInterpreterAgent:
                 # Poll until completion
                 while run.status not in ["completed", "failed", "cancelled", "expired"]:
                     time.sleep(1)
+                    self._openai_acquire()
                     run = self.openai_client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
+                self._openai_settle(reserved, run)
+                settled = True
 
                 if run.status != "completed":
                     raise RuntimeError(f"Assistant run failed: {run.status}")
 
+                self._openai_acquire()
                 messages = self.openai_client.beta.threads.messages.list(thread_id=thread.id)
                 result_text = messages.data[0].content[0].text.value
             else:
                 # Fallback to Chat Completions API
+                self._openai_acquire(reserved)
                 response = self.openai_client.chat.completions.create(
                     model=self.config.OPENAI_MODEL,
                     messages=[
@@ -399,24 +701,95 @@ class LogInterpreterAgent:
                     temperature=0.1,
                     max_tokens=4000
                 )
+                self._openai_settle(reserved, response)
+                settled = True
 
                 result_text = response.choices[0].message.content
             
-            # Parse JSON response
-            try:
-                result = json.loads(result_text)
-                return result
-            except json.JSONDecodeError:
-                # Try to extract JSON from response if wrapped in markdown
-                import re
-                json_match = re.search(r'```json\s*(\{.*?\})\s*```', result_text, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group(1))
-                    return result
-                else:
-                    raise ValueError("Could not parse JSON from OpenAI response")
+            extracted = self.parse_extraction_response(result_text)
+            self._store_extraction(extraction_key, result_text)
+            return extracted
                     
         except Exception as e:
+            if not settled:
+                self._openai_settle(reserved, error=e)
+            self.logger.error(f"OpenAI API call failed: {e}")
+            raise
+    
+    async def call_openai_assistant_async(self, payload: str, file_content: str) -> Dict[str, Any]:
+        """Async variant of call_openai_assistant using AsyncOpenAI
+        
+        Chunks of one log are extracted concurrently. Assistant runs are polled
+        with ``asyncio.sleep`` and exponential backoff (ASSISTANT_POLL_INITIAL
+        doubling up to ASSISTANT_POLL_MAX), so waiting on a run costs no thread.
+        """
+        chunks, stats = self.prepare_extraction_chunks(payload, file_content)
+        results = await asyncio.gather(*(self._extract_chunk_async(chunk_payload, chunk_file)
+                                         for chunk_payload, chunk_file in chunks))
+        return self._merge_chunk_extractions(list(results), stats)
+    
+    async def _extract_chunk_async(self, payload: str, file_content: str) -> Dict[str, Any]:
+        client = self.async_openai_client
+        system_prompt, full_content = self.build_extraction_prompt(payload, file_content)
+        extraction_key = self._extraction_cache_key(system_prompt, full_content)
+        cached = self._cached_extraction(extraction_key)
+        if cached is not None:
+            return self.parse_extraction_response(cached)
+        reserved = self._openai_reservation(system_prompt, full_content)
+        settled = False
+        
+        try:
+            if self._use_assistants_api(client):
+                await self._openai_acquire_async()
+                thread = await client.beta.threads.create(messages=[{"role": "user", "content": full_content}])
+                await self._openai_acquire_async(reserved)
+                run = await client.beta.threads.runs.create(
+                    thread_id=thread.id,
+                    assistant_id=self.config.ASSISTANT_ID,
+                    instructions=system_prompt
+                )
+
+                delay = self.config.ASSISTANT_POLL_INITIAL
+                deadline = time.monotonic() + self.config.ASSISTANT_RUN_TIMEOUT
+                while run.status not in ["completed", "failed", "cancelled", "expired"]:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Assistant run {run.id} still {run.status} after "
+                                           f"{self.config.ASSISTANT_RUN_TIMEOUT:.0f}s")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.config.ASSISTANT_POLL_MAX)
+                    await self._openai_acquire_async()
+                    run = await client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
+                self._openai_settle(reserved, run)
+                settled = True
+
+                if run.status != "completed":
+                    raise RuntimeError(f"Assistant run failed: {run.status}")
+
+                await self._openai_acquire_async()
+                messages = await client.beta.threads.messages.list(thread_id=thread.id)
+                result_text = messages.data[0].content[0].text.value
+            else:
+                await self._openai_acquire_async(reserved)
+                response = await client.chat.completions.create(
+                    model=self.config.OPENAI_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": full_content}
+                    ],
+                    temperature=0.1,
+                    max_tokens=4000
+                )
+                self._openai_settle(reserved, response)
+                settled = True
+                result_text = response.choices[0].message.content
+            
+            extracted = self.parse_extraction_response(result_text)
+            self._store_extraction(extraction_key, result_text)
+            return extracted
+        
+        except Exception as e:
+            if not settled:
+                self._openai_settle(reserved, error=e)
             self.logger.error(f"OpenAI API call failed: {e}")
             raise
     
@@ -556,42 +929,43 @@ class LogInterpreterAgent:
         else:
             return obj
 
+    def prepare_structured_insert(self, raw_log_id: str, normalized_data: Dict[str, Any], audit: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the JSON-safe subsidies_structured row, raising ValueError if array fields are malformed"""
+        # Prepare data for insertion
+        insert_data = {
+            "raw_log_id": raw_log_id,
+            "audit": audit,
+            **normalized_data
+        }
+        
+        # Convert all data to be JSON serializable (handle Decimal, date objects, etc.)
+        insert_data = self._convert_for_json_serialization(insert_data)
+        
+        # Log the exact array payload for debugging; at INFO this was several lines per row
+        if self.logger.isEnabledFor(logging.DEBUG):
+            array_fields_log = ["amount", "region", "sector", "legal_entity_type", "objectives", "beneficiary_types"]
+            self.logger.debug(f"Inserting data for raw_log_id {raw_log_id}: " + ", ".join(
+                f"{field}={insert_data[field]!r}" for field in array_fields_log if field in insert_data))
+        
+        # Double-check all array fields are actually arrays before insert
+        array_validation_errors = []
+        for field in ["amount", "region", "sector", "documents", "priority_groups", 
+                     "application_requirements", "questionnaire_steps", "legal_entity_type",
+                     "objectives", "eligible_actions", "ineligible_actions", 
+                     "beneficiary_types", "investment_types", "rejection_conditions"]:
+            if field in insert_data and not isinstance(insert_data[field], list):
+                array_validation_errors.append(f"{field} is not an array: {type(insert_data[field])}")
+        
+        if array_validation_errors:
+            self.logger.error(f"ARRAY VALIDATION FAILED: {array_validation_errors}")
+            raise ValueError(f"Array validation failed: {array_validation_errors}")
+        
+        return insert_data
+    
     def save_structured_data(self, raw_log_id: str, normalized_data: Dict[str, Any], audit: Dict[str, Any]) -> bool:
         """Save normalized data to subsidies_structured table"""
         try:
-            # Prepare data for insertion
-            insert_data = {
-                "raw_log_id": raw_log_id,
-                "audit": audit,
-                **normalized_data
-            }
-            
-            # Convert all data to be JSON serializable (handle Decimal, date objects, etc.)
-            insert_data = self._convert_for_json_serialization(insert_data)
-            
-            # Log the exact payload being inserted for debugging - CRITICAL FOR ARRAY VALIDATION
-            self.logger.info(f"Inserting data for raw_log_id {raw_log_id}:")
-            array_fields_log = ["amount", "region", "sector", "legal_entity_type", "objectives", "beneficiary_types"]
-            for field in array_fields_log:
-                if field in insert_data:
-                    field_value = insert_data.get(field)
-                    self.logger.info(f"{field} field type: {type(field_value)}, value: {field_value}")
-                    if not isinstance(field_value, list):
-                        self.logger.error(f"CRITICAL ERROR: {field} is not an array! Type: {type(field_value)}")
-            
-            # Double-check all array fields are actually arrays before insert
-            array_validation_errors = []
-            for field in ["amount", "region", "sector", "documents", "priority_groups", 
-                         "application_requirements", "questionnaire_steps", "legal_entity_type",
-                         "objectives", "eligible_actions", "ineligible_actions", 
-                         "beneficiary_types", "investment_types", "rejection_conditions"]:
-                if field in insert_data and not isinstance(insert_data[field], list):
-                    array_validation_errors.append(f"{field} is not an array: {type(insert_data[field])}")
-            
-            if array_validation_errors:
-                self.logger.error(f"ARRAY VALIDATION FAILED: {array_validation_errors}")
-                raise ValueError(f"Array validation failed: {array_validation_errors}")
-            
+            insert_data = self.prepare_structured_insert(raw_log_id, normalized_data, audit)
             response = self.supabase.table('subsidies_structured').insert(insert_data).execute()
             
             if response.data:
@@ -605,29 +979,83 @@ class LogInterpreterAgent:
             self.logger.error(f"Error saving structured data for log {raw_log_id}: {e}")
             return False
     
+    async def save_structured_data_async(self, raw_log_id: str, normalized_data: Dict[str, Any], audit: Dict[str, Any]) -> bool:
+        """Async variant of save_structured_data using the batch's async Supabase client"""
+        try:
+            insert_data = self.prepare_structured_insert(raw_log_id, normalized_data, audit)
+            response = await self.async_supabase.table('subsidies_structured').insert(insert_data).execute()
+            
+            if response.data:
+                self.logger.info(f"Successfully saved structured data for log {raw_log_id}")
+                return True
+            self.logger.error(f"Failed to save structured data for log {raw_log_id}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Error saving structured data for log {raw_log_id}: {e}")
+            return False
+    
+    def flush_writes(self) -> Dict[str, List[str]]:
+        """Flush buffered results; flushed logs leave the claim set, failures are remembered for stats"""
+        if self.write_buffer is None:
+            return {"processed": [], "failed": []}
+        result = self.write_buffer.flush()
+        with self._claims_lock:
+            self._claimed_ids.difference_update(result["processed"])
+            self._failed_writes.update(result["failed"])
+        return result
+    
+    def _processed_update(self) -> Dict[str, Any]:
+        update = {
+            'processed': True,
+            'processed_at': datetime.now().isoformat()
+        }
+        if self.claims_supported:
+            update.update({'claimed_by': None, 'claim_expires_at': None})
+        return update
+    
     def mark_as_processed(self, log_id: str) -> bool:
         """Mark raw log as processed"""
         try:
-            response = self.supabase.table('raw_logs').update({
-                'processed': True,
-                'processed_at': datetime.now().isoformat()
-            }).eq('id', log_id).execute()
+            response = self.supabase.table('raw_logs').update(self._processed_update()).eq('id', log_id).execute()
             
             return len(response.data) > 0
         except Exception as e:
             self.logger.error(f"Failed to mark log {log_id} as processed: {e}")
             return False
     
+    async def mark_as_processed_async(self, log_id: str) -> bool:
+        """Async variant of mark_as_processed"""
+        try:
+            response = await self.async_supabase.table('raw_logs').update(self._processed_update()).eq('id', log_id).execute()
+            return len(response.data) > 0
+        except Exception as e:
+            self.logger.error(f"Failed to mark log {log_id} as processed: {e}")
+            return False
+    
+    def _error_row(self, raw_log_id: str, error_type: str, error_message: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        return {
+            'raw_log_id': raw_log_id,
+            'error_type': error_type,
+            'error_message': error_message,
+            'stack_trace': traceback.format_exc(),
+            'metadata': metadata or {}
+        }
+    
     def log_error(self, raw_log_id: str, error_type: str, error_message: str, metadata: Dict[str, Any] = None):
         """Log processing error to error_log table"""
         try:
-            self.supabase.table('error_log').insert({
-                'raw_log_id': raw_log_id,
-                'error_type': error_type,
-                'error_message': error_message,
-                'stack_trace': traceback.format_exc(),
-                'metadata': metadata or {}
-            }).execute()
+            self.supabase.table('error_log').insert(
+                self._error_row(raw_log_id, error_type, error_message, metadata)
+            ).execute()
+        except Exception as e:
+            self.logger.error(f"Failed to log error to database: {e}")
+    
+    async def log_error_async(self, raw_log_id: str, error_type: str, error_message: str, metadata: Dict[str, Any] = None):
+        """Async variant of log_error"""
+        try:
+            await self.async_supabase.table('error_log').insert(
+                self._error_row(raw_log_id, error_type, error_message, metadata)
+            ).execute()
         except Exception as e:
             self.logger.error(f"Failed to log error to database: {e}")
     
@@ -647,8 +1075,10 @@ class LogInterpreterAgent:
         """Process a single log entry"""
         log_id = log_data['id']
         
-        # Acquire processing lock
-        if not self.acquire_lock(log_id):
+        # Claimed logs are already exclusive to this worker; others need a processing lock
+        with self._claims_lock:
+            claimed = log_id in self._claimed_ids
+        if not claimed and not self.acquire_lock(log_id):
             self.logger.info(f"Could not acquire lock for log {log_id}, skipping")
             return False
         
@@ -660,19 +1090,31 @@ class LogInterpreterAgent:
             
             # Call OpenAI Assistant
             extracted_data = self.call_openai_assistant(log_data['payload'], file_content)
+            content_reduction = extracted_data.pop('_content_reduction', None)
             
             # Validate and normalize
             normalized_data, audit = self.validate_and_normalize(extracted_data)
+            if content_reduction:
+                audit['content_reduction'] = content_reduction
             
             # Add attachment sources to audit
             if log_data.get('file_refs'):
                 audit['attachment_sources_used'] = log_data['file_refs']
             
+            # Claimed logs go through the write-behind buffer; the lease holds them until the flush
+            if claimed and self.write_buffer is not None:
+                if self.write_buffer.add(log_id, self.prepare_structured_insert(log_id, normalized_data, audit)):
+                    self.flush_writes()
+                self.logger.debug(f"Queued structured data for log {log_id}")
+                return True
+            
             # Save structured data
             if self.save_structured_data(log_id, normalized_data, audit):
                 # Mark as processed
                 if self.mark_as_processed(log_id):
                     self.logger.info(f"Successfully processed log {log_id}")
+                    with self._claims_lock:
+                        self._claimed_ids.discard(log_id)
                     return True
                 else:
                     self.logger.error(f"Failed to mark log {log_id} as processed")
@@ -688,14 +1130,93 @@ class LogInterpreterAgent:
             return False
         
         finally:
-            # Always release the lock
-            self.release_lock(log_id)
+            # Always release the lock; unfinished claims are released per batch
+            if not claimed:
+                self.release_lock(log_id)
     
     async def process_single_log_async(self, log_data: Dict[str, Any]) -> bool:
-        """Async wrapper for processing a single log entry with concurrency control"""
+        """Process a single log entry with concurrency control
+        
+        Uses the batch's async clients when they are open, so in-flight logs are
+        bounded only by the semaphore; otherwise runs process_single_log in a
+        worker thread.
+        """
         async with self.semaphore:
-            # Use asyncio.to_thread to run the synchronous method in a thread pool
-            return await asyncio.to_thread(self.process_single_log, log_data)
+            if self.async_openai_client is None or self.async_supabase is None:
+                # Use asyncio.to_thread to run the synchronous method in a thread pool
+                return await asyncio.to_thread(self.process_single_log, log_data)
+            return await self._process_single_log_native(log_data)
+    
+    async def _process_single_log_native(self, log_data: Dict[str, Any]) -> bool:
+        """Native async counterpart of process_single_log"""
+        log_id = log_data['id']
+        
+        with self._claims_lock:
+            claimed = log_id in self._claimed_ids
+        if not claimed and not await asyncio.to_thread(self.acquire_lock, log_id):
+            self.logger.info(f"Could not acquire lock for log {log_id}, skipping")
+            return False
+        
+        try:
+            file_content = ""
+            if log_data.get('file_refs'):
+                # Downloads and OCR are blocking, keep them off the event loop
+                file_content = await asyncio.to_thread(self.extract_file_content, log_data['file_refs'])
+            
+            extracted_data = await self.call_openai_assistant_async(log_data['payload'], file_content)
+            content_reduction = extracted_data.pop('_content_reduction', None)
+            normalized_data, audit = self.validate_and_normalize(extracted_data)
+            if content_reduction:
+                audit['content_reduction'] = content_reduction
+            
+            if log_data.get('file_refs'):
+                audit['attachment_sources_used'] = log_data['file_refs']
+            
+            if claimed and self.write_buffer is not None:
+                if self.write_buffer.add(log_id, self.prepare_structured_insert(log_id, normalized_data, audit)):
+                    # The buffer writes with the sync client, keep the bulk calls off the event loop
+                    await asyncio.to_thread(self.flush_writes)
+                self.logger.debug(f"Queued structured data for log {log_id}")
+                return True
+            
+            if not await self.save_structured_data_async(log_id, normalized_data, audit):
+                await self.log_error_async(log_id, "SAVE_ERROR", "Failed to save structured data")
+                return False
+            if not await self.mark_as_processed_async(log_id):
+                self.logger.error(f"Failed to mark log {log_id} as processed")
+                return False
+            
+            self.logger.info(f"Successfully processed log {log_id}")
+            with self._claims_lock:
+                self._claimed_ids.discard(log_id)
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Processing failed for log {log_id}: {str(e)}")
+            await self.log_error_async(log_id, "PROCESSING_ERROR", str(e))
+            return False
+        
+        finally:
+            if not claimed:
+                await asyncio.to_thread(self.release_lock, log_id)
+    
+    async def _open_async_clients(self):
+        """Create AsyncOpenAI and async Supabase clients for the current event loop"""
+        try:
+            self.async_openai_client = AsyncOpenAI(
+                api_key=self.config.OPENAI_API_KEY,
+                base_url=self.config.OPENAI_BASE_URL
+            )
+            self.async_supabase = await acreate_client(self.config.SUPABASE_URL, self.config.SUPABASE_SERVICE_KEY)
+        except Exception as e:
+            self.logger.warning(f"Async clients unavailable, using worker threads: {e}")
+            await self._close_async_clients()
+    
+    async def _close_async_clients(self):
+        if self.async_openai_client is not None:
+            await self.async_openai_client.close()
+        self.async_openai_client = None
+        self.async_supabase = None
     
     async def process_batch_async(self) -> Dict[str, int]:
         """Process a batch of logs asynchronously with controlled concurrency"""
@@ -709,12 +1230,40 @@ class LogInterpreterAgent:
         self.logger.info(f"🚀 Starting async batch processing of {len(logs)} logs")
         self.logger.info(f"⚡ Max concurrent extractions: {self.config.MAX_CONCURRENT_EXTRACTIONS}")
         
-        # Process all logs concurrently, respecting semaphore limits
-        tasks = [self.process_single_log_async(log_data) for log_data in logs]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Semaphores and async clients belong to this batch's event loop
+        self.semaphore = asyncio.Semaphore(self.config.MAX_CONCURRENT_EXTRACTIONS)
+        if self.config.USE_ASYNC_CLIENTS:
+            await self._open_async_clients()
+        
+        # Keep leases alive while extractions run
+        heartbeat = asyncio.create_task(self._heartbeat_claims())
+        with self._claims_lock:
+            self._failed_writes.clear()
+        results = None
+        try:
+            # Process all logs concurrently, respecting semaphore limits
+            tasks = [self.process_single_log_async(log_data) for log_data in logs]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            # Write what is still buffered before unfinished claims go back to the queue
+            await asyncio.to_thread(self.flush_writes)
+            heartbeat.cancel()
+            with self._claims_lock:
+                # Failed logs keep their lease until it expires, so they back off instead of
+                # being re-claimed by the next batch; only logs never attempted go back now
+                attempted = {log_data['id'] for log_data in logs} if results is not None else set()
+                unfinished = [log_id for log_id in self._claimed_ids if log_id not in attempted]
+                self._claimed_ids.clear()
+            if unfinished:
+                released = await asyncio.to_thread(self.release_claims, unfinished)
+                self.logger.info(f"Released {released} unfinished claims")
+            await self._close_async_clients()
         
-        # Calculate statistics
-        processed = sum(1 for result in results if result is True)
+        # Calculate statistics; buffered logs only count once their flush succeeded
+        with self._claims_lock:
+            failed_writes = set(self._failed_writes)
+        processed = sum(1 for log_data, result in zip(logs, results)
+                        if result is True and log_data['id'] not in failed_writes)
         failed = len(results) - processed
         stats = {"processed": processed, "failed": failed, "total": len(logs)}
         
@@ -724,6 +1273,10 @@ class LogInterpreterAgent:
         
         self.logger.info(f"⏱️  Async batch completed in {elapsed_time:.2f}s")
         self.logger.info(f"📊 Throughput: {throughput:.2f} logs/second")
+        if self.response_cache is not None:
+            cache_stats = self.response_cache.stats()
+            self.logger.info(f"🗄️  LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                             f"({cache_stats['hit_rate']:.0%} hit rate)")
         
         # Check failure rate and send alerts
         failure_rate = stats["failed"] / stats["total"] if stats["total"] > 0 else 0
@@ -744,17 +1297,33 @@ class LogInterpreterAgent:
             # Not in async context, create new event loop
             return asyncio.run(self.process_batch_async())
     
+    def run_batch_api(self, limit: int, resume_batch_id: Optional[str] = None) -> Dict[str, Any]:
+        """Extract up to ``limit`` unprocessed logs as one OpenAI Batch API job"""
+        from batch_extraction import BatchExtractionJob
+        
+        job = BatchExtractionJob(
+            self,
+            job_dir=self.config.BATCH_JOB_DIR,
+            poll_interval=self.config.BATCH_API_POLL_INTERVAL,
+            claim_lease_seconds=self.config.BATCH_CLAIM_LEASE_SECONDS
+        )
+        if resume_batch_id:
+            return job.resume(resume_batch_id)
+        return job.run(limit=limit)
+    
     def run_continuous(self):
         """Run the agent continuously with polling"""
         self.logger.info("🔄 Starting AgriTool Raw Log Interpreter Agent (Continuous Mode)")
-        self.logger.info(f"📋 Configuration: batch_size={self.config.BATCH_SIZE}, poll_interval={self.config.POLL_INTERVAL}s")
+        self.logger.info(f"📋 Configuration: batch_size={self.config.BATCH_SIZE}, poll_interval={self.config.POLL_INTERVAL}s, worker={self.config.WORKER_ID}")
         self.logger.info(f"⚡ Max concurrent extractions: {self.config.MAX_CONCURRENT_EXTRACTIONS}")
         
         while True:
             try:
                 # Use async processing for better performance
-                asyncio.run(self.process_batch_async())
-                time.sleep(self.config.POLL_INTERVAL)
+                stats = asyncio.run(self.process_batch_async())
+                # A full batch that made progress means the queue has more work: claim again right away
+                if stats["total"] < self.config.BATCH_SIZE or stats["processed"] == 0:
+                    time.sleep(self.config.POLL_INTERVAL)
             except KeyboardInterrupt:
                 self.logger.info("Received interrupt signal, shutting down...")
                 break
@@ -793,11 +1362,31 @@ def main():
         type=int, 
         help="Maximum concurrent OpenAI extractions (overrides MAX_CONCURRENT_EXTRACTIONS env var)"
     )
+    parser.add_argument(
+        "--sync-clients",
+        action="store_true",
+        help="Run each extraction with the synchronous clients in a worker thread instead of AsyncOpenAI"
+    )
     parser.add_argument(
         "--single-batch", 
         action="store_true", 
         help="Process only one batch and exit (for CI/CD workflows)"
     )
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="Backfill: submit unprocessed logs as one OpenAI Batch API job, wait for it and ingest the results"
+    )
+    parser.add_argument(
+        "--batch-limit",
+        type=int,
+        default=1000,
+        help="Number of logs to claim for --batch-api"
+    )
+    parser.add_argument(
+        "--resume-batch",
+        help="Wait for and ingest a previously submitted batch job by id"
+    )
     
     args = parser.parse_args()
     
@@ -814,8 +1403,14 @@ def main():
     print(f"🚀 AgriTool AI Agent Starting...")
     print(f"📊 Batch size: {config.BATCH_SIZE}")
     print(f"⚡ Max concurrent extractions: {config.MAX_CONCURRENT_EXTRACTIONS}")
+    print(f"🔌 Clients: {'async' if config.USE_ASYNC_CLIENTS else 'sync (worker threads)'}")
     print(f"🔄 Mode: {'Single batch' if args.single_batch else 'Continuous'}")
     
+    if args.batch_api or args.resume_batch:
+        stats = agent.run_batch_api(args.batch_limit, args.resume_batch)
+        print(f"✅ Batch API extraction complete: {stats}")
+        sys.exit(0)
+    
     if args.single_batch:
         # Single batch processing for CI/CD
         stats = asyncio.run(agent.process_batch_async())
@@ -1,10 +1,12 @@
 """
 Robust Array Processing Utilities for AgriTool
-Handles all forms of array input with comprehensive logging and audit trails
+Handles all forms of array input with compact audit trails; only coercions
+that change a value are recorded
 """
 
 import json
 import re
+import time
 import logging
 from typing import Any, List, Optional, Union, Tuple
 from datetime import datetime
@@ -28,8 +30,16 @@ if not array_logger.handlers:
     handler.setFormatter(formatter)
     array_logger.addHandler(handler)
 
+# Precompiled parsers for the common input shapes
+_EMPTY_TOKENS = frozenset(['null', 'none', 'undefined', '[]', '{}'])
+_PYTHON_LIST_SPLIT = re.compile(r',(?=(?:[^"\']*["\'][^"\']*["\'])*[^"\']*$)')
+_json_loads = json.loads
+
+
 class ArrayCoercionResult:
     """Result of array coercion with audit information"""
+    __slots__ = ('value', 'original', 'method', 'field_name', 'warnings', 'created_at', 'success')
+
     def __init__(self, value: List[Any], original: Any, method: str, 
                  field_name: str, warnings: List[str] = None):
         self.value = value
@@ -37,9 +47,19 @@ class ArrayCoercionResult:
         self.method = method
         self.field_name = field_name
         self.warnings = warnings or []
-        self.timestamp = datetime.now().isoformat()
+        # Formatted lazily, most results are never audited
+        self.created_at = time.time()
         self.success = True
 
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.created_at).isoformat()
+
+    @property
+    def changed(self) -> bool:
+        """False when the input already was a clean list"""
+        return _changed(self.method, self.warnings)
+
     def to_audit_dict(self):
         """Convert to dictionary for audit logging"""
         return {
@@ -54,10 +74,98 @@ class ArrayCoercionResult:
             'success': self.success
         }
 
+
+def _changed(method: str, warnings: List[str]) -> bool:
+    return method != 'list_cleanup' or bool(warnings)
+
+
+def _compact_audit(field_name: str, original: Any, value: List[Any], method: str,
+                   warnings: List[str], success: bool) -> dict:
+    """Audit entry for a field whose value was actually rewritten"""
+    entry = {
+        'field_name': field_name,
+        'original_value': original,
+        'original_type': type(original).__name__,
+        'coerced_length': len(value),
+        'method': method,
+        'success': success
+    }
+    if warnings:
+        entry['warnings'] = warnings
+    return entry
+
+
+def _coerce(value: Any, numeric: bool) -> Tuple[List[Any], str, List[str]]:
+    """Return (array, method, warnings) for one value"""
+    # Handle None, empty, or null-like values
+    if value is None:
+        return [], 'null_handling', []
+    
+    # Handle already-list values: the common case, no copy of the warnings list unless needed
+    if isinstance(value, list):
+        cleaned = [item for item in value if item is not None and str(item).strip()]
+        if len(cleaned) == len(value):
+            return cleaned, 'list_cleanup', []
+        warnings = [f"Filtered empty/null item: {item!r}" for item in value
+                    if item is None or not str(item).strip()]
+        return cleaned, 'list_cleanup', warnings
+    
+    str_value = str(value).strip()
+    
+    # Handle empty strings
+    if not str_value or str_value.lower() in _EMPTY_TOKENS:
+        return [], 'empty_string', []
+    
+    warnings = []
+    if str_value[0] == '[' and str_value[-1] == ']':
+        # Try JSON parsing first (most reliable)
+        try:
+            parsed = _json_loads(str_value)
+            if isinstance(parsed, list):
+                return [item for item in parsed if item is not None and str(item).strip()], 'json_parse', []
+            warnings.append(f"JSON parsed to non-list: {type(parsed)}")
+        except json.JSONDecodeError as e:
+            warnings.append(f"JSON parse failed: {str(e)}")
+        
+        # Then Python-style list notation, handling quoted strings
+        items = []
+        clean_str = str_value[1:-1]
+        if clean_str.strip():
+            for part in _PYTHON_LIST_SPLIT.split(clean_str):
+                clean_part = part.strip().strip('\'"')
+                if clean_part:
+                    items.append(clean_part)
+        return items, 'python_style', warnings
+    
+    # Handle comma- or semicolon-separated values
+    separator = ',' if ',' in str_value else ';' if ';' in str_value else None
+    if separator:
+        items = [item.strip() for item in str_value.split(separator) if item.strip()]
+        if items:
+            return items, f'csv_split_{separator}', warnings
+    
+    # Handle numeric fields specially
+    if numeric:
+        try:
+            if isinstance(value, (int, float)):
+                numeric_value = value
+            else:
+                numeric_value = float(str_value) if '.' in str_value else int(str_value)
+            return [numeric_value], 'numeric_wrap', warnings
+        except ValueError:
+            warnings.append(f"Failed to convert to numeric: {str_value}")
+    
+    # Last resort: wrap as single item
+    return [str_value], 'single_wrap', warnings
+
+
 def ensure_array(value: Any, field_name: str = 'unknown', 
                  logger: logging.Logger = None) -> ArrayCoercionResult:
     """
-    Robust array coercion with comprehensive audit logging
+    Robust array coercion with audit information
+    
+    Nothing is logged for inputs that are already clean lists or parse
+    cleanly; enable DEBUG on the logger to trace individual coercions.
     
     Args:
         value: Input value to coerce to array
@@ -70,125 +178,52 @@ def ensure_array(value: Any, field_name: str = 'unknown',
     if logger is None:
         logger = array_logger
     
-    original_value = value
-    warnings = []
-    
-    # Log the attempt
-    logger.info(f"Array coercion attempt: field='{field_name}', "
-                f"value={repr(value)}, type={type(value).__name__}")
-    
     try:
-        # Handle None, empty, or null-like values
-        if value is None:
-            return ArrayCoercionResult([], original_value, 'null_handling', field_name)
-        
-        # Handle already-list values
-        if isinstance(value, list):
-            # Validate and clean existing list
-            cleaned = []
-            for item in value:
-                if item is not None and str(item).strip():
-                    cleaned.append(item)
-                else:
-                    warnings.append(f"Filtered empty/null item: {repr(item)}")
-            
-            result = ArrayCoercionResult(cleaned, original_value, 'list_cleanup', field_name, warnings)
-            logger.info(f"List cleanup successful: {len(cleaned)} items")
-            return result
-        
-        # Convert to string for processing
-        str_value = str(value).strip()
-        
-        # Handle empty strings
-        if not str_value or str_value.lower() in ['null', 'none', 'undefined', '[]', '{}']:
-            return ArrayCoercionResult([], original_value, 'empty_string', field_name)
-        
-        # Try JSON parsing first (most reliable)
-        if str_value.startswith('[') and str_value.endswith(']'):
-            try:
-                parsed = json.loads(str_value)
-                if isinstance(parsed, list):
-                    # Clean the parsed list
-                    cleaned = [item for item in parsed if item is not None and str(item).strip()]
-                    result = ArrayCoercionResult(cleaned, original_value, 'json_parse', field_name)
-                    logger.info(f"JSON parse successful: {len(cleaned)} items")
-                    return result
-                else:
-                    warnings.append(f"JSON parsed to non-list: {type(parsed)}")
-            except json.JSONDecodeError as e:
-                warnings.append(f"JSON parse failed: {str(e)}")
-        
-        # Try Python-style list parsing
-        if str_value.startswith('[') and str_value.endswith(']'):
-            try:
-                # Clean up Python-style list notation
-                clean_str = str_value[1:-1]  # Remove brackets
-                # Handle quoted strings
-                items = []
-                if clean_str.strip():
-                    # Split by comma, handling quotes
-                    parts = re.split(r',(?=(?:[^"\']*["\'][^"\']*["\'])*[^"\']*$)', clean_str)
-                    for part in parts:
-                        clean_part = part.strip().strip('\'"')
-                        if clean_part:
-                            items.append(clean_part)
-                
-                result = ArrayCoercionResult(items, original_value, 'python_style', field_name, warnings)
-                logger.info(f"Python-style parse successful: {len(items)} items")
-                return result
-            except Exception as e:
-                warnings.append(f"Python-style parse failed: {str(e)}")
-        
-        # Handle comma-separated values
-        if ',' in str_value or ';' in str_value:
-            # Split by comma or semicolon
-            separator = ',' if ',' in str_value else ';'
-            items = []
-            for item in str_value.split(separator):
-                clean_item = item.strip()
-                if clean_item:
-                    items.append(clean_item)
-            
-            if items:
-                result = ArrayCoercionResult(items, original_value, f'csv_split_{separator}', field_name, warnings)
-                logger.info(f"CSV parse successful: {len(items)} items")
-                return result
-        
-        # Handle numeric fields specially
-        field_type = get_field_type(field_name)
-        if field_type == 'numeric':
-            try:
-                # Try to convert to number
-                if isinstance(value, (int, float)):
-                    numeric_value = value
-                else:
-                    numeric_value = float(str_value) if '.' in str_value else int(str_value)
-                
-                result = ArrayCoercionResult([numeric_value], original_value, 'numeric_wrap', field_name, warnings)
-                logger.info(f"Numeric wrap successful: [{numeric_value}]")
-                return result
-            except ValueError:
-                warnings.append(f"Failed to convert to numeric: {str_value}")
-        
-        # Last resort: wrap as single item
-        if str_value:
-            result = ArrayCoercionResult([str_value], original_value, 'single_wrap', field_name, warnings)
-            logger.info(f"Single wrap successful: ['{str_value}']")
-            return result
-        else:
-            result = ArrayCoercionResult([], original_value, 'empty_fallback', field_name, warnings)
-            logger.info(f"Empty fallback applied")
-            return result
-    
+        coerced, method, warnings = _coerce(value, get_field_type(field_name) == 'numeric')
     except Exception as e:
         # Critical error - log and return empty array to prevent pipeline failure
         error_msg = f"Array coercion critical error: {str(e)}"
         logger.error(error_msg)
-        warnings.append(error_msg)
-        
-        result = ArrayCoercionResult([], original_value, 'error_fallback', field_name, warnings)
+        result = ArrayCoercionResult([], value, 'error_fallback', field_name, [error_msg])
         result.success = False
         return result
+    
+    if logger.isEnabledFor(logging.DEBUG) and _changed(method, warnings):
+        logger.debug(f"Array coercion: field='{field_name}', type={type(value).__name__}, "
+                     f"method={method}, items={len(coerced)}")
+    return ArrayCoercionResult(coerced, value, method, field_name, warnings)
+
+
+def _process_record(record: dict, fields: List[Tuple[str, bool]], logger: logging.Logger,
+                    audit_entries: List[dict], record_index: Optional[int] = None) -> dict:
+    """Coerce the array fields of one record, appending audit entries for changed fields"""
+    processed_record = record.copy()
+    for field_name, numeric in fields:
+        if field_name not in record:
+            continue
+        original = record[field_name]
+        try:
+            coerced, method, warnings = _coerce(original, numeric)
+            success = True
+        except Exception as e:
+            error_msg = f"Array coercion critical error: {str(e)}"
+            logger.error(error_msg)
+            coerced, method, warnings, success = [], 'error_fallback', [error_msg], False
+        processed_record[field_name] = coerced
+        
+        if _changed(method, warnings):
+            entry = _compact_audit(field_name, original, coerced, method, warnings, success)
+            if record_index is not None:
+                entry['record_index'] = record_index
+            audit_entries.append(entry)
+        for warning in warnings:
+            logger.warning(f"Field '{field_name}': {warning}")
+    return processed_record
+
+
+def _array_field_specs() -> List[Tuple[str, bool]]:
+    return [(field_name, get_field_type(field_name) == 'numeric') for field_name in get_array_fields()]
+
 
 def process_record_arrays(record: dict, logger: logging.Logger = None) -> Tuple[dict, List[dict]]:
     """
@@ -199,29 +234,41 @@ def process_record_arrays(record: dict, logger: logging.Logger = None) -> Tuple[
         logger: Optional logger instance
         
     Returns:
-        Tuple of (processed_record, audit_entries)
+        Tuple of (processed_record, audit_entries); only fields whose value
+        was actually rewritten get an audit entry
     """
     if logger is None:
         logger = array_logger
     
-    processed_record = record.copy()
     audit_entries = []
-    array_fields = get_array_fields()
+    processed_record = _process_record(record, _array_field_specs(), logger, audit_entries)
+    return processed_record, audit_entries
+
+
+def process_records_arrays(records: List[dict], logger: logging.Logger = None) -> Tuple[List[dict], List[dict]]:
+    """
+    Process the array fields of a batch of records
     
-    logger.info(f"Processing record with {len(array_fields)} potential array fields")
+    Field lookups are resolved once for the whole batch and a single summary
+    line is logged instead of one per record.
     
-    for field_name in array_fields:
-        if field_name in record:
-            result = ensure_array(record[field_name], field_name, logger)
-            processed_record[field_name] = result.value
-            audit_entries.append(result.to_audit_dict())
-            
-            if result.warnings:
-                for warning in result.warnings:
-                    logger.warning(f"Field '{field_name}': {warning}")
+    Args:
+        records: Dictionary records to process
+        logger: Optional logger instance
+        
+    Returns:
+        Tuple of (processed_records, audit_entries); each audit entry carries
+        the ``record_index`` of the record it belongs to
+    """
+    if logger is None:
+        logger = array_logger
     
-    logger.info(f"Record processing complete: {len(audit_entries)} fields processed")
-    return processed_record, audit_entries
+    fields = _array_field_specs()
+    audit_entries = []
+    processed = [_process_record(record, fields, logger, audit_entries, index)
+                 for index, record in enumerate(records)]
+    logger.info(f"Array coercion: {len(records)} records, {len(audit_entries)} fields rewritten")
+    return processed, audit_entries
 
 def validate_array_fields(record: dict) -> List[str]:
     """
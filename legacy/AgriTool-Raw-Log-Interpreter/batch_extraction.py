@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+OpenAI Batch API mode for bulk re-extraction
+
+Backfills over thousands of raw logs used to send one synchronous request
+per log. BatchExtractionJob renders every extraction prompt into a JSONL
+file, submits it as one asynchronous batch job (separate, larger rate limits
+and lower cost), polls until the job finishes and ingests the answers through
+the agent's usual validate_and_normalize / save_structured_data /
+mark_as_processed path.
+
+Job state is written to BATCH_JOB_DIR as soon as a batch is submitted, so an
+interrupted backfill can be picked up again with ``--resume-batch <id>``.
+Batch jobs always use Chat Completions with OPENAI_MODEL; the Assistants API
+has no batch endpoint.
+"""
+
+import json
+import time
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+# OpenAI accepts at most 50,000 requests per batch input file
+MAX_REQUESTS_PER_BATCH = 50_000
+
+
+class BatchExtractionJob:
+    """Submit raw log extractions as OpenAI batch jobs and ingest the results
+
+    ``agent`` is a LogInterpreterAgent (or anything with the same extraction,
+    validation and persistence methods); its synchronous OpenAI client is
+    used for the Files and Batches endpoints.
+    """
+
+    def __init__(self, agent, job_dir: str = "batch_jobs", poll_interval: float = 60,
+                 timeout: float = 26 * 3600, claim_lease_seconds: int = 25 * 3600,
+                 max_requests: int = MAX_REQUESTS_PER_BATCH):
+        self.agent = agent
+        self.client = agent.openai_client
+        self.logger = agent.logger
+        self.job_dir = Path(job_dir)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.claim_lease_seconds = claim_lease_seconds
+        self.max_requests = max_requests
+
+    def claim_logs(self, limit: int) -> List[Dict[str, Any]]:
+        """Claim unprocessed logs under a lease long enough to outlive the batch window"""
+        try:
+            response = self.agent.supabase.rpc('claim_raw_logs', {
+                'p_worker': self.agent.config.WORKER_ID,
+                'p_limit': limit,
+                'p_lease_seconds': self.claim_lease_seconds,
+                'p_max_attempts': self.agent.config.MAX_CLAIM_ATTEMPTS
+            }).execute()
+            return response.data or []
+        except Exception as e:
+            if getattr(e, 'code', None) not in ('PGRST202', '42883'):
+                raise
+            self.logger.warning("claim_raw_logs not available, selecting unprocessed logs without a lease")
+            response = self.agent.supabase.table('raw_logs').select('*').eq('processed', False).limit(limit).execute()
+            return response.data or []
+
+    def render_requests(self, logs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build one batch request line per log
+
+        Returns ``{"requests": [...], "logs": {log_id: file_refs},
+        "content_reduction": {log_id: stats}, "failed": [log_id, ...]}``; logs
+        whose attachments cannot be read are recorded as errors and left out.
+        """
+        requests, rendered, reductions, failed = [], {}, {}, []
+        for log in logs:
+            log_id = str(log['id'])
+            try:
+                file_content = ""
+                if log.get('file_refs'):
+                    file_content = self.agent.extract_file_content(log['file_refs'])
+                # One request per log, so the reducer has to fit everything in a single chunk
+                chunks, reduction = self.agent.prepare_extraction_chunks(log['payload'], file_content, max_chunks=1)
+                system_prompt, full_content = self.agent.build_extraction_prompt(*chunks[0])
+            except Exception as e:
+                self.agent.log_error(log_id, "BATCH_RENDER_ERROR", str(e))
+                failed.append(log_id)
+                continue
+            requests.append({
+                "custom_id": log_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": self.agent.config.OPENAI_MODEL,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": full_content}
+                    ],
+                    "temperature": 0.1,
+                    "max_tokens": 4000
+                }
+            })
+            rendered[log_id] = log.get('file_refs') or []
+            if reduction:
+                reductions[log_id] = reduction
+        return {"requests": requests, "logs": rendered, "content_reduction": reductions, "failed": failed}
+
+    def _state_path(self, batch_id: str) -> Path:
+        return self.job_dir / f"{batch_id}.json"
+
+    def submit(self, logs: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Upload the rendered requests and create a batch job, returning its saved state"""
+        rendered = self.render_requests(logs)
+        # Logs that could not be rendered go back to the queue instead of waiting out the batch lease
+        if rendered["failed"]:
+            self.agent.release_claims(rendered["failed"])
+        if not rendered["requests"]:
+            return None
+
+        try:
+            self.job_dir.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            input_path = self.job_dir / f"batch_input_{stamp}.jsonl"
+            with open(input_path, "w", encoding="utf-8") as f:
+                for request in rendered["requests"]:
+                    f.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+            with open(input_path, "rb") as f:
+                input_file = self.client.files.create(file=f, purpose="batch")
+            batch = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=BATCH_ENDPOINT,
+                completion_window=COMPLETION_WINDOW,
+                metadata={"worker": str(self.agent.config.WORKER_ID)}
+            )
+        except Exception:
+            self.agent.release_claims(list(rendered["logs"]))
+            raise
+
+        state = {
+            "batch_id": batch.id,
+            # Claims are released under the claiming worker's id, which a resumed run does not share
+            "worker_id": self.agent.config.WORKER_ID,
+            "input_file_id": input_file.id,
+            "input_path": str(input_path),
+            "submitted_at": stamp,
+            "logs": rendered["logs"],
+            "content_reduction": rendered["content_reduction"]
+        }
+        with open(self._state_path(batch.id), "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        self.logger.info(f"📦 Submitted batch {batch.id} with {len(rendered['requests'])} extractions")
+        return state
+
+    def load_state(self, batch_id: str) -> Dict[str, Any]:
+        with open(self._state_path(batch_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def wait(self, batch_id: str):
+        """Poll the batch until it reaches a terminal status"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in TERMINAL_STATUSES:
+                self.logger.info(f"📦 Batch {batch_id} finished with status {batch.status}")
+                return batch
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Batch {batch_id} still {batch.status} after {self.timeout:.0f}s")
+            counts = getattr(batch, "request_counts", None)
+            if counts is not None:
+                self.logger.info(f"⏳ Batch {batch_id} {batch.status}: {counts.completed}/{counts.total} done")
+            time.sleep(self.poll_interval)
+
+    def _read_lines(self, file_id: Optional[str]) -> List[Dict[str, Any]]:
+        if not file_id:
+            return []
+        text = self.client.files.content(file_id).text
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    def _ingest_result(self, log_id: str, file_refs: List[str], result_text: str, batch_id: str,
+                       content_reduction: Optional[Dict[str, Any]] = None) -> bool:
+        """Validate and persist one extraction exactly like the per-log path"""
+        try:
+            extracted = self.agent.parse_extraction_response(result_text)
+            normalized_data, audit = self.agent.validate_and_normalize(extracted)
+            if file_refs:
+                audit['attachment_sources_used'] = file_refs
+            if content_reduction:
+                audit['content_reduction'] = content_reduction
+            audit['openai_batch_id'] = batch_id
+            if not self.agent.save_structured_data(log_id, normalized_data, audit):
+                self.agent.log_error(log_id, "SAVE_ERROR", "Failed to save structured data")
+                return False
+            if not self.agent.mark_as_processed(log_id):
+                self.logger.error(f"Failed to mark log {log_id} as processed")
+                return False
+            return True
+        except Exception as e:
+            self.agent.log_error(log_id, "PROCESSING_ERROR", str(e), {"openai_batch_id": batch_id})
+            return False
+
+    def ingest(self, batch, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Save every answer in the batch output and record per-request failures"""
+        logs = state["logs"]
+        reductions = state.get("content_reduction", {})
+        processed = set()
+        failed = 0
+
+        for line in self._read_lines(getattr(batch, "output_file_id", None)):
+            log_id = line["custom_id"]
+            response = line.get("response") or {}
+            if line.get("error") or response.get("status_code") != 200:
+                message = (line.get("error") or {}).get("message") or f"HTTP {response.get('status_code')}"
+                self.agent.log_error(log_id, "BATCH_REQUEST_ERROR", message, {"openai_batch_id": batch.id})
+                failed += 1
+                continue
+            result_text = response["body"]["choices"][0]["message"]["content"]
+            if self._ingest_result(log_id, logs.get(log_id, []), result_text, batch.id,
+                                   reductions.get(log_id)):
+                processed.add(log_id)
+            else:
+                failed += 1
+
+        for line in self._read_lines(getattr(batch, "error_file_id", None)):
+            message = (line.get("error") or {}).get("message") or "Batch request failed"
+            self.agent.log_error(line["custom_id"], "BATCH_REQUEST_ERROR", message, {"openai_batch_id": batch.id})
+            failed += 1
+
+        # Requests the batch never answered (expired/cancelled) and failures go back to the queue
+        unfinished = [log_id for log_id in logs if log_id not in processed]
+        if unfinished:
+            self.agent.release_claims(unfinished, state.get("worker_id"))
+
+        stats = {"batch_id": batch.id, "status": batch.status, "processed": len(processed),
+                 "failed": failed, "total": len(logs)}
+        self.logger.info(f"📦 Batch {batch.id} ingested: {stats}")
+        return stats
+
+    def resume(self, batch_id: str) -> Dict[str, Any]:
+        """Wait for and ingest a batch submitted by an earlier run"""
+        state = self.load_state(batch_id)
+        return self.ingest(self.wait(batch_id), state)
+
+    def run(self, logs: Optional[List[Dict[str, Any]]] = None, limit: int = 1000) -> Dict[str, Any]:
+        """Submit ``logs`` (or newly claimed ones) in batch jobs, then ingest all of them"""
+        if logs is None:
+            logs = self.claim_logs(limit)
+        states = []
+        for start in range(0, len(logs), self.max_requests):
+            state = self.submit(logs[start:start + self.max_requests])
+            if state is not None:
+                states.append(state)
+
+        totals = {"batches": [], "processed": 0, "failed": 0, "total": 0}
+        for state in states:
+            stats = self.resume(state["batch_id"])
+            totals["batches"].append(stats["batch_id"])
+            for key in ("processed", "failed", "total"):
+                totals[key] += stats[key]
+        return totals
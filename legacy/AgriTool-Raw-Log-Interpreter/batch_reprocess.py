@@ -157,6 +157,30 @@ class BatchReprocessor:
         
         self.logger.info(f"🎯 Batch reprocess complete: {success_count}/{len(failed_logs)} successful")
     
+    def run_openai_batch_reprocess(self, limit: int = 50, dry_run: bool = False):
+        """Re-extract failed logs with one OpenAI Batch API job instead of per-log edge function calls"""
+        failed_logs = self.find_failed_logs(limit)
+        log_ids = list(dict.fromkeys(log['raw_log_id'] for log in failed_logs if log['raw_log_id']))
+        if not log_ids:
+            self.logger.info("✅ No failed logs found to reprocess")
+            return
+        if dry_run:
+            self.logger.info(f"🔍 DRY RUN: Would submit {len(log_ids)} logs as one OpenAI batch job")
+            return
+        
+        from agent import Config, LogInterpreterAgent
+        from batch_extraction import BatchExtractionJob
+        
+        logs = self.supabase.table('raw_logs').select('*').in_('id', log_ids).execute().data or []
+        config = Config()
+        agent = LogInterpreterAgent(config)
+        stats = BatchExtractionJob(
+            agent,
+            job_dir=config.BATCH_JOB_DIR,
+            poll_interval=config.BATCH_API_POLL_INTERVAL
+        ).run(logs=logs)
+        self.logger.info(f"🎯 Batch API reprocess complete: {stats['processed']}/{stats['total']} successful")
+    
     def cleanup_duplicate_extractions(self):
         """Remove duplicate structured entries (keep the latest)"""
         try:
@@ -179,13 +203,18 @@ def main():
     parser.add_argument('--limit', type=int, default=50, help='Max number of logs to process')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be processed without doing it')
     parser.add_argument('--cleanup', action='store_true', help='Also run cleanup of duplicates')
+    parser.add_argument('--batch-api', action='store_true',
+                        help='Re-extract through one OpenAI Batch API job instead of the edge function')
     
     args = parser.parse_args()
     
     reprocessor = BatchReprocessor()
     
     # Run batch reprocessing
-    reprocessor.run_batch_reprocess(limit=args.limit, dry_run=args.dry_run)
+    if args.batch_api:
+        reprocessor.run_openai_batch_reprocess(limit=args.limit, dry_run=args.dry_run)
+    else:
+        reprocessor.run_batch_reprocess(limit=args.limit, dry_run=args.dry_run)
     
     # Optional cleanup
     if args.cleanup and not args.dry_run:
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Pre-LLM content reduction for raw log extraction
+
+call_openai_assistant used to send the whole raw payload plus the text of
+every attachment, so long PDFs overflowed the context window and most tokens
+went to repeated headers, cookie banners and navigation menus. ContentReducer
+cuts the prompt down before it is sent:
+
+1. splits payload and attachment text into paragraphs;
+2. drops paragraphs repeated across tabs/attachments and navigation or
+   legal boilerplate;
+3. when the rest is still over the token budget, ranks paragraphs by how
+   much they say about the canonical fields (amounts, deadlines,
+   eligibility, documents...) and keeps the best ones in original order;
+4. when even the relevant content does not fit, splits it into up to
+   ``max_chunks`` chunks for map-reduce extraction (see merge_extractions).
+
+Kept paragraphs are never rewritten, so verbatim extraction still holds.
+"""
+
+import re
+import json
+import hashlib
+from typing import Any, Dict, List, Tuple
+
+try:
+    from openai_rate_limiter import estimate_tokens as _estimate_message_tokens
+except ImportError:
+    _estimate_message_tokens = None
+
+# Keys in the raw payload kept at the top of every chunk
+PINNED_PAYLOAD_KEYS = ("source_url", "url", "title", "agency", "program", "lang", "language")
+ATTACHMENT_MARKER = re.compile(r"^--- .* ---$")
+SECTION_MARKER = re.compile(r"^\[[^\[\]\n]{1,120}\]$")
+
+NAVIGATION_PATTERNS = re.compile(
+    r"(cookie|mentions l[ée]gales|plan du site|politique de confidentialit[ée]|tous droits r[ée]serv[ée]s|"
+    r"retour en haut|aller au contenu|se connecter|cr[ée]er un compte|newsletter|suivez-nous|partager sur|"
+    r"fil d'ariane|accessibilit[ée] ?: |javascript|accept all|privacy policy|skip to content|sign in)",
+    re.IGNORECASE
+)
+
+# Vocabulary signalling canonical-field content (French and English pages)
+FIELD_KEYWORDS = {
+    "amount": ("montant", "€", "eur", "euros", "plafond", "plancher", "amount", "budget", "enveloppe"),
+    "co_financing_rate": ("taux", "%", "pourcentage", "cofinancement", "co-financing", "rate"),
+    "deadline": ("date limite", "avant le", "jusqu'au", "clôture", "deadline", "échéance", "dépôt"),
+    "eligibility": ("éligib", "eligib", "bénéficiaire", "beneficiar", "condition", "critère", "criteria",
+                    "agriculteur", "exploitation", "entreprise", "farmer"),
+    "documents": ("pièce", "justificatif", "document", "dossier", "formulaire", "attestation", "kbis",
+                  "business plan", "devis"),
+    "application_method": ("demande", "candidature", "déposer", "téléprocédure", "apply", "application",
+                           "plateforme", "en ligne"),
+    "evaluation_criteria": ("sélection", "notation", "évaluation", "priorit", "scoring", "grille"),
+    "payment_terms": ("versement", "paiement", "avance", "acompte", "solde", "payment"),
+    "project_duration": ("durée", "mois", "ans", "duration", "months", "years"),
+    "funding_source": ("feader", "fonds", "fund", "région", "état", "europe", "ue ", "pac"),
+}
+_DATE = re.compile(r"\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b|\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2} (janvier|février|mars|avril|mai|"
+                   r"juin|juillet|août|septembre|octobre|novembre|décembre)\b", re.IGNORECASE)
+_MONEY = re.compile(r"\d[\d\s.,]*\s?(€|eur|euros|k€|m€)", re.IGNORECASE)
+
+DEFAULT_TOKEN_BUDGET = 12000
+DEFAULT_MAX_CHUNKS = 4
+
+
+def count_tokens(text: str) -> int:
+    """Token estimate for ``text`` (tiktoken through the shared limiter when available)"""
+    if _estimate_message_tokens is not None:
+        return _estimate_message_tokens([{"role": "user", "content": text}]) - 7
+    return (len(text) + 3) // 4
+
+
+def _fingerprint(text: str) -> str:
+    normalized = re.sub(r"\W+", " ", text.lower()).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def is_navigation(paragraph: str) -> bool:
+    """Menus, breadcrumbs, cookie banners and footer links"""
+    lines = [line.strip() for line in paragraph.splitlines() if line.strip()]
+    if not lines:
+        return True
+    # A navigation phrase only condemns a short paragraph that carries no
+    # field signal ("se connecter à la plateforme avant le 15/03" is content)
+    if (NAVIGATION_PATTERNS.search(paragraph) and len(paragraph) < 400
+            and relevance_score(paragraph) == 0
+            and not _DATE.search(paragraph) and not _MONEY.search(paragraph)):
+        return True
+    # Three or more bare one-to-three word lines read as a link list; bulleted
+    # or field-related lists (documents, regions...) are content
+    short = sum(1 for line in lines if len(line.split()) <= 3 and not line.startswith(("-", "•", "*", "–"))
+                and not _DATE.search(line) and not _MONEY.search(line))
+    if len(lines) >= 3 and short / len(lines) >= 0.8 and relevance_score(paragraph) == 0:
+        return True
+    return bool(re.fullmatch(r"[\w\s'’-]+(\s*[>|›»/]\s*[\w\s'’-]+){2,}", lines[0])) and len(lines) == 1
+
+
+def relevance_score(paragraph: str) -> float:
+    """Density of canonical-field signals in a paragraph"""
+    lowered = paragraph.lower()
+    hits = sum(1 for words in FIELD_KEYWORDS.values() for word in words if word in lowered)
+    hits += 2 * len(_DATE.findall(paragraph)) + 2 * len(_MONEY.findall(paragraph))
+    fields = sum(1 for words in FIELD_KEYWORDS.values() if any(word in lowered for word in words))
+    return (hits + fields) / (1 + len(paragraph) / 500)
+
+
+def merge_extractions(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reduce step for chunked extraction
+
+    Lists are merged in order without duplicates, other fields keep the first
+    non-empty value (the first chunk carries the pinned page header), and
+    requirements count as extracted if any chunk found them.
+    """
+    merged: Dict[str, Any] = {}
+    for result in results:
+        for field, value in result.items():
+            if value is None or value == "" or value == [] or value == {}:
+                merged.setdefault(field, value)
+                continue
+            current = merged.get(field)
+            if isinstance(value, list):
+                combined = list(current) if isinstance(current, list) else []
+                seen = {json.dumps(item, sort_keys=True, default=str) for item in combined}
+                for item in value:
+                    key = json.dumps(item, sort_keys=True, default=str)
+                    if key not in seen:
+                        seen.add(key)
+                        combined.append(item)
+                merged[field] = combined
+            elif current is None or current == "" or current == [] or current == {}:
+                merged[field] = value
+    statuses = [r.get("requirements_extraction_status") for r in results]
+    if "extracted" in statuses:
+        merged["requirements_extraction_status"] = "extracted"
+    return merged
+
+
+class ContentReducer:
+    """Deduplicate, filter, rank and chunk extraction input under a token budget"""
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET, max_chunks: int = DEFAULT_MAX_CHUNKS):
+        self.token_budget = token_budget
+        self.max_chunks = max_chunks
+
+    def _split_payload(self, payload: str) -> Tuple[str, List[str]]:
+        """Return (pinned header, paragraphs) for a raw log payload"""
+        try:
+            data = json.loads(payload)
+        except (TypeError, ValueError):
+            data = None
+        if not isinstance(data, dict):
+            return "", self._paragraphs(payload or "")
+
+        pinned = {k: data[k] for k in PINNED_PAYLOAD_KEYS if k in data and not isinstance(data[k], (dict, list))}
+        paragraphs = []
+        for key, value in data.items():
+            if key in pinned:
+                continue
+            if isinstance(value, dict):
+                for name, text in value.items():
+                    paragraphs.append(f"[{key}: {name}]")
+                    paragraphs.extend(self._paragraphs(text if isinstance(text, str) else json.dumps(text, ensure_ascii=False)))
+            elif isinstance(value, str) and len(value) > 200:
+                paragraphs.append(f"[{key}]")
+                paragraphs.extend(self._paragraphs(value))
+            else:
+                pinned[key] = value
+        return json.dumps(pinned, ensure_ascii=False), paragraphs
+
+    @staticmethod
+    def _paragraphs(text: str) -> List[str]:
+        blocks = re.split(r"\n\s*\n", text)
+        paragraphs = []
+        for block in blocks:
+            block = block.strip()
+            if not block:
+                continue
+            # Attachment markers stay on their own so section boundaries survive filtering
+            lines = block.splitlines()
+            current = []
+            for line in lines:
+                if ATTACHMENT_MARKER.match(line.strip()):
+                    if current:
+                        paragraphs.append("\n".join(current))
+                        current = []
+                    paragraphs.append(line.strip())
+                else:
+                    current.append(line)
+            if current:
+                paragraphs.append("\n".join(current))
+        return paragraphs
+
+    @staticmethod
+    def _split_oversized(item: Dict[str, Any], budget: int) -> List[Dict[str, Any]]:
+        """Split a paragraph larger than one chunk on line, then sentence boundaries"""
+        if item["marker"] or item["tokens"] <= budget:
+            return [item]
+        units = [u for line in item["text"].splitlines() for u in re.split(r"(?<=[.;!?])\s+", line) if u.strip()]
+        pieces, current, used = [], [], 0
+        for unit in units:
+            tokens = count_tokens(unit) + 1
+            if current and used + tokens > budget:
+                pieces.append(current)
+                current, used = [], 0
+            current.append(unit)
+            used += tokens
+        if current:
+            pieces.append(current)
+        return [{"source": item["source"], "text": "\n".join(piece), "marker": False,
+                 "tokens": count_tokens("\n".join(piece)) + 1} for piece in pieces]
+
+    @staticmethod
+    def _drop_empty_sections(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Remove section/attachment markers left with no content after filtering"""
+        result = []
+        for index, item in enumerate(items):
+            following = items[index + 1] if index + 1 < len(items) else None
+            if item["marker"] and (following is None or following["marker"]):
+                continue
+            result.append(item)
+        return result
+
+    @staticmethod
+    def _pack(items: List[Dict[str, Any]], budget: int) -> List[List[Dict[str, Any]]]:
+        """Fill chunks in order, never ending a chunk on a marker"""
+        chunks = []
+        current, used = [], 0
+        for index, item in enumerate(items):
+            needed = item["tokens"]
+            if item["marker"] and index + 1 < len(items):
+                needed += items[index + 1]["tokens"]
+            if current and used + needed > budget:
+                chunks.append(current)
+                current, used = [], 0
+            current.append(item)
+            used += item["tokens"]
+        if current or not chunks:
+            chunks.append(current)
+        return chunks
+
+    def reduce(self, payload: str, file_content: str) -> Dict[str, Any]:
+        """Return ``{"chunks": [(payload, file_content), ...], "stats": {...}}``"""
+        original_tokens = count_tokens(payload or "") + count_tokens(file_content or "")
+        header, payload_paragraphs = self._split_payload(payload)
+        items = [("payload", p) for p in payload_paragraphs] + [("file", p) for p in self._paragraphs(file_content or "")]
+
+        seen = set()
+        kept = []
+        duplicates = navigation = 0
+        for source, paragraph in items:
+            marker = SECTION_MARKER.match(paragraph) or ATTACHMENT_MARKER.match(paragraph)
+            if not marker:
+                fingerprint = _fingerprint(paragraph)
+                if fingerprint in seen:
+                    duplicates += 1
+                    continue
+                seen.add(fingerprint)
+                if is_navigation(paragraph):
+                    navigation += 1
+                    continue
+            kept.append({"source": source, "text": paragraph, "marker": bool(marker),
+                         "tokens": count_tokens(paragraph) + 1})
+
+        header_tokens = count_tokens(header)
+        budget = max(1, self.token_budget - header_tokens)
+        kept = [piece for item in kept for piece in self._split_oversized(item, budget)]
+        kept = self._drop_empty_sections(kept)
+        total = sum(item["tokens"] for item in kept)
+        dropped = 0
+        if total > budget * self.max_chunks:
+            # Keep the most field-relevant paragraphs that fit in max_chunks chunks
+            ranked = sorted((i for i, item in enumerate(kept) if not item["marker"]),
+                            key=lambda i: relevance_score(kept[i]["text"]), reverse=True)
+            allowance = budget * self.max_chunks - sum(item["tokens"] for item in kept if item["marker"])
+            keep = set()
+            for i in ranked:
+                if kept[i]["tokens"] <= allowance:
+                    keep.add(i)
+                    allowance -= kept[i]["tokens"]
+            dropped = len(ranked) - len(keep)
+            kept = self._drop_empty_sections([item for i, item in enumerate(kept) if item["marker"] or i in keep])
+
+        chunks = self._pack(kept, budget)
+        while len(chunks) > self.max_chunks:
+            # Packing loses some room at chunk boundaries; shed the least relevant paragraph
+            weakest = min((i for i, item in enumerate(kept) if not item["marker"]),
+                          key=lambda i: relevance_score(kept[i]["text"]))
+            kept = self._drop_empty_sections(kept[:weakest] + kept[weakest + 1:])
+            dropped += 1
+            chunks = self._pack(kept, budget)
+
+        rendered = []
+        for chunk in chunks:
+            payload_text = "\n\n".join([header] * bool(header) + [i["text"] for i in chunk if i["source"] == "payload"])
+            file_text = "\n\n".join(i["text"] for i in chunk if i["source"] == "file")
+            rendered.append((payload_text, file_text))
+
+        reduced_tokens = sum(count_tokens(p) + count_tokens(f) for p, f in rendered)
+        return {
+            "chunks": rendered,
+            "stats": {
+                "tokens_before": original_tokens,
+                "tokens_after": reduced_tokens,
+                "duplicate_paragraphs_removed": duplicates,
+                "navigation_paragraphs_removed": navigation,
+                "low_relevance_paragraphs_removed": dropped,
+                "chunks": len(rendered)
+            }
+        }
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI API stub for load-testing the Raw Log Interpreter
+
+Serves just enough of the Chat Completions, Assistants, Files and Batch
+endpoints for the agent's extraction calls, with configurable latency, so
+concurrency can be measured and batch jobs exercised without spending
+tokens. Run directly to compare thread-based and native async extraction
+throughput.
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import asyncio
+import logging
+import argparse
+import itertools
+import threading
+from typing import Any, Dict, List, Optional, Set
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+STUB_API_KEY = "sk-stub"
+
+SAMPLE_EXTRACTION = {
+    "url": "https://example.fr/aides/modernisation",
+    "title": "Aide à la modernisation des exploitations agricoles",
+    "description": "Soutien aux investissements de modernisation.",
+    "amount": [5000, 15000],
+    "region": ["Occitanie"],
+    "sector": ["agriculture"],
+    "documents": [],
+    "deadline": "2025-12-31",
+    "requirements_extraction_status": "not_found"
+}
+
+
+class _BackloggedHTTPServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections under load-test bursts
+    request_queue_size = 512
+    daemon_threads = True
+
+
+class StubOpenAIServer:
+    """Minimal OpenAI API stand-in
+
+    ``POST /v1/chat/completions`` answers after ``latency`` seconds with
+    ``content`` as the assistant message. Assistants runs report
+    ``in_progress`` until ``latency`` seconds after creation, then
+    ``completed``. The first ``throttle_first`` requests get
+    ``429 Too Many Requests`` with a ``retry-after-ms`` header.
+
+    Uploaded batch input files are kept in memory; a batch completes
+    ``latency`` seconds after creation with one chat completion per input
+    line, except lines whose ``custom_id`` is in ``batch_failures``, which
+    land in the error file.
+    """
+
+    def __init__(self, latency: float = 0.2, content: Optional[str] = None, throttle_first: int = 0,
+                 batch_failures: Optional[Set[str]] = None):
+        self.latency = latency
+        self.content = content if content is not None else json.dumps(SAMPLE_EXTRACTION)
+        self.throttle_first = throttle_first
+        self.batch_failures = set(batch_failures or ())
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.throttled = 0
+        self.requests = 0
+        self.completions = 0
+        self.run_polls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.runs: Dict[str, float] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = _BackloggedHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> 'StubOpenAIServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StubOpenAIServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def _next_id(self, prefix: str) -> str:
+        return f"{prefix}_{next(self._ids)}"
+
+    def _completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        prompt_chars = sum(len(str(m.get('content', ''))) for m in body.get('messages', []))
+        return {
+            'id': self._next_id('chatcmpl'),
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': self.content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_chars // 4,
+                'completion_tokens': len(self.content) // 4,
+                'total_tokens': (prompt_chars + len(self.content)) // 4
+            }
+        }
+
+    def _store_file(self, data: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+        file_id = self._next_id('file')
+        with self._lock:
+            self.files[file_id] = data
+        return {'id': file_id, 'object': 'file', 'bytes': len(data), 'created_at': int(time.time()),
+                'filename': filename, 'purpose': purpose, 'status': 'processed'}
+
+    def _batch_state(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Advance a batch by elapsed time, producing its output files on completion"""
+        with self._lock:
+            batch = self.batches.get(batch_id)
+        if batch is None:
+            return None
+        if batch['status'] != 'completed' and time.monotonic() - batch['_created'] >= self.latency:
+            outputs, errors = [], []
+            for line in self.files[batch['input_file_id']].decode('utf-8').splitlines():
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                custom_id = request['custom_id']
+                if custom_id in self.batch_failures:
+                    errors.append({'id': self._next_id('batch_req'), 'custom_id': custom_id, 'response': None,
+                                   'error': {'code': 'server_error', 'message': 'Stub batch failure'}})
+                else:
+                    outputs.append({'id': self._next_id('batch_req'), 'custom_id': custom_id, 'error': None,
+                                    'response': {'status_code': 200, 'request_id': self._next_id('req'),
+                                                 'body': self._completion(request['body'])}})
+            encode = lambda rows: ''.join(json.dumps(r) + '\n' for r in rows).encode('utf-8')
+            batch['output_file_id'] = self._store_file(encode(outputs), 'output.jsonl', 'batch_output')['id'] if outputs else None
+            batch['error_file_id'] = self._store_file(encode(errors), 'errors.jsonl', 'batch_output')['id'] if errors else None
+            batch['request_counts'] = {'total': len(outputs) + len(errors), 'completed': len(outputs),
+                                       'failed': len(errors)}
+            batch['status'] = 'completed'
+            batch['completed_at'] = int(time.time())
+        elif batch['status'] == 'validating':
+            batch['status'] = 'in_progress'
+        return {k: v for k, v in batch.items() if not k.startswith('_')}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _reply_bytes(self, data: bytes) -> None:
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/octet-stream')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _read_body(self) -> Dict[str, Any]:
+                length = int(self.headers.get('Content-Length', 0))
+                raw = self.rfile.read(length)
+                content_type = self.headers.get('Content-Type', '')
+                if content_type.startswith('multipart/form-data'):
+                    message = BytesParser(policy=HTTP).parsebytes(
+                        f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + raw
+                    )
+                    form: Dict[str, Any] = {}
+                    for part in message.iter_parts():
+                        name = part.get_param('name', header='content-disposition')
+                        filename = part.get_filename()
+                        payload = part.get_payload(decode=True)
+                        form[name] = (filename, payload) if filename else payload.decode('utf-8')
+                    return form
+                return json.loads(raw or b'{}')
+
+            def _throttle(self) -> bool:
+                with stub._lock:
+                    stub.requests += 1
+                    throttle = stub.throttled < stub.throttle_first
+                    if throttle:
+                        stub.throttled += 1
+                if throttle:
+                    self._reply(429, {'error': {'message': 'Rate limit reached', 'type': 'requests',
+                                                'code': 'rate_limit_exceeded'}},
+                                {'retry-after-ms': '10', 'x-ratelimit-remaining-requests': '0'})
+                return throttle
+
+            def do_POST(self):
+                path = urlparse(self.path).path.rstrip('/')
+                body = self._read_body()
+                if self._throttle():
+                    return
+                parts = path.split('/')
+
+                if path == '/v1/chat/completions':
+                    with stub._lock:
+                        stub.in_flight += 1
+                        stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    try:
+                        time.sleep(stub.latency)
+                        with stub._lock:
+                            stub.completions += 1
+                        self._reply(200, stub._completion(body))
+                    finally:
+                        with stub._lock:
+                            stub.in_flight -= 1
+                elif path == '/v1/files':
+                    filename, data = body['file']
+                    self._reply(200, stub._store_file(data, filename, body.get('purpose', 'batch')))
+                elif path == '/v1/batches':
+                    batch_id = stub._next_id('batch')
+                    with stub._lock:
+                        stub.batches[batch_id] = {
+                            'id': batch_id, 'object': 'batch', 'endpoint': body['endpoint'],
+                            'input_file_id': body['input_file_id'],
+                            'completion_window': body.get('completion_window', '24h'),
+                            'status': 'validating', 'created_at': int(time.time()),
+                            'metadata': body.get('metadata'), 'output_file_id': None, 'error_file_id': None,
+                            'request_counts': {'total': 0, 'completed': 0, 'failed': 0},
+                            '_created': time.monotonic()
+                        }
+                    self._reply(200, stub._batch_state(batch_id))
+                elif path == '/v1/threads':
+                    self._reply(200, {'id': stub._next_id('thread'), 'object': 'thread',
+                                      'created_at': int(time.time()), 'metadata': {}})
+                elif len(parts) == 5 and parts[2] == 'threads' and parts[4] == 'runs':
+                    run_id = stub._next_id('run')
+                    with stub._lock:
+                        stub.runs[run_id] = time.monotonic()
+                    self._reply(200, self._run(parts[3], run_id, body.get('assistant_id', ''), 'queued'))
+                else:
+                    self._reply(404, {'error': {'message': f'Unknown endpoint {path}'}})
+
+            def do_GET(self):
+                path = urlparse(self.path).path.rstrip('/')
+                if self._throttle():
+                    return
+                parts = path.split('/')
+
+                if len(parts) == 4 and parts[2] == 'batches':
+                    batch = stub._batch_state(parts[3])
+                    if batch is None:
+                        self._reply(404, {'error': {'message': 'No such batch'}})
+                    else:
+                        self._reply(200, batch)
+                elif len(parts) == 5 and parts[2] == 'files' and parts[4] == 'content':
+                    data = stub.files.get(parts[3])
+                    if data is None:
+                        self._reply(404, {'error': {'message': 'No such file'}})
+                    else:
+                        self._reply_bytes(data)
+                elif len(parts) == 6 and parts[2] == 'threads' and parts[4] == 'runs':
+                    with stub._lock:
+                        stub.run_polls += 1
+                        started = stub.runs.get(parts[5])
+                    if started is None:
+                        self._reply(404, {'error': {'message': 'No such run'}})
+                        return
+                    done = time.monotonic() - started >= stub.latency
+                    if done:
+                        with stub._lock:
+                            stub.completions += 1
+                    self._reply(200, self._run(parts[3], parts[5], '', 'completed' if done else 'in_progress'))
+                elif len(parts) == 5 and parts[2] == 'threads' and parts[4] == 'messages':
+                    message_id = stub._next_id('msg')
+                    self._reply(200, {
+                        'object': 'list',
+                        'data': [{
+                            'id': message_id, 'object': 'thread.message', 'created_at': int(time.time()),
+                            'thread_id': parts[3], 'role': 'assistant', 'status': 'completed',
+                            'content': [{'type': 'text', 'text': {'value': stub.content, 'annotations': []}}],
+                            'attachments': [], 'metadata': {}
+                        }],
+                        'first_id': message_id, 'last_id': message_id, 'has_more': False
+                    })
+                else:
+                    self._reply(404, {'error': {'message': f'Unknown endpoint {path}'}})
+
+            def _run(self, thread_id: str, run_id: str, assistant_id: str, status: str) -> Dict[str, Any]:
+                return {'id': run_id, 'object': 'thread.run', 'created_at': int(time.time()),
+                        'thread_id': thread_id, 'assistant_id': assistant_id, 'status': status,
+                        'instructions': '', 'model': 'stub', 'tools': [], 'metadata': {},
+                        'parallel_tool_calls': True}
+
+        return Handler
+
+
+def _load_test_agent(base_url: str, assistant_id: str, poll_initial: float):
+    """Build a LogInterpreterAgent wired to the stub without Supabase or startup checks"""
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from openai import OpenAI, AsyncOpenAI
+    from agent import LogInterpreterAgent
+
+    agent = LogInterpreterAgent.__new__(LogInterpreterAgent)
+    agent.config = types.SimpleNamespace(
+        OPENAI_MODEL='stub', ASSISTANT_ID=assistant_id,
+        ASSISTANT_POLL_INITIAL=poll_initial, ASSISTANT_POLL_MAX=poll_initial * 8,
+        ASSISTANT_RUN_TIMEOUT=600
+    )
+    agent.logger = logging.getLogger('openai_stub_load_test')
+    agent.openai_client = OpenAI(api_key=STUB_API_KEY, base_url=base_url)
+    agent.async_openai_client = AsyncOpenAI(api_key=STUB_API_KEY, base_url=base_url)
+    return agent
+
+
+async def _drive(agent, mode: str, calls: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            payload = f"Raw log {i}"
+            if mode == 'async':
+                return await agent.call_openai_assistant_async(payload, "")
+            return await asyncio.to_thread(agent.call_openai_assistant, payload, "")
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    await agent.async_openai_client.close()
+
+
+def run_load_test(
+    modes: List[str],
+    calls: int = 200,
+    concurrency: int = 64,
+    latency: float = 0.2,
+    assistant_id: str = 'stub',
+    poll_initial: float = 0.05
+) -> List[Dict[str, Any]]:
+    """Run the same number of extraction calls per mode and report throughput"""
+
+    results = []
+    for mode in modes:
+        with StubOpenAIServer(latency=latency) as server:
+            agent = _load_test_agent(server.base_url, assistant_id, poll_initial)
+            started = time.perf_counter()
+            asyncio.run(_drive(agent, mode, calls, concurrency))
+            elapsed = time.perf_counter() - started
+            results.append({
+                'mode': mode,
+                'calls': calls,
+                'concurrency': concurrency,
+                'max_in_flight': server.max_in_flight,
+                'requests': server.requests,
+                'seconds': round(elapsed, 3),
+                'calls_per_sec': round(calls / elapsed, 1) if elapsed else 0.0
+            })
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test extraction calls against a local OpenAI stub")
+    parser.add_argument('--modes', nargs='+', choices=['threads', 'async'], default=['threads', 'async'])
+    parser.add_argument('--calls', type=int, default=200, help='Extraction calls per mode')
+    parser.add_argument('--concurrency', type=int, default=64, help='MAX_CONCURRENT_EXTRACTIONS to emulate')
+    parser.add_argument('--latency', type=float, default=0.2, help='Simulated model latency (s)')
+    parser.add_argument('--assistant-id', default='stub',
+                       help='Use an asst_... id to exercise the Assistants polling path')
+    args = parser.parse_args()
+
+    results = run_load_test(args.modes, args.calls, args.concurrency, args.latency, args.assistant_id)
+
+    print(f"{'mode':>8} {'calls':>6} {'in-flight':>10} {'requests':>9} {'seconds':>8} {'calls/s':>8}")
+    for r in results:
+        print(f"{r['mode']:>8} {r['calls']:>6} {r['max_in_flight']:>10} {r['requests']:>9} "
+              f"{r['seconds']:>8} {r['calls_per_sec']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,7 +6,7 @@ Tests all known edge cases and failure scenarios
 
 import unittest
 import json
-from array_utils import ensure_array, process_record_arrays, validate_array_fields
+from array_utils import ensure_array, process_record_arrays, process_records_arrays, validate_array_fields
 from array_field_config import ARRAY_COERCION_EXAMPLES
 
 class TestArrayUtils(unittest.TestCase):
@@ -157,6 +157,36 @@ class TestArrayUtils(unittest.TestCase):
             self.assertIn('success', entry)
             self.assertTrue(entry['success'])
     
+    def test_clean_lists_are_not_audited(self):
+        """Only fields whose value was rewritten produce audit entries"""
+        record = {'region': ['foo', 'bar'], 'sector': 'agriculture', 'amount': [1000]}
+        
+        processed_record, audit_entries = process_record_arrays(record)
+        
+        self.assertEqual(processed_record['sector'], ['agriculture'])
+        self.assertEqual([entry['field_name'] for entry in audit_entries], ['sector'])
+        self.assertEqual(audit_entries[0]['original_value'], 'agriculture')
+        self.assertNotIn('warnings', audit_entries[0])
+        self.assertFalse(ensure_array(['foo'], 'region').changed)
+        self.assertTrue(ensure_array(['foo', None], 'region').changed)
+    
+    def test_process_records_arrays(self):
+        """Batch processing matches per-record processing and tags audit entries"""
+        records = [
+            {'region': 'foo, bar', 'amount': '1000'},
+            {'region': ['baz'], 'sector': None},
+        ]
+        
+        processed, audit_entries = process_records_arrays(records)
+        
+        self.assertEqual(processed, [process_record_arrays(record)[0] for record in records])
+        self.assertEqual(processed[1]['sector'], [])
+        self.assertEqual(
+            [(entry['record_index'], entry['field_name']) for entry in audit_entries],
+            [(0, 'amount'), (0, 'region'), (1, 'sector')]
+        )
+        self.assertEqual(records[0]['region'], 'foo, bar')  # inputs are not modified
+    
     def test_validate_array_fields(self):
         """Test array field validation"""
         valid_record = {
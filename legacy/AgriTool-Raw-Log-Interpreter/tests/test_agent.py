@@ -4,9 +4,10 @@ Unit tests for the AgriTool Raw Log Interpreter Agent
 """
 
 import pytest
+import asyncio
 import json
 import os
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -15,6 +16,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from agent import Config, LogInterpreterAgent, CANONICAL_FIELDS
+from write_buffer import StructuredWriteBuffer
 
 class TestConfig:
     """Test configuration management"""
@@ -61,12 +63,27 @@ class TestLogInterpreterAgent:
         config.SUPABASE_SERVICE_KEY = 'test-key'
         config.OPENAI_API_KEY = 'test-openai-key'
         config.BATCH_SIZE = 50
+        config.MAX_CONCURRENT_EXTRACTIONS = 4
         config.POLL_INTERVAL = 300
         config.LOG_LEVEL = 'INFO'
         config.SLACK_WEBHOOK_URL = None
         config.SLACK_ALERT_THRESHOLD = 0.25
         config.OPENAI_MODEL = 'gpt-4o-mini'
         config.ASSISTANT_ID = 'SCRAPER_RAW_LOGS_INTERPRETER'
+        config.CLAIM_LEASE_SECONDS = 900
+        config.MAX_CLAIM_ATTEMPTS = 5
+        config.HEARTBEAT_INTERVAL = 300
+        config.WORKER_ID = 'test-worker'
+        config.USE_ASYNC_CLIENTS = False
+        config.ASSISTANT_POLL_INITIAL = 0.01
+        config.ASSISTANT_POLL_MAX = 0.04
+        config.ASSISTANT_RUN_TIMEOUT = 5
+        config.LLM_CACHE_ENABLED = False
+        config.PROMPT_TOKEN_BUDGET = 12000
+        config.MAX_PROMPT_CHUNKS = 4
+        config.WRITE_BUFFER_SIZE = 0
+        config.IN_MEMORY_EXTRACTION_MAX_BYTES = 5 * 1024 * 1024
+        config.DOCUMENT_CACHE_SIZE = 16
         return config
     
     @pytest.fixture
@@ -82,20 +99,83 @@ class TestLogInterpreterAgent:
             return agent
     
     def test_fetch_unprocessed_logs(self, mock_agent):
-        """Test fetching unprocessed logs"""
-        # Mock Supabase response
+        """Test claiming a batch of unprocessed logs"""
+        # Mock claim RPC response
         mock_response = Mock()
         mock_response.data = [
             {'id': 'test-id-1', 'payload': 'test payload 1', 'file_refs': []},
             {'id': 'test-id-2', 'payload': 'test payload 2', 'file_refs': ['file1.pdf']}
         ]
-        mock_agent.supabase.table().select().eq().limit().execute.return_value = mock_response
+        mock_agent.supabase.rpc.return_value.execute.return_value = mock_response
         
         logs = mock_agent.fetch_unprocessed_logs()
         
         assert len(logs) == 2
         assert logs[0]['id'] == 'test-id-1'
         assert logs[1]['file_refs'] == ['file1.pdf']
+        mock_agent.supabase.rpc.assert_called_once_with('claim_raw_logs', {
+            'p_worker': 'test-worker', 'p_limit': 50, 'p_lease_seconds': 900, 'p_max_attempts': 5
+        })
+        assert mock_agent._claimed_ids == {'test-id-1', 'test-id-2'}
+    
+    def test_fetch_unprocessed_logs_without_claim_rpc(self, mock_agent):
+        """Test fallback to a plain select when claim_raw_logs is not deployed"""
+        missing = Exception("Could not find the function public.claim_raw_logs")
+        missing.code = 'PGRST202'
+        mock_agent.supabase.rpc.return_value.execute.side_effect = missing
+        mock_response = Mock()
+        mock_response.data = [{'id': 'test-id-1', 'payload': 'test payload 1', 'file_refs': []}]
+        mock_agent.supabase.table().select().eq().limit().execute.return_value = mock_response
+        
+        logs = mock_agent.fetch_unprocessed_logs()
+        
+        assert [log['id'] for log in logs] == ['test-id-1']
+        assert mock_agent.claims_supported is False
+        assert mock_agent._claimed_ids == set()
+    
+    def test_claimed_log_skips_advisory_lock(self, mock_agent):
+        """Test that claimed logs are processed without per-log lock round-trips"""
+        mock_agent._claimed_ids.add('test-log-id')
+        mock_agent.acquire_lock = Mock()
+        mock_agent.release_lock = Mock()
+        mock_agent.call_openai_assistant = Mock(return_value={'title': 'Test Subsidy'})
+        mock_agent.save_structured_data = Mock(return_value=True)
+        mock_agent.mark_as_processed = Mock(return_value=True)
+        
+        result = mock_agent.process_single_log({'id': 'test-log-id', 'payload': 'p', 'file_refs': []})
+        
+        assert result is True
+        mock_agent.acquire_lock.assert_not_called()
+        mock_agent.release_lock.assert_not_called()
+        assert 'test-log-id' not in mock_agent._claimed_ids
+    
+    def test_failed_claims_keep_their_lease(self, mock_agent):
+        """Test that a failing log is not handed straight back to the queue"""
+        logs = [{'id': 'ok', 'payload': 'p', 'file_refs': []}, {'id': 'poison', 'payload': 'p', 'file_refs': []}]
+        mock_agent.fetch_unprocessed_logs = Mock(side_effect=lambda: mock_agent._claimed_ids.update(['ok', 'poison']) or logs)
+        mock_agent.process_single_log = Mock(side_effect=lambda log: mock_agent._claimed_ids.discard('ok') or log['id'] == 'ok')
+        mock_agent.release_claims = Mock(return_value=0)
+        
+        stats = asyncio.run(mock_agent.process_batch_async())
+        
+        assert stats == {'processed': 1, 'failed': 1, 'total': 2}
+        mock_agent.release_claims.assert_not_called()
+        assert mock_agent._claimed_ids == set()
+    
+    def test_run_continuous_sleeps_when_a_full_batch_makes_no_progress(self, mock_agent):
+        """Test that a batch of failing logs does not trigger an immediate re-claim"""
+        mock_agent.config.BATCH_SIZE = 2
+        batches = iter([{'processed': 2, 'failed': 0, 'total': 2}, {'processed': 0, 'failed': 2, 'total': 2}])
+        
+        async def next_batch():
+            return next(batches)
+        
+        mock_agent.process_batch_async = next_batch
+        with patch('agent.time.sleep', side_effect=KeyboardInterrupt) as sleep:
+            mock_agent.run_continuous()
+        
+        # The productive batch claimed again at once; the unproductive one waited for the poll interval
+        sleep.assert_called_once_with(300)
     
     def test_validate_and_normalize_complete_data(self, mock_agent):
         """Test validation with complete valid data"""
@@ -180,118 +260,192 @@ The extraction is complete.'''
         assert result['url'] == 'https://example.com'
         assert result['amount'] == 5000
     
+    def test_call_openai_assistant_async_polls_with_backoff(self, mock_agent):
+        """Test async Assistants path polls without blocking a thread"""
+        mock_agent.config.ASSISTANT_ID = 'asst_test'
+        client = Mock()
+        client.beta.threads.create = AsyncMock(return_value=Mock(id='thread_1'))
+        client.beta.threads.runs.create = AsyncMock(return_value=Mock(id='run_1', status='queued'))
+        client.beta.threads.runs.retrieve = AsyncMock(side_effect=[
+            Mock(id='run_1', status='in_progress'),
+            Mock(id='run_1', status='completed')
+        ])
+        message = MagicMock()
+        message.content[0].text.value = json.dumps({'title': 'Test Subsidy'})
+        client.beta.threads.messages.list = AsyncMock(return_value=Mock(data=[message]))
+        mock_agent.async_openai_client = client
+        
+        with patch('agent.asyncio.sleep', new=AsyncMock()) as sleep:
+            result = asyncio.run(mock_agent.call_openai_assistant_async('test payload', ''))
+        
+        assert result.pop('_content_reduction')['chunks'] == 1
+        assert result == {'title': 'Test Subsidy'}
+        assert [call.args[0] for call in sleep.await_args_list] == [0.01, 0.02]
+    
     def test_process_single_log_success(self, mock_agent):
-        """Test successful processing of a single log"""
+        """Test a claimed log is extracted, saved and leaves the claim set"""
         log_data = {
             'id': 'test-log-id',
             'payload': 'test payload',
             'file_refs': []
         }
-        
-        # Mock all dependencies
-        mock_agent.acquire_lock.return_value = True
-        mock_agent.extract_file_content.return_value = ''
-        mock_agent.call_openai_assistant.return_value = {field: f'test_{field}' for field in CANONICAL_FIELDS}
-        mock_agent.save_structured_data.return_value = True
-        mock_agent.mark_as_processed.return_value = True
-        mock_agent.release_lock.return_value = True
+        mock_agent._claimed_ids.add('test-log-id')
+        mock_agent.acquire_lock = Mock()
+        mock_agent.call_openai_assistant = Mock(return_value={'title': 'Test Subsidy'})
+        mock_agent.save_structured_data = Mock(return_value=True)
+        mock_agent.mark_as_processed = Mock(return_value=True)
         
         result = mock_agent.process_single_log(log_data)
         
         assert result is True
-        mock_agent.acquire_lock.assert_called_once_with('test-log-id')
-        mock_agent.release_lock.assert_called_once_with('test-log-id')
+        mock_agent.acquire_lock.assert_not_called()
+        mock_agent.save_structured_data.assert_called_once()
+        mock_agent.mark_as_processed.assert_called_once_with('test-log-id')
+        assert mock_agent._claimed_ids == set()
     
-    def test_process_single_log_lock_failed(self, mock_agent):
-        """Test processing fails when lock cannot be acquired"""
-        log_data = {
-            'id': 'test-log-id',
-            'payload': 'test payload',
-            'file_refs': []
-        }
+    def test_heartbeat_renews_claims_and_forgets_lost_ones(self, mock_agent):
+        """Test the heartbeat extends in-flight leases and drops claims taken over by others"""
+        mock_agent._claimed_ids.update(['log1', 'log2'])
+        renewals = []
         
-        mock_agent.acquire_lock.return_value = False
+        def renew(log_ids):
+            renewals.append(sorted(log_ids))
+            return {'log1'}
         
-        result = mock_agent.process_single_log(log_data)
+        mock_agent.renew_claims = renew
         
-        assert result is False
-        mock_agent.acquire_lock.assert_called_once_with('test-log-id')
-        mock_agent.release_lock.assert_not_called()
+        async def run():
+            with patch('agent.asyncio.sleep', new=AsyncMock(side_effect=[None, asyncio.CancelledError()])):
+                with pytest.raises(asyncio.CancelledError):
+                    await mock_agent._heartbeat_claims()
+        
+        asyncio.run(run())
+        
+        assert renewals == [['log1', 'log2']]
+        assert mock_agent._claimed_ids == {'log1'}
     
     def test_process_batch_success(self, mock_agent):
-        """Test batch processing with successful results"""
-        # Mock logs
-        mock_agent.fetch_unprocessed_logs.return_value = [
+        """Test a fully processed batch has nothing left to release"""
+        logs = [
             {'id': 'log1', 'payload': 'payload1', 'file_refs': []},
             {'id': 'log2', 'payload': 'payload2', 'file_refs': []}
         ]
+        mock_agent.supabase.rpc.return_value.execute.return_value = Mock(data=logs)
+        
+        def process(log_data):
+            mock_agent._claimed_ids.discard(log_data['id'])
+            return True
         
-        # Mock successful processing
-        mock_agent.process_single_log.return_value = True
+        mock_agent.process_single_log = Mock(side_effect=process)
+        mock_agent.release_claims = Mock(return_value=0)
         
         stats = mock_agent.process_batch()
         
-        assert stats['total'] == 2
-        assert stats['processed'] == 2
-        assert stats['failed'] == 0
+        assert stats == {'processed': 2, 'failed': 0, 'total': 2}
+        mock_agent.release_claims.assert_not_called()
+        assert mock_agent._claimed_ids == set()
     
     def test_process_batch_high_failure_rate(self, mock_agent):
-        """Test batch processing with high failure rate triggers alert"""
-        # Mock logs
-        mock_agent.fetch_unprocessed_logs.return_value = [
+        """Test failed logs keep their lease and a high failure rate triggers an alert"""
+        logs = [
             {'id': 'log1', 'payload': 'payload1', 'file_refs': []},
             {'id': 'log2', 'payload': 'payload2', 'file_refs': []}
         ]
-        
-        # Mock failures
-        mock_agent.process_single_log.return_value = False
+        mock_agent.supabase.rpc.return_value.execute.return_value = Mock(data=logs)
+        mock_agent.process_single_log = Mock(return_value=False)
+        mock_agent.release_claims = Mock(return_value=0)
         mock_agent.send_alert = Mock()
         
         stats = mock_agent.process_batch()
         
-        assert stats['total'] == 2
-        assert stats['processed'] == 0
-        assert stats['failed'] == 2
+        assert stats == {'processed': 0, 'failed': 2, 'total': 2}
+        # Releasing would let the next batch re-claim the failures immediately
+        mock_agent.release_claims.assert_not_called()
+        assert mock_agent._claimed_ids == set()
         mock_agent.send_alert.assert_called_once()
     
+    def test_interrupted_batch_releases_unattempted_claims(self, mock_agent):
+        """Test claims go back to the queue when the batch stops before processing them"""
+        logs = [
+            {'id': 'log1', 'payload': 'payload1', 'file_refs': []},
+            {'id': 'log2', 'payload': 'payload2', 'file_refs': []}
+        ]
+        mock_agent.supabase.rpc.return_value.execute.return_value = Mock(data=logs)
+        mock_agent.release_claims = Mock(return_value=2)
+        
+        async def run():
+            batch = asyncio.create_task(mock_agent.process_batch_async())
+            
+            async def interrupt(log_data):
+                batch.cancel()
+                await asyncio.sleep(10)
+            
+            mock_agent.process_single_log_async = interrupt
+            with pytest.raises(asyncio.CancelledError):
+                await batch
+        
+        asyncio.run(run())
+        
+        mock_agent.release_claims.assert_called_once()
+        assert sorted(mock_agent.release_claims.call_args.args[0]) == ['log1', 'log2']
+        assert mock_agent._claimed_ids == set()
+    
     def test_extract_file_content_pdf(self, mock_agent):
         """Test PDF file content extraction"""
         with patch('agent.PythonDocumentExtractor') as mock_extractor_class, \
              patch('agent.requests') as mock_requests:
             
-            # Mock file download
-            mock_requests.get.return_value.content = b'fake pdf content'
+            # Mock file download through the pooled session
+            mock_requests.Session.return_value.get.return_value.content = b'fake pdf content'
             
-            # Mock Python document extractor
+            # Mock Python document extractor (small files are extracted in memory)
             mock_extractor = mock_extractor_class.return_value
-            mock_extractor.extract_document_text.return_value = {
-                'success': True,
-                'text_content': 'Extracted PDF text',
-                'metadata': {'method': 'pdfplumber', 'page_count': 1}
-            }
+            mock_extractor.extract_document_bytes.return_value = Mock(
+                success=True,
+                text_content='Extracted PDF text',
+                extraction_method='pdf',
+                metadata={'method': 'pdfplumber', 'page_count': 1},
+                error=None
+            )
             
             content = mock_agent.extract_file_content(['https://example.com/test.pdf'])
             
             assert 'Extracted PDF text' in content
             assert 'test.pdf' in content
+            
+            # A second log with the same attachment reuses the extraction
+            assert mock_agent.extract_file_content(['https://example.com/test.pdf']) == content
+            mock_extractor.extract_document_bytes.assert_called_once()
+            mock_extractor_class.assert_called_once()
     
     def test_save_structured_data(self, mock_agent):
-        """Test saving structured data to database"""
-        normalized_data = {
-            'title': 'Test Subsidy',
-            'amount': Decimal('1000'),
-            'deadline': date(2025, 12, 31)
-        }
+        """Test claimed results are buffered and written with one bulk insert and update"""
+        mock_agent.write_buffer = StructuredWriteBuffer(mock_agent, max_rows=2)
+        mock_agent._claimed_ids.update(['log1', 'log2'])
         audit = {'missing_fields': [], 'validation_notes': []}
+        table = mock_agent.supabase.table.return_value
+        table.insert.return_value.execute.return_value = Mock(data=[{'raw_log_id': 'log1'}, {'raw_log_id': 'log2'}])
+        table.update.return_value.in_.return_value.execute.return_value = Mock(data=[{'id': 'log1'}, {'id': 'log2'}])
         
-        # Mock successful insertion
-        mock_response = Mock()
-        mock_response.data = [{'id': 'new-record-id'}]
-        mock_agent.supabase.table().insert().execute.return_value = mock_response
+        for log_id in ['log1', 'log2']:
+            row = mock_agent.prepare_structured_insert(log_id, {
+                'title': 'Test Subsidy',
+                'amount': [Decimal('1000')],
+                'deadline': date(2025, 12, 31)
+            }, audit)
+            full = mock_agent.write_buffer.add(log_id, row)
         
-        result = mock_agent.save_structured_data('test-log-id', normalized_data, audit)
+        assert full is True
+        table.insert.assert_not_called()
         
-        assert result is True
+        result = mock_agent.flush_writes()
+        
+        assert result == {'processed': ['log1', 'log2'], 'failed': []}
+        [rows], _ = table.insert.call_args
+        assert [row['raw_log_id'] for row in rows] == ['log1', 'log2']
+        assert rows[0]['amount'] == [1000.0] and rows[0]['deadline'] == '2025-12-31'
+        table.update.return_value.in_.assert_called_once_with('id', ['log1', 'log2'])
+        assert mock_agent._claimed_ids == set()
     
     def test_mark_as_processed(self, mock_agent):
         """Test marking log as processed"""
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for OpenAI Batch API extraction against the local stub
+"""
+
+import json
+import os
+import sys
+import types
+import logging
+from unittest.mock import Mock
+
+import pytest
+from openai import OpenAI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from batch_extraction import BatchExtractionJob
+from openai_stub_server import SAMPLE_EXTRACTION, STUB_API_KEY, StubOpenAIServer
+
+
+def _fake_agent(base_url):
+    """Agent stand-in exposing only what BatchExtractionJob uses"""
+    agent = types.SimpleNamespace()
+    agent.config = types.SimpleNamespace(OPENAI_MODEL='stub', WORKER_ID='test-worker')
+    agent.logger = logging.getLogger('batch_extraction_test')
+    agent.openai_client = OpenAI(api_key=STUB_API_KEY, base_url=base_url)
+    agent.extract_file_content = Mock(return_value='attachment text')
+    agent.prepare_extraction_chunks = lambda payload, file_content, max_chunks=None: ([(payload, file_content)], None)
+    agent.build_extraction_prompt = lambda payload, file_content: ('system', f'{payload}\n{file_content}')
+    agent.parse_extraction_response = json.loads
+    agent.validate_and_normalize = Mock(side_effect=lambda data: (dict(data), {}))
+    agent.save_structured_data = Mock(return_value=True)
+    agent.mark_as_processed = Mock(return_value=True)
+    agent.log_error = Mock()
+    agent.release_claims = Mock(return_value=1)
+    return agent
+
+
+def test_batch_job_round_trip(tmp_path):
+    """Logs are rendered to JSONL, submitted once and ingested through the save path"""
+    logs = [
+        {'id': 'log-1', 'payload': 'payload 1', 'file_refs': ['https://example.fr/a.pdf']},
+        {'id': 'log-2', 'payload': 'payload 2'},
+        {'id': 'log-3', 'payload': 'payload 3'},
+    ]
+
+    with StubOpenAIServer(latency=0.05, batch_failures={'log-3'}) as server:
+        agent = _fake_agent(server.base_url)
+        job = BatchExtractionJob(agent, job_dir=str(tmp_path), poll_interval=0.02)
+        stats = job.run(logs=logs)
+
+        # no per-log chat completions, just a single batch job
+        assert server.completions == 0
+        assert len(server.batches) == 1
+
+    assert stats['processed'] == 2
+    assert stats['failed'] == 1
+    assert stats['total'] == 3
+    saved = {call.args[0]: call.args for call in agent.save_structured_data.call_args_list}
+    assert set(saved) == {'log-1', 'log-2'}
+    assert saved['log-1'][1]['title'] == SAMPLE_EXTRACTION['title']
+    assert saved['log-1'][2]['attachment_sources_used'] == ['https://example.fr/a.pdf']
+    assert agent.log_error.call_args.args[:2] == ('log-3', 'BATCH_REQUEST_ERROR')
+    agent.release_claims.assert_called_once_with(['log-3'], 'test-worker')
+
+    state = json.loads((tmp_path / f"{stats['batches'][0]}.json").read_text())
+    assert set(state['logs']) == {'log-1', 'log-2', 'log-3'}
+    lines = open(state['input_path'], encoding='utf-8').read().splitlines()
+    assert json.loads(lines[0])['body']['messages'][1]['content'] == 'payload 1\nattachment text'
+
+
+def test_resume_ingests_an_already_submitted_batch(tmp_path):
+    """A batch submitted by an interrupted run is picked up from its state file"""
+    with StubOpenAIServer(latency=0.05) as server:
+        agent = _fake_agent(server.base_url)
+        first = BatchExtractionJob(agent, job_dir=str(tmp_path), poll_interval=0.02)
+        state = first.submit([{'id': 'log-1', 'payload': 'payload 1'}])
+
+        resumed = BatchExtractionJob(_fake_agent(server.base_url), job_dir=str(tmp_path), poll_interval=0.02)
+        stats = resumed.resume(state['batch_id'])
+
+    assert stats == {'batch_id': state['batch_id'], 'status': 'completed', 'processed': 1, 'failed': 0, 'total': 1}
+    resumed.agent.mark_as_processed.assert_called_once_with('log-1')
+
+
+def test_resume_releases_claims_as_the_submitting_worker(tmp_path):
+    """A resumed run in another process releases unanswered logs under the original claimer"""
+    with StubOpenAIServer(latency=0.05, batch_failures={'log-2'}) as server:
+        first = BatchExtractionJob(_fake_agent(server.base_url), job_dir=str(tmp_path), poll_interval=0.02)
+        state = first.submit([{'id': 'log-1', 'payload': 'payload 1'}, {'id': 'log-2', 'payload': 'payload 2'}])
+
+        other = _fake_agent(server.base_url)
+        other.config.WORKER_ID = 'other-host-4242'
+        resumed = BatchExtractionJob(other, job_dir=str(tmp_path), poll_interval=0.02)
+        resumed.resume(state['batch_id'])
+
+    other.release_claims.assert_called_once_with(['log-2'], 'test-worker')
+
+
+def test_unrendered_and_unsubmitted_logs_are_released(tmp_path):
+    """Render errors and a failed upload give the claims back instead of holding them for the batch lease"""
+    agent = _fake_agent('http://127.0.0.1:9/v1')
+    agent.extract_file_content = Mock(side_effect=RuntimeError('download failed'))
+    agent.openai_client = Mock()
+    agent.openai_client.files.create.side_effect = ConnectionError('upload failed')
+    job = BatchExtractionJob(agent, job_dir=str(tmp_path))
+
+    with pytest.raises(ConnectionError):
+        job.submit([{'id': 'log-1', 'payload': 'payload 1', 'file_refs': ['https://example.fr/a.pdf']},
+                    {'id': 'log-2', 'payload': 'payload 2'}])
+
+    assert [call.args[0] for call in agent.release_claims.call_args_list] == [['log-1'], ['log-2']]
+    assert agent.log_error.call_args.args[:2] == ('log-1', 'BATCH_RENDER_ERROR')
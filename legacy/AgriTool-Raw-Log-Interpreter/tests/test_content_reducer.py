@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for pre-LLM content reduction and chunk merging
+"""
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from content_reducer import ContentReducer, is_navigation, merge_extractions
+
+RELEVANT = "Le montant de l'aide est plafonné à 50 000 € par exploitation. Date limite de dépôt : 15/03/2025."
+FILLER = " ".join(["Texte général sans rapport avec le dispositif présenté ici."] * 40)
+FOOTER = "Mentions légales | Plan du site | Cookies"
+
+
+def _payload():
+    return json.dumps({
+        "title": "Aide à l'investissement",
+        "source_url": "https://example.fr/aide",
+        "tabs": {
+            "presentation": f"{RELEVANT}\n\n{FOOTER}",
+            "conditions": f"Bénéficiaires éligibles : exploitations agricoles.\n\n{FOOTER}",
+        },
+    }, ensure_ascii=False)
+
+
+def test_small_input_drops_boilerplate_and_keeps_content_verbatim():
+    file_content = f"--- Content from a.pdf ---\n{RELEVANT}\n\n{FOOTER}"
+    result = ContentReducer().reduce(_payload(), file_content)
+    stats = result["stats"]
+
+    assert stats["chunks"] == 1
+    assert stats["duplicate_paragraphs_removed"] == 3
+    assert stats["navigation_paragraphs_removed"] == 1
+    assert stats["tokens_after"] < stats["tokens_before"]
+    payload_text, file_text = result["chunks"][0]
+    assert RELEVANT in payload_text and "Aide à l'investissement" in payload_text
+    assert FOOTER not in payload_text
+    # the attachment only repeated the page, so its marker goes too
+    assert file_text == ""
+
+
+
+def test_navigation_phrases_do_not_drop_field_content():
+    application = "Pour déposer votre demande, se connecter à la plateforme en ligne avant le 15/03/2025."
+    assert not is_navigation(application)
+    assert not is_navigation("Newsletter : aide plafonnée à 20 000 €")
+    assert is_navigation(FOOTER)
+    assert is_navigation("Se connecter | Créer un compte")
+
+    payload = json.dumps({"title": "Aide", "tabs": {"demarches": f"{application}\n\n{FOOTER}"}},
+                         ensure_ascii=False)
+    result = ContentReducer().reduce(payload, "")
+    assert result["stats"]["navigation_paragraphs_removed"] == 1
+    assert application in result["chunks"][0][0]
+
+
+def test_oversized_input_is_ranked_and_capped_at_max_chunks():
+    payload = json.dumps({"title": "Aide", "body": "\n\n".join(
+        [f"{FILLER} {i}" for i in range(12)] + [RELEVANT])}, ensure_ascii=False)
+    reducer = ContentReducer(token_budget=400, max_chunks=2)
+    result = reducer.reduce(payload, "")
+    stats = result["stats"]
+
+    assert stats["chunks"] == len(result["chunks"]) <= 2
+    assert stats["low_relevance_paragraphs_removed"] > 0
+    assert any(RELEVANT in chunk_payload for chunk_payload, _ in result["chunks"])
+    for chunk_payload, _ in result["chunks"]:
+        assert chunk_payload.startswith('{"title": "Aide"}')
+        assert chunk_payload.rstrip().split("\n\n")[-1] != "[body]"
+
+
+def test_merge_extractions_unions_lists_and_keeps_first_scalar():
+    merged = merge_extractions([
+        {"title": "Aide", "amount": [5000], "documents": ["Kbis"], "deadline": None,
+         "requirements_extraction_status": "not_found"},
+        {"title": "Autre", "amount": [5000, 15000], "documents": ["Devis"], "deadline": "2025-03-15",
+         "requirements_extraction_status": "extracted"},
+    ])
+    assert merged == {"title": "Aide", "amount": [5000, 15000], "documents": ["Kbis", "Devis"],
+                      "deadline": "2025-03-15", "requirements_extraction_status": "extracted"}
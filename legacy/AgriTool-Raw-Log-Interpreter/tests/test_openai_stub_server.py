@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the local OpenAI stub used in extraction load tests
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+from openai import AsyncOpenAI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from openai_stub_server import SAMPLE_EXTRACTION, STUB_API_KEY, StubOpenAIServer
+
+
+def test_async_chat_completions_run_concurrently():
+    """AsyncOpenAI calls overlap instead of queuing behind one another"""
+
+    async def run(base_url):
+        client = AsyncOpenAI(api_key=STUB_API_KEY, base_url=base_url)
+        try:
+            responses = await asyncio.gather(*(
+                client.chat.completions.create(model='stub', messages=[{'role': 'user', 'content': f'log {i}'}])
+                for i in range(20)
+            ))
+        finally:
+            await client.close()
+        return responses
+
+    with StubOpenAIServer(latency=0.2) as server:
+        responses = asyncio.run(run(server.base_url))
+
+        assert server.completions == 20
+        assert server.max_in_flight == 20
+    assert json.loads(responses[0].choices[0].message.content) == SAMPLE_EXTRACTION
+
+
+def test_assistant_runs_complete_after_latency():
+    """Runs stay in progress until the simulated latency elapses"""
+
+    async def run(base_url):
+        client = AsyncOpenAI(api_key=STUB_API_KEY, base_url=base_url)
+        try:
+            thread = await client.beta.threads.create(messages=[{'role': 'user', 'content': 'log'}])
+            run = await client.beta.threads.runs.create(thread_id=thread.id, assistant_id='asst_stub')
+            statuses = [run.status]
+            while run.status != 'completed':
+                await asyncio.sleep(0.05)
+                run = await client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
+                statuses.append(run.status)
+            messages = await client.beta.threads.messages.list(thread_id=thread.id)
+        finally:
+            await client.close()
+        return statuses, messages.data[0].content[0].text.value
+
+    with StubOpenAIServer(latency=0.2) as server:
+        statuses, text = asyncio.run(run(server.base_url))
+
+    assert statuses[0] == 'queued'
+    assert 'in_progress' in statuses
+    assert json.loads(text) == SAMPLE_EXTRACTION
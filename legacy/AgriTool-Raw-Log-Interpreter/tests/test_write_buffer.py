@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the write-behind buffer of structured extraction results
+"""
+
+import os
+import sys
+import types
+import logging
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from write_buffer import StructuredWriteBuffer
+
+
+class FakeQuery:
+    """Just enough of the PostgREST builder: insert/update, in_ and execute"""
+
+    def __init__(self, db, table):
+        self.db, self.table = db, table
+        self.rows, self.update_values, self.ids = None, None, None
+
+    def insert(self, rows):
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, values):
+        self.update_values = values
+        return self
+
+    def in_(self, column, values):
+        self.ids = list(values)
+        return self
+
+    def execute(self):
+        self.db.calls.append((self.table, 'insert' if self.rows is not None else 'update'))
+        if self.rows is not None:
+            # PostgREST rejects the whole statement when any row is bad
+            if any(row.get('title') == 'bad' for row in self.rows):
+                raise RuntimeError('invalid input syntax')
+            self.db.tables[self.table].extend(self.rows)
+            # Rows hidden from the caller (e.g. by a row level security policy) are written but not returned
+            return types.SimpleNamespace(data=[row for row in self.rows if row.get('title') != 'hidden'])
+        return types.SimpleNamespace(data=[{'id': log_id} for log_id in self.ids])
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.calls = []
+        self.tables = {'subsidies_structured': [], 'raw_logs': []}
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def _agent():
+    agent = types.SimpleNamespace()
+    agent.logger = logging.getLogger('write_buffer_test')
+    agent.supabase = FakeSupabase()
+    agent._processed_update = lambda: {'processed': True}
+    agent.mark_as_processed = Mock(return_value=True)
+    agent.log_error = Mock()
+    return agent
+
+
+def test_flush_writes_all_rows_in_two_round_trips():
+    agent = _agent()
+    buffer = StructuredWriteBuffer(agent, max_rows=3)
+
+    assert buffer.add('log-1', {'raw_log_id': 'log-1', 'title': 'A'}) is False
+    assert buffer.add('log-2', {'raw_log_id': 'log-2', 'title': 'B'}) is False
+    assert buffer.add('log-3', {'raw_log_id': 'log-3', 'title': 'C'}) is True
+
+    result = buffer.flush()
+
+    assert result == {'processed': ['log-1', 'log-2', 'log-3'], 'failed': []}
+    assert agent.supabase.calls == [('subsidies_structured', 'insert'), ('raw_logs', 'update')]
+    assert buffer.round_trips == 2
+    assert len(buffer) == 0
+    agent.mark_as_processed.assert_not_called()
+
+
+def test_rejected_batch_is_retried_row_by_row():
+    agent = _agent()
+    buffer = StructuredWriteBuffer(agent)
+    buffer.add('log-1', {'raw_log_id': 'log-1', 'title': 'A'})
+    buffer.add('log-2', {'raw_log_id': 'log-2', 'title': 'bad'})
+    buffer.add('log-3', {'raw_log_id': 'log-3', 'title': 'C'})
+
+    result = buffer.flush()
+
+    assert result == {'processed': ['log-1', 'log-3'], 'failed': ['log-2']}
+    assert [row['raw_log_id'] for row in agent.supabase.tables['subsidies_structured']] == ['log-1', 'log-3']
+    assert agent.log_error.call_args.args[:2] == ('log-2', 'SAVE_ERROR')
+    assert buffer.flush() == {'processed': [], 'failed': []}
+
+
+def test_partial_bulk_response_is_reconciled_without_reinserting():
+    agent = _agent()
+    buffer = StructuredWriteBuffer(agent)
+    buffer.add('log-1', {'raw_log_id': 'log-1', 'title': 'A'})
+    buffer.add('log-2', {'raw_log_id': 'log-2', 'title': 'hidden'})
+
+    result = buffer.flush()
+
+    assert result == {'processed': ['log-1'], 'failed': ['log-2']}
+    # The bulk insert succeeded, so nothing is written a second time
+    assert [row['raw_log_id'] for row in agent.supabase.tables['subsidies_structured']] == ['log-1', 'log-2']
+    assert agent.supabase.calls == [('subsidies_structured', 'insert'), ('raw_logs', 'update')]
+    assert agent.log_error.call_args.args[:2] == ('log-2', 'SAVE_ERROR')
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Write-behind buffer for structured extraction results
+
+Every processed log used to cost one subsidies_structured insert and one
+raw_logs update of its own. StructuredWriteBuffer collects the rows produced
+by concurrent workers and flushes them together: one bulk insert and one
+bulk processed-flag update per flush. PostgREST inserts a batch atomically,
+so when a bulk call fails the rows are retried one by one and only the bad
+ones are recorded as SAVE_ERROR. A bulk call that succeeds is reconciled by
+the raw_log_id of the rows it returned instead; retrying it would insert the
+written rows a second time.
+
+Only logs claimed under a lease are buffered: the claim keeps the row
+exclusive to this worker (and the heartbeat keeps renewing it) until the
+flush marks it processed.
+"""
+
+import threading
+from typing import Any, Dict, List, Tuple
+
+DEFAULT_MAX_ROWS = 25
+
+
+class StructuredWriteBuffer:
+    """Collect (log id, subsidies_structured row) pairs and write them in bulk
+
+    ``agent`` is a LogInterpreterAgent; its synchronous Supabase client,
+    processed-flag update and error logging are reused.
+    """
+
+    def __init__(self, agent, max_rows: int = DEFAULT_MAX_ROWS):
+        self.agent = agent
+        self.logger = agent.logger
+        self.max_rows = max_rows
+        self.round_trips = 0
+        self._rows: List[Tuple[str, Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def add(self, log_id: str, row: Dict[str, Any]) -> bool:
+        """Queue one row; returns True once the buffer is full and should be flushed"""
+        with self._lock:
+            self._rows.append((log_id, row))
+            return len(self._rows) >= self.max_rows
+
+    def flush(self) -> Dict[str, List[str]]:
+        """Write every queued row, returning ``{"processed": [...], "failed": [...]}`` log ids"""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return {"processed": [], "failed": []}
+
+        before = self.round_trips
+        saved = self._insert(rows)
+        processed = self._mark_processed(saved)
+        done = set(processed)
+        failed = [log_id for log_id, _ in rows if log_id not in done]
+        self.logger.info(f"💾 Flushed {len(processed)}/{len(rows)} structured rows "
+                         f"in {self.round_trips - before} round trips")
+        return {"processed": processed, "failed": failed}
+
+    def _insert(self, rows: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Bulk insert, falling back to one insert per row when the batch is rejected"""
+        table = self.agent.supabase.table('subsidies_structured')
+        try:
+            self.round_trips += 1
+            response = table.insert([row for _, row in rows]).execute()
+        except Exception as e:
+            self.logger.warning(f"Bulk insert of {len(rows)} structured rows failed, retrying row by row: {e}")
+        else:
+            return self._reconcile(rows, response.data or [])
+
+        saved = []
+        for log_id, row in rows:
+            try:
+                self.round_trips += 1
+                response = table.insert(row).execute()
+                if response.data:
+                    saved.append(log_id)
+                else:
+                    self.agent.log_error(log_id, "SAVE_ERROR", "Failed to save structured data")
+            except Exception as e:
+                self.logger.error(f"Error saving structured data for log {log_id}: {e}")
+                self.agent.log_error(log_id, "SAVE_ERROR", str(e))
+        return saved
+
+    def _reconcile(self, rows: List[Tuple[str, Dict[str, Any]]], returned: List[Dict[str, Any]]) -> List[str]:
+        """Log ids whose row came back from a successful bulk insert; the rest are SAVE_ERRORs"""
+        written = {str(row.get('raw_log_id')) for row in returned}
+        saved = []
+        for log_id, _ in rows:
+            if str(log_id) in written:
+                saved.append(log_id)
+            else:
+                self.agent.log_error(log_id, "SAVE_ERROR", "Bulk insert did not return the structured row")
+        if len(saved) < len(rows):
+            self.logger.warning(f"Bulk insert of {len(rows)} structured rows returned {len(saved)} of them")
+        return saved
+
+    def _mark_processed(self, log_ids: List[str]) -> List[str]:
+        """Bulk processed-flag update, retrying rows the bulk call did not touch"""
+        if not log_ids:
+            return []
+        updated = set()
+        try:
+            self.round_trips += 1
+            response = self.agent.supabase.table('raw_logs').update(
+                self.agent._processed_update()
+            ).in_('id', log_ids).execute()
+            updated = {str(row.get('id')) for row in response.data or []}
+        except Exception as e:
+            self.logger.warning(f"Bulk processed update of {len(log_ids)} logs failed, retrying row by row: {e}")
+
+        processed = []
+        for log_id in log_ids:
+            if str(log_id) in updated:
+                processed.append(log_id)
+                continue
+            self.round_trips += 1
+            if self.agent.mark_as_processed(log_id):
+                processed.append(log_id)
+            else:
+                self.logger.error(f"Failed to mark log {log_id} as processed")
+        return processed
@@ -7,4 +7,20 @@ modules.
 
 from document_parser import extract_text_from_pdf, save_text_to_file
 
-__all__ = ["extract_text_from_pdf", "save_text_to_file"]
\ No newline at end of file
+from .python_document_extractor import (
+    DEFAULT_EXTRACTION_WORKERS,
+    DocumentExtractionResult,
+    PythonDocumentExtractor,
+    ScraperDocumentExtractor,
+    extract_document_text,
+)
+
+__all__ = [
+    "extract_text_from_pdf",
+    "save_text_to_file",
+    "DEFAULT_EXTRACTION_WORKERS",
+    "DocumentExtractionResult",
+    "PythonDocumentExtractor",
+    "ScraperDocumentExtractor",
+    "extract_document_text",
+]
\ No newline at end of file
@@ -8,10 +8,33 @@ external services.
 
 from __future__ import annotations
 
+import io
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any, Dict
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:  # POSIX only: per-file limits are skipped elsewhere
+    import resource
+    import signal
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+    signal = None
+
+# A filesystem path or an in-memory file object; every backend accepts both
+DocumentSource = Union[str, IO[bytes]]
+
+# Defaults for extract_many
+DEFAULT_EXTRACTION_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_FILE_TIMEOUT = 120.0
+DEFAULT_FILE_MEMORY_MB = 1024
+
+# Spreadsheet limits: rows read per sheet, rows kept in the per-sheet table
+# representation and characters of text after which reading stops
+DEFAULT_MAX_SHEET_ROWS = 100_000
+DEFAULT_MAX_TABLE_ROWS = 1_000
+DEFAULT_MAX_TEXT_CHARS = 5_000_000
 
 
 class DocumentExtractionResult:
@@ -50,12 +73,18 @@ class PythonDocumentExtractor:
         enable_ocr: bool = True,
         ocr_language: str = "eng",
         max_file_size_mb: float = 25.0,
+        max_sheet_rows: int = DEFAULT_MAX_SHEET_ROWS,
+        max_table_rows: int = DEFAULT_MAX_TABLE_ROWS,
+        max_text_chars: int = DEFAULT_MAX_TEXT_CHARS,
     ) -> None:
-        # The parameters are accepted for backwards compatibility.
+        # The OCR parameters are accepted for backwards compatibility.
         self.enable_ocr = enable_ocr
         self.ocr_language = ocr_language
         self.max_file_size_mb = max_file_size_mb
         self.max_file_size_bytes = int(max_file_size_mb * 1024 * 1024)
+        self.max_sheet_rows = max_sheet_rows
+        self.max_table_rows = max_table_rows
+        self.max_text_chars = max_text_chars
         self.logger = logging.getLogger(__name__)
 
     # ------------------------------------------------------------------
@@ -72,19 +101,32 @@ class PythonDocumentExtractor:
             if os.path.getsize(file_path) > self.max_file_size_bytes:
                 raise ValueError("File too large")
 
-            ext = Path(file_path).suffix.lower()
-            if ext == ".pdf":
-                text = self._extract_pdf(file_path)
-                result.extraction_method = "pdf"
-            elif ext in {".doc", ".docx"}:
-                text = self._extract_docx(file_path)
-                result.extraction_method = "docx"
-            elif ext in {".xls", ".xlsx"}:
-                text = self._extract_xlsx(file_path)
-                result.extraction_method = "xlsx"
-            else:
-                raise ValueError(f"Unsupported file type: {ext}")
+            text, result.extraction_method, metadata = self._extract(file_path, Path(file_path).suffix.lower())
+            result.metadata.update(metadata)
+            result.text_content = text
+            result.success = True
+            result.character_count = len(text)
+        except Exception as exc:  # pragma: no cover - defensive
+            result.error = str(exc)
+            self.logger.error("Document extraction failed", exc_info=exc)
+        return result
+
+    def extract_document_bytes(self, content: bytes, file_name: str) -> DocumentExtractionResult:
+        """Extract text from an in-memory document without touching disk.
 
+        ``file_name`` only selects the format from its extension.
+        """
+
+        result = DocumentExtractionResult(file_name)
+        result.file_size = len(content)
+        try:
+            if len(content) > self.max_file_size_bytes:
+                raise ValueError("File too large")
+
+            text, result.extraction_method, metadata = self._extract(
+                io.BytesIO(content), Path(file_name).suffix.lower()
+            )
+            result.metadata.update(metadata)
             result.text_content = text
             result.success = True
             result.character_count = len(text)
@@ -93,33 +135,177 @@ class PythonDocumentExtractor:
             self.logger.error("Document extraction failed", exc_info=exc)
         return result
 
+    def extract_many(
+        self,
+        paths: Iterable[str],
+        workers: int = DEFAULT_EXTRACTION_WORKERS,
+        timeout: Optional[float] = DEFAULT_FILE_TIMEOUT,
+        memory_limit_mb: Optional[float] = DEFAULT_FILE_MEMORY_MB,
+    ) -> Iterator[DocumentExtractionResult]:
+        """Extract several documents in parallel, yielding results as they complete.
+
+        Each file runs in a worker process under ``timeout`` seconds and
+        ``memory_limit_mb`` of extra address space (POSIX only); a file that
+        exceeds either comes back as a failed result instead of stalling or
+        killing the batch. Results arrive in completion order, use
+        ``result.file_path`` to match them to ``paths``. With one worker or a
+        single file the extraction runs in-process without limits.
+        """
+
+        paths = list(paths)
+        if workers <= 1 or len(paths) <= 1:
+            for path in paths:
+                yield self.extract_document(path)
+            return
+
+        memory_limit = int(memory_limit_mb * 1024 * 1024) if memory_limit_mb else None
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(paths)))
+        try:
+            futures = {
+                pool.submit(_extract_with_limits, self, path, timeout, memory_limit): path
+                for path in paths
+            }
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as exc:
+                    # A worker died (BrokenProcessPool after an OOM kill...); report the file, keep going
+                    result = DocumentExtractionResult(futures[future])
+                    result.error = f"Extraction worker failed: {exc}"
+                    self.logger.error(f"Extraction worker failed for {futures[future]}: {exc}")
+                    yield result
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
     # ------------------------------------------------------------------
     # Format specific helpers
     # ------------------------------------------------------------------
-    def _extract_pdf(self, file_path: str) -> str:
+    def _extract(self, source: DocumentSource, ext: str) -> Tuple[str, str, Dict[str, Any]]:
+        """Return ``(text, extraction_method, metadata)`` for a document of type ``ext``."""
+
+        if ext == ".pdf":
+            return self._extract_pdf(source), "pdf", {}
+        if ext in {".doc", ".docx"}:
+            return self._extract_docx(source), "docx", {}
+        if ext in {".xls", ".xlsx"}:
+            text, sheets, truncated = self._extract_xlsx_tables(source)
+            return text, "xlsx", {"sheets": sheets, "truncated": truncated}
+        raise ValueError(f"Unsupported file type: {ext}")
+
+    def _extract_pdf(self, file_path: DocumentSource) -> str:
         import pdfplumber
 
         with pdfplumber.open(file_path) as pdf:
             pages = [page.extract_text() or "" for page in pdf.pages]
         return "\n".join(pages)
 
-    def _extract_docx(self, file_path: str) -> str:
+    def _extract_docx(self, file_path: DocumentSource) -> str:
         from docx import Document
 
         doc = Document(file_path)
         return "\n".join(p.text for p in doc.paragraphs)
 
-    def _extract_xlsx(self, file_path: str) -> str:
+    def _extract_xlsx(self, file_path: DocumentSource) -> str:
+        return self._extract_xlsx_tables(file_path)[0]
+
+    def _extract_xlsx_tables(self, file_path: DocumentSource) -> Tuple[str, List[Dict[str, Any]], bool]:
+        """Stream a workbook row by row.
+
+        Returns ``(text, sheets, truncated)``: one line per non-empty row, a
+        ``{"name", "rows", "row_count", "truncated"}`` table per sheet (the
+        first ``max_table_rows`` rows, cells as strings) and whether a row or
+        character limit cut the text short. The workbook is opened read-only,
+        so memory stays flat however large the file is.
+        """
+
         from openpyxl import load_workbook
 
-        wb = load_workbook(file_path, data_only=True)
-        texts: list[str] = []
-        for ws in wb.worksheets:
-            for row in ws.iter_rows(values_only=True):
-                row_text = " ".join(str(c) for c in row if c is not None)
-                if row_text:
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        texts: List[str] = []
+        sheets: List[Dict[str, Any]] = []
+        chars = 0
+        truncated = out_of_budget = False
+        try:
+            for ws in wb.worksheets:
+                if out_of_budget:
+                    break
+                if not hasattr(ws, "iter_rows"):  # chartsheets
+                    continue
+                # Some writers store a wrong <dimension>; read every row that is there
+                ws.reset_dimensions()
+                table: List[List[str]] = []
+                sheet = {"name": ws.title, "rows": table, "row_count": 0, "truncated": False}
+                sheets.append(sheet)
+                for row in ws.iter_rows(values_only=True):
+                    row_text = " ".join(str(c) for c in row if c is not None)
+                    if not row_text:
+                        continue
+                    if sheet["row_count"] >= self.max_sheet_rows:
+                        sheet["truncated"] = truncated = True
+                        break
+                    if chars + len(row_text) > self.max_text_chars:
+                        sheet["truncated"] = truncated = out_of_budget = True
+                        break
+                    sheet["row_count"] += 1
+                    chars += len(row_text) + 1
                     texts.append(row_text)
-        return "\n".join(texts)
+                    if len(table) < self.max_table_rows:
+                        cells = ["" if c is None else str(c) for c in row]
+                        while cells and not cells[-1]:
+                            cells.pop()
+                        table.append(cells)
+        finally:
+            wb.close()
+        if truncated:
+            self.logger.info(
+                "Spreadsheet text truncated at %d rows / %d characters",
+                sum(sheet["row_count"] for sheet in sheets),
+                chars,
+            )
+        return "\n".join(texts), sheets, truncated
+
+
+def _address_space_bytes() -> int:
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError("Extraction timed out")
+
+
+def _extract_with_limits(
+    extractor: PythonDocumentExtractor,
+    file_path: str,
+    timeout: Optional[float],
+    memory_limit: Optional[int],
+) -> DocumentExtractionResult:
+    """Worker entry point for :meth:`PythonDocumentExtractor.extract_many`."""
+
+    previous_limit = None
+    if memory_limit and resource is not None and os.path.exists("/proc/self/statm"):
+        # Allow this file ``memory_limit`` bytes on top of what the worker already maps
+        previous_limit = resource.getrlimit(resource.RLIMIT_AS)
+        soft = _address_space_bytes() + memory_limit
+        if previous_limit[1] != resource.RLIM_INFINITY:
+            soft = min(soft, previous_limit[1])
+        resource.setrlimit(resource.RLIMIT_AS, (soft, previous_limit[1]))
+    if timeout and signal is not None:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        result = extractor.extract_document(file_path)
+    finally:
+        if timeout and signal is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if previous_limit is not None:
+            resource.setrlimit(resource.RLIMIT_AS, previous_limit)
+    if result.error == "Extraction timed out":
+        result.error = f"Extraction timed out after {timeout:g}s"
+    elif memory_limit and result.error == "" and not result.success:
+        # MemoryError carries no message
+        result.error = f"Extraction exceeded the {memory_limit // (1024 * 1024)} MB memory limit"
+    return result
 
 
 def extract_document_text(file_path: str) -> str:
@@ -157,3 +343,51 @@ class ScraperDocumentExtractor:
                 "extraction_method": "failed",
                 "extracted_for_scraper": True,
             }
+
+    def iter_attachments(
+        self, attachment_paths: Iterable[str], workers: int = DEFAULT_EXTRACTION_WORKERS
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(path, data)`` for each attachment as soon as it is extracted."""
+
+        for result in self.extractor.extract_many(attachment_paths, workers=workers):
+            data = result.to_dict()
+            data["text"] = result.text_content
+            data["extracted_for_scraper"] = True
+            data["attachment_path"] = result.file_path
+            yield result.file_path, data
+
+    def extract_multiple_attachments(
+        self, attachment_paths: Iterable[str], workers: int = DEFAULT_EXTRACTION_WORKERS
+    ) -> Dict[str, Dict[str, Any]]:
+        """Extract attachments in parallel, keyed by path in input order."""
+
+        paths = list(attachment_paths)
+        extracted = dict(self.iter_attachments(paths, workers=workers))
+        return {path: extracted[path] for path in paths if path in extracted}
+
+    @staticmethod
+    def merge_page_and_attachment_content(
+        page: Dict[str, Any], attachment_texts: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """Combine page text and attachment texts into one document."""
+
+        parts = [
+            f"=== PAGE TITLE ===\n{page.get('title', '')}",
+            f"=== PAGE CONTENT ===\n{page.get('text', '')}",
+        ]
+        successful: List[str] = []
+        for path, text in attachment_texts.items():
+            if text and text.strip():
+                parts.append(f"=== DOCUMENT: {os.path.basename(path)} ===\n{text}")
+                successful.append(path)
+        combined_text = "\n\n".join(parts)
+        return {
+            "combined_text": combined_text,
+            "extraction_summary": {
+                "url": page.get("url"),
+                "total_attachments": len(attachment_texts),
+                "successful_extractions": len(successful),
+                "failed_extractions": len(attachment_texts) - len(successful),
+                "total_characters": len(combined_text),
+            },
+        }
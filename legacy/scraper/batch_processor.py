@@ -18,6 +18,11 @@ import random
 
 from .core import RobustWebDriver, ScrapingLogger
 
+# crawl_index lives at the repository root, two levels above this package
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from crawl_index import CrawlIndex, DEFAULT_INDEX_PATH
+
 
 class BatchScrapeConfig:
     """Configuration for batch scraping operations"""
@@ -53,6 +58,10 @@ class BatchScrapeConfig:
         self.delay_range = (1, 3)
         self.max_retries = 3
         self.timeout = 30
+        
+        # Incremental crawling (disabled when crawl_index_path is None)
+        self.crawl_index_path = None
+        self.recrawl_after_hours = None
 
 
 class URLDiscovery:
@@ -201,11 +210,19 @@ class BatchProcessor:
         self.logger = ScrapingLogger().get_logger()
         self.discovery = URLDiscovery(self.config)
         
+        self.crawl_index = None
+        if self.config.crawl_index_path:
+            self.crawl_index = CrawlIndex(
+                self.config.crawl_index_path,
+                max_age_hours=self.config.recrawl_after_hours
+            )
+        
         # Processing statistics
         self.stats = {
             'total_urls': 0,
             'successful': 0,
             'failed': 0,
+            'skipped_unchanged': 0,
             'start_time': None,
             'end_time': None,
             'errors': []
@@ -232,6 +249,12 @@ class BatchProcessor:
                     site_name: str = "unknown") -> Dict[str, Any]:
         """Process a list of URLs with parallel execution"""
         
+        if self.crawl_index is not None:
+            discovered = len(urls)
+            urls = self.crawl_index.filter_urls(urls, revalidate=True)
+            self.stats['skipped_unchanged'] = discovered - len(urls)
+            self.logger.info(f"♻️ Crawl index: skipping {self.stats['skipped_unchanged']} fresh or unchanged URLs")
+        
         self.stats['total_urls'] = len(urls)
         self.logger.info(f"📋 Processing {len(urls)} URLs with {self.config.max_workers} workers")
         
@@ -293,6 +316,13 @@ class BatchProcessor:
                             json.dump(result, f, indent=2, ensure_ascii=False)
                         
                         result['output_file'] = str(output_file)
+                        
+                        if self.crawl_index is not None:
+                            self.crawl_index.record(
+                                url,
+                                content=result.get('text', ''),
+                                output_path=str(output_file)
+                            )
                         return result
                     
             except Exception as e:
@@ -322,6 +352,7 @@ class BatchProcessor:
         self.logger.info(f"   Total URLs: {self.stats['total_urls']}")
         self.logger.info(f"   Successful: {self.stats['successful']}")
         self.logger.info(f"   Failed: {self.stats['failed']}")
+        self.logger.info(f"   Skipped (unchanged): {self.stats['skipped_unchanged']}")
         self.logger.info(f"   Success Rate: {self.stats['success_rate']:.1f}%")
         self.logger.info(f"   Duration: {self.stats['duration']:.1f} seconds")
         
@@ -338,12 +369,19 @@ def main():
     parser.add_argument('--max-pages', type=int, default=10, help='Maximum pages to scan')
     parser.add_argument('--output-dir', default='data', help='Output directory')
     parser.add_argument('--workers', type=int, default=3, help='Number of parallel workers')
+    parser.add_argument('--incremental', action='store_true', help='Skip pages already in the crawl index')
+    parser.add_argument('--crawl-index', default=DEFAULT_INDEX_PATH, help='Crawl index database path')
+    parser.add_argument('--recrawl-after-hours', type=float, default=None,
+                        help='Re-crawl indexed pages older than this many hours')
     
     args = parser.parse_args()
     
     # Configure processor
     config = BatchScrapeConfig()
     config.max_workers = args.workers
+    if args.incremental:
+        config.crawl_index_path = args.crawl_index
+        config.recrawl_after_hours = args.recrawl_after_hours
     
     processor = BatchProcessor(config)
     stats = processor.process_site(
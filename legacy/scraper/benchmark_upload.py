@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Upload throughput benchmark against a local stub PostgREST server
+Measures how SupabaseUploader scales with concurrent_limit without touching a real database
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Any JWT-shaped string passes supabase-py's key validation
+STUB_API_KEY = "stub.header.signature"
+
+
+class StubPostgrestServer:
+    """Minimal PostgREST stand-in for the ``raw_scraped_pages`` table
+
+    Supports the calls the uploader makes: ``select`` with ``limit``/``order``/
+    ``gt`` filters and ``POST`` upserts with ``on_conflict`` that ignore
+    duplicates and return the inserted rows with an ``id``. Every write waits ``latency`` seconds to emulate a remote
+    database, and rows whose ``source_url`` contains ``reject_marker`` make the
+    whole request fail with ``400`` like a constraint violation would. The
+    first ``throttle_first`` writes are answered with ``429 Too Many Requests``.
+    """
+
+    def __init__(self, latency: float = 0.05, reject_marker: Optional[str] = None,
+                 throttle_first: int = 0):
+        self.latency = latency
+        self.reject_marker = reject_marker
+        self.throttle_first = throttle_first
+        self.throttled = 0
+        self.urls = set()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubPostgrestServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StubPostgrestServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, payload: Any) -> None:
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                limit = int(query.get('limit', ['1000'])[0])
+                after = query.get('source_url', [''])[0]
+                with stub._lock:
+                    stub.requests += 1
+                    urls = sorted(stub.urls)
+                if after.startswith('gt.'):
+                    urls = [u for u in urls if u > after[3:]]
+                self._reply(200, [{'id': i, 'source_url': u} for i, u in enumerate(urls[:limit])])
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                rows = json.loads(self.rfile.read(length) or b'[]')
+                if isinstance(rows, dict):
+                    rows = [rows]
+
+                with stub._lock:
+                    stub.requests += 1
+                    throttle = stub.throttled < stub.throttle_first
+                    if throttle:
+                        stub.throttled += 1
+                    else:
+                        stub.in_flight += 1
+                        stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+
+                if throttle:
+                    body = b'Too Many Requests'
+                    self.send_response(429)
+                    self.send_header('Content-Type', 'text/plain')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.send_header('Retry-After', '1')
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                try:
+                    time.sleep(stub.latency)
+                    if stub.reject_marker and any(stub.reject_marker in r.get('source_url', '') for r in rows):
+                        self._reply(400, {'code': '23514', 'message': 'check constraint violation'})
+                        return
+                    with stub._lock:
+                        new_rows = [r for r in rows if r.get('source_url') not in stub.urls]
+                        inserted = [dict(r, id=len(stub.urls) + i + 1) for i, r in enumerate(new_rows)]
+                        stub.urls.update(r['source_url'] for r in new_rows)
+                    self._reply(201, inserted)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+        return Handler
+
+
+def write_sample_files(directory: Path, count: int, text_size: int = 2000) -> List[Path]:
+    """Write ``count`` scraped-page JSON files for the benchmark"""
+
+    files = []
+    for i in range(count):
+        path = directory / f"page_{i:05d}.json"
+        path.write_text(json.dumps({
+            'url': f"https://example.fr/aides/{i}",
+            'text': f"Aide {i} " + "x" * text_size,
+            'success': True
+        }), encoding='utf-8')
+        files.append(path)
+    return files
+
+
+def run_benchmark(
+    concurrency_levels: List[int],
+    files: int = 200,
+    rows_per_batch: int = 10,
+    latency: float = 0.05,
+    log_level: int = logging.WARNING
+) -> List[Dict[str, Any]]:
+    """Upload the same data set at each concurrency level and report throughput"""
+
+    from .supabase_uploader import SupabaseUploader, UploadConfig
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        write_sample_files(data_dir, files)
+
+        for level in concurrency_levels:
+            with StubPostgrestServer(latency=latency) as server:
+                os.environ['SUPABASE_URL'] = server.url
+                os.environ['SUPABASE_SERVICE_ROLE_KEY'] = STUB_API_KEY
+
+                config = UploadConfig(
+                    concurrent_limit=level,
+                    max_batch_rows=rows_per_batch,
+                    delay_between_batches=0.0,
+                    dedup_mode='server'
+                )
+                uploader = SupabaseUploader(config)
+                uploader.logger.setLevel(log_level)
+                try:
+                    started = time.perf_counter()
+                    stats = asyncio.run(uploader.upload_scraped_data_async(data_dir))
+                    elapsed = time.perf_counter() - started
+                finally:
+                    uploader.close()
+
+                results.append({
+                    'concurrent_limit': level,
+                    'uploaded': stats.successful_uploads,
+                    'requests': server.requests,
+                    'max_in_flight': server.max_in_flight,
+                    'seconds': round(elapsed, 3),
+                    'rows_per_sec': round(stats.successful_uploads / elapsed, 1) if elapsed else 0.0
+                })
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark SupabaseUploader against a stub PostgREST server")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8],
+                       help='concurrent_limit values to compare')
+    parser.add_argument('--files', type=int, default=200, help='Number of JSON files to upload')
+    parser.add_argument('--rows-per-batch', type=int, default=10, help='Rows per bulk upsert')
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated server latency per write (s)')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.concurrency, args.files, args.rows_per_batch, args.latency)
+
+    print(f"{'workers':>8} {'rows':>6} {'requests':>9} {'in-flight':>10} {'seconds':>8} {'rows/s':>8}")
+    for r in results:
+        print(f"{r['concurrent_limit']:>8} {r['uploaded']:>6} {r['requests']:>9} "
+              f"{r['max_in_flight']:>10} {r['seconds']:>8} {r['rows_per_sec']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -645,11 +645,9 @@ class RobustWebDriver:
         self.logger.info(f"📚 Processing {len(downloaded_files)} document attachments...")
 
         try:
-            # Extract text from documents
-            raw_extractions = self.document_extractor.extract_multiple_attachments(downloaded_files)
-
+            # Extract text from documents in parallel, converting each to markdown as it completes
             doc_extractions = {}
-            for path, data in raw_extractions.items():
+            for path, data in self.document_extractor.iter_attachments(downloaded_files):
                 text = data.get('text', '') if isinstance(data, dict) else str(data)
 
                 # Convert to markdown
@@ -664,6 +662,8 @@ class RobustWebDriver:
                 else:
                     doc_extractions[path] = {'text': text, 'markdown': markdown}
 
+            # Keep the page's attachment order regardless of completion order
+            doc_extractions = {path: doc_extractions[path] for path in downloaded_files if path in doc_extractions}
             result['document_extractions'] = doc_extractions
 
             # Create combined content
@@ -8,6 +8,8 @@ import os
 import sys
 import time
 import json
+import random
+import asyncio
 import logging
 import argparse
 from typing import Dict, Any, List, Optional
@@ -16,6 +18,7 @@ from pathlib import Path
 from .batch_processor import BatchProcessor, BatchScrapeConfig
 from .supabase_uploader import SupabaseUploader
 from .ai_extractor import AIExtractor
+from .stage_pipeline import Stage, StreamingPipeline
 
 
 class PipelineOrchestrator:
@@ -34,6 +37,7 @@ class PipelineOrchestrator:
             'total_pages_scraped': 0,
             'total_uploads': 0,
             'total_extractions': 0,
+            'stage_metrics': {},
             'errors': []
         }
     
@@ -81,14 +85,27 @@ class PipelineOrchestrator:
                             dry_run: bool = False) -> Dict[str, Any]:
         """Run the complete scraping and extraction pipeline"""
         
+        streaming = self.config.get('streaming', True) and not dry_run
+        
         self.logger.info("🌱 Starting complete AgriTool pipeline")
         self.logger.info(f"🎯 Target: {site_name}")
         self.logger.info(f"📊 Parameters: {max_urls} URLs, {max_pages} pages, batch size {batch_size}")
         self.logger.info(f"🧪 Dry run: {dry_run}")
+        self.logger.info(f"🌊 Mode: {'streaming' if streaming else 'sequential'}")
         
         self.pipeline_stats['start_time'] = time.time()
+        self.pipeline_stats['mode'] = 'streaming' if streaming else 'sequential'
         
         try:
+            if streaming:
+                # Stages 1-3 run concurrently, Stage 4 once everything is stored
+                stream_stats = self._run_streaming_stages(site_name, max_urls, max_pages, batch_size)
+                
+                if stream_stats['total_uploads'] > 0:
+                    qa_stats = self._run_qa_stage()
+                
+                return self._finalize_pipeline_stats()
+            
             # Stage 1: Scraping
             scrape_stats = self._run_scraping_stage(site_name, max_urls, max_pages, dry_run)
             
@@ -96,8 +113,8 @@ class PipelineOrchestrator:
                 # Stage 2: Upload to Supabase
                 upload_stats = self._run_upload_stage(batch_size)
                 
-                # Stage 3: AI Extraction
-                extraction_stats = self._run_extraction_stage(batch_size)
+                # Stage 3: AI Extraction of the rows this run uploaded
+                extraction_stats = self._run_extraction_stage(batch_size, upload_stats['inserted_ids'])
                 
                 # Stage 4: Quality Assurance
                 qa_stats = self._run_qa_stage()
@@ -114,6 +131,109 @@ class PipelineOrchestrator:
             self.logger.error(f"❌ Pipeline failed: {e}")
             raise
     
+    def _run_streaming_stages(self, site_name: str, max_urls: int, max_pages: int,
+                              batch_size: int) -> Dict[str, Any]:
+        """Stages 1-3: scrape, upload and extract as a streaming stage graph
+        
+        Scraped pages are uploaded in bulk micro-batches of ``batch_size`` as
+        soon as they are written, and the ids of the inserted rows are handed
+        to the extraction stage, so it works on exactly the records this run
+        stored. Bounded queues between stages apply backpressure to the
+        scrapers when uploads or extraction fall behind.
+        """
+        
+        self.logger.info("🌊 Stages 1-3: Streaming scrape → upload → extract")
+        
+        scrape_config = BatchScrapeConfig()
+        scrape_config.max_workers = self.config.get('max_workers', 3)
+        scrape_config.crawl_index_path = self.config.get('crawl_index_path')
+        scrape_config.recrawl_after_hours = self.config.get('recrawl_after_hours')
+        
+        output_path = Path(self.config.get('output_dir', 'data/scraped'))
+        output_path.mkdir(parents=True, exist_ok=True)
+        
+        processor = BatchProcessor(scrape_config)
+        urls = processor.discovery.discover_urls(site_name, max_urls, max_pages)
+        self.pipeline_stats['total_urls_discovered'] = len(urls)
+        
+        if processor.crawl_index is not None:
+            urls = processor.crawl_index.filter_urls(urls, revalidate=True)
+        
+        if not urls:
+            self.logger.error(f"❌ No URLs discovered for site: {site_name}")
+            return {'total_uploads': 0}
+        
+        # The uploader is async; drive it from a dedicated event loop owned by
+        # the single upload worker so the client and duplicate cache load once
+        uploader = SupabaseUploader()
+        uploader.config.batch_size = batch_size
+        upload_loop = asyncio.new_event_loop()
+        extractor = AIExtractor()
+        extraction_totals = {'successful_extractions': 0}
+        
+        def scrape(url: str) -> Optional[Dict[str, Any]]:
+            result = processor._process_single_url(url, output_path, site_name)
+            # Respectful delay between requests, as in BatchProcessor.process_urls
+            time.sleep(random.uniform(*scrape_config.delay_range))
+            if not result.get('success'):
+                self.logger.warning(f"⚠️ Scrape failed: {url}: {result.get('error', 'Unknown error')}")
+                return None
+            return result
+        
+        def upload(results: List[Dict[str, Any]]) -> List[Any]:
+            return upload_loop.run_until_complete(
+                uploader.upload_files_async([Path(result['output_file']) for result in results])
+            )
+        
+        def extract(record_ids: List[Any]) -> List[Any]:
+            stats = extractor.process_raw_logs(batch_size=len(record_ids), record_ids=record_ids)
+            extraction_totals['successful_extractions'] += stats.get('successful_extractions', 0)
+            return record_ids
+        
+        pipeline = StreamingPipeline(
+            [
+                Stage('scraping', scrape, workers=scrape_config.max_workers),
+                Stage('upload', upload, workers=1, batch_size=batch_size,
+                      batch_timeout=self.config.get('batch_timeout', 5.0)),
+                Stage('extraction', extract, workers=1, batch_size=batch_size,
+                      batch_timeout=self.config.get('batch_timeout', 5.0)),
+            ],
+            queue_size=self.config.get('queue_size', batch_size * 2),
+            logger=self.logger
+        )
+        
+        try:
+            upload_loop.run_until_complete(uploader.initialize())
+            pipeline.run(urls)
+        except Exception as e:
+            self.logger.error(f"❌ Streaming stages failed: {e}")
+            self.pipeline_stats['errors'].append({
+                'stage': 'streaming',
+                'error': str(e)
+            })
+            raise
+        finally:
+            self.pipeline_stats['stage_metrics'] = pipeline.report()
+            uploader.close()
+            upload_loop.close()
+        
+        metrics = pipeline.metrics
+        self.pipeline_stats['total_pages_scraped'] = metrics['scraping'].items_out
+        self.pipeline_stats['total_uploads'] = uploader.stats.successful_uploads
+        self.pipeline_stats['total_extractions'] = extraction_totals['successful_extractions']
+        self.pipeline_stats['errors'].extend(pipeline.errors)
+        
+        for stage_name in ('scraping', 'upload', 'extraction'):
+            if metrics[stage_name].calls:
+                self.pipeline_stats['stages_completed'].append(stage_name)
+        
+        self.logger.info(
+            f"✅ Streaming stages completed: {metrics['scraping'].items_out}/{len(urls)} scraped, "
+            f"{self.pipeline_stats['total_uploads']} uploaded, "
+            f"{self.pipeline_stats['total_extractions']} extracted"
+        )
+        return {'total_uploads': self.pipeline_stats['total_uploads']}
+    
     def _run_scraping_stage(self, site_name: str, max_urls: int, max_pages: int, 
                           dry_run: bool) -> Dict[str, Any]:
         """Stage 1: Web scraping"""
@@ -124,6 +244,8 @@ class PipelineOrchestrator:
             # Configure scraper
             scrape_config = BatchScrapeConfig()
             scrape_config.max_workers = self.config.get('max_workers', 3)
+            scrape_config.crawl_index_path = self.config.get('crawl_index_path')
+            scrape_config.recrawl_after_hours = self.config.get('recrawl_after_hours')
             
             # Create output directory
             output_dir = self.config.get('output_dir', 'data/scraped')
@@ -199,8 +321,8 @@ class PipelineOrchestrator:
             })
             raise
     
-    def _run_extraction_stage(self, batch_size: int) -> Dict[str, Any]:
-        """Stage 3: AI Extraction"""
+    def _run_extraction_stage(self, batch_size: int, record_ids: List[Any]) -> Dict[str, Any]:
+        """Stage 3: AI Extraction of the records inserted by the upload stage"""
         
         self.logger.info("🤖 Stage 3: AI Extraction")
         
@@ -209,7 +331,7 @@ class PipelineOrchestrator:
             
             stats = extractor.process_raw_logs(
                 batch_size=batch_size,
-                max_records=None
+                record_ids=record_ids
             )
             
             self.pipeline_stats['total_extractions'] = stats['successful_extractions']
@@ -311,6 +433,14 @@ class PipelineOrchestrator:
         self.logger.info(f"☁️ Records Uploaded: {self.pipeline_stats['total_uploads']}")
         self.logger.info(f"🤖 AI Extractions: {self.pipeline_stats['total_extractions']}")
         
+        for stage_name, metrics in self.pipeline_stats['stage_metrics'].items():
+            self.logger.info(
+                f"⏱️ {stage_name}: {metrics['items_in']} in / {metrics['items_out']} out, "
+                f"{metrics['throughput_per_sec']:.2f} items/s, "
+                f"p50 {metrics['latency_p50']:.2f}s, p95 {metrics['latency_p95']:.2f}s, "
+                f"blocked {metrics['blocked_seconds']:.1f}s"
+            )
+        
         if self.pipeline_stats['errors']:
             self.logger.warning(f"⚠️ Errors Encountered: {len(self.pipeline_stats['errors'])}")
             for error in self.pipeline_stats['errors']:
@@ -337,13 +467,21 @@ def main():
     parser.add_argument('--dry-run', action='store_true', help='Dry run mode')
     parser.add_argument('--output-dir', default='data/scraped', help='Output directory')
     parser.add_argument('--max-workers', type=int, default=3, help='Number of parallel workers')
+    parser.add_argument('--queue-size', type=int, default=20, help='Bounded queue size between streaming stages')
+    parser.add_argument('--sequential', action='store_true', help='Run stages one after another instead of streaming')
+    parser.add_argument('--crawl-index', default=None, help='Crawl index database path (enables incremental crawling)')
+    parser.add_argument('--recrawl-after-hours', type=float, default=None, help='Re-crawl indexed pages older than this many hours')
     
     args = parser.parse_args()
     
     # Configure pipeline
     config = {
         'output_dir': args.output_dir,
-        'max_workers': args.max_workers
+        'max_workers': args.max_workers,
+        'queue_size': args.queue_size,
+        'streaming': not args.sequential,
+        'crawl_index_path': args.crawl_index,
+        'recrawl_after_hours': args.recrawl_after_hours
     }
     
     # Run pipeline
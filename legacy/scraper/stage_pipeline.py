@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+AgriTool Stage Pipeline - Streaming stage graph with bounded queues
+Runs pipeline stages concurrently so records flow from one stage to the next
+as soon as they are ready, with backpressure and per-stage metrics
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from dataclasses import dataclass, field
+
+
+# Marker placed on a stage queue to tell one worker to drain and exit
+_END_OF_STREAM = object()
+
+
+@dataclass
+class Stage:
+    """A single processing stage in a streaming pipeline
+
+    ``func`` receives one item (or a list of items when ``batch_size`` > 1)
+    and returns the value to forward downstream. Returning ``None`` drops the
+    item; for batched stages a returned list is forwarded item by item.
+    """
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+    batch_size: int = 1
+    batch_timeout: float = 2.0
+
+
+@dataclass
+class StageMetrics:
+    """Throughput and latency statistics for one pipeline stage"""
+    name: str
+    workers: int = 1
+    items_in: int = 0
+    items_out: int = 0
+    items_dropped: int = 0
+    errors: int = 0
+    calls: int = 0
+    busy_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+    first_start: Optional[float] = None
+    last_end: Optional[float] = None
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def wall_seconds(self) -> float:
+        """Elapsed time between the first and last call of the stage"""
+        if self.first_start is None or self.last_end is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    @property
+    def throughput(self) -> float:
+        """Items processed per second of stage wall time"""
+        if self.wall_seconds > 0:
+            return self.items_in / self.wall_seconds
+        return 0.0
+
+    def _percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarise the metrics for the pipeline report"""
+        calls = max(self.calls, 1)
+        return {
+            'workers': self.workers,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'items_dropped': self.items_dropped,
+            'errors': self.errors,
+            'calls': self.calls,
+            'wall_seconds': round(self.wall_seconds, 3),
+            'busy_seconds': round(self.busy_seconds, 3),
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'throughput_per_sec': round(self.throughput, 3),
+            'latency_avg': round(self.busy_seconds / calls, 3),
+            'latency_p50': round(self._percentile(50), 3),
+            'latency_p95': round(self._percentile(95), 3),
+            'latency_max': round(max(self.latencies, default=0.0), 3),
+        }
+
+
+class StreamingPipeline:
+    """Run a linear chain of stages connected by bounded queues
+
+    Every stage owns an input queue of at most ``queue_size`` items, so a slow
+    stage blocks its producers instead of letting work pile up in memory. Time
+    spent blocked on a full downstream queue is reported as ``blocked_seconds``.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 10,
+                 logger: Optional[logging.Logger] = None):
+        if not stages:
+            raise ValueError("StreamingPipeline requires at least one stage")
+
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.logger = logger or logging.getLogger('stage_pipeline')
+
+        self.metrics: Dict[str, StageMetrics] = {
+            stage.name: StageMetrics(name=stage.name, workers=stage.workers)
+            for stage in stages
+        }
+        self.errors: List[Dict[str, Any]] = []
+
+        self._queues = [queue.Queue(maxsize=self.queue_size) for _ in stages]
+        self._lock = threading.Lock()
+
+    def run(self, source: Iterable[Any]) -> Dict[str, StageMetrics]:
+        """Feed ``source`` through all stages and wait for them to drain"""
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            stage_threads = []
+            for worker_num in range(max(1, stage.workers)):
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    args=(index,),
+                    name=f"{stage.name}-{worker_num}",
+                    daemon=True
+                )
+                thread.start()
+                stage_threads.append(thread)
+            threads.append(stage_threads)
+
+        try:
+            for item in source:
+                self._queues[0].put(item)
+        finally:
+            # Close each stage in order once all of its upstream workers are done
+            for index, stage in enumerate(self.stages):
+                for _ in range(max(1, stage.workers)):
+                    self._queues[index].put(_END_OF_STREAM)
+                for thread in threads[index]:
+                    thread.join()
+
+        return self.metrics
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage metrics as plain dictionaries"""
+        return {name: metrics.to_dict() for name, metrics in self.metrics.items()}
+
+    def _worker_loop(self, index: int) -> None:
+        stage = self.stages[index]
+        inbox = self._queues[index]
+
+        while True:
+            item = inbox.get()
+            if item is _END_OF_STREAM:
+                return
+
+            if stage.batch_size <= 1:
+                self._run_stage(index, item, 1)
+                continue
+
+            batch = [item]
+            finished = False
+            deadline = time.monotonic() + stage.batch_timeout
+            while len(batch) < stage.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    next_item = inbox.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if next_item is _END_OF_STREAM:
+                    finished = True
+                    break
+                batch.append(next_item)
+
+            self._run_stage(index, batch, len(batch))
+            if finished:
+                return
+
+    def _run_stage(self, index: int, payload: Any, count: int) -> None:
+        stage = self.stages[index]
+        metrics = self.metrics[stage.name]
+
+        start = time.time()
+        try:
+            result = stage.func(payload)
+            error = None
+        except Exception as e:
+            result = None
+            error = str(e)
+            self.logger.error(f"❌ Stage {stage.name} failed: {e}")
+        elapsed = time.time() - start
+
+        if stage.batch_size > 1:
+            outputs = [] if result is None else list(result)
+        else:
+            outputs = [] if result is None else [result]
+
+        with self._lock:
+            metrics.calls += 1
+            metrics.items_in += count
+            metrics.busy_seconds += elapsed
+            metrics.latencies.append(elapsed)
+            if metrics.first_start is None or start < metrics.first_start:
+                metrics.first_start = start
+            metrics.last_end = max(metrics.last_end or 0.0, start + elapsed)
+            if error is not None:
+                metrics.errors += count
+                self.errors.append({'stage': stage.name, 'error': error})
+            elif not outputs:
+                metrics.items_dropped += count
+
+        if index + 1 >= len(self.stages):
+            with self._lock:
+                metrics.items_out += len(outputs)
+            return
+
+        outbox = self._queues[index + 1]
+        for output in outputs:
+            put_start = time.time()
+            outbox.put(output)
+            blocked = time.time() - put_start
+            with self._lock:
+                metrics.items_out += 1
+                metrics.blocked_seconds += blocked
@@ -0,0 +1,201 @@
+"""Persistent cache for LLM responses.
+
+Re-running enrichment, translation or raw log interpretation on unchanged
+inputs used to pay for identical completions again. :class:`ResponseCache`
+stores responses in SQLite keyed by a hash of the model, the prompt
+template version, the sampling parameters and the rendered messages.
+Entries expire after a TTL and the least recently used ones are evicted
+when the cache grows past its size budget.
+
+Configuration for the shared instance returned by :func:`get_response_cache`:
+
+``LLM_CACHE_PATH``
+    SQLite file (default ``.cache/llm_responses.sqlite3``).
+``LLM_CACHE_TTL``
+    Entry lifetime in seconds (default 30 days).
+``LLM_CACHE_MAX_MB``
+    Size budget for stored responses (default 256).
+``LLM_CACHE_DISABLED``
+    Set to ``1``/``true`` to bypass the cache entirely.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+
+DEFAULT_CACHE_PATH = ".cache/llm_responses.sqlite3"
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Evict down to this fraction of the budget so eviction does not run on every write
+EVICTION_TARGET = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    template_version TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def cache_key(
+    model: str,
+    messages: List[Mapping[str, Any]],
+    temperature: Optional[float] = None,
+    template_version: str = "",
+    **params: Any,
+) -> str:
+    """Return the cache key for one chat request.
+
+    ``params`` holds any other request options that change the output
+    (``max_tokens``, ``response_format``...).
+    """
+    payload = {
+        "model": model,
+        "template_version": template_version,
+        "temperature": temperature,
+        "params": params,
+        "messages": [{"role": m.get("role"), "content": m.get("content")} for m in messages],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache, safe to share between threads."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self._size = row[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for ``key`` or ``None`` on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, response: Dict[str, Any], model: str = "", template_version: str = "") -> None:
+        """Store ``response`` under ``key`` and evict if over budget."""
+        encoded = json.dumps(response, ensure_ascii=False, default=str)
+        size = len(encoded.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._delete(key)
+            self._conn.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, template_version, model, encoded, size, now, now),
+            )
+            self._size += size
+            if self._size > self.max_bytes:
+                self._evict(now)
+
+    def _delete(self, key: str) -> None:
+        row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._size -= row[0]
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones down to the target size."""
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        target = self.max_bytes * EVICTION_TARGET
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > target:
+            cursor = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at")
+            doomed = []
+            for key, size in cursor:
+                if total <= target:
+                    break
+                doomed.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self._size = total
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus current cache size."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "bytes": self._size,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_shared_lock = threading.Lock()
+_shared_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide cache, or ``None`` when disabled via ``LLM_CACHE_DISABLED``."""
+    global _shared_cache
+    if os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache(
+                path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 1024 / 1024)) * 1024 * 1024),
+            )
+        return _shared_cache
+
+
+__all__ = [
+    "ResponseCache",
+    "cache_key",
+    "get_response_cache",
+    "DEFAULT_CACHE_PATH",
+    "DEFAULT_TTL_SECONDS",
+    "DEFAULT_MAX_BYTES",
+]
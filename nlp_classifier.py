@@ -11,6 +11,8 @@ try:  # optional dependency, tests use heuristic branch
 except Exception:  # pragma: no cover - import failure path
     openai = None  # type: ignore
 
+from openai_rate_limiter import Priority, chat_completion
+
 
 def _heuristic_classification(text: str) -> Dict[str, object]:
     """Fallback classification using keyword heuristics."""
@@ -66,15 +68,17 @@ def classify_project_text(text: str) -> Dict[str, object]:
     api_key = os.getenv("OPENAI_API_KEY")
     if api_key and openai is not None:
         try:  # pragma: no cover - network calls are not tested
-            openai.api_key = api_key
             prompt = (
                 "Extract project_type, region, legal_entity and keywords from the"
                 " following text. Respond with JSON.\n" + text
             )
-            response = openai.ChatCompletion.create(
+            response = chat_completion(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.0,
+                priority=Priority.INTERACTIVE,
+                api_key=api_key,
+                template_version="classify_project_text:1",
             )
             content = response["choices"][0]["message"]["content"].strip()
             data = json.loads(content)
@@ -0,0 +1,476 @@
+"""Shared, rate-limited access to the OpenAI Chat Completions API.
+
+Every helper that talks to OpenAI (AI enrichment, classification,
+translation, rewriting and the raw log interpreter) used to call the API on
+its own, so bursts from one of them pushed the whole account into ``429``
+responses. This module gives them a single gate:
+
+* :class:`RateLimiter` - a requests-per-minute and a tokens-per-minute token
+  bucket. Callers reserve the estimated prompt tokens plus the completion
+  budget before sending; the reservation is reconciled with the reported
+  usage afterwards and the buckets are clamped to the ``x-ratelimit-*``
+  headers the API returns. Waiting callers are served by :class:`Priority`
+  first, then in arrival order.
+* :class:`RateLimitedOpenAI` - sync and async chat completions through a
+  limiter, retrying rate-limit, timeout and server errors with jittered
+  exponential backoff that honours ``retry-after`` headers.
+* :func:`chat_completion` - process-wide shortcut using a shared limiter
+  configured from ``OPENAI_RPM_LIMIT`` and ``OPENAI_TPM_LIMIT``.
+
+Limits are enforced per process; replicas should be given a share of the
+account limits through the environment.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import random
+import re
+import threading
+import time
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from llm_cache import cache_key, get_response_cache
+
+try:  # optional dependency, callers fall back to their heuristics without it
+    import openai  # type: ignore
+except Exception:  # pragma: no cover - import failure path
+    openai = None  # type: ignore
+
+try:  # optional, exact prompt token counts
+    import tiktoken  # type: ignore
+except Exception:  # pragma: no cover - import failure path
+    tiktoken = None  # type: ignore
+
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+# Completion budget reserved when the caller does not pass ``max_tokens``
+DEFAULT_COMPLETION_TOKENS = 1024
+DEFAULT_MAX_RETRIES = 6
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+# Longest single sleep while waiting, so priority changes are noticed promptly
+_WAIT_SLICE = 0.05
+_RETRYABLE_STATUS = {408, 409, 429}
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Scheduling class of a request; lower values are served first."""
+
+    INTERACTIVE = 0
+    NORMAL = 1
+    BATCH = 2
+
+
+def estimate_tokens(messages: List[Mapping[str, Any]], model: Optional[str] = None) -> int:
+    """Estimate prompt tokens for chat ``messages``.
+
+    Uses ``tiktoken`` when installed and a four-characters-per-token rule
+    otherwise, plus the per-message framing overhead of the chat format.
+    """
+    encoder = None
+    if tiktoken is not None:
+        try:
+            encoder = tiktoken.encoding_for_model(model or "gpt-4o-mini")
+        except Exception:
+            encoder = tiktoken.get_encoding("cl100k_base")
+
+    total = 3
+    for message in messages:
+        content = message.get("content") or ""
+        if not isinstance(content, str):
+            content = str(content)
+        total += 4 + (len(encoder.encode(content)) if encoder else (len(content) + 3) // 4)
+    return total
+
+
+def parse_duration(value: Any) -> Optional[float]:
+    """Parse OpenAI reset durations such as ``"20ms"``, ``"1s"`` or ``"6m0s"`` into seconds."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(text)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Return the server-requested retry delay from ``retry-after(-ms)`` headers."""
+    if not headers:
+        return None
+    retry_ms = headers.get("retry-after-ms")
+    if retry_ms is not None:
+        try:
+            return float(retry_ms) / 1000
+        except ValueError:
+            pass
+    return parse_duration(headers.get("retry-after"))
+
+
+class TokenBucket:
+    """Continuously refilling bucket; ``capacity`` is the largest allowed burst."""
+
+    def __init__(self, per_minute: float, capacity: float, clock: Callable[[], float]) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, capacity)
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken (requests above capacity wait for a full bucket)."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def clamp(self, remaining: float) -> None:
+        self._refill()
+        self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    """Requests- and tokens-per-minute limiter shared by all OpenAI callers.
+
+    ``burst_seconds`` sets how much of the per-minute allowance may be spent
+    at once; the default allows a full minute's worth, like the API itself.
+    Safe to use from threads and from asyncio code at the same time.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = DEFAULT_RPM,
+        tokens_per_minute: float = DEFAULT_TPM,
+        burst_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        fraction = min(burst_seconds, 60.0) / 60.0
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute * fraction, clock)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute * fraction, clock)
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+
+    def _enqueue(self, priority: Priority) -> Tuple[int, int]:
+        ticket = (int(priority), next(self._seq))
+        heapq.heappush(self._waiting, ticket)
+        return ticket
+
+    def _dequeue(self, ticket: Tuple[int, int]) -> None:
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+            self._cond.notify_all()
+
+    def _try_reserve(self, ticket: Tuple[int, int], tokens: int) -> float:
+        """Reserve capacity for ``ticket`` or return how long to wait. Caller holds the lock."""
+        pause = self._paused_until - self._clock()
+        if pause > 0:
+            return pause
+        if self._waiting[0] != ticket:
+            return _WAIT_SLICE
+        wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+        if wait > 0:
+            return wait
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        heapq.heappop(self._waiting)
+        self._cond.notify_all()
+        return 0.0
+
+    def acquire(self, tokens: int = 0, priority: Priority = Priority.NORMAL) -> None:
+        """Block until one request carrying ``tokens`` may be sent."""
+        with self._cond:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    wait = self._try_reserve(ticket, tokens)
+                    if wait <= 0:
+                        return
+                    self._cond.wait(min(wait, _WAIT_SLICE))
+            except BaseException:
+                self._dequeue(ticket)
+                raise
+
+    async def acquire_async(self, tokens: int = 0, priority: Priority = Priority.NORMAL) -> None:
+        """Asyncio variant of :meth:`acquire`; waits without blocking the event loop."""
+        with self._cond:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_reserve(ticket, tokens)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(min(wait, _WAIT_SLICE))
+        except BaseException:
+            with self._cond:
+                self._dequeue(ticket)
+            raise
+
+    def reconcile(self, reserved: int, used: int) -> None:
+        """Correct a reservation once the actual token usage is known."""
+        with self._cond:
+            if used < reserved:
+                self.tokens.give_back(reserved - used)
+            elif used > reserved:
+                self.tokens.take(used - reserved)
+            self._cond.notify_all()
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """Clamp the buckets to the ``x-ratelimit-remaining-*`` values reported by the API."""
+        if not headers:
+            return
+        with self._cond:
+            for header, bucket in (("x-ratelimit-remaining-requests", self.requests),
+                                   ("x-ratelimit-remaining-tokens", self.tokens)):
+                value = headers.get(header)
+                if value is None:
+                    continue
+                try:
+                    bucket.clamp(float(value))
+                except ValueError:
+                    continue
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for ``seconds`` (used after a ``429``)."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+class RateLimitedOpenAI:
+    """Chat completions gated by a :class:`RateLimiter` with jittered retries.
+
+    Pass existing ``client``/``async_client`` instances to reuse their
+    configuration; their built-in retries are disabled so that every attempt
+    goes through the limiter. Responses are returned as plain dictionaries
+    (``response["choices"][0]["message"]["content"]``) for both the 1.x
+    client and the legacy ``openai.ChatCompletion`` API.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[RateLimiter] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        client: Any = None,
+        async_client: Any = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ) -> None:
+        self.limiter = limiter or get_rate_limiter()
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self._client = client.with_options(max_retries=0) if client is not None else None
+        self._async_client = async_client.with_options(max_retries=0) if async_client is not None else None
+
+    def _sync_client(self) -> Any:
+        if self._client is None:
+            self._client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        return self._client
+
+    def _get_async_client(self) -> Any:
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        return self._async_client
+
+    def _reservation(self, messages: List[Mapping[str, Any]], model: str, max_tokens: Optional[int]) -> int:
+        return estimate_tokens(messages, model) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+    def _retry_delay(self, exc: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying ``exc``, or None if it should propagate."""
+        if attempt >= self.max_retries:
+            return None
+        status = getattr(exc, "status_code", None)
+        transient = type(exc).__name__ in ("APIConnectionError", "APITimeoutError", "Timeout", "RateLimitError",
+                                           "ServiceUnavailableError", "APIError")
+        if status is not None and status not in _RETRYABLE_STATUS and status < 500:
+            return None
+        if status is None and not transient:
+            return None
+
+        response = getattr(exc, "response", None)
+        requested = retry_after_seconds(getattr(response, "headers", None))
+        if requested is not None:
+            delay = requested + random.uniform(0, requested * 0.1 + 0.01)
+        else:
+            # Full jitter keeps concurrent retriers from synchronising
+            delay = random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt))
+        if status == 429 or type(exc).__name__ == "RateLimitError":
+            self.limiter.pause(delay)
+        return delay
+
+    def _finish(self, raw: Any, reserved: int) -> Dict[str, Any]:
+        self.limiter.update_from_headers(raw.headers)
+        response = raw.parse()
+        usage = getattr(response, "usage", None)
+        self.limiter.reconcile(reserved, getattr(usage, "total_tokens", None) or reserved)
+        return response.model_dump()
+
+    def chat_completion(
+        self,
+        messages: List[Mapping[str, Any]],
+        model: str,
+        priority: Priority = Priority.NORMAL,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Send a chat completion once the limiter admits it, retrying transient failures."""
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+        reserved = self._reservation(messages, model, max_tokens)
+
+        for attempt in itertools.count():
+            self.limiter.acquire(reserved, priority)
+            try:
+                if not hasattr(openai, "OpenAI"):
+                    # openai < 1.0 module-level API
+                    response = openai.ChatCompletion.create(
+                        model=model, messages=messages, api_key=self.api_key, **kwargs
+                    )
+                    used = response.get("usage", {}).get("total_tokens") or reserved
+                    self.limiter.reconcile(reserved, used)
+                    return response
+                raw = self._sync_client().chat.completions.with_raw_response.create(
+                    model=model, messages=messages, **kwargs
+                )
+                return self._finish(raw, reserved)
+            except Exception as exc:
+                self.limiter.reconcile(reserved, 0)
+                delay = self._retry_delay(exc, attempt)
+                if delay is None:
+                    raise
+                logger.warning("OpenAI call failed (%s), retry %d in %.2fs", exc, attempt + 1, delay)
+                time.sleep(delay)
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def achat_completion(
+        self,
+        messages: List[Mapping[str, Any]],
+        model: str,
+        priority: Priority = Priority.NORMAL,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Asyncio variant of :meth:`chat_completion` using ``AsyncOpenAI``."""
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+        reserved = self._reservation(messages, model, max_tokens)
+
+        for attempt in itertools.count():
+            await self.limiter.acquire_async(reserved, priority)
+            try:
+                raw = await self._get_async_client().chat.completions.with_raw_response.create(
+                    model=model, messages=messages, **kwargs
+                )
+                return self._finish(raw, reserved)
+            except Exception as exc:
+                self.limiter.reconcile(reserved, 0)
+                delay = self._retry_delay(exc, attempt)
+                if delay is None:
+                    raise
+                logger.warning("OpenAI call failed (%s), retry %d in %.2fs", exc, attempt + 1, delay)
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")  # pragma: no cover
+
+
+_shared_lock = threading.Lock()
+_shared_limiter: Optional[RateLimiter] = None
+_shared_clients: Dict[Tuple[Optional[str], Optional[str]], RateLimitedOpenAI] = {}
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide limiter configured from ``OPENAI_RPM_LIMIT``/``OPENAI_TPM_LIMIT``."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter(
+                requests_per_minute=float(os.getenv("OPENAI_RPM_LIMIT", DEFAULT_RPM)),
+                tokens_per_minute=float(os.getenv("OPENAI_TPM_LIMIT", DEFAULT_TPM)),
+            )
+        return _shared_limiter
+
+
+def chat_completion(
+    messages: List[Mapping[str, Any]],
+    model: str,
+    priority: Priority = Priority.NORMAL,
+    api_key: Optional[str] = None,
+    template_version: str = "",
+    use_cache: bool = True,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Rate-limited chat completion through the shared limiter.
+
+    ``api_key`` defaults to ``OPENAI_API_KEY`` and ``OPENAI_BASE_URL`` selects
+    an alternative endpoint such as a local stub. Responses are served from
+    and stored in the shared :mod:`llm_cache` unless ``use_cache`` is false;
+    ``template_version`` names the prompt so a template change can be
+    invalidated explicitly.
+    """
+    if openai is None:
+        raise RuntimeError("openai package is not installed")
+
+    cache = get_response_cache() if use_cache else None
+    if cache is not None:
+        params = dict(kwargs)
+        cached_key = cache_key(model, messages, params.pop("temperature", None), template_version, **params)
+        cached = cache.get(cached_key)
+        if cached is not None:
+            return cached
+
+    key = (api_key or os.getenv("OPENAI_API_KEY"), os.getenv("OPENAI_BASE_URL"))
+    with _shared_lock:
+        client = _shared_clients.get(key)
+    if client is None:
+        client = RateLimitedOpenAI(get_rate_limiter(), api_key=key[0], base_url=key[1])
+        with _shared_lock:
+            client = _shared_clients.setdefault(key, client)
+    response = client.chat_completion(messages, model, priority=priority, **kwargs)
+    if cache is not None:
+        cache.set(cached_key, response, model=model, template_version=template_version)
+    return response
+
+
+__all__ = [
+    "Priority",
+    "RateLimiter",
+    "RateLimitedOpenAI",
+    "TokenBucket",
+    "chat_completion",
+    "estimate_tokens",
+    "get_rate_limiter",
+    "parse_duration",
+    "retry_after_seconds",
+    "DEFAULT_RPM",
+    "DEFAULT_TPM",
+]
@@ -11,6 +11,8 @@ try:  # optional dependency used when an API key is present
 except Exception:  # pragma: no cover - import failure path
     openai = None  # type: ignore
 
+from openai_rate_limiter import Priority, chat_completion
+
 
 def _heuristic_rewrite(text: str) -> Dict[str, object]:
     """Simple deterministic rewrite used when OpenAI isn't available."""
@@ -33,16 +35,18 @@ def optimize_project_description(text: str) -> Dict[str, object]:
     api_key = os.getenv("OPENAI_API_KEY")
     if api_key and openai is not None:
         try:  # pragma: no cover - network calls are not tested
-            openai.api_key = api_key
             prompt = (
                 "Rewrite the following project description to optimise it for "
                 "regulatory compliance. Return JSON with keys 'original', "
                 "'optimized' and 'changes'.\n" + text
             )
-            response = openai.ChatCompletion.create(
+            response = chat_completion(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.2,
+                priority=Priority.NORMAL,
+                api_key=api_key,
+                template_version="optimize_project_description:1",
             )
             content = response["choices"][0]["message"]["content"].strip()
             data = json.loads(content)
@@ -0,0 +1,24 @@
+-- Indexed source_url lookup for raw_logs
+-- raw_logs.payload is TEXT, so duplicate checks previously had to download and
+-- parse every payload. Expose scraping_metadata.source_url as a stored generated
+-- column with a btree index so scrapers can filter with source_url=in.(...).
+
+CREATE OR REPLACE FUNCTION public.raw_logs_payload_source_url(p_payload TEXT)
+RETURNS TEXT AS $$
+BEGIN
+  RETURN (p_payload::jsonb -> 'scraping_metadata' ->> 'source_url');
+EXCEPTION WHEN others THEN
+  -- Non-JSON payloads simply have no source URL
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+IMMUTABLE
+SET search_path = public;
+
+ALTER TABLE public.raw_logs
+  ADD COLUMN IF NOT EXISTS source_url TEXT
+  GENERATED ALWAYS AS (public.raw_logs_payload_source_url(payload)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_raw_logs_source_url
+  ON public.raw_logs(source_url)
+  WHERE source_url IS NOT NULL;
@@ -0,0 +1,146 @@
+-- Server-side aggregates for data quality reports
+-- validate_data_quality.py used to download whole tables and count in Python.
+-- These functions return the same counts as a single JSONB document so each
+-- report costs one round-trip regardless of table size.
+
+-- Parse TEXT as JSONB, returning NULL instead of raising on invalid JSON
+CREATE OR REPLACE FUNCTION public.safe_jsonb(p_text TEXT)
+RETURNS JSONB AS $$
+BEGIN
+  RETURN p_text::jsonb;
+EXCEPTION WHEN others THEN
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+IMMUTABLE
+SET search_path = public;
+
+-- Mirrors Python truthiness: null, "", [], {}, false and 0 count as blank
+CREATE OR REPLACE FUNCTION public.jsonb_is_blank(p_value JSONB)
+RETURNS BOOLEAN AS $$
+  SELECT p_value IS NULL
+      OR p_value IN ('null'::jsonb, '""'::jsonb, '[]'::jsonb, '{}'::jsonb, 'false'::jsonb, '0'::jsonb);
+$$ LANGUAGE sql
+IMMUTABLE
+SET search_path = public;
+
+-- raw_logs payload integrity: per-issue counts plus a sample of offending ids
+CREATE OR REPLACE FUNCTION public.raw_logs_quality_summary(p_sample_size INTEGER DEFAULT 20)
+RETURNS JSONB AS $$
+  WITH parsed AS (
+    SELECT
+      id,
+      COALESCE(processed, false) AS processed,
+      CASE WHEN COALESCE(payload, '') = '' THEN '{}'::jsonb ELSE public.safe_jsonb(payload) END AS p
+    FROM public.raw_logs
+  ),
+  checked AS (
+    SELECT
+      id,
+      processed,
+      jsonb_typeof(p) IS DISTINCT FROM 'object' AS invalid_json,
+      jsonb_typeof(p) = 'object' AND public.jsonb_is_blank(p -> 'source_url') AS missing_source_url,
+      jsonb_typeof(p) = 'object' AND public.jsonb_is_blank(p -> 'title') AS missing_title,
+      jsonb_typeof(p) = 'object' AND jsonb_typeof(p -> 'tabs') IS DISTINCT FROM 'object' AS invalid_tabs,
+      jsonb_typeof(p) = 'object' AND p -> 'tabs' = '{}'::jsonb AS empty_tabs
+    FROM parsed
+  )
+  SELECT jsonb_build_object(
+    'total', count(*),
+    'processed', count(*) FILTER (WHERE processed),
+    'invalid_json', count(*) FILTER (WHERE invalid_json),
+    'missing_source_url', count(*) FILTER (WHERE missing_source_url),
+    'missing_title', count(*) FILTER (WHERE missing_title),
+    'invalid_tabs', count(*) FILTER (WHERE invalid_tabs),
+    'empty_tabs', count(*) FILTER (WHERE empty_tabs),
+    'valid', count(*) FILTER (WHERE NOT (invalid_json OR missing_source_url OR missing_title OR invalid_tabs OR empty_tabs)),
+    'sample_invalid_ids', COALESCE((
+      SELECT jsonb_agg(id) FROM (
+        SELECT id FROM checked
+        WHERE invalid_json OR missing_source_url OR missing_title OR invalid_tabs OR empty_tabs
+        LIMIT p_sample_size
+      ) s
+    ), '[]'::jsonb)
+  )
+  FROM checked;
+$$ LANGUAGE sql
+STABLE
+SET search_path = public;
+
+-- subsidies_structured field completeness and format checks
+CREATE OR REPLACE FUNCTION public.subsidies_structured_quality(
+  p_fields TEXT[],
+  p_required_fields TEXT[]
+)
+RETURNS JSONB AS $$
+  WITH rows AS (
+    SELECT to_jsonb(s) AS r FROM public.subsidies_structured s
+  ),
+  checked AS (
+    SELECT
+      r,
+      EXISTS (SELECT 1 FROM unnest(p_required_fields) f WHERE public.jsonb_is_blank(r -> f)) AS missing_required,
+      NOT public.jsonb_is_blank(r -> 'deadline') AND NOT (
+        (r ->> 'deadline') ~ '^\d{4}-\d{2}-\d{2}$'
+        OR (r ->> 'deadline') ~ '^\d{2}/\d{2}/\d{4}$'
+        OR (r ->> 'deadline') ~ '^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}'
+      ) AS invalid_deadline,
+      NOT public.jsonb_is_blank(r -> 'amount') AND NOT (
+        CASE jsonb_typeof(r -> 'amount')
+          WHEN 'number' THEN (r ->> 'amount')::numeric >= 0
+          ELSE btrim(regexp_replace(r ->> 'amount', '[,€$]', '', 'g'))
+               ~ '^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'
+        END
+      ) AS invalid_amount,
+      CASE jsonb_typeof(r -> 'audit')
+        WHEN 'object' THEN (r -> 'audit') ?& ARRAY['extraction_status', 'validation_notes']
+        WHEN 'string' THEN COALESCE(public.safe_jsonb(r ->> 'audit') ?& ARRAY['extraction_status', 'validation_notes'], false)
+        ELSE false
+      END AS valid_audit
+    FROM rows
+  )
+  SELECT jsonb_build_object(
+    'total', (SELECT count(*) FROM checked),
+    'filled', COALESCE((
+      SELECT jsonb_object_agg(f, n) FROM (
+        SELECT f, count(*) FILTER (WHERE NOT public.jsonb_is_blank(c.r -> f)) AS n
+        FROM unnest(p_fields) f CROSS JOIN checked c
+        GROUP BY f
+      ) counts
+    ), '{}'::jsonb),
+    'invalid_deadline', (SELECT count(*) FROM checked WHERE invalid_deadline),
+    'invalid_amount', (SELECT count(*) FROM checked WHERE invalid_amount),
+    'invalid_audit', (SELECT count(*) FROM checked WHERE NOT public.jsonb_is_blank(r -> 'audit') AND NOT valid_audit),
+    'valid_audits', (SELECT count(*) FROM checked WHERE valid_audit),
+    'valid', (SELECT count(*) FROM checked
+              WHERE NOT missing_required AND NOT invalid_deadline AND NOT invalid_amount
+                AND (public.jsonb_is_blank(r -> 'audit') OR valid_audit))
+  );
+$$ LANGUAGE sql
+STABLE
+SET search_path = public;
+
+-- Error types and critical-error counts over the most recent error_log rows
+CREATE OR REPLACE FUNCTION public.error_log_patterns(p_limit INTEGER DEFAULT 100)
+RETURNS JSONB AS $$
+  WITH recent AS (
+    SELECT error_type, error_message
+    FROM public.error_log
+    ORDER BY created_at DESC
+    LIMIT p_limit
+  )
+  SELECT jsonb_build_object(
+    'total', (SELECT count(*) FROM recent),
+    'critical', (SELECT count(*) FROM recent
+                 WHERE lower(error_message) ~ '(critical|fatal|system|database)'),
+    'by_type', COALESCE((
+      SELECT jsonb_object_agg(error_type, n) FROM (
+        SELECT COALESCE(error_type, 'unknown') AS error_type, count(*) AS n
+        FROM recent GROUP BY 1
+      ) t
+    ), '{}'::jsonb)
+  );
+$$ LANGUAGE sql
+STABLE
+SET search_path = public;
+
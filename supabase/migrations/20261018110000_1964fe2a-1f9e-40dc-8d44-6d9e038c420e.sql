@@ -0,0 +1,9 @@
+-- Indexes for incremental data quality validation
+-- validate_data_quality.py --mode incremental only re-checks rows whose
+-- updated_at moved past the last checkpoint.
+
+CREATE INDEX IF NOT EXISTS idx_raw_logs_updated_at
+  ON public.raw_logs(updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_subsidies_structured_updated_at
+  ON public.subsidies_structured(updated_at);
@@ -0,0 +1,89 @@
+-- Lease-based work queue for the raw log interpreter
+-- Agents used to select processed = false rows and then race for a per-row
+-- advisory lock. claim_raw_logs hands each caller a disjoint batch in one
+-- statement; claims expire unless the owner renews them with a heartbeat, so
+-- rows held by a crashed agent become claimable again. Every claim counts as an
+-- attempt; rows claimed p_max_attempts times without being processed are no
+-- longer handed out, so a log that always fails cannot monopolise the queue.
+
+ALTER TABLE public.raw_logs
+  ADD COLUMN IF NOT EXISTS claimed_by TEXT,
+  ADD COLUMN IF NOT EXISTS claim_expires_at TIMESTAMP WITH TIME ZONE,
+  ADD COLUMN IF NOT EXISTS claim_attempts INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_raw_logs_claimable
+  ON public.raw_logs(created_at)
+  WHERE processed = false;
+
+-- Atomically claim up to p_limit unprocessed rows that are unclaimed or whose lease expired
+CREATE OR REPLACE FUNCTION public.claim_raw_logs(
+  p_worker TEXT,
+  p_limit INTEGER DEFAULT 50,
+  p_lease_seconds INTEGER DEFAULT 900,
+  p_max_attempts INTEGER DEFAULT 5
+)
+RETURNS SETOF public.raw_logs AS $$
+  UPDATE public.raw_logs r
+  SET claimed_by = p_worker,
+      claim_expires_at = now() + make_interval(secs => p_lease_seconds),
+      claim_attempts = r.claim_attempts + 1
+  WHERE r.id IN (
+    SELECT id FROM public.raw_logs
+    WHERE processed = false
+      AND (claim_expires_at IS NULL OR claim_expires_at < now())
+      AND claim_attempts < p_max_attempts
+    ORDER BY created_at
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING r.*;
+$$ LANGUAGE sql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public;
+
+-- Heartbeat: extend the lease on rows still owned by p_worker, returning the ids still held
+CREATE OR REPLACE FUNCTION public.extend_raw_log_claims(
+  p_worker TEXT,
+  p_ids UUID[],
+  p_lease_seconds INTEGER DEFAULT 900
+)
+RETURNS SETOF UUID AS $$
+  UPDATE public.raw_logs
+  SET claim_expires_at = now() + make_interval(secs => p_lease_seconds)
+  WHERE id = ANY(p_ids)
+    AND claimed_by = p_worker
+    AND processed = false
+  RETURNING id;
+$$ LANGUAGE sql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public;
+
+-- Give back rows that p_worker could not finish so another agent can pick them up
+CREATE OR REPLACE FUNCTION public.release_raw_log_claims(
+  p_worker TEXT,
+  p_ids UUID[]
+)
+RETURNS INTEGER AS $$
+  WITH released AS (
+    UPDATE public.raw_logs
+    SET claimed_by = NULL,
+        claim_expires_at = NULL
+    WHERE id = ANY(p_ids)
+      AND claimed_by = p_worker
+    RETURNING 1
+  )
+  SELECT count(*)::INTEGER FROM released;
+$$ LANGUAGE sql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public;
+
+-- The queue functions run as the table owner and bypass RLS: only the service role may call them
+REVOKE EXECUTE ON FUNCTION public.claim_raw_logs(TEXT, INTEGER, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.extend_raw_log_claims(TEXT, UUID[], INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.release_raw_log_claims(TEXT, UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_raw_logs(TEXT, INTEGER, INTEGER, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.extend_raw_log_claims(TEXT, UUID[], INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.release_raw_log_claims(TEXT, UUID[]) TO service_role;
@@ -0,0 +1,105 @@
+"""Tests for concurrent, resumable AI enrichment."""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import ai_extractor
+from ai_extractor import compute_qa_metrics, run_ai_pipeline
+
+
+class _FakeCompletions:
+    def __init__(self, fail_titles=()):
+        self.fail_titles = set(fail_titles)
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, model, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.05)
+            title = messages[0]["content"]
+            if title in self.fail_titles:
+                raise RuntimeError("boom")
+            content = json.dumps({"title": title, "eligibility": ""})
+            return {"choices": [{"message": {"content": content}}]}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _setup(monkeypatch, tmp_path, fake, size=8):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(ai_extractor, "load_prompt", lambda language: "{title}")
+    monkeypatch.setattr(ai_extractor, "chat_completion", fake)
+    monkeypatch.setattr(ai_extractor, "get_response_cache", lambda: None)
+    batch_path = tmp_path / "batch.json"
+    batch_path.write_text(json.dumps([{"title": f"Grant {i}"} for i in range(size)]))
+    return str(batch_path), str(tmp_path / "out" / "ai_processed.json")
+
+
+def test_entries_are_enriched_concurrently_in_batch_order(monkeypatch, tmp_path):
+    fake = _FakeCompletions()
+    batch_path, output_path = _setup(monkeypatch, tmp_path, fake)
+
+    results = run_ai_pipeline(batch_path=batch_path, output_path=output_path, concurrency=4, qa_report=True)
+
+    assert fake.max_in_flight == 4
+    assert [r["title"] for r in results] == [f"Grant {i}" for i in range(8)]
+    journal = Path(output_path).with_suffix(".jsonl").read_text().splitlines()
+    assert len(journal) == 8
+    report = json.loads((Path(output_path).parent / "qa_report.json").read_text())
+    assert report == compute_qa_metrics(results)
+    assert report["field_failure_rate"]["eligibility"] == 1.0
+
+
+def test_resume_skips_enriched_entries_and_retries_failures(monkeypatch, tmp_path):
+    fake = _FakeCompletions(fail_titles={"Grant 2"})
+    batch_path, output_path = _setup(monkeypatch, tmp_path, fake, size=5)
+    run_ai_pipeline(batch_path=batch_path, output_path=output_path, concurrency=2)
+    assert fake.calls == 5
+
+    # Simulate a crash mid-write leaving a truncated journal line
+    journal = Path(output_path).with_suffix(".jsonl")
+    with journal.open("a", encoding="utf-8") as fh:
+        fh.write('{"title": "Grant')
+
+    retry = _FakeCompletions()
+    monkeypatch.setattr(ai_extractor, "chat_completion", retry)
+    results = run_ai_pipeline(batch_path=batch_path, output_path=output_path, concurrency=2)
+
+    assert retry.calls == 1
+    assert all(r["structured_output"] for r in results)
+    assert json.loads(Path(output_path).read_text()) == results
+    assert all(r["structured_output"] for r in ai_extractor.load_journal(str(journal)).values())
+
+
+def test_resume_survives_a_line_cut_inside_a_multibyte_character(monkeypatch, tmp_path):
+    fake = _FakeCompletions(fail_titles={"Grant 2"})
+    batch_path, output_path = _setup(monkeypatch, tmp_path, fake, size=3)
+    run_ai_pipeline(batch_path=batch_path, output_path=output_path, concurrency=2)
+
+    # The journal is written with ensure_ascii=False; cut a line after the first byte of "é"
+    journal = Path(output_path).with_suffix(".jsonl")
+    with journal.open("ab") as fh:
+        fh.write('{"title": "Aide à l\'été'.encode("utf-8")[:-1])
+
+    assert len(ai_extractor.load_journal(str(journal))) == 3
+
+    retry = _FakeCompletions()
+    monkeypatch.setattr(ai_extractor, "chat_completion", retry)
+    results = run_ai_pipeline(batch_path=batch_path, output_path=output_path, concurrency=2)
+
+    assert retry.calls == 1
+    assert all(r["structured_output"] for r in results)
+    # The retried entry starts on a fresh line after the truncated one
+    assert json.loads(journal.read_bytes().splitlines()[-1])["title"] == "Grant 2"
@@ -0,0 +1,103 @@
+"""Tests for the producer/consumer raw page batch upload."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from supabase import create_client
+
+from AI_SCRAPER_RAW_TEXTS import batch_upload
+from AI_SCRAPER_RAW_TEXTS.batch_upload import is_transient_error, parallel_upload
+from legacy.scraper.benchmark_upload import STUB_API_KEY, StubPostgrestServer
+
+
+def _write_pages(directory, count):
+    files = []
+    for i in range(count):
+        path = directory / f"page_{i}.json"
+        path.write_text(json.dumps({
+            "source_url": f"https://example.fr/aides/{i}",
+            "source_site": "example.fr",
+            "raw_text": "x" * 500,
+            "attachment_paths": [],
+        }), encoding="utf-8")
+        files.append(path)
+    return files
+
+
+def test_parallel_upload_uses_bulk_upserts(tmp_path):
+    files = _write_pages(tmp_path, 30)
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+    files.append(tmp_path / "broken.json")
+
+    with StubPostgrestServer(latency=0) as server:
+        client = create_client(server.url, STUB_API_KEY)
+        stats = parallel_upload(client, files, max_workers=3, check_existing=False, batch_rows=10)
+
+    assert stats["uploaded"] == 30
+    assert stats["errors"] == 1
+    assert stats["batches"] == 3
+    assert server.requests == 3
+    assert stats["rows_per_sec"] > 0
+    assert stats["mb_per_sec"] >= 0
+
+
+def test_batches_bounded_by_bytes_and_bad_rows_isolated(tmp_path):
+    files = _write_pages(tmp_path, 12)
+
+    with StubPostgrestServer(latency=0, reject_marker="/aides/4") as server:
+        client = create_client(server.url, STUB_API_KEY)
+        stats = parallel_upload(client, files, max_workers=2, check_existing=False,
+                                batch_bytes=3000, batch_rows=100)
+
+    assert stats["uploaded"] == 11
+    assert stats["errors"] == 1
+    # roughly 650 bytes per row -> four rows per batch
+    assert stats["batches"] == 3
+    assert "https://example.fr/aides/4" not in server.urls
+
+
+
+class _UpstreamError(Exception):
+    def __init__(self, code, message="upstream error"):
+        super().__init__(message)
+        self.code = code
+
+
+def test_transient_errors_are_retried_not_bisected(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_upload, "RETRY_DELAY", 0)
+    files = _write_pages(tmp_path, 10)
+
+    with StubPostgrestServer(latency=0, throttle_first=2) as server:
+        client = create_client(server.url, STUB_API_KEY)
+        stats = parallel_upload(client, files, max_workers=2, check_existing=False, batch_rows=10)
+
+    assert stats["uploaded"] == 10
+    assert stats["errors"] == 0
+    # two throttled attempts and one successful retry of the whole batch
+    assert server.throttled == 2
+    assert server.requests == 3
+
+
+def test_transient_error_classification():
+    assert is_transient_error(_UpstreamError("429"))
+    assert is_transient_error(_UpstreamError("503"))
+    assert is_transient_error(_UpstreamError("40P01"))
+    assert is_transient_error(ConnectionResetError("reset by peer"))
+    assert not is_transient_error(_UpstreamError("400"))
+    assert not is_transient_error(_UpstreamError("23505", "duplicate key value"))
+
+
+def test_script_runs_from_its_own_directory():
+    """The documented `cd AI_SCRAPER_RAW_TEXTS && python batch_upload.py` entry point still imports."""
+    script_dir = Path(__file__).resolve().parents[1] / "AI_SCRAPER_RAW_TEXTS"
+    completed = subprocess.run(
+        [sys.executable, "batch_upload.py", "--help"],
+        cwd=script_dir, capture_output=True, text=True, timeout=60,
+        env={**os.environ, "SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_SERVICE_ROLE_KEY": "test-key"},
+    )
+    assert completed.returncode == 0, completed.stderr
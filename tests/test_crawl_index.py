@@ -0,0 +1,97 @@
+"""Tests for the persistent crawl index."""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from crawl_index import CrawlIndex, content_hash
+
+
+class _Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class _Session:
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def head(self, url, headers=None, timeout=None, allow_redirects=True):
+        self.requests.append((url, headers))
+        return self.response
+
+
+def test_record_and_lookup(tmp_path):
+    index = CrawlIndex(str(tmp_path / "index.sqlite"))
+    assert index.record("https://a.fr/1", content="hello", output_path="a.json", etag='"v1"')
+
+    entry = index.get("https://a.fr/1")
+    assert entry.content_hash == content_hash("hello")
+    assert entry.output_path == "a.json"
+    assert entry.etag == '"v1"'
+    assert index.get("https://a.fr/missing") is None
+    assert len(index) == 1
+
+
+def test_record_reports_content_changes(tmp_path):
+    index = CrawlIndex(str(tmp_path / "index.sqlite"))
+    index.record("https://a.fr/1", content="v1", etag='"e1"')
+
+    assert index.record("https://a.fr/1", content="v1") is False
+    assert index.record("https://a.fr/1", content="v2") is True
+    # Validators not supplied on re-record are preserved
+    assert index.get("https://a.fr/1").etag == '"e1"'
+
+
+def test_filter_urls_applies_age_policy(tmp_path):
+    index = CrawlIndex(str(tmp_path / "index.sqlite"), max_age_hours=24)
+    index.record("https://a.fr/fresh", content="x")
+    index.record("https://a.fr/stale", content="y", fetched_at=time.time() - 48 * 3600)
+
+    urls = ["https://a.fr/new", "https://a.fr/fresh", "https://a.fr/stale"]
+    assert index.filter_urls(urls) == ["https://a.fr/new", "https://a.fr/stale"]
+    # Without an age policy indexed pages are never re-crawled
+    assert index.filter_urls(urls, max_age_hours=None) == ["https://a.fr/new", "https://a.fr/stale"]
+    assert CrawlIndex(str(tmp_path / "index.sqlite")).filter_urls(urls) == ["https://a.fr/new"]
+
+
+def test_stale_page_revalidated_with_conditional_request(tmp_path):
+    index = CrawlIndex(str(tmp_path / "index.sqlite"), max_age_hours=1)
+    old = time.time() - 2 * 3600
+    index.record("https://a.fr/p", content="x", etag='"abc"', fetched_at=old)
+
+    session = _Session(_Response(304))
+    assert index.filter_urls(["https://a.fr/p"], revalidate=True, session=session) == []
+    assert session.requests[0][1] == {"If-None-Match": '"abc"'}
+    assert index.get("https://a.fr/p").fetched_at > old
+
+    index.record("https://a.fr/q", content="x", etag='"abc"', fetched_at=old)
+    session = _Session(_Response(200, {"ETag": '"def"'}))
+    assert index.filter_urls(["https://a.fr/q"], revalidate=True, session=session) == ["https://a.fr/q"]
+    # New validators are only stored once the re-crawl is recorded
+    assert index.get("https://a.fr/q").etag == '"abc"'
+    index.record("https://a.fr/q", content="y")
+    assert index.get("https://a.fr/q").etag == '"def"'
+
+
+def test_failed_recrawl_keeps_previous_validators(tmp_path):
+    index = CrawlIndex(str(tmp_path / "index.sqlite"), max_age_hours=1)
+    old = time.time() - 2 * 3600
+    index.record("https://a.fr/p", content="x", etag='"abc"', fetched_at=old)
+
+    session = _Session(_Response(200, {"ETag": '"def"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}))
+    unchanged, validators = index.revalidate(index.get("https://a.fr/p"), session)
+    assert not unchanged
+    assert validators == {"etag": '"def"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+    # The re-crawl never gets recorded, so the next run still asks about the
+    # version that was actually fetched
+    assert index.filter_urls(["https://a.fr/p"], revalidate=True, session=session) == ["https://a.fr/p"]
+    assert index.get("https://a.fr/p").etag == '"abc"'
+    session = _Session(_Response(304))
+    assert index.filter_urls(["https://a.fr/p"], revalidate=True, session=session) == []
+    assert session.requests[0][1] == {"If-None-Match": '"abc"'}
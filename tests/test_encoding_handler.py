@@ -0,0 +1,112 @@
+"""Tests for content harvester encoding detection."""
+
+import codecs
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from content_harvester.utils.encoding_handler import EncodingHandler
+
+FRENCH = (
+    "Les aides à l'installation des jeunes agriculteurs sont versées après "
+    "vérification du dossier. Le bénéficiaire s'engage à exercer son activité "
+    "pendant quatre années et à réaliser les investissements prévus. "
+)
+
+
+def _decode(content, content_type=None, host=None):
+    return EncodingHandler()._decode(content, content_type, host)
+
+
+@pytest.mark.parametrize("bom, codec", [
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+])
+def test_byte_order_mark_wins(bom, codec):
+    content = bom + "été".encode(codec)
+
+    # The BOM beats a contradicting header
+    text, _, method = _decode(content, "text/html; charset=iso-8859-2")
+    assert text == "été"
+    assert method == "bom"
+
+
+def test_declared_charset_is_used_when_it_decodes():
+    content = FRENCH.encode("iso-8859-1")
+
+    text, encoding, method = _decode(content, 'text/html; charset="ISO-8859-1"')
+    assert (text, encoding, method) == (FRENCH, "iso-8859-1", "declared")
+
+
+def test_meta_and_xml_declarations_are_sniffed():
+    html = '<html><head><meta charset="windows-1250"></head><body>Žatec</body></html>'
+    text, encoding, method = _decode(html.encode("windows-1250"))
+    assert (encoding, method) == ("windows-1250", "meta")
+    assert "Žatec" in text
+
+    xml = '<?xml version="1.0" encoding="ISO-8859-15"?><aide>€</aide>'
+    text, encoding, method = _decode(xml.encode("iso-8859-15"))
+    assert (encoding, method) == ("iso-8859-15", "meta")
+    assert "€" in text
+
+    # A UTF-16 declaration cannot be true of an ASCII-compatible stream
+    html = '<meta http-equiv="Content-Type" content="text/html; charset=utf-16">é'
+    assert _decode(html.encode("utf-8"))[1:] == ("utf-8", "meta")
+
+
+def test_invalid_declarations_fall_through():
+    content = ('<meta charset="no-such-charset">' + FRENCH).encode("utf-8")
+
+    # Neither the unknown meta charset nor a header that cannot decode the bytes is trusted
+    text, encoding, method = _decode(content, "text/html; charset=us-ascii")
+    assert (encoding, method) == ("utf-8", "utf-8")
+    assert text.endswith(FRENCH)
+
+
+def test_strict_utf8_before_detection(monkeypatch):
+    def fail(_content):
+        raise AssertionError("detector should not run for valid UTF-8")
+
+    handler = EncodingHandler()
+    monkeypatch.setattr(handler, "_detect_encoding", fail)
+    assert handler._decode(FRENCH.encode("utf-8"), None, None) == (FRENCH, "utf-8", "utf-8")
+
+    # Bytes that are not strict UTF-8 do reach the detector
+    with pytest.raises(AssertionError):
+        handler._decode(FRENCH.encode("cp1252"), None, None)
+
+
+def test_western_text_prefers_cp1252_over_cp1250():
+    # charset-normalizer scores this cp1252 text identically in cp1250,
+    # cp1252 and cp1257 and ranks cp1250 first; the European preference
+    # order breaks the tie towards Windows Western
+    sample = "Café crème à la française, élevé près de la forêt."
+
+    text, encoding, method = _decode(sample.encode("cp1252"))
+    assert method == "detected"
+    assert codecs.lookup(encoding).name == "cp1252"
+    assert text == sample
+
+
+def test_detected_encoding_is_cached_per_host(monkeypatch):
+    handler = EncodingHandler(cache_size=1)
+    content = (FRENCH * 3).encode("cp1252")
+    handler.decode_content(content, url="https://aides.example.fr/page-1")
+
+    calls = []
+    monkeypatch.setattr(handler, "_detect_encoding", lambda data: calls.append(data) or "utf-8")
+
+    # The same host reuses the cached answer without running detection
+    short = "Montant versé".encode("cp1252")
+    assert handler._decode(short, None, "aides.example.fr") == ("Montant versé", "cp1252", "host_cache")
+    assert calls == []
+
+    # The LRU holds one host, so a new host evicts the first one
+    handler._remember_encoding("other.example.fr", "iso-8859-2")
+    assert handler._cached_encoding("aides.example.fr") is None
+    assert handler._cached_encoding("other.example.fr") == "iso-8859-2"
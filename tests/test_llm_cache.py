@@ -0,0 +1,64 @@
+"""Tests for the persistent LLM response cache."""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "legacy" / "AgriTool-Raw-Log-Interpreter"))
+
+import openai_rate_limiter
+from llm_cache import ResponseCache, cache_key
+from openai_stub_server import STUB_API_KEY, StubOpenAIServer
+
+MESSAGES = [{"role": "user", "content": "Translate from fr to en:\nAide"}]
+
+
+def test_key_covers_model_template_temperature_and_prompt():
+    base = cache_key("gpt-4o-mini", MESSAGES, 0.0, "translate_text:1")
+    assert base == cache_key("gpt-4o-mini", [dict(MESSAGES[0])], 0.0, "translate_text:1")
+    assert base != cache_key("gpt-4o", MESSAGES, 0.0, "translate_text:1")
+    assert base != cache_key("gpt-4o-mini", MESSAGES, 0.2, "translate_text:1")
+    assert base != cache_key("gpt-4o-mini", MESSAGES, 0.0, "translate_text:2")
+    assert base != cache_key("gpt-4o-mini", [{"role": "user", "content": "Aide"}], 0.0, "translate_text:1")
+
+
+def test_entries_expire_and_lru_eviction_keeps_budget(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("llm_cache.time.time", lambda: clock[0])
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_bytes=320)
+
+    cache.set("a", {"content": "x" * 80})
+    clock[0] += 1
+    cache.set("b", {"content": "y" * 80})
+    clock[0] += 1
+    assert cache.get("a") == {"content": "x" * 80}  # a is now more recent than b
+    clock[0] += 1
+    cache.set("c", {"content": "z" * 80})
+    clock[0] += 1
+    cache.set("d", {"content": "w" * 80})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["bytes"] <= 320
+
+    clock[0] += 120
+    assert cache.get("d") is None
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+
+
+def test_cache_survives_restart_and_skips_the_api(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite3")
+    with StubOpenAIServer(latency=0.0) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        for _ in range(2):
+            cache = ResponseCache(path)
+            monkeypatch.setattr(openai_rate_limiter, "get_response_cache", lambda: cache)
+            response = openai_rate_limiter.chat_completion(
+                MESSAGES, model="stub", api_key=STUB_API_KEY, temperature=0.0, template_version="t:1"
+            )
+            cache.close()
+        assert server.completions == 1
+    assert response["choices"][0]["message"]["role"] == "assistant"
@@ -0,0 +1,93 @@
+"""Tests for the shared OpenAI rate limiter."""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "legacy" / "AgriTool-Raw-Log-Interpreter"))
+
+from openai_rate_limiter import (
+    Priority,
+    RateLimitedOpenAI,
+    RateLimiter,
+    estimate_tokens,
+    parse_duration,
+    retry_after_seconds,
+)
+from openai_stub_server import SAMPLE_EXTRACTION, STUB_API_KEY, StubOpenAIServer
+
+
+def test_token_budget_spaces_out_requests():
+    # 1000 tokens/s with a 100 token burst: five 100 token requests need ~0.4s
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=60_000, burst_seconds=0.1)
+    started = time.monotonic()
+    for _ in range(5):
+        limiter.acquire(tokens=100)
+    elapsed = time.monotonic() - started
+    assert 0.3 <= elapsed < 1.0
+
+
+def test_reconcile_returns_unused_tokens():
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=60_000, burst_seconds=0.1)
+    limiter.acquire(tokens=100)
+    limiter.reconcile(reserved=100, used=10)
+    started = time.monotonic()
+    limiter.acquire(tokens=80)
+    assert time.monotonic() - started < 0.05
+
+
+def test_interactive_requests_jump_the_queue():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=10**6, burst_seconds=0.1)
+    limiter.acquire()  # drain the single-request burst
+    order = []
+
+    def worker(name, priority):
+        limiter.acquire(priority=priority)
+        order.append(name)
+
+    batch = threading.Thread(target=worker, args=("batch", Priority.BATCH))
+    batch.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=worker, args=("interactive", Priority.INTERACTIVE))
+    interactive.start()
+    batch.join(2)
+    interactive.join(2)
+    assert order == ["interactive", "batch"]
+
+
+def test_headers_and_estimates():
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("20ms") == 0.02
+    assert retry_after_seconds({"retry-after-ms": "250"}) == 0.25
+    assert retry_after_seconds({"retry-after": "2"}) == 2
+
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=60_000, burst_seconds=1)
+    limiter.update_from_headers({"x-ratelimit-remaining-tokens": "0"})
+    started = time.monotonic()
+    limiter.acquire(tokens=100)
+    assert time.monotonic() - started >= 0.08
+
+    assert estimate_tokens([{"role": "user", "content": "x" * 400}]) >= 100
+
+
+def test_throttled_calls_are_retried_through_the_limiter():
+    with StubOpenAIServer(latency=0.0, throttle_first=2) as server:
+        client = RateLimitedOpenAI(RateLimiter(), api_key=STUB_API_KEY, base_url=server.base_url)
+        response = client.chat_completion([{"role": "user", "content": "log"}], model="stub",
+                                          priority=Priority.BATCH)
+
+        async def run_async():
+            async_client = RateLimitedOpenAI(RateLimiter(), api_key=STUB_API_KEY, base_url=server.base_url)
+            return await async_client.achat_completion([{"role": "user", "content": "log"}], model="stub")
+
+        async_response = asyncio.run(run_async())
+
+        assert server.throttled == 2
+        assert server.completions == 2
+    assert response["choices"][0]["message"]["content"] == async_response["choices"][0]["message"]["content"]
+    assert json.loads(response["choices"][0]["message"]["content"]) == SAMPLE_EXTRACTION
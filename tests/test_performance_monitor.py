@@ -0,0 +1,160 @@
+"""Tests for the histogram-based content harvester performance monitor."""
+
+import asyncio
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from content_harvester.utils.performance_monitor import (
+    MAX_LABEL_SETS,
+    SUB_BUCKETS,
+    LogHistogram,
+    PerformanceMonitor,
+)
+
+
+def test_histogram_percentiles_are_within_one_bucket():
+    histogram = LogHistogram()
+    for value in range(1, 1001):
+        histogram.record(value / 1000)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 1000
+    assert snapshot["min"] == 0.001
+    assert snapshot["max"] == 1.0
+    assert abs(snapshot["total"] - 500.5) < 1e-9
+    for key, expected in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        assert abs(snapshot[key] - expected) <= expected / SUB_BUCKETS
+
+
+def test_histogram_bounds_and_edge_values():
+    histogram = LogHistogram()
+    assert histogram.snapshot() == {"count": 0}
+    assert histogram.percentile(0.5) == 0.0
+
+    histogram.record(0.0)
+    histogram.record(-1.0)
+    histogram.record(1e-15)
+    histogram.record(1e15)
+    assert histogram.percentile(0.5) == 0.0
+    # Values outside the covered exponents land in the edge buckets but
+    # percentiles never leave the observed range
+    assert histogram.percentile(1.0) == 1e15
+    assert histogram.snapshot()["min"] == -1.0
+
+    single = LogHistogram()
+    single.record(3.7)
+    assert single.percentile(0.5) == single.percentile(0.99) == 3.7
+
+    for value in (1.0, 1.5, 2.0, 1000.0):
+        low, high = LogHistogram._bucket_bounds(LogHistogram._index(value))
+        assert low <= value < high
+
+
+def test_timer_context_manager_and_decorators():
+    monitor = PerformanceMonitor()
+
+    with monitor.timer("block") as timer:
+        pass
+    assert timer.elapsed >= 0
+
+    @monitor.timer("sync_call")
+    def double(value):
+        return value * 2
+
+    @monitor.timer("async_call", labels={"domain": "example.org"})
+    async def fetch():
+        await asyncio.sleep(0)
+        return "page"
+
+    assert double(2) == 4
+    assert double.__name__ == "double"
+    assert asyncio.run(fetch()) == "page"
+
+    operations = monitor.get_summary()["operations"]
+    assert operations["block"]["count"] == 1
+    assert operations["sync_call"]["count"] == 1
+    assert operations['async_call{domain="example.org"}']["count"] == 1
+
+
+def test_metadata_becomes_labels_and_measurements():
+    monitor = PerformanceMonitor()
+    monitor.record_custom_metric("decode", 0.5, unit="seconds", category="encoding",
+                                 metadata={"method": "bom", "bytes": 120})
+    monitor.record_custom_metric("decode", 0.25, unit="seconds", category="encoding",
+                                 metadata={"method": "declared", "bytes": 80})
+    timer_id = monitor.start_timer("fetch")
+    monitor.stop_timer(timer_id, metadata={"domain": "a.fr"})
+    monitor.record_failure("harvest", "Timeout", metadata={"domain": "b.fr"})
+
+    metrics = {
+        (metric["name"], tuple(sorted(metric["labels"].items()))): metric
+        for metric in monitor.get_detailed_metrics()
+    }
+    assert metrics[("decode", (("method", "bom"),))]["total"] == 0.5
+    assert metrics[("decode", (("method", "declared"),))]["total"] == 0.25
+    assert metrics[("decode_bytes", (("method", "bom"),))]["total"] == 120
+    assert metrics[("fetch", (("domain", "a.fr"),))]["count"] == 1
+    assert monitor.counters["harvest_failure"] == 1
+    assert monitor.labelled_counters[("error_Timeout", (("domain", "b.fr"),))] == 1
+
+
+def test_label_sets_are_capped_per_metric():
+    monitor = PerformanceMonitor()
+    for host in range(MAX_LABEL_SETS + 10):
+        monitor.record_custom_metric("per_host", 1, metadata={"host": f"h{host}.fr"})
+
+    series = [metric for metric in monitor.get_detailed_metrics(limit=1000) if metric["name"] == "per_host"]
+    assert len(series) == MAX_LABEL_SETS + 1
+    overflow = [metric for metric in series if metric["labels"] == {"overflow": "true"}]
+    assert overflow[0]["count"] == 10
+
+
+def test_export_prometheus():
+    monitor = PerformanceMonitor()
+    monitor.record_duration("fetch", 0.5)
+    monitor.record_custom_metric("page size", 2048, unit="bytes", metadata={"method": "utf-8"})
+    monitor.increment("harvest_page_bytes", 2048)
+    monitor.record_success("harvest", metadata={"domain": "a.fr"})
+    monitor.record_success("harvest")
+    monitor.gauges["system_memory_usage_mb"] = 12.5
+
+    text = monitor.export_prometheus(prefix="test")
+    lines = text.splitlines()
+    assert "# TYPE test_operation_duration_seconds summary" in lines
+    assert 'test_operation_duration_seconds{operation="fetch",quantile="0.5"} 0.5' in lines
+    assert 'test_operation_duration_seconds_sum{operation="fetch"} 0.5' in lines
+    assert 'test_operation_duration_seconds_count{operation="fetch"} 1' in lines
+    assert 'test_page_size_count{method="utf-8"} 1' in lines
+    assert "# TYPE test_events_total counter" in lines
+    assert 'test_events_total{event="harvest_page_bytes"} 2048' in lines
+    # The labelled and unlabelled samples of an event add up to its total
+    assert 'test_events_total{event="harvest_success",domain="a.fr"} 1' in lines
+    assert 'test_events_total{event="harvest_success"} 1' in lines
+    assert "test_system_memory_usage_mb 12.5" in lines
+    assert text.endswith("\n")
+
+
+def test_export_jsonl(tmp_path):
+    monitor = PerformanceMonitor()
+    monitor.record_duration("parse", 0.25)
+    monitor.increment("documents_found", 3, labels={"kind": "pdf"})
+
+    stream = io.StringIO()
+    assert monitor.export_jsonl(stream) == 3
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    histogram, total, labelled = records
+    assert histogram["type"] == "histogram"
+    assert histogram["name"] == "parse"
+    assert histogram["labels"] == {}
+    assert histogram["p50"] == 0.25
+    assert total == {"timestamp": total["timestamp"], "type": "counter", "name": "documents_found", "value": 3}
+    assert labelled["labels"] == {"kind": "pdf"}
+
+    path = tmp_path / "metrics.jsonl"
+    monitor.export_jsonl(str(path))
+    monitor.export_jsonl(str(path))
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 6
@@ -0,0 +1,130 @@
+"""Tests for the shared Python document extractor."""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "legacy"))
+
+from document_processing import PythonDocumentExtractor, ScraperDocumentExtractor
+
+
+def _create_docx(path: Path) -> Path:
+    from docx import Document
+
+    doc = Document()
+    doc.add_paragraph("Hello DOCX")
+    doc.save(path)
+    return path
+
+
+def _create_xlsx(path: Path) -> Path:
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws["A1"] = "Hello XLSX"
+    wb.save(path)
+    return path
+
+
+def _create_pdf(path: Path) -> Path:
+    pytest.importorskip("reportlab")
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(str(path))
+    c.drawString(100, 750, "Hello PDF")
+    c.save()
+    return path
+
+
+@pytest.mark.parametrize(
+    "name, factory",
+    [("sample.pdf", _create_pdf), ("sample.docx", _create_docx), ("sample.xlsx", _create_xlsx)],
+)
+def test_extract_document_bytes_matches_path_extraction(tmp_path, name, factory):
+    extractor = PythonDocumentExtractor()
+    path = factory(tmp_path / name)
+
+    from_bytes = extractor.extract_document_bytes(path.read_bytes(), path.name)
+    assert from_bytes.success
+    assert from_bytes.file_size == path.stat().st_size
+    assert from_bytes.text_content == extractor.extract_document(str(path)).text_content
+
+
+class _SlowDocxExtractor(PythonDocumentExtractor):
+    """Hangs on files named slow*.docx to exercise the per-file timeout."""
+
+    def _extract_docx(self, source):
+        if Path(str(source)).name.startswith("slow"):
+            time.sleep(10)
+        return super()._extract_docx(source)
+
+
+def test_extract_many_streams_results_and_enforces_timeout(tmp_path):
+    paths = [str(_create_docx(tmp_path / f"doc{i}.docx")) for i in range(3)]
+    paths.append(str(_create_xlsx(tmp_path / "sheet.xlsx")))
+    slow = str(_create_docx(tmp_path / "slow.docx"))
+
+    started = time.monotonic()
+    results = {
+        result.file_path: result
+        for result in _SlowDocxExtractor().extract_many(paths + [slow], workers=3, timeout=1)
+    }
+
+    assert time.monotonic() - started < 8
+    assert set(results) == set(paths + [slow])
+    assert all(results[path].success and results[path].text_content.strip() for path in paths)
+    assert not results[slow].success
+    assert "timed out" in results[slow].error
+
+
+def test_scraper_extractor_merges_attachments_in_input_order(tmp_path):
+    paths = [str(_create_docx(tmp_path / "a.docx")), str(_create_xlsx(tmp_path / "b.xlsx"))]
+    extractor = ScraperDocumentExtractor()
+
+    extractions = extractor.extract_multiple_attachments(paths, workers=2)
+    merged = extractor.merge_page_and_attachment_content(
+        {"url": "https://example.fr", "title": "Aide", "text": "Page"},
+        {path: data["text"] for path, data in extractions.items()},
+    )
+
+    assert list(extractions) == paths
+    assert "Hello DOCX" in merged["combined_text"] and "Hello XLSX" in merged["combined_text"]
+    assert merged["extraction_summary"]["successful_extractions"] == 2
+
+
+def test_xlsx_streams_tables_and_stops_at_limits(tmp_path):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Aides"
+    ws.append(["Nom", "Montant", None])
+    for i in range(50):
+        ws.append([f"Aide {i}", i * 100, None])
+    notes = wb.create_sheet("Notes")
+    notes.append([None, None])
+    notes.append(["Voir", None, "annexe"])
+    path = tmp_path / "aides.xlsx"
+    wb.save(path)
+
+    result = PythonDocumentExtractor(max_table_rows=3).extract_document(str(path))
+    assert result.success
+    assert result.text_content.splitlines()[:2] == ["Nom Montant", "Aide 0 0"]
+    assert result.text_content.endswith("Aide 49 4900\nVoir annexe")
+    aides, notes_sheet = result.metadata["sheets"]
+    assert aides["rows"] == [["Nom", "Montant"], ["Aide 0", "0"], ["Aide 1", "100"]]
+    assert aides["row_count"] == 51 and not result.metadata["truncated"]
+    assert notes_sheet["rows"] == [["Voir", "", "annexe"]]
+
+    limited = PythonDocumentExtractor(max_sheet_rows=5).extract_document(str(path))
+    assert [sheet["row_count"] for sheet in limited.metadata["sheets"]] == [5, 1]
+    assert limited.metadata["sheets"][0]["truncated"]
+
+    budget = PythonDocumentExtractor(max_text_chars=60).extract_document(str(path))
+    assert budget.character_count <= 60 and budget.metadata["truncated"]
+    assert [sheet["name"] for sheet in budget.metadata["sheets"]] == ["Aides"]
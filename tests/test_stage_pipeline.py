@@ -0,0 +1,135 @@
+import json
+import pathlib
+import sys
+import threading
+import time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from legacy.scraper import pipeline_orchestrator
+from legacy.scraper.benchmark_upload import STUB_API_KEY, StubPostgrestServer
+from legacy.scraper.stage_pipeline import Stage, StreamingPipeline
+
+
+def test_items_flow_through_all_stages():
+    collected = []
+    pipeline = StreamingPipeline(
+        [
+            Stage("double", lambda x: x * 2, workers=3),
+            Stage("collect", lambda x: collected.append(x) or x),
+        ],
+        queue_size=2,
+    )
+    metrics = pipeline.run(range(20))
+
+    assert sorted(collected) == [x * 2 for x in range(20)]
+    assert metrics["double"].items_in == 20
+    assert metrics["double"].items_out == 20
+    assert metrics["collect"].items_out == 20
+
+
+def test_dropped_items_and_errors_are_isolated():
+    def flaky(x):
+        if x == 3:
+            raise ValueError("boom")
+        return None if x % 2 else x
+
+    pipeline = StreamingPipeline([Stage("flaky", flaky), Stage("sink", lambda x: x)])
+    metrics = pipeline.run(range(6))
+
+    assert metrics["flaky"].errors == 1
+    assert metrics["flaky"].items_dropped == 2
+    assert metrics["sink"].items_in == 3
+    assert pipeline.errors == [{"stage": "flaky", "error": "boom"}]
+
+
+def test_batched_stage_receives_lists():
+    batches = []
+    pipeline = StreamingPipeline(
+        [Stage("batch", lambda items: batches.append(list(items)) or items,
+               batch_size=4, batch_timeout=1.0)]
+    )
+    pipeline.run(range(10))
+
+    assert sum(len(b) for b in batches) == 10
+    assert max(len(b) for b in batches) <= 4
+    assert pipeline.metrics["batch"].calls == len(batches)
+
+
+def test_stages_overlap_and_apply_backpressure():
+    first_downstream = threading.Event()
+    produced_before_downstream = []
+
+    def produce(x):
+        if not first_downstream.is_set():
+            produced_before_downstream.append(x)
+        return x
+
+    def slow_sink(x):
+        first_downstream.set()
+        time.sleep(0.02)
+        return x
+
+    pipeline = StreamingPipeline(
+        [Stage("produce", produce), Stage("sink", slow_sink)], queue_size=2
+    )
+    pipeline.run(range(15))
+    report = pipeline.report()
+
+    # Downstream work starts before the producer finishes the whole input
+    assert len(produced_before_downstream) < 15
+    # The fast producer spends time waiting on the bounded queue
+    assert report["produce"]["blocked_seconds"] > 0
+    assert report["sink"]["throughput_per_sec"] > 0
+    assert report["sink"]["latency_p95"] >= report["sink"]["latency_p50"]
+
+
+class _Discovery:
+    def discover_urls(self, site_name, max_urls, max_pages):
+        return [f"https://example.fr/aides/{i}" for i in range(max_urls)]
+
+
+class _Processor:
+    def __init__(self, config):
+        config.delay_range = (0, 0)
+        self.discovery = _Discovery()
+        self.crawl_index = None
+
+    def _process_single_url(self, url, output_path, site_name):
+        path = output_path / f"{url.rsplit('/', 1)[-1]}.json"
+        path.write_text(json.dumps({"url": url, "text": "Aide " + url, "success": True}), encoding="utf-8")
+        return {"success": True, "output_file": str(path)}
+
+
+class _Extractor:
+    calls = []
+
+    def process_raw_logs(self, batch_size=10, max_records=None, record_ids=None):
+        self.calls.append(list(record_ids))
+        return {"successful_extractions": len(record_ids), "failed_extractions": 0}
+
+
+def test_streaming_extraction_only_sees_rows_uploaded_by_the_run(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline_orchestrator, "BatchProcessor", _Processor)
+    monkeypatch.setattr(pipeline_orchestrator, "AIExtractor", _Extractor)
+    monkeypatch.delenv("NEXT_PUBLIC_SUPABASE_URL", raising=False)
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", STUB_API_KEY)
+    _Extractor.calls = []
+
+    with StubPostgrestServer(latency=0) as server:
+        monkeypatch.setenv("SUPABASE_URL", server.url)
+        # A row stored by an earlier run is not this run's to extract
+        server.urls.add("https://example.fr/aides/0")
+        orchestrator = pipeline_orchestrator.PipelineOrchestrator(
+            {"output_dir": str(tmp_path / "scraped"), "batch_timeout": 0.2}
+        )
+        stats = orchestrator._run_streaming_stages("example", max_urls=7, max_pages=1, batch_size=3)
+
+        # Pages are upserted in batches rather than one request per file
+        assert server.requests < 7
+
+    extracted = [record_id for call in _Extractor.calls for record_id in call]
+    assert sorted(extracted) == list(range(2, 8))
+    assert stats["total_uploads"] == 6
+    assert orchestrator.pipeline_stats["total_extractions"] == 6
@@ -0,0 +1,257 @@
+"""Tests for the bulk, non-blocking Supabase uploader."""
+
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from legacy.scraper.benchmark_upload import STUB_API_KEY, StubPostgrestServer, write_sample_files
+from legacy.scraper.supabase_uploader import (
+    BatchUploadOptimizer,
+    SupabaseUploader,
+    UploadConfig,
+    is_transient_error,
+    pack_rows_by_bytes,
+)
+
+
+def _upload(monkeypatch, server, data_dir, **config):
+    monkeypatch.delenv("NEXT_PUBLIC_SUPABASE_URL", raising=False)
+    monkeypatch.setenv("SUPABASE_URL", server.url)
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", STUB_API_KEY)
+    config.setdefault("delay_between_batches", 0.0)
+    config.setdefault("delay_between_retries", 0.0)
+    uploader = SupabaseUploader(UploadConfig(**config))
+    uploader.logger.setLevel(logging.WARNING)
+    try:
+        return asyncio.run(uploader.upload_scraped_data_async(data_dir))
+    finally:
+        uploader.close()
+
+
+class _UpstreamError(Exception):
+    def __init__(self, code, message="upstream error"):
+        super().__init__(message)
+        self.code = code
+
+
+class _FlakyDeduplicator:
+    """Fails the first ``failures`` upserts with ``error``, then accepts rows"""
+
+    def __init__(self, error, failures):
+        self.error = error
+        self.failures = failures
+        self.calls = []
+
+    def upsert(self, rows):
+        self.calls.append(len(rows))
+        if len(self.calls) <= self.failures:
+            raise self.error
+        return rows
+
+
+def _upsert(deduplicator, rows, max_retries=3):
+    uploader = SupabaseUploader(UploadConfig(delay_between_retries=0.0, max_retries=max_retries))
+    uploader.logger.setLevel(logging.CRITICAL)
+    uploader.deduplicator = deduplicator
+    counts = {"inserted": 0, "duplicates": 0, "failed": 0, "requests": 0, "throttled": 0}
+    try:
+        asyncio.run(uploader._upsert_with_bisection(rows, counts))
+    finally:
+        uploader.close()
+    return counts, uploader.stats
+
+
+def test_transient_error_classification():
+    assert is_transient_error(_UpstreamError("502"))
+    assert is_transient_error(_UpstreamError("57014", "canceling statement due to statement timeout"))
+    assert is_transient_error(ConnectionResetError("connection reset by peer"))
+    assert is_transient_error(TimeoutError())
+    assert not is_transient_error(_UpstreamError("400"))
+    assert not is_transient_error(_UpstreamError("23514", "check constraint violation"))
+
+
+def test_transient_errors_retry_the_whole_batch():
+    rows = [{"source_url": f"https://example.fr/aides/{i}"} for i in range(8)]
+    deduplicator = _FlakyDeduplicator(_UpstreamError("503"), failures=2)
+
+    counts, stats = _upsert(deduplicator, rows)
+
+    assert deduplicator.calls == [8, 8, 8]
+    assert counts["inserted"] == 8
+    assert counts["failed"] == 0
+    assert stats.retry_attempts == 2
+
+
+def test_exhausted_transient_errors_fail_the_batch_without_bisecting():
+    rows = [{"source_url": f"https://example.fr/aides/{i}"} for i in range(4)]
+    deduplicator = _FlakyDeduplicator(ConnectionError("server disconnected"), failures=10)
+
+    counts, stats = _upsert(deduplicator, rows, max_retries=2)
+
+    assert deduplicator.calls == [4, 4, 4]
+    assert counts["failed"] == 4
+    assert [e["source"] for e in stats.errors] == [r["source_url"] for r in rows]
+
+
+def test_data_errors_bisect_without_retrying():
+    rows = [{"source_url": f"https://example.fr/aides/{i}"} for i in range(4)]
+    deduplicator = _FlakyDeduplicator(_UpstreamError("23514"), failures=1)
+
+    counts, stats = _upsert(deduplicator, rows)
+
+    assert deduplicator.calls == [4, 2, 2]
+    assert counts["inserted"] == 4
+    assert stats.retry_attempts == 0
+
+
+def test_pack_rows_by_bytes_respects_limits():
+    rows = [{"source_url": f"u{i}", "raw_text": "x" * 100} for i in range(10)]
+
+    batches = pack_rows_by_bytes(rows, max_bytes=300, max_rows=100)
+    assert [len(b) for b in batches] == [2, 2, 2, 2, 2]
+
+    batches = pack_rows_by_bytes(rows, max_bytes=10_000, max_rows=4)
+    assert [len(b) for b in batches] == [4, 4, 2]
+
+    # A row larger than the limit still goes out on its own
+    assert pack_rows_by_bytes(rows[:1], max_bytes=10, max_rows=4) == [rows[:1]]
+
+
+def test_bulk_upserts_run_concurrently(monkeypatch, tmp_path):
+    write_sample_files(tmp_path, 40, text_size=100)
+
+    with StubPostgrestServer(latency=0.05) as server:
+        stats = _upload(monkeypatch, server, tmp_path, concurrent_limit=4,
+                        max_batch_rows=5, dedup_mode="server")
+
+        assert stats.successful_uploads == 40
+        # one connection check plus eight bulk upserts of five rows
+        assert server.requests == 9
+        assert server.max_in_flight > 1
+        assert len(server.urls) == 40
+
+
+def test_failing_row_is_isolated_by_bisection(monkeypatch, tmp_path):
+    write_sample_files(tmp_path, 8, text_size=100)
+
+    with StubPostgrestServer(latency=0, reject_marker="/aides/5") as server:
+        server.urls.add("https://example.fr/aides/0")
+        stats = _upload(monkeypatch, server, tmp_path, max_batch_rows=8,
+                        max_retries=1, dedup_mode="server")
+
+    assert stats.successful_uploads == 6
+    assert stats.duplicate_skips == 1
+    assert stats.failed_uploads == 1
+    assert stats.errors[0]["source"] == "https://example.fr/aides/5"
+
+
+def test_optimizer_additive_increase_multiplicative_decrease():
+    optimizer = BatchUploadOptimizer(initial_batch_size=20, max_batch_size=100,
+                                     initial_concurrency=2, max_concurrency=4,
+                                     target_latency=1.0, base_cooldown=0.5)
+
+    for _ in range(2):
+        optimizer.record_batch(rows=optimizer.current_batch_size, payload_bytes=1000, latency=0.1)
+    assert optimizer.current_batch_size == 30
+    assert optimizer.concurrency == 3
+
+    # Slow batches shrink the batch but keep concurrency
+    optimizer.record_batch(rows=30, payload_bytes=1000, latency=5.0)
+    assert optimizer.current_batch_size == 15
+    assert optimizer.concurrency == 3
+    assert optimizer.cooldown_remaining() == 0
+
+    # Throttling halves both and opens a cooldown window
+    optimizer.record_batch(rows=15, payload_bytes=1000, latency=0.1, throttled=True)
+    assert optimizer.current_batch_size == 7
+    assert optimizer.concurrency == 1
+    assert 0 < optimizer.cooldown_remaining() <= 0.5
+
+
+def test_throttling_backs_off_and_retries(monkeypatch, tmp_path):
+    write_sample_files(tmp_path, 20, text_size=100)
+
+    with StubPostgrestServer(latency=0, throttle_first=2) as server:
+        stats = _upload(monkeypatch, server, tmp_path, concurrent_limit=4, max_batch_rows=5,
+                        dedup_mode="server", delay_between_batches=0.01)
+
+    assert stats.successful_uploads == 20
+    assert stats.failed_uploads == 0
+    assert server.throttled == 2
+    assert sum(b["throttled"] for b in stats.batch_stats) == 2
+
+
+
+class _LookupClient:
+    """Records the thread each duplicate lookup runs on"""
+
+    def __init__(self, known):
+        self.known = known
+        self.threads = []
+        self._url = None
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self._url = value
+        return self
+
+    def limit(self, count):
+        return self
+
+    def execute(self):
+        self.threads.append(threading.current_thread().name)
+        return type("Response", (), {"data": [{"id": 1}] if self._url in self.known else []})()
+
+
+def test_duplicate_lookup_runs_off_the_event_loop():
+    uploader = SupabaseUploader(UploadConfig(dedup_mode="preload"))
+    uploader.client = _LookupClient({"https://example.fr/aides/1"})
+
+    async def check():
+        return [await uploader._is_duplicate(f"https://example.fr/aides/{i}") for i in range(2)]
+
+    try:
+        assert asyncio.run(check()) == [False, True]
+    finally:
+        uploader.close()
+    assert all(name.startswith("supabase-io") for name in uploader.client.threads)
+    assert uploader._db_executor is None
+
+
+def test_sync_wrapper_releases_the_io_pool(monkeypatch, tmp_path):
+    write_sample_files(tmp_path, 4, text_size=100)
+    monkeypatch.delenv("NEXT_PUBLIC_SUPABASE_URL", raising=False)
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", STUB_API_KEY)
+
+    with StubPostgrestServer(latency=0) as server:
+        monkeypatch.setenv("SUPABASE_URL", server.url)
+        uploader = SupabaseUploader(UploadConfig(delay_between_batches=0.0, dedup_mode="server"))
+        uploader.logger.setLevel(logging.WARNING)
+        stats = uploader.upload_scraped_data(str(tmp_path))
+        assert stats["successful_uploads"] == 4
+        assert uploader._db_executor is None
+        # The uploader stays usable; the next call starts a fresh pool
+        assert uploader.upload_scraped_data(str(tmp_path))["failed_uploads"] == 0
+        assert uploader._db_executor is None
+
+
+def test_script_runs_from_its_own_directory():
+    """The documented `python supabase_uploader.py` entry point still imports."""
+    script_dir = Path(__file__).resolve().parents[1] / "legacy" / "scraper"
+    completed = subprocess.run(
+        [sys.executable, "supabase_uploader.py", "--help"],
+        cwd=script_dir, capture_output=True, text=True, timeout=60,
+        env={**os.environ, "SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_SERVICE_ROLE_KEY": "test-key"},
+    )
+    assert completed.returncode == 0, completed.stderr
@@ -0,0 +1,112 @@
+"""Tests for per-stage timing in the universal content harvester."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from content_harvester.core.base_harvester import HarvestConfig, HarvestResult, UniversalHarvester
+
+
+class _Processor:
+    def __init__(self):
+        self.documents = {"https://a.fr/aide.pdf": {"url": "https://a.fr/aide.pdf", "file_size": 500}}
+
+    async def process_content(self, url, custom_config=None, timings=None):
+        timings["fetch"] = 0.25
+        timings["parse"] = 0.125
+        return {"text_content": "Aide à l'installation", "response_metadata": {"content_length": 1200}}
+
+    def find_document_links(self, content_data):
+        return list(self.documents) + ["https://a.fr/missing.pdf"]
+
+    async def process_document(self, url):
+        return self.documents.get(url)
+
+
+class _Stage:
+    def __init__(self, result=None, error=None):
+        self.result = result if result is not None else {}
+        self.error = error
+
+    async def __call__(self, *args, **kwargs):
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def _harvester(metadata_error=None):
+    harvester = UniversalHarvester(HarvestConfig(delay_between_requests=0, language_detection=False))
+    harvester.content_processor = _Processor()
+    harvester.format_preserver.preserve_format = _Stage({"text": "Aide"})
+    harvester.metadata_extractor.extract_metadata = _Stage({}, error=metadata_error)
+    harvester.validation_engine.validate_content = _Stage({"confidence": 0.9})
+    return harvester
+
+
+def test_successful_harvest_records_stage_timings_and_bytes():
+    harvester = _harvester()
+
+    [result] = asyncio.run(harvester.harvest_content(["https://a.fr/page"]))
+
+    assert result.success
+    assert result.stage_timings["fetch"] == 0.25
+    assert result.stage_timings["parse"] == 0.125
+    assert set(result.stage_timings) == {
+        "fetch", "parse", "preserve_format", "metadata", "documents", "relationships", "validation"
+    }
+    assert result.bytes_processed == {"page": 1200, "documents": 500}
+
+    monitor = harvester.performance_monitor
+    assert monitor.counters["harvest_success"] == 1
+    assert monitor.counters["harvest_page_bytes"] == 1200
+    assert monitor.get_summary()["operations"]["harvest_fetch"]["total"] == 0.25
+
+
+def test_failing_stage_keeps_the_timings_of_completed_stages():
+    harvester = _harvester(metadata_error=ValueError("bad metadata"))
+
+    [result] = asyncio.run(harvester.harvest_content(["https://a.fr/page"]))
+
+    assert not result.success
+    assert result.error_message == "bad metadata"
+    # The stage that raised is timed too; later stages never ran
+    assert set(result.stage_timings) == {"fetch", "parse", "preserve_format", "metadata"}
+    assert result.bytes_processed == {"page": 1200}
+    assert harvester.performance_monitor.counters["error_ValueError"] == 1
+
+
+def test_harvest_summary_breaks_time_down_by_stage_and_domain():
+    harvester = UniversalHarvester(HarvestConfig(delay_between_requests=0))
+
+    def result(url, processing_time, stage_timings, success=True, page_bytes=0):
+        return HarvestResult(session_id="s", timestamp="t", source_url=url, success=success,
+                             processing_time=processing_time, stage_timings=stage_timings,
+                             bytes_processed={"page": page_bytes})
+
+    results = [
+        result("https://fast.fr/1", 1.0, {"fetch": 0.5, "parse": 0.25}, page_bytes=100),
+        result("https://slow.fr/1", 4.0, {"fetch": 1.0, "documents": 3.0}, page_bytes=300),
+        result("https://slow.fr/2", 2.5, {"fetch": 2.5}, success=False),
+        result("https://medium.fr/1", 3.0, {"parse": 2.0}),
+    ]
+
+    summary = harvester.get_harvest_summary(results)
+
+    stages = summary["stage_timings"]
+    assert list(stages) == ["fetch", "documents", "parse"]
+    assert stages["fetch"]["total"] == 4.0
+    assert stages["fetch"]["count"] == 3
+    assert stages["fetch"]["max"] == 2.5
+    assert sum(stage["share"] for stage in stages.values()) == pytest.approx(1.0)
+
+    domains = summary["domains"]
+    assert list(domains) == ["slow.fr", "medium.fr", "fast.fr"]
+    assert domains["slow.fr"]["sources"] == 2
+    assert domains["slow.fr"]["successful_harvests"] == 1
+    assert domains["slow.fr"]["bytes_processed"] == {"page": 300}
+    assert domains["slow.fr"]["slowest_stage"] == "fetch"
+    assert domains["fast.fr"]["slowest_stage"] == "fetch"
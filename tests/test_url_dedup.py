@@ -0,0 +1,121 @@
+"""Tests for the compact URL de-duplication layer."""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from url_dedup import UrlDeduplicator, UrlHashSet
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, table, max_rows):
+        self.table = table
+        self.max_rows = max_rows
+        self.filters = []
+        self.row_limit = None
+        self.upsert_rows = None
+        self.upsert_kwargs = None
+
+    def select(self, column):
+        self.column = column
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, n):
+        self.row_limit = n
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self.upsert_rows = rows
+        self.upsert_kwargs = kwargs
+        return self
+
+    def execute(self):
+        self.table.requests += 1
+        if self.upsert_rows is not None:
+            existing = {row["source_url"] for row in self.table.rows}
+            inserted = [row for row in self.upsert_rows if row["source_url"] not in existing]
+            self.table.rows.extend(inserted)
+            self.table.last_upsert_kwargs = self.upsert_kwargs
+            return _Response(inserted)
+        rows = sorted(self.table.rows, key=lambda row: row["source_url"])
+        rows = [row for row in rows if all(f(row) for f in self.filters)]
+        # Emulate PostgREST's max-rows cap
+        rows = rows[: min(self.row_limit or self.max_rows, self.max_rows)]
+        return _Response([{"source_url": row["source_url"]} for row in rows])
+
+
+class _Table:
+    def __init__(self, urls):
+        self.rows = [{"source_url": url} for url in urls]
+        self.requests = 0
+        self.last_upsert_kwargs = None
+
+
+class _Client:
+    def __init__(self, urls, max_rows=1000):
+        self.table_obj = _Table(urls)
+        self.max_rows = max_rows
+
+    def table(self, name):
+        return _Query(self.table_obj, self.max_rows)
+
+
+def test_url_hash_set_membership_and_merge():
+    urls = [f"https://example.fr/aide/{i}" for i in range(10000)]
+    seen = UrlHashSet(urls)
+
+    assert len(seen) == 10000
+    assert "https://example.fr/aide/42" in seen
+    assert "https://example.fr/aide/10000" not in seen
+    seen.add("https://example.fr/aide/42")
+    assert len(seen) == 10000
+    assert seen.nbytes <= 8 * 10000
+
+
+def test_load_pages_past_server_row_limit():
+    urls = [f"https://example.fr/{i:04d}" for i in range(250)]
+    client = _Client(urls, max_rows=100)
+    dedup = UrlDeduplicator(client, page_size=1000)
+
+    assert dedup.load() == 250
+    assert all(url in dedup.seen for url in urls)
+    # three full pages plus the terminating empty page
+    assert client.table_obj.requests == 4
+
+
+def test_is_duplicate_with_exact_fallback():
+    client = _Client(["https://example.fr/a"])
+    dedup = UrlDeduplicator(client)
+    dedup.load()
+
+    assert dedup.is_duplicate("https://example.fr/a")
+    assert dedup.is_duplicate("https://example.fr/a", exact=True)
+    assert not dedup.is_duplicate("https://example.fr/b", exact=True)
+
+
+def test_upsert_ignores_conflicts_without_preloading():
+    client = _Client(["https://example.fr/a"])
+    dedup = UrlDeduplicator(client)
+
+    inserted = dedup.upsert([{"source_url": "https://example.fr/a"}, {"source_url": "https://example.fr/b"}])
+
+    assert inserted == [{"source_url": "https://example.fr/b"}]
+    assert client.table_obj.last_upsert_kwargs == {"on_conflict": "source_url", "ignore_duplicates": True}
+    assert "https://example.fr/b" in dedup.seen
@@ -0,0 +1,221 @@
+"""Tests for server-side aggregation in the data quality validator."""
+
+import json
+import sys
+import uuid
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import validate_data_quality
+from validate_data_quality import DataQualityValidator
+
+
+class _Response:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class _Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = []
+        self.row_limit = None
+        self.head = False
+
+    def select(self, *columns, count=None, head=False):
+        self.head = head
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, n):
+        self.row_limit = n
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row[column] >= value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row[column] <= value)
+        return self
+
+    def execute(self):
+        rows = sorted(self.client.tables.get(self.table, []), key=lambda row: row["id"])
+        rows = [row for row in rows if all(f(row) for f in self.filters)]
+        if self.head:
+            return _Response([], count=len(rows))
+        rows = rows[: self.row_limit] if self.row_limit else rows
+        self.client.requests.append(self.table)
+        self.client.rows_read += len(rows)
+        return _Response(rows)
+
+
+class _Rpc:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        self.client.rpc_calls.append((self.name, self.params))
+        if self.name not in self.client.rpc_results:
+            raise Exception(f"function public.{self.name} does not exist")
+        return _Response(self.client.rpc_results[self.name])
+
+
+class _Client:
+    def __init__(self, tables, rpc_results=None):
+        self.tables = tables
+        self.rpc_results = rpc_results or {}
+        self.requests = []
+        self.rows_read = 0
+        self.rpc_calls = []
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def rpc(self, name, params):
+        return _Rpc(self, name, params)
+
+
+def _validator(monkeypatch, client, page_size=2, **options):
+    monkeypatch.setenv("NEXT_PUBLIC_SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "a.b.c")
+    monkeypatch.setattr(validate_data_quality, "create_client", lambda *args: client)
+    validator = DataQualityValidator(**options)
+    validator.page_size = page_size
+    return validator
+
+
+def _raw_log(i, updated_at="2025-01-01T00:00:00+00:00", **payload):
+    processed = isinstance(i, int) and i % 2 == 0
+    return {"id": i, "processed": processed, "payload": json.dumps(payload), "updated_at": updated_at}
+
+
+GOOD_PAYLOAD = {"source_url": "https://example.fr/a", "title": "Aide", "tabs": {"presentation": "x"}}
+
+
+def test_raw_logs_stream_when_rpc_missing(monkeypatch):
+    good = {"source_url": "https://example.fr/a", "title": "Aide", "tabs": {"presentation": "x"}}
+    client = _Client({"raw_logs": [
+        _raw_log(1, **good),
+        _raw_log(2, **good),
+        _raw_log(3, title="Aide", tabs={}),
+        {"id": 4, "processed": False, "payload": "not json"},
+        _raw_log(5, **good),
+    ]})
+    validator = _validator(monkeypatch, client)
+
+    metrics = validator.validate_raw_logs_integrity()
+
+    assert metrics.total_records == 5
+    assert metrics.valid_records == 3
+    assert metrics.missing_fields["source_url"] == 1
+    assert validator.aggregation_sources["raw_logs_quality_summary"] == "stream"
+    # five rows in pages of two, plus the terminating empty page
+    assert client.requests.count("raw_logs") == 4
+    details = validator.validation_results["Raw Logs Integrity"][0]["metrics"]
+    assert details["payload_issues"] == 3
+    assert details["processed_count"] == 1
+
+
+def test_structured_summary_is_shared_and_matches_rpc_shape(monkeypatch):
+    audit = {"extraction_status": "ok", "validation_notes": ""}
+    record = {"url": "u", "title": "t", "description": "d", "audit": audit,
+              "deadline": "2025-01-31"}
+    client = _Client({"subsidies_structured": [
+        dict(record, id=1, amount="1500"),
+        dict(record, id=2, deadline="31 janvier", amount=None),
+        dict(record, id=3, description="", audit=None, amount="12.5"),
+    ]})
+    validator = _validator(monkeypatch, client)
+
+    metrics = validator.validate_structured_data_quality()
+    validator.validate_audit_trails()
+
+    summary = validator.structured_summary()
+    assert set(summary) == {"total", "filled", "invalid_deadline", "invalid_amount",
+                            "invalid_audit", "valid_audits", "valid"}
+    assert summary["invalid_deadline"] == 1
+    assert summary["valid_audits"] == 2
+    assert metrics.valid_records == 1
+    assert metrics.missing_fields == {"description": 1, "audit": 1}
+    # audit trails reuse the cached aggregate instead of re-reading the table
+    assert client.requests.count("subsidies_structured") == 3
+
+
+def test_rpc_aggregate_skips_table_reads(monkeypatch):
+    client = _Client({}, rpc_results={"error_log_patterns": {
+        "total": 10, "critical": 0,
+        "by_type": {"timeout": 3, "parse": 3, "network": 2, "auth": 2},
+    }})
+    validator = _validator(monkeypatch, client)
+
+    assert validator.validate_error_patterns()
+    assert client.requests == []
+    assert client.rpc_calls == [("error_log_patterns", {"p_limit": 100})]
+    assert validator.aggregation_sources["error_log_patterns"] == "rpc"
+
+
+def test_incremental_mode_rechecks_only_changed_rows(monkeypatch, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    rows = [_raw_log(f"{i:03d}", updated_at=f"2024-12-{i + 1:02d}T00:00:00+00:00", **GOOD_PAYLOAD)
+            for i in range(20)]
+    client = _Client({"raw_logs": rows})
+
+    first = _validator(monkeypatch, client, page_size=50, mode="incremental", checkpoint_path=str(checkpoint))
+    first.validate_raw_logs_integrity()
+    first.save_checkpoint()
+    assert client.rows_read == 20
+
+    # One row is edited a day later, one is added and one is deleted
+    rows[3] = _raw_log("003", updated_at="2025-01-02T00:00:00+00:00", title="Aide")
+    rows.append(_raw_log("020", updated_at="2025-01-02T00:00:00+00:00", **GOOD_PAYLOAD))
+    del rows[0]
+    client.rows_read = 0
+
+    second = _validator(monkeypatch, client, page_size=50, mode="incremental", checkpoint_path=str(checkpoint))
+    incremental = second.raw_logs_summary()
+    second.save_checkpoint()
+    # two changed rows, the last row inside the overlap window and one id-only pass to prune
+    assert client.rows_read == 3 + 20
+
+    full = _validator(monkeypatch, client).raw_logs_summary()
+    assert incremental == full
+    assert incremental["total"] == 20
+    assert incremental["missing_source_url"] == 1
+    assert second.aggregation_sources["raw_logs_quality_summary"] == "incremental"
+    assert json.loads(checkpoint.read_text())["raw_logs"]["watermark"] == "2025-01-02T00:00:00+00:00"
+
+
+def test_sample_mode_estimates_with_confidence_interval(monkeypatch):
+    rows = []
+    for i in range(2000):
+        payload = dict(GOOD_PAYLOAD, title="" if i % 5 == 0 else "Aide")
+        rows.append(_raw_log(str(uuid.UUID(int=i * (2 ** 128 // 2000))), **payload))
+    client = _Client({"raw_logs": rows})
+    validator = _validator(monkeypatch, client, page_size=1000, mode="sample", sample_size=400, seed=7)
+
+    metrics = validator.validate_raw_logs_integrity()
+
+    summary = validator.raw_logs_summary()
+    assert summary["total"] == 2000
+    assert summary["sampled"] == 400
+    assert client.rows_read <= 400 + 400
+    low, high = summary["confidence_intervals"]["valid"]
+    assert low < 0.8 < high
+    assert high - low < 0.1
+    assert abs(metrics.valid_records - 1600) < 160
+    report_metrics = validator.validation_results["Raw Logs Integrity"][0]["metrics"]
+    assert report_metrics["sample_size"] == 400
+    assert "validity_rate_95%_ci" in report_metrics
+    assert set(validator.generate_quality_report()) == {"validation_execution", "validation_results", "summary"}
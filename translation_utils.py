@@ -8,6 +8,8 @@ try:  # optional dependency
 except Exception:  # pragma: no cover - import failure path
     openai = None  # type: ignore
 
+from openai_rate_limiter import Priority, chat_completion
+
 
 def translate_text(text: str, source_lang: str, target_lang: str) -> str:
     """Translate ``text`` from ``source_lang`` to ``target_lang``.
@@ -19,12 +21,14 @@ def translate_text(text: str, source_lang: str, target_lang: str) -> str:
     api_key = os.getenv("OPENAI_API_KEY")
     if api_key and openai is not None:
         try:  # pragma: no cover - network calls are not tested
-            openai.api_key = api_key
             prompt = f"Translate from {source_lang} to {target_lang}:\n{text}"
-            response = openai.ChatCompletion.create(
+            response = chat_completion(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.0,
+                priority=Priority.INTERACTIVE,
+                api_key=api_key,
+                template_version="translate_text:1",
             )
             return response["choices"][0]["message"]["content"].strip()
         except Exception:
@@ -0,0 +1,211 @@
+"""Compact URL de-duplication for Supabase uploads.
+
+Uploaders used to preload every ``source_url`` of ``raw_scraped_pages`` with
+a single ``select`` call. PostgREST silently caps such responses at its
+``max-rows`` limit and the resulting Python ``set`` of strings grows without
+bound. This module replaces that with:
+
+* :class:`UrlHashSet` - a set of URLs stored as a sorted array of 64-bit
+  hashes (8 bytes per URL instead of a full string object).
+* :class:`UrlDeduplicator` - pages through the existing keys with keyset
+  pagination, answers membership queries with an optional exact server-side
+  confirmation, and writes rows with ``upsert ... on_conflict`` so callers
+  can skip preloading entirely and let the database discard duplicates.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# PostgREST's default ``max-rows``; larger pages would be truncated anyway
+DEFAULT_PAGE_SIZE = 1000
+
+# Pending hashes are merged into the sorted array once this many accumulate
+_MERGE_THRESHOLD = 4096
+
+
+def url_hash64(url: str) -> int:
+    """Return a stable unsigned 64-bit hash of ``url``."""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class UrlHashSet:
+    """Set of URLs kept as a sorted ``array('Q')`` of 64-bit hashes.
+
+    Membership is a binary search over the sorted array plus a small pending
+    set for recent additions. Two distinct URLs collide with probability of
+    roughly ``n / 2**64``; callers that cannot tolerate that use
+    :meth:`UrlDeduplicator.is_duplicate` with ``exact=True``.
+    """
+
+    def __init__(self, urls: Iterable[str] = ()) -> None:
+        self._sorted = array("Q")
+        self._pending: set = set()
+        self.update(urls)
+
+    @classmethod
+    def from_hashes(cls, hashes: Iterable[int]) -> "UrlHashSet":
+        """Build a set directly from precomputed :func:`url_hash64` values."""
+        instance = cls()
+        instance._sorted = array("Q", sorted(set(hashes)))
+        return instance
+
+    def _contains_hash(self, value: int) -> bool:
+        if value in self._pending:
+            return True
+        index = bisect_left(self._sorted, value)
+        return index < len(self._sorted) and self._sorted[index] == value
+
+    def __contains__(self, url: object) -> bool:
+        if not isinstance(url, str):
+            return False
+        return self._contains_hash(url_hash64(url))
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._pending)
+
+    def add(self, url: str) -> None:
+        """Add ``url`` to the set."""
+        value = url_hash64(url)
+        if self._contains_hash(value):
+            return
+        self._pending.add(value)
+        if len(self._pending) >= _MERGE_THRESHOLD:
+            self._merge()
+
+    def update(self, urls: Iterable[str]) -> None:
+        """Add every URL in ``urls``."""
+        for url in urls:
+            self.add(url)
+
+    def _merge(self) -> None:
+        self._sorted = array("Q", heapq.merge(self._sorted, sorted(self._pending)))
+        self._pending.clear()
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the stored hashes."""
+        return self._sorted.itemsize * len(self._sorted) + 8 * len(self._pending)
+
+
+class UrlDeduplicator:
+    """Duplicate detection and conflict-free writes for a URL-keyed table.
+
+    Parameters
+    ----------
+    client:
+        Supabase client (or anything exposing ``table()`` with the
+        PostgREST query builder interface).
+    table:
+        Table holding the URLs.
+    column:
+        Unique URL column; also used as the ``on_conflict`` target.
+    page_size:
+        Keys fetched per request when preloading.
+    """
+
+    def __init__(self, client: Any, table: str = "raw_scraped_pages",
+                 column: str = "source_url", page_size: int = DEFAULT_PAGE_SIZE,
+                 logger: Optional[logging.Logger] = None) -> None:
+        self.client = client
+        self.table = table
+        self.column = column
+        self.page_size = page_size
+        self.logger = logger or logging.getLogger(__name__)
+        self.seen = UrlHashSet()
+        self.loaded = False
+        # upsert() may be called from several I/O worker threads
+        self._lock = threading.Lock()
+
+    def iter_keys(self) -> Iterator[str]:
+        """Yield every URL in the table using keyset pagination.
+
+        Pages are ordered by the unique URL column and continue strictly after
+        the last key seen, so no rows are skipped or repeated regardless of
+        the server's row limit and no ``OFFSET`` scans are needed.
+        """
+
+        last_key = None
+        while True:
+            query = (
+                self.client.table(self.table)
+                .select(self.column)
+                .order(self.column)
+                .limit(self.page_size)
+            )
+            if last_key is not None:
+                query = query.gt(self.column, last_key)
+            rows = query.execute().data or []
+            if not rows:
+                return
+            for row in rows:
+                yield row[self.column]
+            last_key = rows[-1][self.column]
+
+    def load(self) -> int:
+        """Preload all existing keys into :attr:`seen` and return the count."""
+        hashes = array("Q")
+        for url in self.iter_keys():
+            hashes.append(url_hash64(url))
+        self.seen = UrlHashSet.from_hashes(hashes)
+        self.loaded = True
+        self.logger.info(
+            f"Loaded {len(self.seen)} keys from {self.table}.{self.column} "
+            f"({self.seen.nbytes / 1024:.0f} KB)"
+        )
+        return len(self.seen)
+
+    def exists(self, url: str) -> bool:
+        """Exact server-side existence check for a single URL."""
+        response = (
+            self.client.table(self.table)
+            .select(self.column)
+            .eq(self.column, url)
+            .limit(1)
+            .execute()
+        )
+        return bool(response.data)
+
+    def is_duplicate(self, url: str, exact: bool = False) -> bool:
+        """Whether ``url`` is already known.
+
+        A hash hit is confirmed against the server when ``exact`` is set, which
+        rules out the (tiny) chance of a 64-bit hash collision.
+        """
+        if url not in self.seen:
+            return False
+        return self.exists(url) if exact else True
+
+    def add(self, url: str) -> None:
+        """Remember ``url`` as stored."""
+        with self._lock:
+            self.seen.add(url)
+
+    def upsert(self, rows: List[Dict[str, Any]], ignore_duplicates: bool = True) -> List[Dict[str, Any]]:
+        """Write ``rows`` with ``on_conflict`` on the URL column.
+
+        With ``ignore_duplicates`` existing rows are left untouched and only
+        newly inserted rows are returned, so the caller can count duplicates
+        as ``len(rows) - len(result)`` without any preloading.
+        """
+        if not rows:
+            return []
+        response = (
+            self.client.table(self.table)
+            .upsert(rows, on_conflict=self.column, ignore_duplicates=ignore_duplicates)
+            .execute()
+        )
+        with self._lock:
+            for row in rows:
+                if row.get(self.column):
+                    self.seen.add(row[self.column])
+        return response.data or []
+
+
+__all__ = ["UrlHashSet", "UrlDeduplicator", "url_hash64", "DEFAULT_PAGE_SIZE"]
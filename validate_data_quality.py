@@ -18,8 +18,14 @@ import os
 import sys
 import json
 import re
-from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional, Tuple
+import math
+import uuid
+import random
+import argparse
+import itertools
+from datetime import datetime, timedelta, timezone
+from statistics import NormalDist
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Iterator
 from collections import defaultdict
 from dataclasses import dataclass
 
@@ -33,6 +39,26 @@ except ImportError as e:
     sys.exit(1)
 
 
+# Rows per page when streaming tables without the aggregate RPCs
+STREAM_PAGE_SIZE = 1000
+# Offending ids included in the raw logs summary
+ISSUE_SAMPLE_SIZE = 20
+# Most recent error_log rows analysed for patterns
+ERROR_PATTERN_WINDOW = 100
+# Rows inspected per table in sample mode
+DEFAULT_SAMPLE_SIZE = 2000
+DEFAULT_CHECKPOINT_PATH = 'data_quality_checkpoint.json'
+# Incremental runs re-read this much history to catch rows committed out of order
+CHECKPOINT_OVERLAP = timedelta(minutes=5)
+
+# Per-row verdict bits kept in the incremental checkpoint
+RAW_LOG_FLAGS = ('processed', 'invalid_json', 'missing_source_url', 'missing_title',
+                 'invalid_tabs', 'empty_tabs')
+STRUCTURED_FLAGS = ('missing_required', 'invalid_deadline', 'invalid_amount',
+                    'invalid_audit', 'valid_audit')
+VALIDATION_MODES = ('full', 'incremental', 'sample')
+
+
 @dataclass
 class ValidationMetrics:
     """Data structure for validation metrics."""
@@ -55,8 +81,19 @@ class ValidationMetrics:
 class DataQualityValidator:
     """Comprehensive data quality validation system."""
     
-    def __init__(self):
-        """Initialize validator with Supabase connection."""
+    def __init__(self, mode: str = 'full', sample_size: int = DEFAULT_SAMPLE_SIZE,
+                 confidence: float = 0.95, checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT_PATH,
+                 seed: Optional[int] = None):
+        """Initialize validator with Supabase connection.
+        
+        ``mode`` selects how raw_logs and subsidies_structured are aggregated:
+        ``full`` (server-side RPC, streaming fallback), ``incremental`` (only rows
+        updated since ``checkpoint_path``) or ``sample`` (``sample_size`` random
+        rows per table with ``confidence`` intervals).
+        """
+        if mode not in VALIDATION_MODES:
+            raise ValueError(f"Unknown validation mode: {mode}")
+        
         self.supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
         self.supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
         
@@ -66,6 +103,19 @@ class DataQualityValidator:
         self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
         self.validation_results = {}
         self.start_time = datetime.now(timezone.utc)
+        self.page_size = STREAM_PAGE_SIZE
+        # How each aggregate was computed: 'rpc' or 'stream'
+        self.aggregation_sources: Dict[str, str] = {}
+        self._raw_logs_summary: Optional[Dict[str, Any]] = None
+        self._structured_summary: Optional[Dict[str, Any]] = None
+        self.mode = mode
+        self.sample_size = sample_size
+        self.confidence = confidence
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint: Dict[str, Any] = {}
+        self._random = random.Random(seed)
+        if mode == 'incremental':
+            self.load_checkpoint()
         
         # Define canonical field requirements
         self.canonical_fields = [
@@ -79,6 +129,7 @@ class DataQualityValidator:
         ]
         
         self.required_fields = ['url', 'title', 'description', 'audit']
+        self.quality_fields = list(dict.fromkeys(self.canonical_fields + self.required_fields))
         
     def log_validation(self, category: str, success: bool, details: str = "", 
                       metrics: Dict = None) -> None:
@@ -103,56 +154,352 @@ class DataQualityValidator:
                 print(f"    📊 {key}: {value}")
         print()
 
+    def _aggregate(self, rpc_name: str, params: Dict[str, Any], fallback) -> Dict[str, Any]:
+        """Run a server-side aggregate RPC, streaming rows locally if it is unavailable."""
+        try:
+            result = self.supabase.rpc(rpc_name, params).execute()
+            if isinstance(result.data, dict):
+                self.aggregation_sources[rpc_name] = 'rpc'
+                return result.data
+            raise ValueError(f"unexpected response: {type(result.data).__name__}")
+        except Exception as e:
+            print(f"    ⚠️ {rpc_name} RPC unavailable ({e}); streaming rows instead")
+            self.aggregation_sources[rpc_name] = 'stream'
+            return fallback()
+
+    def _stream_rows(self, table: str, columns: str = '*', start_after: Optional[str] = None,
+                     filters: Iterable[Tuple[str, str, Any]] = (),
+                     page_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield rows of a table using keyset pagination on id (constant memory).
+        
+        ``filters`` are ``(operator, column, value)`` tuples applied to every page,
+        e.g. ``('gte', 'updated_at', watermark)``.
+        """
+        page_size = page_size or self.page_size
+        last_id = start_after
+        while True:
+            query = self.supabase.table(table).select(columns)
+            for operator, column, value in filters:
+                query = getattr(query, operator)(column, value)
+            query = query.order('id').limit(page_size)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            rows = query.execute().data or []
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1]['id']
+
+    def _count_rows(self, table: str) -> Optional[int]:
+        """Exact row count via a HEAD request, or None when counting is unavailable."""
+        try:
+            return self.supabase.table(table).select('id', count='exact', head=True).execute().count
+        except Exception as e:
+            print(f"    ⚠️ Could not count {table}: {e}")
+            return None
+
+    def _raw_log_flags(self, log: Dict[str, Any]) -> int:
+        """Encode the integrity checks of one raw log as a RAW_LOG_FLAGS bitmask."""
+        flags = set()
+        if log.get('processed'):
+            flags.add('processed')
+
+        try:
+            payload = json.loads(log['payload']) if log.get('payload') else {}
+        except (json.JSONDecodeError, TypeError):
+            payload = None
+
+        if not isinstance(payload, dict):
+            flags.add('invalid_json')
+        else:
+            if not payload.get('source_url'):
+                flags.add('missing_source_url')
+            if not payload.get('title'):
+                flags.add('missing_title')
+            if not isinstance(payload.get('tabs'), dict):
+                flags.add('invalid_tabs')
+            elif not payload['tabs']:
+                flags.add('empty_tabs')
+
+        return sum(1 << RAW_LOG_FLAGS.index(flag) for flag in flags)
+
+    def _structured_flags(self, record: Dict[str, Any]) -> int:
+        """Encode field presence and format checks of one structured record as a bitmask.
+        
+        Bit ``i`` is set when ``quality_fields[i]`` is filled; STRUCTURED_FLAGS follow.
+        """
+        bits = 0
+        for i, field in enumerate(self.quality_fields):
+            if record.get(field):
+                bits |= 1 << i
+
+        flags = set()
+        if any(not record.get(field) for field in self.required_fields):
+            flags.add('missing_required')
+        if record.get('deadline') and not self._validate_date_format(record['deadline']):
+            flags.add('invalid_deadline')
+        if record.get('amount') and not self._validate_numeric_field(record['amount']):
+            flags.add('invalid_amount')
+        if record.get('audit'):
+            flags.add('valid_audit' if self._validate_audit_structure(record['audit']) else 'invalid_audit')
+
+        offset = len(self.quality_fields)
+        return bits | sum(1 << (offset + STRUCTURED_FLAGS.index(flag)) for flag in flags)
+
+    def _fold_raw_logs(self, flagged: Iterable[Tuple[Any, int]]) -> Dict[str, Any]:
+        """Build the raw_logs_quality_summary document from (id, flags) pairs."""
+        summary = {key: 0 for key in ('total', 'valid') + RAW_LOG_FLAGS}
+        summary['sample_invalid_ids'] = []
+        issue_mask = sum(1 << RAW_LOG_FLAGS.index(flag) for flag in RAW_LOG_FLAGS if flag != 'processed')
+        for row_id, flags in flagged:
+            summary['total'] += 1
+            for i, flag in enumerate(RAW_LOG_FLAGS):
+                if flags & (1 << i):
+                    summary[flag] += 1
+            if flags & issue_mask:
+                if len(summary['sample_invalid_ids']) < ISSUE_SAMPLE_SIZE:
+                    summary['sample_invalid_ids'].append(row_id)
+            else:
+                summary['valid'] += 1
+        return summary
+
+    def _fold_structured(self, flagged: Iterable[Tuple[Any, int]]) -> Dict[str, Any]:
+        """Build the subsidies_structured_quality document from (id, flags) pairs."""
+        offset = len(self.quality_fields)
+        bit = {flag: 1 << (offset + i) for i, flag in enumerate(STRUCTURED_FLAGS)}
+        invalid_mask = bit['missing_required'] | bit['invalid_deadline'] | bit['invalid_amount'] | bit['invalid_audit']
+        summary = {
+            'total': 0, 'filled': {field: 0 for field in self.quality_fields}, 'invalid_deadline': 0,
+            'invalid_amount': 0, 'invalid_audit': 0, 'valid_audits': 0, 'valid': 0
+        }
+        for _, flags in flagged:
+            summary['total'] += 1
+            for i, field in enumerate(self.quality_fields):
+                if flags & (1 << i):
+                    summary['filled'][field] += 1
+            for flag in ('invalid_deadline', 'invalid_amount', 'invalid_audit'):
+                if flags & bit[flag]:
+                    summary[flag] += 1
+            if flags & bit['valid_audit']:
+                summary['valid_audits'] += 1
+            if not flags & invalid_mask:
+                summary['valid'] += 1
+        return summary
+
+    def _summarize_raw_logs(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Local equivalent of the raw_logs_quality_summary RPC."""
+        return self._fold_raw_logs((log.get('id'), self._raw_log_flags(log)) for log in rows)
+
+    def _summarize_structured(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Local equivalent of the subsidies_structured_quality RPC."""
+        return self._fold_structured((record.get('id'), self._structured_flags(record)) for record in rows)
+
+    def _summarize_error_logs(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Local equivalent of the error_log_patterns RPC."""
+        summary = {'total': 0, 'critical': 0, 'by_type': defaultdict(int)}
+        for error in rows:
+            summary['total'] += 1
+            summary['by_type'][error.get('error_type') or 'unknown'] += 1
+            error_message = (error.get('error_message') or '').lower()
+            if any(keyword in error_message for keyword in ['critical', 'fatal', 'system', 'database']):
+                summary['critical'] += 1
+        summary['by_type'] = dict(summary['by_type'])
+        return summary
+
+    def _incremental_summary(self, table: str, columns: str, flag_row, fold) -> Dict[str, Any]:
+        """Re-check only rows updated since the last checkpoint and fold the cached flags.
+        
+        The checkpoint keeps one flag bitmask per row id, so updated rows replace
+        their previous verdict instead of being counted twice. Rows deleted since
+        the last run are pruned when the table count no longer matches.
+        """
+        layout = list(self.quality_fields) if table == 'subsidies_structured' else list(RAW_LOG_FLAGS)
+        state = self.checkpoint.get(table)
+        if not state or state.get('layout') != layout:
+            state = {'watermark': None, 'layout': layout, 'rows': {}}
+
+        filters = []
+        if state['watermark']:
+            since = datetime.fromisoformat(state['watermark']) - CHECKPOINT_OVERLAP
+            filters.append(('gte', 'updated_at', since.isoformat()))
+
+        watermark = state['watermark']
+        rechecked = 0
+        if columns != '*':
+            columns = f"{columns},updated_at"
+        for row in self._stream_rows(table, columns, filters=filters):
+            state['rows'][str(row['id'])] = flag_row(row)
+            rechecked += 1
+            if row.get('updated_at') and (watermark is None or
+                                          datetime.fromisoformat(row['updated_at']) > datetime.fromisoformat(watermark)):
+                watermark = row['updated_at']
+        state['watermark'] = watermark
+
+        total = self._count_rows(table)
+        if total is not None and total != len(state['rows']):
+            live_ids = {str(row['id']) for row in self._stream_rows(table, 'id')}
+            state['rows'] = {row_id: flags for row_id, flags in state['rows'].items() if row_id in live_ids}
+
+        print(f"    ♻️ {table}: re-validated {rechecked} changed rows, {len(state['rows'])} tracked")
+        self.checkpoint[table] = state
+        return fold(state['rows'].items())
+
+    def _sampled_summary(self, table: str, columns: str, flag_row, fold,
+                         count_keys: Iterable[str]) -> Dict[str, Any]:
+        """Estimate a summary from a random sample of rows with confidence intervals.
+        
+        Ids are random UUIDs, so the ``sample_size`` rows following a random
+        pivot in id order form a simple random sample of the table. Counts are
+        scaled to the table size and ``confidence_intervals`` holds Wilson score
+        bounds (with finite population correction) for each rate.
+        """
+        total = self._count_rows(table)
+        pivot = str(uuid.UUID(int=self._random.getrandbits(128), version=4))
+        page_size = min(self.page_size, self.sample_size)
+        rows = itertools.islice(itertools.chain(
+            self._stream_rows(table, columns, start_after=pivot, page_size=page_size),
+            self._stream_rows(table, columns, filters=[('lte', 'id', pivot)], page_size=page_size)
+        ), self.sample_size)
+        summary = fold((row.get('id'), flag_row(row)) for row in rows)
+
+        sampled = summary['total']
+        population = max(total or 0, sampled)
+        scale = population / sampled if sampled else 0
+        intervals = {}
+        for key in count_keys:
+            intervals[key] = self._wilson_interval(summary[key], sampled, population)
+            summary[key] = round(summary[key] * scale)
+        if 'filled' in summary:
+            summary['filled'] = {field: round(n * scale) for field, n in summary['filled'].items()}
+        summary['total'] = population
+        summary['sampled'] = sampled
+        summary['confidence_level'] = self.confidence
+        summary['confidence_intervals'] = intervals
+        return summary
+
+    def _wilson_interval(self, successes: int, n: int, population: int) -> Tuple[float, float]:
+        """Wilson score interval for a proportion, narrowed by the finite population correction."""
+        if n == 0:
+            return (0.0, 1.0)
+        p = successes / n
+        if n >= population:
+            return (p, p)
+        n_eff = n * (population - 1) / (population - n)
+        z = NormalDist().inv_cdf((1 + self.confidence) / 2)
+        denominator = 1 + z * z / n_eff
+        center = (p + z * z / (2 * n_eff)) / denominator
+        margin = z * math.sqrt(p * (1 - p) / n_eff + z * z / (4 * n_eff * n_eff)) / denominator
+        return (max(0.0, center - margin), min(1.0, center + margin))
+
+    def _interval_metrics(self, summary: Dict[str, Any], keys: Dict[str, str]) -> Dict[str, str]:
+        """Format sampled confidence intervals as extra report metrics."""
+        intervals = summary.get('confidence_intervals')
+        if not intervals:
+            return {}
+        level = f"{summary['confidence_level']:.0%}"
+        metrics = {'sample_size': summary['sampled']}
+        for key, label in keys.items():
+            low, high = intervals[key]
+            metrics[f"{label}_{level}_ci"] = f"{low:.1%} - {high:.1%}"
+        return metrics
+
+    def raw_logs_summary(self) -> Dict[str, Any]:
+        """Aggregate payload integrity counts for raw_logs (cached per run)."""
+        if self._raw_logs_summary is not None:
+            return self._raw_logs_summary
+
+        name = 'raw_logs_quality_summary'
+        if self.mode == 'incremental':
+            self.aggregation_sources[name] = 'incremental'
+            self._raw_logs_summary = self._incremental_summary(
+                'raw_logs', 'id,payload,processed', self._raw_log_flags, self._fold_raw_logs)
+        elif self.mode == 'sample':
+            self.aggregation_sources[name] = 'sample'
+            self._raw_logs_summary = self._sampled_summary(
+                'raw_logs', 'id,payload,processed', self._raw_log_flags, self._fold_raw_logs,
+                ('valid',) + RAW_LOG_FLAGS)
+        else:
+            self._raw_logs_summary = self._aggregate(
+                name,
+                {'p_sample_size': ISSUE_SAMPLE_SIZE},
+                lambda: self._summarize_raw_logs(self._stream_rows('raw_logs', 'id,payload,processed'))
+            )
+        return self._raw_logs_summary
+
+    def structured_summary(self) -> Dict[str, Any]:
+        """Aggregate field completeness and format checks for subsidies_structured (cached per run)."""
+        if self._structured_summary is not None:
+            return self._structured_summary
+
+        name = 'subsidies_structured_quality'
+        if self.mode == 'incremental':
+            self.aggregation_sources[name] = 'incremental'
+            self._structured_summary = self._incremental_summary(
+                'subsidies_structured', '*', self._structured_flags, self._fold_structured)
+        elif self.mode == 'sample':
+            self.aggregation_sources[name] = 'sample'
+            self._structured_summary = self._sampled_summary(
+                'subsidies_structured', '*', self._structured_flags, self._fold_structured,
+                ('valid', 'valid_audits', 'invalid_deadline', 'invalid_amount', 'invalid_audit'))
+        else:
+            self._structured_summary = self._aggregate(
+                name,
+                {'p_fields': self.quality_fields, 'p_required_fields': self.required_fields},
+                lambda: self._summarize_structured(self._stream_rows('subsidies_structured'))
+            )
+        return self._structured_summary
+
+    def load_checkpoint(self) -> None:
+        """Load per-row verdicts from the incremental checkpoint file, if present."""
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            try:
+                with open(self.checkpoint_path, 'r') as f:
+                    self.checkpoint = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️ Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+                self.checkpoint = {}
+
+    def save_checkpoint(self) -> None:
+        """Atomically write the incremental checkpoint file."""
+        if self.mode != 'incremental' or not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
     def validate_raw_logs_integrity(self) -> ValidationMetrics:
         """Validate raw logs data integrity and completeness."""
         print("🔍 Validating raw logs data integrity...")
         
         try:
-            # Fetch all raw logs for analysis
-            result = self.supabase.table('raw_logs').select('*').execute()
-            raw_logs = result.data if result.data else []
+            summary = self.raw_logs_summary()
             
             metrics = ValidationMetrics()
-            metrics.total_records = len(raw_logs)
-            
-            payload_issues = []
-            processing_status = {'processed': 0, 'unprocessed': 0}
-            
-            for log in raw_logs:
-                # Check payload validity
-                try:
-                    payload = json.loads(log.get('payload', '{}')) if log.get('payload') else {}
-                    
-                    # Validate payload structure
-                    if not payload.get('source_url'):
-                        payload_issues.append(f"Log {log['id']}: Missing source_url")
-                    
-                    if not payload.get('title'):
-                        payload_issues.append(f"Log {log['id']}: Missing title")
-                        
-                    # Check for multi-tab content
-                    if 'tabs' in payload and isinstance(payload['tabs'], dict):
-                        tab_count = len(payload['tabs'])
-                        if tab_count == 0:
-                            payload_issues.append(f"Log {log['id']}: Empty tabs object")
-                    else:
-                        payload_issues.append(f"Log {log['id']}: Missing or invalid tabs structure")
-                    
-                    # Valid record if no critical issues
-                    if not any(log['id'] in issue for issue in payload_issues[-3:]):
-                        metrics.valid_records += 1
-                    else:
-                        metrics.invalid_records += 1
-                        
-                except json.JSONDecodeError:
-                    payload_issues.append(f"Log {log['id']}: Invalid JSON payload")
-                    metrics.invalid_records += 1
-                
-                # Track processing status
-                if log.get('processed'):
-                    processing_status['processed'] += 1
-                else:
-                    processing_status['unprocessed'] += 1
+            metrics.total_records = summary['total']
+            metrics.valid_records = summary['valid']
+            metrics.invalid_records = summary['total'] - summary['valid']
+            metrics.missing_fields['source_url'] = summary['missing_source_url']
+            metrics.missing_fields['title'] = summary['missing_title']
+            
+            issue_labels = {
+                'invalid_json': 'Invalid JSON payload',
+                'missing_source_url': 'Missing source_url',
+                'missing_title': 'Missing title',
+                'invalid_tabs': 'Missing or invalid tabs structure',
+                'empty_tabs': 'Empty tabs object'
+            }
+            payload_issue_count = sum(summary[key] for key in issue_labels)
+            payload_issues = [
+                f"{label}: {summary[key]} logs" for key, label in issue_labels.items() if summary[key]
+            ]
+            if summary.get('sample_invalid_ids'):
+                payload_issues.append(f"Sample affected logs: {', '.join(map(str, summary['sample_invalid_ids']))}")
+            
+            processing_status = {
+                'processed': summary['processed'],
+                'unprocessed': summary['total'] - summary['processed']
+            }
             
             # Calculate completeness metrics
             if metrics.total_records > 0:
@@ -162,7 +509,7 @@ class DataQualityValidator:
                 validity_rate = 0
                 processing_rate = 0
             
-            success = len(payload_issues) == 0 and validity_rate > 0.8
+            success = payload_issue_count == 0 and validity_rate > 0.8
             
             self.log_validation(
                 "Raw Logs Integrity",
@@ -174,9 +521,10 @@ class DataQualityValidator:
                     'invalid_records': metrics.invalid_records,
                     'validity_rate': f"{validity_rate:.1%}",
                     'processing_rate': f"{processing_rate:.1%}",
-                    'payload_issues': len(payload_issues),
+                    'payload_issues': payload_issue_count,
                     'processed_count': processing_status['processed'],
-                    'unprocessed_count': processing_status['unprocessed']
+                    'unprocessed_count': processing_status['unprocessed'],
+                    **self._interval_metrics(summary, {'valid': 'validity_rate', 'processed': 'processing_rate'})
                 }
             )
             
@@ -196,60 +544,35 @@ class DataQualityValidator:
         print("🔍 Validating structured data quality...")
         
         try:
-            # Fetch structured data for analysis
-            result = self.supabase.table('subsidies_structured').select('*').execute()
-            structured_data = result.data if result.data else []
+            summary = self.structured_summary()
+            filled = summary['filled']
             
             metrics = ValidationMetrics()
-            metrics.total_records = len(structured_data)
+            metrics.total_records = summary['total']
+            metrics.valid_records = summary['valid']
+            metrics.invalid_records = summary['total'] - summary['valid']
             
-            field_stats = defaultdict(int)
-            field_completeness = {}
             validation_errors = []
-            
-            for record in structured_data:
-                record_valid = True
-                
-                # Check required fields
-                for field in self.required_fields:
-                    if not record.get(field):
-                        metrics.missing_fields[field] += 1
-                        validation_errors.append(f"Record {record.get('id', 'unknown')}: Missing {field}")
-                        record_valid = False
-                    else:
-                        field_stats[field] += 1
-                
-                # Check canonical fields completeness
-                for field in self.canonical_fields:
-                    if record.get(field):
-                        field_stats[field] += 1
-                
-                # Validate specific field formats
-                if record.get('deadline'):
-                    if not self._validate_date_format(record['deadline']):
-                        validation_errors.append(f"Record {record.get('id', 'unknown')}: Invalid deadline format")
-                        record_valid = False
-                
-                if record.get('amount'):
-                    if not self._validate_numeric_field(record['amount']):
-                        validation_errors.append(f"Record {record.get('id', 'unknown')}: Invalid amount format")
-                        record_valid = False
-                
-                # Validate audit trail
-                if record.get('audit'):
-                    if not self._validate_audit_structure(record['audit']):
-                        validation_errors.append(f"Record {record.get('id', 'unknown')}: Invalid audit structure")
-                        record_valid = False
-                
-                if record_valid:
-                    metrics.valid_records += 1
-                else:
-                    metrics.invalid_records += 1
+            for field in self.required_fields:
+                missing = summary['total'] - filled.get(field, 0)
+                if missing:
+                    metrics.missing_fields[field] = missing
+                    validation_errors.append(f"Missing {field}: {missing} records")
+            for key, label in [('invalid_deadline', 'Invalid deadline format'),
+                               ('invalid_amount', 'Invalid amount format'),
+                               ('invalid_audit', 'Invalid audit structure')]:
+                if summary[key]:
+                    validation_errors.append(f"{label}: {summary[key]} records")
+            error_count = (
+                sum(metrics.missing_fields.values())
+                + summary['invalid_deadline'] + summary['invalid_amount'] + summary['invalid_audit']
+            )
             
             # Calculate field completeness rates
+            field_completeness = {}
             for field in self.canonical_fields:
                 if metrics.total_records > 0:
-                    field_completeness[field] = field_stats[field] / metrics.total_records
+                    field_completeness[field] = filled.get(field, 0) / metrics.total_records
                 else:
                     field_completeness[field] = 0
             
@@ -258,7 +581,7 @@ class DataQualityValidator:
             
             # Overall quality assessment
             avg_completeness = sum(field_completeness.values()) / len(field_completeness) if field_completeness else 0
-            error_rate = len(validation_errors) / metrics.total_records if metrics.total_records > 0 else 1
+            error_rate = error_count / metrics.total_records if metrics.total_records > 0 else 1
             
             success = (
                 avg_completeness > 0.6 and  # At least 60% field completeness
@@ -275,9 +598,10 @@ class DataQualityValidator:
                     'valid_records': metrics.valid_records,
                     'invalid_records': metrics.invalid_records,
                     'avg_field_completeness': f"{avg_completeness:.1%}",
-                    'validation_errors': len(validation_errors),
+                    'validation_errors': error_count,
                     'error_rate': f"{error_rate:.1%}",
-                    'required_fields_ok': sum(1 for f in self.required_fields if field_completeness.get(f, 0) > 0.8)
+                    'required_fields_ok': sum(1 for f in self.required_fields if field_completeness.get(f, 0) > 0.8),
+                    **self._interval_metrics(summary, {'valid': 'validity_rate'})
                 }
             )
             
@@ -296,42 +620,15 @@ class DataQualityValidator:
         print("🔍 Validating audit trails...")
         
         try:
-            # Fetch records with audit trails
-            result = self.supabase.table('subsidies_structured').select('id', 'audit', 'raw_log_id').execute()
-            records = result.data if result.data else []
+            # Shares the structured-data aggregate instead of re-reading the table
+            summary = self.structured_summary()
             
-            audit_issues = []
-            valid_audits = 0
-            
-            for record in records:
-                audit_data = record.get('audit')
-                if not audit_data:
-                    audit_issues.append(f"Record {record.get('id')}: Missing audit trail")
-                    continue
-                
-                try:
-                    # Parse audit JSON
-                    if isinstance(audit_data, str):
-                        audit = json.loads(audit_data)
-                    else:
-                        audit = audit_data
-                    
-                    # Validate audit structure
-                    required_audit_fields = ['extraction_status', 'validation_notes']
-                    missing_audit_fields = [f for f in required_audit_fields if f not in audit]
-                    
-                    if missing_audit_fields:
-                        audit_issues.append(f"Record {record.get('id')}: Missing audit fields: {missing_audit_fields}")
-                    else:
-                        valid_audits += 1
-                        
-                except json.JSONDecodeError:
-                    audit_issues.append(f"Record {record.get('id')}: Invalid audit JSON")
-            
-            total_records = len(records)
+            total_records = summary['total']
+            valid_audits = summary['valid_audits']
+            audit_issue_count = total_records - valid_audits
             audit_completeness = valid_audits / total_records if total_records > 0 else 0
             
-            success = audit_completeness > 0.8 and len(audit_issues) < total_records * 0.1
+            success = audit_completeness > 0.8 and audit_issue_count < total_records * 0.1
             
             self.log_validation(
                 "Audit Trails",
@@ -340,9 +637,10 @@ class DataQualityValidator:
                 {
                     'total_records': total_records,
                     'valid_audits': valid_audits,
-                    'audit_issues': len(audit_issues),
+                    'audit_issues': audit_issue_count,
                     'audit_completeness': f"{audit_completeness:.1%}",
-                    'issues_rate': f"{len(audit_issues) / total_records:.1%}" if total_records > 0 else "0%"
+                    'issues_rate': f"{audit_issue_count / total_records:.1%}" if total_records > 0 else "0%",
+                    **self._interval_metrics(summary, {'valid_audits': 'audit_completeness'})
                 }
             )
             
@@ -436,24 +734,18 @@ class DataQualityValidator:
         print("🔍 Validating error patterns...")
         
         try:
-            # Fetch recent error logs
-            result = self.supabase.table('error_log').select('*').order('created_at', desc=True).limit(100).execute()
-            error_logs = result.data if result.data else []
-            
-            error_patterns = defaultdict(int)
-            critical_errors = 0
-            
-            for error in error_logs:
-                error_type = error.get('error_type', 'unknown')
-                error_message = error.get('error_message', '')
-                
-                error_patterns[error_type] += 1
-                
-                # Identify critical errors
-                if any(keyword in error_message.lower() for keyword in ['critical', 'fatal', 'system', 'database']):
-                    critical_errors += 1
+            summary = self._aggregate(
+                'error_log_patterns',
+                {'p_limit': ERROR_PATTERN_WINDOW},
+                lambda: self._summarize_error_logs(
+                    self.supabase.table('error_log').select('error_type', 'error_message')
+                    .order('created_at', desc=True).limit(ERROR_PATTERN_WINDOW).execute().data or []
+                )
+            )
             
-            total_errors = len(error_logs)
+            error_patterns = summary['by_type']
+            critical_errors = summary['critical']
+            total_errors = summary['total']
             critical_rate = critical_errors / total_errors if total_errors > 0 else 0
             
             # Check for concerning error patterns
@@ -571,7 +863,9 @@ class DataQualityValidator:
                 'total_validations': total_validations,
                 'passed_validations': passed_validations,
                 'overall_score': overall_score,
-                'quality_level': quality_level
+                'quality_level': quality_level,
+                'validation_mode': self.mode,
+                'aggregation_sources': self.aggregation_sources
             },
             'validation_results': self.validation_results,
             'summary': {
@@ -620,13 +914,32 @@ class DataQualityValidator:
 
 def main():
     """Run comprehensive data quality validation."""
+    parser = argparse.ArgumentParser(description="AgriTool data quality validation")
+    parser.add_argument('--mode', choices=VALIDATION_MODES, default='full',
+                       help='full: aggregate every row; incremental: only rows changed since the '
+                            'checkpoint; sample: estimate from a random sample')
+    parser.add_argument('--sample-size', type=int, default=DEFAULT_SAMPLE_SIZE,
+                       help='Rows per table inspected in sample mode')
+    parser.add_argument('--confidence', type=float, default=0.95,
+                       help='Confidence level of sampled intervals')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT_PATH,
+                       help='Checkpoint file used by incremental mode')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible samples')
+    args = parser.parse_args()
+    
     print("🔍 === AGRITOOL DATA QUALITY VALIDATION ===")
     print(f"📅 Validation started: {datetime.now(timezone.utc).isoformat()}")
     print()
     
     try:
         # Initialize validator
-        validator = DataQualityValidator()
+        validator = DataQualityValidator(
+            mode=args.mode,
+            sample_size=args.sample_size,
+            confidence=args.confidence,
+            checkpoint_path=args.checkpoint,
+            seed=args.seed
+        )
         
         # Run validation suite
         print("🏃 Running data quality validation suite...")
@@ -654,6 +967,9 @@ def main():
         with open('data_quality_report.json', 'w') as f:
             json.dump(report, f, indent=2)
         
+        # Remember per-row verdicts for the next incremental run
+        validator.save_checkpoint()
+        
         # Print summary
         print("📋 === DATA QUALITY VALIDATION SUMMARY ===")
         print(f"⏱️ Duration: {report['validation_execution']['duration_seconds']:.2f} seconds")
@@ -661,6 +977,7 @@ def main():
         print(f"✅ Passed: {report['validation_execution']['passed_validations']}")
         print(f"🎯 Overall Score: {report['validation_execution']['overall_score']:.1%}")
         print(f"🏆 Quality Level: {report['validation_execution']['quality_level']}")
+        print(f"🧮 Mode: {report['validation_execution']['validation_mode']}")
         print()
         
         if report['summary']['data_quality_acceptable']: